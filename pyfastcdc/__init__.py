@@ -1,20 +1,102 @@
 __version__ = '0.2.1'
 
 __all__ = [
+	'AECDC',
+	'BackgroundIterator',
 	'BinaryStreamReader',
+	'BinaryStreamWriter',
+	'BloomFilter',
+	'Boundaries',
+	'BufferPool',
 	'Chunk',
+	'ChunkBoundaries',
+	'ChunkLocation',
+	'ChunkManifest',
+	'ChunkSink',
+	'ChunkTracer',
+	'ChunkerStats',
+	'CompressionCodec',
+	'DeltaCopy',
+	'DeltaLiteral',
+	'DeltaOp',
 	'FastCDC',
+	'FastCDC2016',
+	'ManifestEntry',
 	'NormalizedChunking',
+	'ObjectStore',
+	'PackedChunkSink',
+	'RAMCDC',
+	'S3ObjectStore',
+	'Sketch',
+	'SketchIndex',
+	'TraceSpan',
+	'TuningCandidate',
+	'TuningReport',
+	'apply_delta',
+	'compute_delta',
+	'cut_files_parallel',
+	'get_include',
+	'prefetch_chunks',
+	'tune_parameters',
 ]
 
 from pyfastcdc.common import (
 	BinaryStreamReader,
+	BinaryStreamWriter,
+	Boundaries,
+	CompressionCodec,
 	NormalizedChunking,
+	ObjectStore,
+	Sketch,
+	TraceSpan,
 )
 
 try:
-	from pyfastcdc.cy import FastCDC, Chunk
+	from pyfastcdc.cy import AECDC, BloomFilter, FastCDC, FastCDC2016, RAMCDC, Chunk, ChunkerStats, ChunkTracer
 except ImportError:
-	from pyfastcdc.py import FastCDC, Chunk
+	from pyfastcdc.py import AECDC, BloomFilter, FastCDC, FastCDC2016, RAMCDC, Chunk, ChunkerStats, ChunkTracer
 	import warnings
 	warnings.warn('Failed to import pyfastcdc cython extension, fallback to pure python implementation with is a lot slower.')
+
+from pyfastcdc.background import (
+	BackgroundIterator,
+	prefetch_chunks,
+)
+from pyfastcdc.delta import (
+	DeltaCopy,
+	DeltaLiteral,
+	DeltaOp,
+	apply_delta,
+	compute_delta,
+)
+from pyfastcdc.manifest import (
+	ChunkManifest,
+	ManifestEntry,
+)
+from pyfastcdc.parallel import (
+	ChunkBoundaries,
+	cut_files_parallel,
+)
+from pyfastcdc.pool import (
+	BufferPool,
+)
+from pyfastcdc.similarity import (
+	SketchIndex,
+)
+from pyfastcdc.sink import (
+	ChunkLocation,
+	ChunkSink,
+	PackedChunkSink,
+	S3ObjectStore,
+)
+from pyfastcdc.tuning import (
+	TuningCandidate,
+	TuningReport,
+	tune_parameters,
+)
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+def get_include() -> str:
+	import os
+	return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'include')
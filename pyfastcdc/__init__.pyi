@@ -1,5 +1,8 @@
+import abc
+import array
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import Optional, Union, Iterator
+from typing import Optional, Union, Iterator, Iterable, NamedTuple, List, Sequence, Tuple, Dict, Any, Generic, TypeVar, Callable, overload
 
 from typing_extensions import Protocol, Literal
 
@@ -20,17 +23,69 @@ A reader object that supports ``read()`` or ``readinto()`` methods.
 ``readinto()`` is preferred since it's faster than ``read()``
 """
 
+
+class BinaryStreamWriter(Protocol):
+	"""
+	A writer object that supports the ``write()`` method
+	"""
+
+	def write(self, b: Union[bytes, memoryview]) -> Optional[int]: ...
+
+
+class ObjectStore(Protocol):
+	"""
+	An object storage that supports the ``put_object()`` method, e.g. :class:`S3ObjectStore`, used by :class:`PackedChunkSink`.
+	``put_object()`` is called from multiple upload threads at the same time, and should raise an exception on failure
+	"""
+
+	def put_object(self, key: str, data: bytes) -> None: ...
+
 NormalizedChunking = Literal[0, 1, 2, 3]
 """
 The normalized chunking parameter (NC) from the paper
 """
 
+Boundaries = Union[Iterable[int], Callable[[int], Optional[int]]]
+"""
+Forced chunk boundaries, as offsets from the beginning of the input. It can be either:
+
+* An iterable of strictly increasing offsets. Offsets outside the input are ignored
+* A callable that takes the offset of the current chunk, and returns the next forced boundary after it,
+  or ``None`` if there's no more forced boundary. The returned boundary must be greater than the given offset
+
+A chunk always ends at a forced boundary, even if it's smaller than ``min_size``, and the next chunk starts with a fresh gear hash.
+So the chunks before and after a boundary are the same as chunking the input segments separately,
+which keeps chunks of files in an archive or records in a log aligned with them
+"""
+
+CompressionCodec = Literal['gzip', 'bz2', 'lzma', 'zlib']
+"""
+A compression format supported by :meth:`FastCDC.cut_compressed`.
+``lzma`` accepts both ``.xz`` and legacy ``.lzma`` files
+"""
+
+Sketch = Tuple[int, int, int]
+"""
+A resemblance sketch of a chunk, made of 3 uint64 super-features. See :attr:`Chunk.sketch`
+"""
+
 
 class FastCDC:
 	"""
 	The FastCDC 2020 chunker implementation
 
 	Paper: https://ieeexplore.ieee.org/document/9055082
+
+	.. note::
+
+		Thread safety: A ``FastCDC`` instance is immutable after construction and can be shared between threads freely,
+		e.g. with one ``cut_xxx()`` call per thread on a shared instance.
+		The chunk iterators returned by ``cut_xxx()`` are not thread-safe and should be consumed by one thread at a time.
+		In the Cython implementation, a ``next()`` call on an iterator that is still executing in another thread,
+		or re-entrantly from a stream callback, raises ``ValueError`` like a generator does, on both regular and free-threaded builds
+
+		The chunking loop of the Cython implementation runs without the GIL,
+		so chunking in multiple threads scales with the number of CPU cores, especially on free-threaded builds
 	"""
 
 	def __init__(
@@ -41,18 +96,24 @@ class FastCDC:
 			max_size: Optional[int] = None,
 			normalized_chunking: NormalizedChunking = 1,
 			seed: int = 0,
+			fingerprint: bool = False,
+			sketch: bool = False,
 	):
 		"""
 		Construct a FastCDC instance for chunking. The instance can be reused for multiple chunking operations
 
+		The instance is picklable, so it can be passed to worker processes, e.g. via :class:`concurrent.futures.ProcessPoolExecutor`
+
 		:param avg_size: Specifies the average output chunk size. Suggested to be a power of 2.
 			Note: The actual output average chunk size is ``avg_size + min_size``,
 			as described in the paper section 3.4 "Cut-Point Skipping".
-			Default is 16384, should be within [256, 4194304]
+			Default is 16384, should be within [256, 134217728] (128 MiB).
+			Sizes above 4194304 (4 MiB) are beyond the limits of fastcdc-rs, so their chunk boundaries are specific to PyFastCDC
 		:keyword min_size: Specifies the minimum constraint for the output chunk size.
-			Default is None, meaning ``avg_size // 4``. The value should be within [64, 1048576]
+			Default is None, meaning ``avg_size // 4``. The value should be within [64, 33554432]
 		:keyword max_size: Specifies the maximum constraint for the output chunk size.
-			Default is None, meaning ``avg_size * 4``. The value should be within [1024, 16777216]
+			Default is None, meaning ``avg_size * 4``. The value should be within [1024, 536870912].
+			Note that :meth:`cut_stream` uses a buffer of ``max_size`` plus up to 64 MiB bytes
 		:keyword normalized_chunking: Defines the normalized chunking parameter (NC) from the paper.
 			Increasing the value will decrease the number of too-small / too-big chunks
 			and might also decrease the deduplication ratio if NC is set to too high.
@@ -64,28 +125,43 @@ class FastCDC:
 			Default is 0, meaning using the default gear table from the C reference repository from the paper
 			(https://github.com/HIT-HSSL/destor/blob/master/src/chunking/fascdc_chunking.c)
 			will be used
+		:keyword fingerprint: If set to True, a 128-bit MurmurHash3_x64_128 fingerprint is calculated for each chunk
+			right after the cut point is found, and stored in :attr:`Chunk.fingerprint`.
+			Default is False
+		:keyword sketch: If set to True, a resemblance sketch is calculated for each chunk and stored in :attr:`Chunk.sketch`,
+			which can be used to find similar chunks for delta compression with :class:`SketchIndex`.
+			Default is False
 		"""
 		...
 
-	def cut_buf(self, buf: Union[bytes, bytearray, memoryview]) -> Iterator[Chunk]:
+	def cut_buf(self, buf: Union[bytes, bytearray, memoryview], *, boundaries: Optional[Boundaries] = None, sparse: bool = False, stats: Optional['ChunkerStats'] = None, tracer: Optional['ChunkTracer'] = None) -> Iterator[Chunk]:
 		"""
 		Cut the given buffer with FastCDC algorithm
 
 		:param buf: The input buffer to be processed
+		:param boundaries: Optional forced chunk boundaries, see :data:`Boundaries`
+		:param sparse: Detect chunks made of zeros only with a fast scan, and create them without gear hashing. The output is unchanged
+		:param stats: Optional :class:`ChunkerStats` to record the statistics of this call into
+		:param tracer: Optional :class:`ChunkTracer` to record the timing spans of this call into
 		:return: An iterator that yields ``Chunk`` objects
 		"""
 		...
 
-	def cut_file(self, file_path: Union[str, bytes, Path]) -> Iterator[Chunk]:
+	def cut_file(self, file_path: Union[str, bytes, Path], *, boundaries: Optional[Boundaries] = None, sparse: bool = False, stats: Optional['ChunkerStats'] = None, tracer: Optional['ChunkTracer'] = None) -> Iterator[Chunk]:
 		"""
 		Cut the given file with FastCDC algorithm
 
 		:param file_path: Path to the file to be processed. It should be a readable regular file
+		:param boundaries: Optional forced chunk boundaries, see :data:`Boundaries`
+		:param sparse: Detect chunks made of zeros only, and create them without gear hashing. The output is unchanged.
+		File holes are located with ``SEEK_HOLE`` / ``SEEK_DATA`` if supported, so they are never read, which makes chunking sparse disk images fast
+		:param stats: Optional :class:`ChunkerStats` to record the statistics of this call into
+		:param tracer: Optional :class:`ChunkTracer` to record the timing spans of this call into
 		:return: An iterator that yields ``Chunk`` objects
 		"""
 		...
 
-	def cut_stream(self, stream: BinaryStreamReader) -> Iterator[Chunk]:
+	def cut_stream(self, stream: BinaryStreamReader, *, boundaries: Optional[Boundaries] = None, buffer_pool: Optional['BufferPool'] = None, stats: Optional['ChunkerStats'] = None, tracer: Optional['ChunkTracer'] = None) -> Iterator[Chunk]:
 		"""
 		Cut the given stream with FastCDC algorithm
 
@@ -98,6 +174,55 @@ class FastCDC:
 		* ``read(self, n: int) -> bytes``
 		* ``readinto(self, b: memoryview) -> int``  (preferred)
 
+		If the stream only has ``read()``, it is read in large blocks which are chunked in place like :meth:`cut_iter` does,
+		unless ``buffer_pool`` is given
+
+		:param boundaries: Optional forced chunk boundaries, see :data:`Boundaries`
+		:param buffer_pool: Optional :class:`BufferPool` to take the stream buffer from, for bounding the memory of many concurrent streams.
+			The buffer, ``max_size`` plus up to 64 MiB bytes, is taken on the first chunk, and returned when the stream is exhausted,
+			or when the ``close()`` method of the returned iterator is called
+		:param stats: Optional :class:`ChunkerStats` to record the statistics of this call into
+		:param tracer: Optional :class:`ChunkTracer` to record the timing spans of this call into
+		:return: An iterator that yields ``Chunk`` objects
+		"""
+		...
+
+	def cut_iter(self, blocks: Iterable[Union[bytes, bytearray, memoryview]], *, boundaries: Optional[Boundaries] = None, stats: Optional['ChunkerStats'] = None, tracer: Optional['ChunkTracer'] = None) -> Iterator[Chunk]:
+		"""
+		Cut the data formed by concatenating the given blocks with FastCDC algorithm, e.g. an HTTP response body in blocks.
+		The output is the same as cutting the concatenated data with :meth:`cut_buf`
+
+		Chunks are cut in place from the blocks without copying.
+		Only the data of chunks that span block edges is copied, so it's recommended to use blocks larger than ``max_size``
+
+		.. caution::
+
+			Blocks must not be modified after they are yielded, since chunk data might refer to them
+
+		:param blocks: An iterable of data blocks. Empty blocks are allowed
+		:param boundaries: Optional forced chunk boundaries, see :data:`Boundaries`
+		:param stats: Optional :class:`ChunkerStats` to record the statistics of this call into
+		:param tracer: Optional :class:`ChunkTracer` to record the timing spans of this call into
+		:return: An iterator that yields ``Chunk`` objects
+		"""
+		...
+
+	def cut_compressed(self, source: Union[str, bytes, Path, BinaryStreamReader], *, codec: Optional[CompressionCodec] = None, boundaries: Optional[Boundaries] = None, stats: Optional['ChunkerStats'] = None, tracer: Optional['ChunkTracer'] = None) -> Iterator[Chunk]:
+		"""
+		Cut the decompressed content of the given compressed file or stream with FastCDC algorithm.
+		The output is the same as cutting the decompressed data with :meth:`cut_buf`
+
+		The input is read and decompressed in a background thread, into blocks that are chunked in place like :meth:`cut_iter` does.
+		Decompressors of the standard library release the GIL, so decompression and chunking run in parallel on multi-core hosts.
+		Concatenated compressed streams, e.g. a multi-member gzip file, are decompressed as a whole
+
+		Errors of reading, decompressing and codec detection are raised from the iterator
+
+		:param source: Path to the compressed file, or a compressed stream with ``read()`` or ``readinto()`` methods
+		:param codec: The compression format. If not provided, it's detected from the magic bytes of the input, where ``zlib`` cannot be detected
+		:param boundaries: Optional forced chunk boundaries on the decompressed data, see :data:`Boundaries`
+		:param stats: Optional :class:`ChunkerStats` to record the statistics of this call into
+		:param tracer: Optional :class:`ChunkTracer` to record the timing spans of this call into
 		:return: An iterator that yields ``Chunk`` objects
 		"""
 		...
@@ -114,6 +239,162 @@ class FastCDC:
 	def max_size(self) -> int:
 		...
 
+	@property
+	def normalized_chunking(self) -> NormalizedChunking:
+		...
+
+	@property
+	def seed(self) -> int:
+		...
+
+	@property
+	def fingerprint(self) -> bool:
+		...
+
+	@property
+	def sketch(self) -> bool:
+		...
+
+
+class FastCDC2016(FastCDC):
+	"""
+	The FastCDC 2016 chunker, compatible with https://github.com/iscc/fastcdc-py.
+	For the same sizes, it cuts at the same boundaries as ``fastcdc.fastcdc()`` of iscc/fastcdc-py
+
+	It uses a 32-bit gear hash that is updated one byte per step, and 2 cut masks switching at a center size,
+	as described in the FastCDC 2016 paper (https://www.usenix.org/system/files/conference/atc16/atc16-paper-xia.pdf).
+	It shares all ``cut_xxx()`` methods, the chunk type and the thread safety of :class:`FastCDC`.
+	:attr:`Chunk.gear_hash` is the 32-bit gear hash at the cut point
+	"""
+
+	def __init__(
+			self,
+			avg_size: int = 8192,
+			*,
+			min_size: Optional[int] = None,
+			max_size: Optional[int] = None,
+			fingerprint: bool = False,
+			sketch: bool = False,
+	):
+		"""
+		:param avg_size: Specifies the average output chunk size. Default is 8192, the same as iscc/fastcdc-py.
+			The ranges of sizes are the same as :class:`FastCDC`
+		:keyword min_size: Specifies the minimum constraint for the output chunk size. Default is None, meaning ``avg_size // 4``
+		:keyword max_size: Specifies the maximum constraint for the output chunk size. Default is None, meaning ``avg_size * 8``, capped at 512 MiB
+		:keyword fingerprint: See :class:`FastCDC`
+		:keyword sketch: See :class:`FastCDC`
+		"""
+		...
+
+	@property
+	def normalized_chunking(self) -> NormalizedChunking:
+		"""
+		Always 0. Normalized chunking is a FastCDC 2020 feature
+		"""
+		...
+
+	@property
+	def seed(self) -> int:
+		"""
+		Always 0. Seeding the gear table is a FastCDC 2020 feature
+		"""
+		...
+
+
+class AECDC(FastCDC):
+	"""
+	The Asymmetric Extremum (AE) chunker
+
+	Paper: AE: An Asymmetric Extremum Content Defined Chunking Algorithm for Fast and Bandwidth-Efficient Data Deduplication, INFOCOM 2015
+
+	It cuts a chunk once the max value is not exceeded by any value in a fixed-size window after it,
+	where a value is the 8 bytes before a position, read as a big-endian integer.
+	There is no hashing, and the window size is derived from ``avg_size``.
+	It shares all ``cut_xxx()`` methods, the chunk type and the thread safety of :class:`FastCDC`.
+	:attr:`Chunk.gear_hash` is always 0
+	"""
+
+	def __init__(
+			self,
+			avg_size: int = 16384,
+			*,
+			min_size: Optional[int] = None,
+			max_size: Optional[int] = None,
+			fingerprint: bool = False,
+			sketch: bool = False,
+	):
+		"""
+		:param avg_size: Specifies the average output chunk size, which is met with random data.
+			The default and the ranges of sizes are the same as :class:`FastCDC`
+		:keyword min_size: Specifies the minimum constraint for the output chunk size. Default is None, meaning ``avg_size // 4``
+		:keyword max_size: Specifies the maximum constraint for the output chunk size. Default is None, meaning ``avg_size * 4``
+		:keyword fingerprint: See :class:`FastCDC`
+		:keyword sketch: See :class:`FastCDC`
+		"""
+		...
+
+	@property
+	def normalized_chunking(self) -> NormalizedChunking:
+		"""
+		Always 0. Normalized chunking is a FastCDC 2020 feature
+		"""
+		...
+
+	@property
+	def seed(self) -> int:
+		"""
+		Always 0. Seeding the gear table is a FastCDC 2020 feature
+		"""
+		...
+
+
+class RAMCDC(FastCDC):
+	"""
+	The Rapid Asymmetric Maximum (RAM) chunker
+
+	Paper: A new content-defined chunking algorithm for data deduplication in cloud storage, Future Generation Computer Systems, 2017
+
+	It finds the max byte in a fixed-size window at the beginning of the chunk,
+	and cuts right after the first byte after the window that is not less than it.
+	The window is scanned only until a byte of 255 is found, so it is the fastest chunker on high-entropy data,
+	but the bytes it skips have no effect on the boundaries.
+	It shares all ``cut_xxx()`` methods, the chunk type and the thread safety of :class:`FastCDC`.
+	:attr:`Chunk.gear_hash` is always 0
+	"""
+
+	def __init__(
+			self,
+			avg_size: int = 16384,
+			*,
+			min_size: Optional[int] = None,
+			max_size: Optional[int] = None,
+			fingerprint: bool = False,
+			sketch: bool = False,
+	):
+		"""
+		:param avg_size: Specifies the average output chunk size, which is met with random data.
+			The default and the ranges of sizes are the same as :class:`FastCDC`
+		:keyword min_size: Specifies the minimum constraint for the output chunk size. Default is None, meaning ``avg_size // 4``
+		:keyword max_size: Specifies the maximum constraint for the output chunk size. Default is None, meaning ``avg_size * 4``
+		:keyword fingerprint: See :class:`FastCDC`
+		:keyword sketch: See :class:`FastCDC`
+		"""
+		...
+
+	@property
+	def normalized_chunking(self) -> NormalizedChunking:
+		"""
+		Always 0. Normalized chunking is a FastCDC 2020 feature
+		"""
+		...
+
+	@property
+	def seed(self) -> int:
+		"""
+		Always 0. Seeding the gear table is a FastCDC 2020 feature
+		"""
+		...
+
 
 class Chunk:
 	"""
@@ -142,6 +423,11 @@ class Chunk:
 
 		For chunks generated from ``cut_files()``, this memory view will be pointed to part of an mmap object of the input file,
 		which means the mmap object won't be released until all references to the generated chunk objects are released
+
+	.. note::
+
+		In the Cython implementation, the memory view is created on the first access,
+		so consumers that only read ``offset`` and ``length`` don't pay for it
 	"""
 
 	gear_hash: int
@@ -151,5 +437,1105 @@ class Chunk:
 	You should not use this hash for actual data deduplication since it's not guaranteed to be high quality
 	"""
 
-	def __init__(self, offset: int, length: int, data: memoryview, gear_hash: int):
+	fingerprint: Optional[bytes]
+	"""
+	The 16-byte MurmurHash3_x64_128 hash (seed 0) of the chunk data, or None if ``fingerprint=True`` is not passed to :class:`FastCDC`
+
+	The value is the same as ``mmh3.hash_bytes(data)``, on all platforms.
+	It is fast and well-distributed, making it suitable as a dedup index key,
+	but it is not a cryptographic hash, so don't use it when the input might be adversarial
+	"""
+
+	sketch: Optional[Sketch]
+	"""
+	The resemblance sketch of the chunk data, or None if ``sketch=True`` is not passed to :class:`FastCDC`
+
+	The sketch is calculated in the way of Finesse: the chunk is split into 12 sub-chunks,
+	the max rolling gear hash inside each sub-chunk is a feature, and the features are grouped into 3 super-features.
+	Chunks sharing any super-feature are likely to be similar, so one can be delta-compressed against another.
+	Sketches do not depend on the ``seed`` of :class:`FastCDC`
+	"""
+
+	def __init__(self, offset: int, length: int, data: memoryview, gear_hash: int, fingerprint: Optional[bytes] = None, sketch: Optional[Sketch] = None):
+		...
+
+	def __reduce__(self):
+		"""
+		Chunks are picklable. The chunk data is copied into the pickled output,
+		and the unpickled chunk owns a memory view of its own copy
+		"""
+		...
+
+
+class ManifestEntry(NamedTuple):
+	"""
+	Describes a single chunk inside a :class:`ChunkManifest`
+	"""
+
+	offset: int
+	"""
+	The offset of the chunk in bytes from the beginning of the input
+	"""
+
+	length: int
+	"""
+	The length of the chunk in bytes
+	"""
+
+	digest: bytes
+	"""
+	The digest of the chunk data, calculated with the ``hash_name`` algorithm of the owning manifest
+	"""
+
+
+class ChunkManifest:
+	"""
+	An ordered list of chunk digests that describes the content of an input, e.g. an old version of a file
+
+	The entries are contiguous: each entry starts right after the previous one
+	"""
+
+	def __init__(self, entries: Iterable[ManifestEntry] = (), *, hash_name: str = 'sha256'):
+		"""
+		:param entries: The initial entries of the manifest
+		:keyword hash_name: Name of the :mod:`hashlib` algorithm used for the chunk digests. Default is ``'sha256'``
+		"""
+		...
+
+	@classmethod
+	def from_chunks(cls, chunks: Iterable[Chunk], *, hash_name: str = 'sha256') -> 'ChunkManifest':
+		"""
+		Build a manifest by hashing the given chunks, e.g. the output of ``FastCDC.cut_file()``
+
+		:param chunks: The chunks to be recorded, in input order
+		:keyword hash_name: Name of the :mod:`hashlib` algorithm used for the chunk digests. Default is ``'sha256'``
+		"""
+		...
+
+	def append(self, entry: ManifestEntry):
+		"""
+		Append an entry to the end of the manifest
+
+		:raise ValueError: If the entry does not start at the end of the previous entry
+		"""
+		...
+
+	@property
+	def hash_name(self) -> str:
+		...
+
+	@property
+	def total_size(self) -> int:
+		"""
+		The total size in bytes of the input described by this manifest
+		"""
+		...
+
+	def __len__(self) -> int: ...
+	def __iter__(self) -> Iterator[ManifestEntry]: ...
+	@overload
+	def __getitem__(self, index: int) -> ManifestEntry: ...
+	@overload
+	def __getitem__(self, index: slice) -> List[ManifestEntry]: ...
+
+
+class DeltaCopy(NamedTuple):
+	"""
+	A delta operation that copies old chunks ``[start, end)`` from the old input
+	"""
+
+	start: int
+	"""
+	Index of the first old chunk to copy in the manifest
+	"""
+
+	end: int
+	"""
+	Index of the chunk after the last old chunk to copy in the manifest (exclusive)
+	"""
+
+
+class DeltaLiteral(NamedTuple):
+	"""
+	A delta operation that inserts literal bytes that do not exist in the old input
+	"""
+
+	data: bytes
+
+
+DeltaOp = Union[DeltaCopy, DeltaLiteral]
+
+
+def compute_delta(manifest: ChunkManifest, chunks: Iterable[Chunk], *, max_literal_size: int = 1048576) -> Iterator[DeltaOp]:
+	"""
+	Compute an rsync-style delta between an old input, described by its manifest, and a new input
+
+	The new input is consumed chunk by chunk, so it can be any output of ``FastCDC.cut_xxx()``, including ``cut_stream()``.
+	To get matches, the new input must be chunked with the same ``FastCDC`` parameters as the old one
+
+	Runs of consecutive old chunks are merged into a single :class:`DeltaCopy`,
+	and consecutive new chunks are merged into a single :class:`DeltaLiteral` up to ``max_literal_size`` bytes
+
+	Example::
+
+		old_manifest = ChunkManifest.from_chunks(cdc.cut_file('old.bin'))
+		ops = list(compute_delta(old_manifest, cdc.cut_file('new.bin')))
+		with open('restored.bin', 'wb') as f:
+			apply_delta(old_manifest, ops, 'old.bin', f)
+
+	:param manifest: The manifest of the old input
+	:param chunks: The chunks of the new input
+	:keyword max_literal_size: The max size in bytes of a merged literal operation. Default is 1048576.
+		A single chunk larger than it is still emitted as a single literal
+	:return: An iterator that yields delta operations
+	"""
+	...
+
+
+def apply_delta(manifest: ChunkManifest, ops: Iterable[DeltaOp], old: Union[bytes, bytearray, memoryview, str, Path], output: BinaryStreamWriter) -> int:
+	"""
+	Reconstruct the new input from the old input and the delta operations generated by :func:`compute_delta`
+
+	:param manifest: The manifest of the old input, the same one used in :func:`compute_delta`
+	:param ops: The delta operations
+	:param old: The old input. It can be an in-memory buffer, or a path to a regular file that will be read using mmap
+	:param output: A writable object with a ``write()`` method, where the new input will be written to
+	:return: The number of bytes written to ``output``
+	"""
+	...
+
+
+class ChunkBoundaries:
+	"""
+	The chunk boundaries of a file, generated by :func:`cut_files_parallel`
+
+	All arrays are indexed by chunk and share the same length
+	"""
+
+	file_path: Union[str, bytes, Path]
+	"""
+	The path of the chunked file, as passed to :func:`cut_files_parallel`
+	"""
+
+	offsets: 'array.array[int]'
+	"""
+	An ``array.array('Q')`` of the chunk offsets
+	"""
+
+	lengths: 'array.array[int]'
+	"""
+	An ``array.array('Q')`` of the chunk lengths
+	"""
+
+	gear_hashes: 'array.array[int]'
+	"""
+	An ``array.array('Q')`` of the chunk gear hashes
+	"""
+
+	digests: Optional[List[bytes]]
+	"""
+	The chunk digests calculated with the ``hash_name`` algorithm,
+	or None if no ``hash_name`` is given to :func:`cut_files_parallel`
+	"""
+
+	hash_name: Optional[str]
+
+	def __len__(self) -> int:
+		"""
+		The number of chunks
+		"""
+		...
+
+	def to_manifest(self) -> ChunkManifest:
+		"""
+		Create a :class:`ChunkManifest` from the boundaries and the digests
+
+		:raise ValueError: If the digests are not available
+		"""
 		...
+
+
+def cut_files_parallel(
+		cdc: FastCDC,
+		file_paths: Iterable[Union[str, bytes, Path]],
+		*,
+		hash_name: Optional[str] = None,
+		max_workers: Optional[int] = None,
+		executor: Optional[Executor] = None,
+) -> Iterator[ChunkBoundaries]:
+	"""
+	Cut multiple files with ``FastCDC.cut_file()`` in worker processes
+
+	Each worker chunks a whole file, and optionally hashes each chunk with ``hash_name``,
+	which is useful for the pure-Python implementation and for other CPU-heavy per-chunk work that holds the GIL.
+	Results are passed back to the calling process as flat arrays through :mod:`multiprocessing.shared_memory`,
+	instead of pickling a Python object per chunk. On Windows or on Python < 3.8 the arrays are pickled as a single bytes object instead
+
+	Files are submitted lazily, with up to ``2 * max_workers`` files in flight (CPU count if ``max_workers`` is not given),
+	so memory stays bounded with a large or slowly consumed list of files
+
+	Example::
+
+		for boundaries in cut_files_parallel(FastCDC(65536), paths, hash_name='sha256'):
+			manifest = boundaries.to_manifest()
+
+	:param cdc: The FastCDC instance to chunk with. It will be pickled and sent to the workers
+	:param file_paths: Paths to the files to be processed. They should be readable regular files
+	:keyword hash_name: Name of the :mod:`hashlib` algorithm used to calculate chunk digests inside the workers.
+		Default is None, meaning no digest is calculated
+	:keyword max_workers: The max number of worker processes, if a new process pool is created.
+		Default is None, meaning the default of :class:`concurrent.futures.ProcessPoolExecutor`
+	:keyword executor: An existing executor to submit the work to. It will not be shut down after use.
+		Default is None, meaning a new process pool is created and shut down after all results are collected
+	:return: An iterator that yields a :class:`ChunkBoundaries` for each file, in input order
+	"""
+	...
+
+
+_K = TypeVar('_K')
+
+
+class SketchIndex(Generic[_K]):
+	"""
+	An in-memory index from chunk sketches to user-provided keys, for finding delta compression candidates
+
+	Example::
+
+		index = SketchIndex()
+		for chunk in FastCDC(sketch=True).cut_file('base.bin'):
+			index.add(chunk.sketch, chunk.offset)
+		for chunk in FastCDC(sketch=True).cut_file('new.bin'):
+			candidates = index.find(chunk.sketch, limit=1)
+	"""
+
+	def __init__(self):
+		...
+
+	def add(self, sketch: Sketch, key: _K):
+		"""
+		Add a sketch to the index
+
+		:param sketch: The sketch of a chunk, see :attr:`Chunk.sketch`
+		:param key: The value to be returned by :meth:`find`, e.g. the chunk offset or its fingerprint
+		"""
+		...
+
+	def find(self, sketch: Sketch, *, min_matches: int = 1, limit: Optional[int] = None) -> List[_K]:
+		"""
+		Find keys of chunks that are similar to the chunk with the given sketch
+
+		:param sketch: The sketch of the chunk to be delta-compressed
+		:keyword min_matches: The minimum number of matched super-features for a key to be returned. Default is 1
+		:keyword limit: The maximum number of keys to return. Default is None, meaning no limit
+		:return: Keys ordered by the number of matched super-features in descending order,
+			then by the order they were added
+		"""
+		...
+
+	def __len__(self) -> int:
+		...
+
+
+class TuningCandidate(NamedTuple):
+	"""
+	The evaluation result of a FastCDC configuration on the sample, generated by :func:`tune_parameters`
+	"""
+
+	avg_size: int
+	min_size: int
+	max_size: int
+	normalized_chunking: NormalizedChunking
+
+	chunk_count: int
+	unique_chunk_count: int
+	"""
+	The number of distinct chunks, by their fingerprints
+	"""
+
+	total_bytes: int
+	unique_bytes: int
+	"""
+	The total length of distinct chunks, i.e. the bytes to store after deduplication
+	"""
+
+	cut_seconds: float
+	"""
+	The time spent in cutting the sample, without fingerprinting
+	"""
+
+	metadata_bytes: int
+	"""
+	The estimated metadata size, i.e. ``chunk_count * metadata_entry_size``
+	"""
+
+	@property
+	def throughput(self) -> float:
+		"""
+		The chunking speed in bytes per second
+		"""
+		...
+
+	@property
+	def dedup_ratio(self) -> float:
+		"""
+		``total_bytes / unique_bytes``. The higher the better
+		"""
+		...
+
+	@property
+	def metadata_overhead(self) -> float:
+		"""
+		``metadata_bytes / total_bytes``
+		"""
+		...
+
+	def create_fastcdc(self, **kwargs: Any) -> FastCDC:
+		"""
+		Create a :class:`FastCDC` instance with this configuration
+
+		:param kwargs: Extra keyword arguments for :class:`FastCDC`, e.g. ``fingerprint=True``
+		"""
+		...
+
+
+class TuningReport(NamedTuple):
+	"""
+	The result of :func:`tune_parameters`
+	"""
+
+	sampled_bytes: int
+	sampled_block_count: int
+
+	candidates: List[TuningCandidate]
+	"""
+	All evaluated configurations, in the order of the grid
+	"""
+
+	pareto_front: List[TuningCandidate]
+	"""
+	The candidates that no other candidate beats in all of dedup ratio, throughput and metadata size
+	"""
+
+	recommended: TuningCandidate
+	"""
+	The candidate on the Pareto front with the highest dedup ratio within the metadata budget, ties broken by throughput.
+	If no candidate fits the budget, the one with the least metadata
+	"""
+
+
+def tune_parameters(
+		file_paths: Iterable[Union[str, bytes, Path]],
+		*,
+		avg_sizes: Sequence[int] = (4096, 8192, 16384, 32768, 65536),
+		normalized_chunkings: Sequence[NormalizedChunking] = (0, 1, 2, 3),
+		size_ratios: Sequence[Tuple[int, int]] = ((4, 4),),
+		sample_size: int = 67108864,
+		block_size: int = 4194304,
+		metadata_entry_size: int = 48,
+		metadata_budget: Optional[float] = None,
+) -> TuningReport:
+	"""
+	Evaluate a grid of :class:`FastCDC` configurations on a sample of the given files,
+	and recommend one on the Pareto front of dedup ratio, throughput and metadata size
+
+	The sample is read once into memory, as blocks of ``block_size`` bytes spread evenly over each file,
+	with the number of blocks per file proportional to its size. Similar files, e.g. versions of the same file,
+	are sampled at the same relative offsets, so their duplicates are seen. If the files fit in ``sample_size``, they are read whole.
+	Each block is cut separately with :meth:`FastCDC.cut_buf` for every configuration,
+	so blocks should be a lot larger than the max chunk size
+
+	Example::
+
+		report = tune_parameters(paths, metadata_budget=0.005)
+		cdc = report.recommended.create_fastcdc(fingerprint=True)
+
+	:param file_paths: Paths to the files of the dataset. They should be readable regular files
+	:keyword avg_sizes: The ``avg_size`` values to evaluate
+	:keyword normalized_chunkings: The ``normalized_chunking`` values to evaluate
+	:keyword size_ratios: The ``(avg_size // min_size, max_size // avg_size)`` ratios to evaluate. Default is ``((4, 4),)``, the FastCDC defaults
+	:keyword sample_size: The approximate total size of the sample in bytes. Default is 67108864 (64 MiB)
+	:keyword block_size: The size of sampled blocks in bytes. Default is 4194304 (4 MiB)
+	:keyword metadata_entry_size: The metadata size of each chunk reference in bytes, e.g. offset, length and digest in a manifest.
+		Default is 48, i.e. two 64-bit integers and a SHA-256 digest
+	:keyword metadata_budget: The max ``metadata_overhead`` of the recommended configuration, e.g. 0.005 for 0.5%.
+		Default is None, meaning no limit
+	:return: A :class:`TuningReport`
+	:raise ValueError: If the files are empty, or the configuration grid is empty
+	"""
+	...
+
+
+class S3ObjectStore:
+	"""
+	A minimal client of S3-compatible object storages, e.g. AWS S3 or MinIO, for :class:`PackedChunkSink`
+
+	Requests use path-style URLs, i.e. ``{endpoint}/{bucket}/{key}``, and are signed with AWS Signature Version 4 if credentials are given.
+	Connections are kept alive and pooled, and it's safe to use from multiple threads.
+	Connection errors and HTTP 408, 429, 500, 502, 503 and 504 responses are retried with exponential backoff.
+	Other statuses, like 501 Not Implemented, are raised at once
+	"""
+
+	def __init__(
+			self,
+			endpoint: str,
+			bucket: str,
+			*,
+			access_key: Optional[str] = None,
+			secret_key: Optional[str] = None,
+			session_token: Optional[str] = None,
+			region: str = 'us-east-1',
+			max_connections: int = 16,
+			max_retries: int = 4,
+			retry_backoff: float = 0.2,
+			timeout: float = 60,
+	):
+		"""
+		:param endpoint: The service URL, e.g. ``'https://s3.us-east-1.amazonaws.com'`` or ``'http://127.0.0.1:9000'``
+		:param bucket: The bucket name
+		:keyword access_key: The access key ID. Default is None, meaning requests are not signed
+		:keyword secret_key: The secret access key. It should be given together with ``access_key``
+		:keyword session_token: The session token of temporary credentials. Default is None
+		:keyword region: The region in the signature. Default is ``'us-east-1'``
+		:keyword max_connections: The max number of idle connections kept for reuse. Default is 16
+		:keyword max_retries: The max number of retries of a request. Default is 4
+		:keyword retry_backoff: The base delay in seconds of the retries, doubled after each retry. Default is 0.2
+		:keyword timeout: The socket timeout in seconds. Default is 60
+		"""
+		...
+
+	@property
+	def connection_count(self) -> int:
+		"""
+		The number of connections opened so far
+		"""
+		...
+
+	def put_object(self, key: str, data: bytes) -> None:
+		"""
+		Upload an object
+
+		:raise OSError: If the request failed after all retries
+		"""
+		...
+
+	def get_object(self, key: str) -> bytes:
+		"""
+		Download an object
+
+		:raise OSError: If the request failed after all retries
+		"""
+		...
+
+	def close(self):
+		"""
+		Close the idle connections
+		"""
+		...
+
+	def __enter__(self) -> 'S3ObjectStore':
+		...
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		...
+
+
+class ChunkLocation(NamedTuple):
+	"""
+	Where a chunk is stored by a :class:`ChunkSink`. The chunk data is ``object[offset:offset + length]`` of the object with the key
+	"""
+
+	digest: bytes
+	"""
+	The digest of the chunk data
+	"""
+
+	key: str
+	"""
+	The key of the object that holds the chunk
+	"""
+
+	offset: int
+	"""
+	The offset of the chunk in the object
+	"""
+
+	length: int
+
+
+class ChunkSink(abc.ABC):
+	"""
+	The base class of chunk consumers that store chunks somewhere, e.g. :class:`PackedChunkSink`.
+	Subclasses implement :meth:`write`, and :meth:`flush` if they buffer chunks
+
+	Example::
+
+		with PackedChunkSink(S3ObjectStore(endpoint, bucket)) as sink:
+			locations = sink.write_chunks(FastCDC(16384).cut_stream(sys.stdin.buffer))
+	"""
+
+	@abc.abstractmethod
+	def write(self, chunk: Chunk) -> ChunkLocation:
+		"""
+		Store a chunk. It might block for flow control, which pauses the chunker feeding the sink
+
+		The chunk data is consumed before this method returns, so chunks from ``cut_stream()`` can be passed directly
+
+		:return: Where the chunk is stored, once the sink is flushed
+		"""
+		...
+
+	def write_chunks(self, chunks: Iterable[Chunk]) -> List[ChunkLocation]:
+		"""
+		Call :meth:`write` for each chunk
+
+		:return: The locations of the chunks, in order
+		"""
+		...
+
+	def flush(self):
+		"""
+		Wait until all chunks written so far are stored
+		"""
+		...
+
+	def close(self):
+		"""
+		Flush and release the resources of the sink
+		"""
+		...
+
+	def __enter__(self) -> 'ChunkSink':
+		...
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		...
+
+
+class PackedChunkSink(ChunkSink):
+	"""
+	A :class:`ChunkSink` that packs chunks into objects of about ``pack_size`` bytes, and uploads them to an :class:`ObjectStore`
+	in a pool of upload threads, so small chunks don't cost one request each
+
+	A chunk larger than ``pack_size`` is packed alone. Pack keys are ``{key_prefix}{random sink id}-{index}``, unique per sink.
+	When the uploads fall behind, :meth:`write` blocks until the packs waiting for upload fit in ``max_pending_bytes``,
+	so memory stays bounded and the chunker is paused.
+	An upload failure is raised by the next :meth:`write`, :meth:`flush` or :meth:`close` call, and by all calls after it,
+	since the locations returned for the failed pack are invalid.
+	Leaving the ``with`` block with an exception doesn't upload the last partial pack
+
+	Not thread-safe. Each sink should be written by one thread at a time
+	"""
+
+	def __init__(
+			self,
+			store: ObjectStore,
+			*,
+			pack_size: int = 8388608,
+			max_workers: int = 8,
+			max_pending_bytes: int = 134217728,
+			key_prefix: str = 'packs/',
+			hash_name: str = 'sha256',
+			dedup: bool = True,
+	):
+		"""
+		:param store: The object storage to upload packs to
+		:keyword pack_size: The target size of packs in bytes. Default is 8388608 (8 MiB)
+		:keyword max_workers: The number of upload threads, i.e. concurrent uploads. Default is 8
+		:keyword max_pending_bytes: The max total size of packs being uploaded or waiting for upload.
+			A pack larger than it is still accepted when nothing is pending. Default is 134217728 (128 MiB)
+		:keyword key_prefix: The prefix of pack keys. Default is ``'packs/'``
+		:keyword hash_name: Name of the :mod:`hashlib` algorithm for :attr:`ChunkLocation.digest`. Default is ``'sha256'``
+		:keyword dedup: Whether to skip chunks whose digest was written before, returning their existing location. Default is True
+		"""
+		...
+
+	@property
+	def chunk_count(self) -> int:
+		"""
+		The number of chunks written, including duplicates
+		"""
+		...
+
+	@property
+	def duplicate_chunk_count(self) -> int:
+		"""
+		The number of chunks skipped by deduplication
+		"""
+		...
+
+	@property
+	def uploaded_bytes(self) -> int:
+		"""
+		The total size of packs uploaded successfully
+		"""
+		...
+
+	@property
+	def uploaded_object_count(self) -> int:
+		"""
+		The number of packs uploaded successfully
+		"""
+		...
+
+	@property
+	def pending_bytes(self) -> int:
+		"""
+		The total size of packs being uploaded or waiting for upload
+		"""
+		...
+
+
+class BloomFilter:
+	"""
+	A Bloom filter of byte string keys with a fixed memory budget, e.g. for testing whether a chunk digest is definitely new
+	before querying a remote chunk store
+
+	Keys are hashed with MurmurHash3_x64_128, so they don't need to be uniformly distributed.
+	Bulk methods :meth:`add_many` and :meth:`contains_many` process a whole array of keys without the GIL in the Cython implementation
+
+	The file format is the same across platforms and implementations.
+	Adding keys is thread-safe. The bit array can be mmap-ed from a file with :meth:`load`
+	"""
+
+	def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+		"""
+		Create an empty in-memory Bloom filter
+
+		:param capacity: The expected number of keys. The false positive rate grows above the given one
+			if more keys are added
+		:param false_positive_rate: The expected false positive rate when ``capacity`` keys are added. Should be within (0, 1).
+			Default is 0.01
+		"""
+		...
+
+	@classmethod
+	def load(cls, file_path: Union[str, bytes, Path], *, writable: bool = False) -> 'BloomFilter':
+		"""
+		Load a Bloom filter file created by :meth:`save`. The file is mmap-ed instead of read into memory
+
+		:param file_path: Path to the file
+		:keyword writable: If True, keys added later are written back to the file. Call :meth:`flush` or :meth:`close` to persist them.
+			Otherwise, the filter is still writable, but changes are kept in memory only
+		"""
+		...
+
+	def add(self, key: Union[bytes, bytearray, memoryview]) -> bool:
+		"""
+		Add a key to the filter
+
+		:return: True if the key was definitely not in the filter before
+		"""
+		...
+
+	def add_many(self, keys: Union[bytes, bytearray, memoryview], key_size: int) -> int:
+		"""
+		Add multiple fixed-size keys to the filter
+
+		:param keys: A buffer of concatenated keys, e.g. ``b''.join(digests)``
+		:param key_size: The size of each key in bytes. The size of ``keys`` should be a multiple of it
+		:return: The number of keys that were definitely not in the filter before
+		"""
+		...
+
+	def __contains__(self, key: Union[bytes, bytearray, memoryview]) -> bool:
+		"""
+		:return: False if the key is definitely not in the filter,
+			or True if it might be in the filter (false positive possible)
+		"""
+		...
+
+	def contains_many(self, keys: Union[bytes, bytearray, memoryview], key_size: int) -> List[bool]:
+		"""
+		Test multiple fixed-size keys. See :meth:`__contains__` for the meaning of the results
+
+		:param keys: A buffer of concatenated keys
+		:param key_size: The size of each key in bytes. The size of ``keys`` should be a multiple of it
+		"""
+		...
+
+	def save(self, file_path: Union[str, bytes, Path]):
+		"""
+		Write the filter into a file, which can be loaded by :meth:`load`
+		"""
+		...
+
+	def flush(self):
+		"""
+		Write changes back to the file, if the filter is loaded with ``writable=True``. Otherwise, do nothing
+		"""
+		...
+
+	def close(self):
+		"""
+		Flush and release the mmap, if the filter is loaded from a file. The filter is not usable after that
+		"""
+		...
+
+	def __enter__(self) -> 'BloomFilter':
+		...
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		...
+
+	@property
+	def capacity(self) -> int:
+		...
+
+	@property
+	def false_positive_rate(self) -> float:
+		...
+
+	@property
+	def bit_count(self) -> int:
+		"""
+		The size of the bit array in bits
+		"""
+		...
+
+	@property
+	def hash_count(self) -> int:
+		"""
+		The number of bits set for each key
+		"""
+		...
+
+	@property
+	def count(self) -> int:
+		"""
+		The number of added keys that were definitely new, i.e. the sum of the results of :meth:`add` and :meth:`add_many`
+		"""
+		...
+
+
+class ChunkerStats:
+	"""
+	Opt-in chunking statistics, recorded by the ``cut_xxx()`` methods of :class:`FastCDC` that are given it with the ``stats`` keyword.
+	Statistics are accumulated across calls, and a :class:`ChunkerStats` can be shared between threads.
+	Without it, chunking has no extra cost
+
+	Cut reasons, the keys of :attr:`cut_counts`:
+
+	* ``mask_s``: cut by the hard mask, before the normalization point of the chunk (FastCDC and FastCDC 2016)
+	* ``mask_l``: cut by the easy mask, after the normalization point of the chunk (FastCDC and FastCDC 2016)
+	* ``extremum``: cut by the local extremum (AE and RAM)
+	* ``max_size``: forced cut at ``max_size``
+	* ``boundary``: forced cut at a given boundary, see :data:`Boundaries`
+	* ``end``: the last chunk of the data
+	* ``zero``: a chunk of zeros created without gear hashing, see the ``sparse`` keyword
+
+	Histograms have 65 log2 buckets, where bucket ``i`` counts values in ``(2 ** (i - 1), 2 ** i]``, and bucket 0 counts values 0 and 1
+	"""
+
+	def __init__(self):
+		...
+
+	@property
+	def chunk_count(self) -> int:
+		...
+
+	@property
+	def total_bytes(self) -> int:
+		"""
+		The total length of the chunks
+		"""
+		...
+
+	@property
+	def cut_counts(self) -> Dict[str, int]:
+		"""
+		The chunk count of each cut reason
+		"""
+		...
+
+	@property
+	def chunk_size_histogram(self) -> List[int]:
+		"""
+		The log2 histogram of chunk lengths in bytes
+		"""
+		...
+
+	@property
+	def read_count(self) -> int:
+		"""
+		The count of ``read()`` / ``readinto()`` calls on streams, and blocks taken from the iterables of :meth:`FastCDC.cut_iter`,
+		including the final read that hits EOF
+		"""
+		...
+
+	@property
+	def read_bytes(self) -> int:
+		...
+
+	@property
+	def read_ns(self) -> int:
+		"""
+		The total time spent in reads, in nanoseconds
+		"""
+		...
+
+	@property
+	def read_time_histogram(self) -> List[int]:
+		"""
+		The log2 histogram of read times in nanoseconds
+		"""
+		...
+
+	@property
+	def copy_bytes(self) -> int:
+		"""
+		The bytes copied inside the chunker, i.e. the unconsumed data moved to the front of the :meth:`FastCDC.cut_stream` buffer on each refill,
+		and the data around block edges copied by :meth:`FastCDC.cut_iter`. Reads into the stream buffer are not included
+		"""
+		...
+
+	@property
+	def cut_ns(self) -> int:
+		"""
+		The total time spent in the cut kernel, in nanoseconds.
+		For :meth:`FastCDC.cut_file`, it includes the page faults of the memory-mapped file
+		"""
+		...
+
+	@property
+	def total_ns(self) -> int:
+		"""
+		The total time spent in generating chunks, in nanoseconds
+		"""
+		...
+
+	def reset(self):
+		"""
+		Reset all statistics to zero
+		"""
+		...
+
+	def to_dict(self) -> Dict[str, Any]:
+		"""
+		A consistent snapshot of all statistics, keyed by the property names, e.g. for exporting to OpenTelemetry or logs
+		"""
+		...
+
+	def to_prometheus(self, *, prefix: str = 'pyfastcdc', labels: Optional[Dict[str, str]] = None) -> str:
+		"""
+		Format the statistics in the Prometheus text exposition format, with histograms and times in seconds
+
+		:param prefix: The prefix of the metric names
+		:param labels: Optional labels added to all metrics
+		"""
+		...
+
+
+class TraceSpan(NamedTuple):
+	"""
+	A timing span recorded by :class:`ChunkTracer`
+	"""
+
+	name: str
+	"""
+	The span name, see :class:`ChunkTracer`
+	"""
+
+	thread_id: int
+	"""
+	The :func:`threading.get_ident` of the thread that runs the span
+	"""
+
+	start_ns: int
+	"""
+	The start time, from a monotonic clock in nanoseconds
+	"""
+
+	end_ns: int
+
+	size: int
+	"""
+	The bytes processed in the span. For ``next`` spans, it's the length of the generated chunk, or 0 at the end of the data.
+	For ``yield`` spans, it's the length of the chunk being consumed
+	"""
+
+
+class ChunkTracer:
+	"""
+	Opt-in timing spans of the chunking hot paths, recorded by the ``cut_xxx()`` methods of :class:`FastCDC` that are given it with the ``tracer`` keyword.
+	Spans are accumulated across calls, and a :class:`ChunkTracer` can be shared between threads.
+	Without it, chunking has no extra cost
+
+	Span names:
+
+	* ``next``: the generation of a chunk, i.e. a whole ``__next__()`` call of the returned iterator, containing the spans below
+	* ``read``: a ``read()`` / ``readinto()`` call on the stream, or a block taken from the iterable of :meth:`FastCDC.cut_iter`
+	* ``scan``: a run of the cut kernel, sized by the bytes scanned
+	* ``shift``: the unconsumed data moved to the front of the :meth:`FastCDC.cut_stream` buffer, or the data around block edges copied by :meth:`FastCDC.cut_iter`
+	* ``yield``: the time spent by the consumer between two chunks, i.e. from the return of a chunk to the next ``__next__()`` call
+
+	Recorded spans can be exported with :meth:`to_chrome_trace`, in the Chrome trace event format that can be viewed in
+	`Perfetto <https://ui.perfetto.dev>`__ or ``chrome://tracing``
+	"""
+
+	def __init__(self, *, callback: Optional[Callable[[TraceSpan], None]] = None, max_spans: int = 1000000):
+		"""
+		:param callback: Optional callable invoked with each :class:`TraceSpan` in the chunking thread, as soon as the span ends,
+			e.g. for streaming spans into another tracing system. It's invoked even if the span is dropped
+		:param max_spans: The max count of kept spans. Spans beyond it are dropped and counted in :attr:`dropped_span_count`.
+			Use 0 to keep nothing, for the callback only
+		"""
+		...
+
+	@property
+	def spans(self) -> List[TraceSpan]:
+		"""
+		A snapshot of the kept spans, in the order of their ends
+		"""
+		...
+
+	@property
+	def max_spans(self) -> int:
+		...
+
+	@property
+	def dropped_span_count(self) -> int:
+		"""
+		The count of spans dropped since :attr:`max_spans` is reached
+		"""
+		...
+
+	def reset(self):
+		"""
+		Drop all kept spans, and reset :attr:`dropped_span_count` to zero
+		"""
+		...
+
+	def to_chrome_trace(self) -> Dict[str, Any]:
+		"""
+		Format the kept spans as a Chrome trace event JSON object, with a track per thread
+		"""
+		...
+
+	def save_chrome_trace(self, file_path: Union[str, bytes, Path]):
+		"""
+		Save :meth:`to_chrome_trace` to the given JSON file
+		"""
+		...
+
+
+_T = TypeVar('_T')
+_ChunkT = TypeVar('_ChunkT', bound=Chunk)
+
+
+class BufferPool:
+	"""
+	A thread-safe pool of stream buffers with a global memory budget, shared by many :meth:`FastCDC.cut_stream` calls,
+	so memory scales with the streams being actively chunked, instead of all open streams
+
+	Released buffers are cached for reuse, and dropped when room is needed for buffers of other sizes.
+	When the budget is used up, :meth:`acquire` blocks until other buffers are released
+	"""
+
+	def __init__(self, max_bytes: int, *, timeout: Optional[float] = None):
+		"""
+		:param max_bytes: The max total size of buffers, both in use and cached
+		:param timeout: The max seconds :meth:`acquire` waits for, before raising :class:`TimeoutError`. Default None, wait forever
+		"""
+		...
+
+	def acquire(self, size: int) -> bytearray:
+		"""
+		Take a buffer of the given size from the pool. Its content is undefined
+
+		:param size: The buffer size in bytes. It should not be greater than ``max_bytes``
+		"""
+		...
+
+	def release(self, buf: bytearray):
+		"""
+		Return a buffer taken by :meth:`acquire` to the pool.
+		Raises ``ValueError`` if the buffer is not taken from this pool, or is already returned
+		"""
+		...
+
+	@property
+	def max_bytes(self) -> int:
+		...
+
+	@property
+	def used_bytes(self) -> int:
+		"""
+		The total size of buffers in use
+		"""
+		...
+
+	@property
+	def cached_bytes(self) -> int:
+		"""
+		The total size of released buffers kept for reuse
+		"""
+		...
+
+
+class BackgroundIterator(Iterator[_T]):
+	"""
+	An iterator that consumes the source iterator in a background producer thread, keeping a bounded number of items ahead
+
+	Exceptions raised by the source iterator are re-raised by ``__next__()`` after all items before the exception are consumed.
+	Close the iterator, or use it as a context manager, to stop the producer thread early
+	"""
+
+	def close(self):
+		"""
+		Stop the producer thread, discard prefetched items and wait for the thread to exit.
+		The producer can only stop after the source iterator yields its current item
+		"""
+		...
+
+	def __enter__(self) -> 'BackgroundIterator[_T]':
+		...
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		...
+
+
+def prefetch_chunks(
+		chunks: Iterable[_ChunkT],
+		*,
+		max_chunks: int = 64,
+		max_bytes: Optional[int] = None,
+		copy_data: bool = True,
+		copy_func: Optional[Callable[[_ChunkT], _ChunkT]] = None,
+) -> BackgroundIterator[_ChunkT]:
+	"""
+	Run the given chunk iterator, e.g. from ``FastCDC.cut_file()``, in a background thread,
+	so that chunking overlaps with slow per-chunk work of the consumer, like uploading
+
+	Since the Cython implementation releases the GIL while cutting, chunking runs in parallel with the consumer thread
+
+	Example::
+
+		with prefetch_chunks(FastCDC().cut_stream(sys.stdin.buffer), max_bytes=64 * 1048576) as chunks:
+			for chunk in chunks:
+				upload(chunk.data)
+
+	:param chunks: The chunk iterator to consume in the background
+	:keyword max_chunks: The maximum number of chunks to keep ahead of the consumer. Default is 64
+	:keyword max_bytes: The maximum total length of chunks to keep ahead of the consumer.
+		A single chunk larger than it is still allowed. Default is None, meaning no limit
+	:keyword copy_data: Whether to copy ``chunk.data`` into a new bytes object before passing it to the consumer.
+		It's required for chunks from ``cut_stream()``, including iterators wrapping it like generators or ``itertools.islice()``,
+		since their data is only valid before the next chunk is generated.
+		Default is True. Set it to False to skip the copy if the chunk data stays valid, e.g. for chunks from ``cut_buf()``
+	:keyword copy_func: The function that copies a chunk when ``copy_data`` is True.
+		Default is None, which rebuilds :class:`Chunk` objects with a bytes copy of the data.
+		It's required for other chunk-like objects, which raise a :class:`TypeError` otherwise
+	:return: A :class:`BackgroundIterator` that yields the chunks in order
+	"""
+	...
+
+
+def get_include() -> str:
+	"""
+	Return the directory containing ``pyfastcdc.h``, the header of the C API for C extensions,
+	e.g. for the ``include_dirs`` argument of a setuptools ``Extension``
+
+	Cython extensions can cimport the kernel directly with ``from pyfastcdc.cy.fastcdc cimport FastCDC, CutResult, cut_gear``.
+	See ``pyfastcdc/include/pyfastcdc.h`` and ``pyfastcdc/cy/fastcdc.pxd`` for details. The C API requires the Cython extension
+	"""
+	...
@@ -0,0 +1,64 @@
+# The file format of BloomFilter, shared by the Cython and the pure-Python implementations
+
+import math
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import NamedTuple, Tuple, Union
+
+
+class BloomFilterHeader(NamedTuple):
+	hash_count: int
+	bit_count: int
+	capacity: int
+	count: int
+	false_positive_rate: float
+
+
+# magic, version, hash_count, bit_count, capacity, count, false_positive_rate. The bit array follows it
+_BLOOM_FILTER_HEADER_STRUCT = struct.Struct('<8sIIQQQd')
+_BLOOM_FILTER_MAGIC = b'PFCBLOOM'
+_BLOOM_FILTER_VERSION = 1
+BLOOM_FILTER_HEADER_SIZE = _BLOOM_FILTER_HEADER_STRUCT.size
+BLOOM_FILTER_MAX_HASH_COUNT = 32
+
+
+def create_bloom_filter_header(capacity: int, false_positive_rate: float) -> BloomFilterHeader:
+	if capacity <= 0:
+		raise ValueError(f'capacity {capacity} should be positive')
+	if not (0 < false_positive_rate < 1):
+		raise ValueError(f'false_positive_rate {false_positive_rate} is out of range (0, 1)')
+	bit_count = max(64, math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+	bit_count = (bit_count + 63) // 64 * 64
+	hash_count = min(BLOOM_FILTER_MAX_HASH_COUNT, max(1, round(bit_count / capacity * math.log(2))))
+	return BloomFilterHeader(hash_count, bit_count, capacity, 0, false_positive_rate)
+
+
+def pack_bloom_filter_header(header: BloomFilterHeader) -> bytes:
+	return _BLOOM_FILTER_HEADER_STRUCT.pack(_BLOOM_FILTER_MAGIC, _BLOOM_FILTER_VERSION, *header)
+
+
+def unpack_bloom_filter_header(buf: Union[bytes, memoryview], file_size: int) -> BloomFilterHeader:
+	if len(buf) < BLOOM_FILTER_HEADER_SIZE:
+		raise ValueError('not a bloom filter file, file too small')
+	magic, version, *fields = _BLOOM_FILTER_HEADER_STRUCT.unpack(buf[:BLOOM_FILTER_HEADER_SIZE])
+	if magic != _BLOOM_FILTER_MAGIC:
+		raise ValueError('not a bloom filter file, bad magic')
+	if version != _BLOOM_FILTER_VERSION:
+		raise ValueError(f'unsupported bloom filter file version {version}')
+	header = BloomFilterHeader(*fields)
+	if header.bit_count == 0 or header.bit_count % 64 != 0 or not (1 <= header.hash_count <= BLOOM_FILTER_MAX_HASH_COUNT):
+		raise ValueError('corrupted bloom filter file header')
+	if file_size != BLOOM_FILTER_HEADER_SIZE + header.bit_count // 8:
+		raise ValueError(f'bloom filter file size mismatch, expected {BLOOM_FILTER_HEADER_SIZE + header.bit_count // 8}, got {file_size}')
+	return header
+
+
+def mmap_bloom_filter_file(file_path: Union[str, bytes, Path], writable: bool) -> Tuple[mmap.mmap, BloomFilterHeader]:
+	with open(file_path, 'r+b' if writable else 'rb') as f:
+		file_size = os.fstat(f.fileno()).st_size
+		header = unpack_bloom_filter_header(f.read(BLOOM_FILTER_HEADER_SIZE), file_size)
+		# ACCESS_COPY: the filter is still writable, but changes are not written back to the file
+		mmap_obj = mmap.mmap(f.fileno(), length=file_size, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_COPY)
+	return mmap_obj, header
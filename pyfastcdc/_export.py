@@ -0,0 +1,79 @@
+# Exporting the statistics of ChunkerStats and the spans of ChunkTracer, shared by the Cython and the pure-Python implementations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pyfastcdc.common import TraceSpan
+
+
+def _escape_prometheus_label(value: str) -> str:
+	return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_chunker_stats_prometheus(stats: Dict[str, Any], prefix: str, labels: Optional[Dict[str, str]]) -> str:
+	base_labels = [f'{k}="{_escape_prometheus_label(str(v))}"' for k, v in (labels or {}).items()]
+	lines = []
+
+	def add_metric(name: str, metric_type: str, help_text: str, samples: List[Tuple[str, List[str], Union[int, float]]]):
+		lines.append(f'# HELP {prefix}_{name} {help_text}')
+		lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+		for suffix, extra_labels, value in samples:
+			label_str = ','.join(base_labels + extra_labels)
+			lines.append(f'{prefix}_{name}{suffix}{{{label_str}}} {value}' if label_str else f'{prefix}_{name}{suffix} {value}')
+
+	# the upper bounds of log2 buckets are powers of 2, in seconds for durations in ns
+	def histogram_samples(buckets: List[int], in_ns: bool, total: Union[int, float]) -> List[Tuple[str, List[str], Union[int, float]]]:
+		samples = []
+		cumulative = 0
+		last_bucket = max((i for i, count in enumerate(buckets) if count > 0), default=-1)
+		for i in range(last_bucket + 1):
+			cumulative += buckets[i]
+			samples.append(('_bucket', [f'le="{(1 << i) / 1e9 if in_ns else 1 << i}"'], cumulative))
+		samples.append(('_bucket', ['le="+Inf"'], cumulative))
+		samples.append(('_sum', [], total))
+		samples.append(('_count', [], cumulative))
+		return samples
+
+	add_metric('chunks_total', 'counter', 'Chunks created', [('', [], stats['chunk_count'])])
+	add_metric('chunk_bytes_total', 'counter', 'Bytes of the chunks created', [('', [], stats['total_bytes'])])
+	add_metric('cuts_total', 'counter', 'Chunks created, by the reason of the cut', [
+		('', [f'reason="{reason}"'], count) for reason, count in stats['cut_counts'].items()
+	])
+	add_metric('chunk_size_bytes', 'histogram', 'Chunk sizes', histogram_samples(stats['chunk_size_histogram'], False, stats['total_bytes']))
+	add_metric('reads_total', 'counter', 'Reads from streams and block iterators', [('', [], stats['read_count'])])
+	add_metric('read_bytes_total', 'counter', 'Bytes read from streams and block iterators', [('', [], stats['read_bytes'])])
+	add_metric('read_duration_seconds', 'histogram', 'Durations of reads from streams and block iterators', histogram_samples(stats['read_time_histogram'], True, stats['read_ns'] / 1e9))
+	add_metric('copy_bytes_total', 'counter', 'Bytes copied inside chunkers, i.e. stream buffer compaction and block edge carries', [('', [], stats['copy_bytes'])])
+	add_metric('cut_seconds_total', 'counter', 'Time spent in the cut kernel', [('', [], stats['cut_ns'] / 1e9)])
+	add_metric('next_seconds_total', 'counter', 'Time spent in next() of chunkers, including reads and cuts', [('', [], stats['total_ns'] / 1e9)])
+	return '\n'.join(lines) + '\n'
+
+
+# the Trace Event Format of chrome://tracing and Perfetto, with one complete event per span
+def format_chrome_trace(spans: List[TraceSpan]) -> Dict[str, Any]:
+	pid = os.getpid()
+	thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+	events: List[Dict[str, Any]] = []
+	for thread_id in sorted({span.thread_id for span in spans}):
+		if thread_id in thread_names:
+			events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id, 'args': {'name': thread_names[thread_id]}})
+	for span in spans:
+		events.append({
+			'name': span.name,
+			'cat': 'pyfastcdc',
+			'ph': 'X',
+			'ts': span.start_ns / 1000,
+			'dur': (span.end_ns - span.start_ns) / 1000,
+			'pid': pid,
+			'tid': span.thread_id,
+			'args': {'size': span.size},
+		})
+	return {'traceEvents': events, 'displayTimeUnit': 'ns'}
+
+
+def save_chrome_trace(spans: List[TraceSpan], file_path: Union[str, bytes, Path]):
+	with open(file_path, 'w', encoding='utf8') as f:
+		json.dump(format_chrome_trace(spans), f)
@@ -0,0 +1,156 @@
+import collections
+import threading
+from typing import Callable, Deque, Generic, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from pyfastcdc.common import ChunkLike
+from pyfastcdc.py.chunk import Chunk as _PyChunk
+
+try:
+	from pyfastcdc.cy.chunk import Chunk as _CyChunk
+	_CHUNK_TYPES: Tuple[type, ...] = (_PyChunk, _CyChunk)
+except ImportError:
+	_CHUNK_TYPES = (_PyChunk,)
+
+_T = TypeVar('_T')
+
+
+# Shared by the producer thread and the consumer. The producer thread does not reference the consumer,
+# so the consumer can still be garbage collected (and then stop the producer) while the producer is blocked
+class _QueueState(Generic[_T]):
+	def __init__(self, max_items: int, max_bytes: Optional[int]):
+		self.max_items = max_items
+		self.max_bytes = max_bytes
+		self.cond = threading.Condition()
+		self.queue: Deque[_T] = collections.deque()
+		self.queued_bytes = 0
+		self.done = False
+		self.closed = False
+		self.error: Optional[BaseException] = None
+
+	def is_full(self, item_size: int) -> bool:
+		if len(self.queue) == 0:
+			return False  # always accept an item, even if it's larger than max_bytes
+		if len(self.queue) >= self.max_items:
+			return True
+		return self.max_bytes is not None and self.queued_bytes + item_size > self.max_bytes
+
+
+def _produce(state: _QueueState[_T], source: Iterable[_T], size_func: Callable[[_T], int], copy_func: Optional[Callable[[_T], _T]]):
+	try:
+		for item in source:
+			if copy_func is not None:
+				item = copy_func(item)
+			item_size = size_func(item)
+			with state.cond:
+				while not state.closed and state.is_full(item_size):
+					state.cond.wait()
+				if state.closed:
+					break
+				state.queue.append(item)
+				state.queued_bytes += item_size
+				state.cond.notify_all()
+	except BaseException as e:
+		with state.cond:
+			state.error = e
+	finally:
+		close_func = getattr(source, 'close', None)
+		if callable(close_func):
+			try:
+				close_func()
+			except Exception:
+				pass
+		with state.cond:
+			state.done = True
+			state.cond.notify_all()
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class BackgroundIterator(Iterator[_T]):
+	def __init__(
+			self,
+			source: Iterable[_T],
+			*,
+			max_items: int,
+			max_bytes: Optional[int],
+			size_func: Callable[[_T], int],
+			copy_func: Optional[Callable[[_T], _T]] = None,
+			thread_name: str = 'pyfastcdc-background',
+	):
+		self.__state: _QueueState[_T] = _QueueState(max_items, max_bytes)
+		if max_items <= 0:
+			raise ValueError(f'max_items {max_items} should be positive')
+		if max_bytes is not None and max_bytes <= 0:
+			raise ValueError(f'max_bytes {max_bytes} should be positive')
+		self.__size_func = size_func
+		self.__thread = threading.Thread(target=_produce, args=(self.__state, source, size_func, copy_func), name=thread_name, daemon=True)
+		self.__thread.start()
+
+	def __next__(self) -> _T:
+		state = self.__state
+		with state.cond:
+			while len(state.queue) == 0 and not state.done:
+				state.cond.wait()
+			if len(state.queue) == 0:
+				if state.error is not None:
+					error, state.error = state.error, None
+					raise error
+				raise StopIteration()
+			item = state.queue.popleft()
+			state.queued_bytes -= self.__size_func(item)
+			state.cond.notify_all()
+		return item
+
+	def close(self):
+		state = self.__state
+		with state.cond:
+			state.closed = True
+			state.queue.clear()
+			state.queued_bytes = 0
+			state.cond.notify_all()
+		if self.__thread is not threading.current_thread():
+			self.__thread.join()
+
+	def __enter__(self) -> 'BackgroundIterator[_T]':
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def __del__(self):
+		# don't join here, the producer thread stops by itself after its current item
+		state = self.__state
+		with state.cond:
+			state.closed = True
+			state.cond.notify_all()
+
+
+_ChunkT = TypeVar('_ChunkT', bound=ChunkLike)
+
+
+def _copy_chunk(chunk: _ChunkT) -> _ChunkT:
+	if not isinstance(chunk, _CHUNK_TYPES):
+		raise TypeError(f'cannot copy the data of {type(chunk).__name__}, provide a copy_func, or set copy_data to False')
+	return type(chunk)(chunk.offset, chunk.length, memoryview(bytes(chunk.data)), chunk.gear_hash, chunk.fingerprint, chunk.sketch)
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+def prefetch_chunks(
+		chunks: Iterable[_ChunkT],
+		*,
+		max_chunks: int = 64,
+		max_bytes: Optional[int] = None,
+		copy_data: bool = True,
+		copy_func: Optional[Callable[[_ChunkT], _ChunkT]] = None,
+) -> BackgroundIterator[_ChunkT]:
+	if not copy_data:
+		copy_func = None
+	elif copy_func is None:
+		copy_func = _copy_chunk
+	return BackgroundIterator(
+		chunks,
+		max_items=max_chunks,
+		max_bytes=max_bytes,
+		size_func=lambda chunk: chunk.length,
+		copy_func=copy_func,
+		thread_name='pyfastcdc-prefetch',
+	)
@@ -0,0 +1,384 @@
+import argparse
+import array
+import json
+import math
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from pyfastcdc import AECDC, FastCDC, FastCDC2016, RAMCDC, __version__, cut_files_parallel, utils
+from pyfastcdc.manifest import ChunkManifest, ManifestEntry
+
+ALGORITHMS = {
+	'fastcdc': FastCDC,
+	'fastcdc2016': FastCDC2016,
+	'ae': AECDC,
+	'ram': RAMCDC,
+}
+MANIFEST_FORMAT = 'pyfastcdc-manifest'
+MANIFEST_VERSION = 1
+# binary manifest: magic, uint32 header size, JSON header, then the length (uint64) and digest of each chunk of each file
+BINARY_MANIFEST_MAGIC = b'PFCDCMF\x01'
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+	# 65536, 64K, 64KiB, 1M, ...
+	value = text.strip().upper()
+	for suffix in ['IB', 'B']:
+		if value.endswith(suffix) and len(value) > len(suffix):
+			value = value[:-len(suffix)]
+			break
+	unit = value[-1:] if value[-1:] in _SIZE_UNITS else ''
+	try:
+		number = int(value[:len(value) - len(unit)])
+	except ValueError:
+		raise argparse.ArgumentTypeError(f'invalid size {text!r}') from None
+	return number * _SIZE_UNITS[unit]
+
+
+class InputFile(NamedTuple):
+	path: Path  # the path to read
+	name: str  # the path stored in manifests, relative to the directory given on the command line
+
+
+def collect_files(paths: Sequence[Path]) -> List[InputFile]:
+	files: List[InputFile] = []
+	for path in paths:
+		if path.is_dir():
+			for root, dir_names, file_names in os.walk(path):
+				dir_names.sort()
+				for file_name in sorted(file_names):
+					file_path = Path(root) / file_name
+					if file_path.is_file():
+						files.append(InputFile(file_path, file_path.relative_to(path).as_posix()))
+		elif path.is_file():
+			files.append(InputFile(path, path.as_posix()))
+		else:
+			raise FileNotFoundError(f'{path} is not a regular file or a directory')
+
+	# manifest entries are matched by name, so 2 input files must not share one
+	file_paths: Dict[str, Path] = {}
+	for file in files:
+		if file.name in file_paths:
+			raise ValueError(f'{file_paths[file.name]} and {file.path} are both stored as {file.name}')
+		file_paths[file.name] = file.path
+	return files
+
+
+def create_fastcdc(args: argparse.Namespace) -> FastCDC:
+	kwargs: Dict[str, Any] = {'min_size': args.min_size, 'max_size': args.max_size}
+	if args.normalized_chunking is not None or args.seed is not None:
+		if args.algorithm != 'fastcdc':
+			raise ValueError('--normalized-chunking and --seed are parameters of the fastcdc algorithm only')
+		if args.normalized_chunking is not None:
+			kwargs['normalized_chunking'] = args.normalized_chunking
+		if args.seed is not None:
+			kwargs['seed'] = args.seed
+	cls = ALGORITHMS[args.algorithm]
+	return cls(args.avg_size, **kwargs) if args.avg_size is not None else cls(**kwargs)
+
+
+def get_fastcdc_params(algorithm: str, cdc: FastCDC) -> Dict[str, Any]:
+	return {
+		'algorithm': algorithm,
+		'avg_size': cdc.avg_size,
+		'min_size': cdc.min_size,
+		'max_size': cdc.max_size,
+		'normalized_chunking': cdc.normalized_chunking,
+		'seed': cdc.seed,
+	}
+
+
+class ChunkedFile(NamedTuple):
+	name: str
+	manifest: ChunkManifest
+
+
+class ManifestFile(NamedTuple):
+	params: Dict[str, Any]
+	hash_name: str
+	files: List[ChunkedFile]
+
+
+def chunk_files(cdc: FastCDC, files: List[InputFile], hash_name: str, max_workers: Optional[int]) -> Iterator[ChunkedFile]:
+	boundaries_iter = cut_files_parallel(cdc, [file.path for file in files], hash_name=hash_name, max_workers=max_workers)
+	for file, boundaries in zip(files, boundaries_iter):
+		yield ChunkedFile(file.name, boundaries.to_manifest())
+
+
+def save_manifest(manifest_file: ManifestFile, output_path: Path, binary: bool):
+	header: Dict[str, Any] = {
+		'format': MANIFEST_FORMAT,
+		'version': MANIFEST_VERSION,
+		'params': manifest_file.params,
+		'hash_name': manifest_file.hash_name,
+	}
+	if not binary:
+		header['files'] = [
+			{
+				'path': file.name,
+				'size': file.manifest.total_size,
+				'chunks': [[entry.offset, entry.length, entry.digest.hex()] for entry in file.manifest],
+			}
+			for file in manifest_file.files
+		]
+		output_path.write_text(json.dumps(header, indent=1), encoding='utf8')
+		return
+
+	header['files'] = [{'path': file.name, 'size': file.manifest.total_size, 'chunk_count': len(file.manifest)} for file in manifest_file.files]
+	header_bytes = json.dumps(header).encode('utf8')
+	with open(output_path, 'wb') as f:
+		f.write(BINARY_MANIFEST_MAGIC)
+		f.write(struct.pack('<I', len(header_bytes)))
+		f.write(header_bytes)
+		for file in manifest_file.files:
+			for entry in file.manifest:
+				f.write(struct.pack('<Q', entry.length))
+				f.write(entry.digest)
+
+
+def load_manifest(input_path: Path) -> ManifestFile:
+	with open(input_path, 'rb') as f:
+		content = f.read()
+
+	pos = 0
+	if content.startswith(BINARY_MANIFEST_MAGIC):
+		pos = len(BINARY_MANIFEST_MAGIC)
+		header_size, = struct.unpack_from('<I', content, pos)
+		pos += 4
+		header = json.loads(content[pos:pos + header_size].decode('utf8'))
+		pos += header_size
+	else:
+		header = json.loads(content.decode('utf8'))
+	if header.get('format') != MANIFEST_FORMAT or header.get('version') != MANIFEST_VERSION:
+		raise ValueError(f'{input_path} is not a pyfastcdc manifest of version {MANIFEST_VERSION}')
+
+	hash_name = header['hash_name']
+	digest_size = len(utils.create_hash_func(hash_name)(memoryview(b'')))
+	files: List[ChunkedFile] = []
+	for file in header['files']:
+		manifest = ChunkManifest(hash_name=hash_name)
+		if 'chunks' in file:
+			for offset, length, digest in file['chunks']:
+				manifest.append(ManifestEntry(offset, length, bytes.fromhex(digest)))
+		else:
+			for _ in range(file['chunk_count']):
+				length, = struct.unpack_from('<Q', content, pos)
+				digest = content[pos + 8:pos + 8 + digest_size]
+				if len(digest) != digest_size:
+					raise ValueError(f'{input_path} is truncated')
+				manifest.append(ManifestEntry(manifest.total_size, length, digest))
+				pos += 8 + digest_size
+		if manifest.total_size != file['size']:
+			raise ValueError(f'the chunks of {file["path"]} in {input_path} do not add up to its size')
+		files.append(ChunkedFile(file['path'], manifest))
+	return ManifestFile(header['params'], hash_name, files)
+
+
+def compute_size_distribution(lengths: 'array.array[int]') -> Dict[str, float]:
+	if len(lengths) == 0:
+		return {}
+	sorted_lengths = sorted(lengths)
+	mean = sum(sorted_lengths) / len(sorted_lengths)
+
+	def percentile(p: float) -> int:
+		# the nearest-rank method
+		return sorted_lengths[max(0, math.ceil(p / 100 * len(sorted_lengths)) - 1)]
+
+	return {
+		'mean': round(mean, 3),
+		'stdev': round(math.sqrt(sum((length - mean) ** 2 for length in sorted_lengths) / len(sorted_lengths)), 3),
+		'min': sorted_lengths[0],
+		'p5': percentile(5),
+		'p50': percentile(50),
+		'p95': percentile(95),
+		'max': sorted_lengths[-1],
+	}
+
+
+def compute_dedup_stats(files: List[ChunkedFile]) -> Dict[str, Any]:
+	lengths = array.array('Q')
+	unique_lengths: Dict[bytes, int] = {}
+	for file in files:
+		for entry in file.manifest:
+			lengths.append(entry.length)
+			unique_lengths[entry.digest] = entry.length
+	total_bytes = sum(lengths)
+	unique_bytes = sum(unique_lengths.values())
+	return {
+		'file_count': len(files),
+		'total_bytes': total_bytes,
+		'chunk_count': len(lengths),
+		'unique_chunk_count': len(unique_lengths),
+		'unique_bytes': unique_bytes,
+		'dedup_ratio': round(total_bytes / unique_bytes, 6) if unique_bytes > 0 else 1.0,
+		'chunk_size': compute_size_distribution(lengths),
+	}
+
+
+def format_bytes(size: float) -> str:
+	if size < 1024:
+		return f'{int(size)} B'
+	for unit in ['KiB', 'MiB', 'GiB']:
+		size /= 1024
+		if size < 1024:
+			break
+	return f'{size:.2f} {unit}'
+
+
+def format_throughput(total_bytes: int, seconds: float) -> str:
+	mib_per_sec = total_bytes / 1024 / 1024 / seconds if seconds > 0 else float('inf')
+	return f'{seconds:.3f}s, {mib_per_sec:.2f} MiB/s'
+
+
+def command_chunk(args: argparse.Namespace) -> int:
+	cdc = create_fastcdc(args)
+	files = collect_files(args.paths)
+	start = time.perf_counter()
+	manifest_file = ManifestFile(get_fastcdc_params(args.algorithm, cdc), args.hash, list(chunk_files(cdc, files, args.hash, args.workers)))
+	elapsed = time.perf_counter() - start
+
+	binary = args.format == 'binary' if args.format is not None else args.output.suffix.lower() != '.json'
+	save_manifest(manifest_file, args.output, binary)
+	total_bytes = sum(file.manifest.total_size for file in manifest_file.files)
+	chunk_count = sum(len(file.manifest) for file in manifest_file.files)
+	print(f'Chunked {len(files)} files, {format_bytes(total_bytes)} into {chunk_count} chunks in {format_throughput(total_bytes, elapsed)}')
+	print(f'Saved the {"binary" if binary else "JSON"} manifest to {args.output}')
+	return 0
+
+
+def print_dedup_stats(stats: Dict[str, Any]):
+	print(f'Files:          {stats["file_count"]}')
+	print(f'Total size:     {format_bytes(stats["total_bytes"])} ({stats["total_bytes"]} bytes)')
+	print(f'Chunks:         {stats["chunk_count"]} ({stats["unique_chunk_count"]} unique)')
+	print(f'Unique size:    {format_bytes(stats["unique_bytes"])} ({stats["unique_bytes"]} bytes)')
+	print(f'Dedup ratio:    {stats["dedup_ratio"]:.4f} ({(1 - 1 / stats["dedup_ratio"]) * 100:.2f}% saved)')
+	if stats['chunk_size']:
+		print('Chunk size:     ' + ', '.join(f'{key} {value:g}' for key, value in stats['chunk_size'].items()))
+	if 'seconds' in stats:
+		print(f'Time:           {format_throughput(stats["total_bytes"], stats["seconds"])}')
+
+
+def command_stats(args: argparse.Namespace) -> int:
+	cdc = create_fastcdc(args)
+	files = collect_files(args.paths)
+	start = time.perf_counter()
+	chunked_files = list(chunk_files(cdc, files, args.hash, args.workers))
+	elapsed = time.perf_counter() - start
+
+	stats = compute_dedup_stats(chunked_files)
+	stats['seconds'] = round(elapsed, 6)
+	stats['params'] = get_fastcdc_params(args.algorithm, cdc)
+	if args.json:
+		print(json.dumps(stats, indent=2))
+	else:
+		print_dedup_stats(stats)
+	return 0
+
+
+def command_diff(args: argparse.Namespace) -> int:
+	old = load_manifest(args.old)
+	new = load_manifest(args.new)
+	if old.params != new.params or old.hash_name != new.hash_name:
+		print(f'Warning: the manifests are created with different parameters, so few chunks can match: {old.params} {old.hash_name} vs {new.params} {new.hash_name}', file=sys.stderr)
+
+	old_digests = {entry.digest for file in old.files for entry in file.manifest}
+	old_files = {file.name: file.manifest for file in old.files}
+	new_files = {file.name: file.manifest for file in new.files}
+
+	new_bytes = 0
+	reused_bytes = 0
+	transferred: Dict[bytes, int] = {}  # new chunks, each one stored once
+	changed_files: List[Tuple[str, int, int]] = []
+	for file in new.files:
+		file_new_bytes = 0
+		for entry in file.manifest:
+			new_bytes += entry.length
+			if entry.digest in old_digests:
+				reused_bytes += entry.length
+			else:
+				file_new_bytes += entry.length
+				transferred[entry.digest] = entry.length
+		old_manifest = old_files.get(file.name)
+		if old_manifest is None or [e.digest for e in old_manifest] != [e.digest for e in file.manifest]:
+			changed_files.append((file.name, file.manifest.total_size, file_new_bytes))
+	removed_files = [name for name in old_files.keys() if name not in new_files]
+
+	result = {
+		'old_bytes': sum(file.manifest.total_size for file in old.files),
+		'new_bytes': new_bytes,
+		'reused_bytes': reused_bytes,
+		'changed_bytes': new_bytes - reused_bytes,
+		'transfer_bytes': sum(transferred.values()),
+		'added_files': sorted(name for name in new_files.keys() if name not in old_files),
+		'removed_files': sorted(removed_files),
+		'changed_files': sorted(name for name, _, _ in changed_files if name in old_files),
+	}
+	if args.json:
+		print(json.dumps(result, indent=2))
+		return 0
+
+	print(f'Old size:       {format_bytes(result["old_bytes"])} in {len(old.files)} files')
+	print(f'New size:       {format_bytes(new_bytes)} in {len(new.files)} files')
+	if new_bytes > 0:
+		print(f'Reused:         {format_bytes(reused_bytes)} ({reused_bytes / new_bytes * 100:.2f}% of the new size)')
+	print(f'To transfer:    {format_bytes(result["transfer_bytes"])} of new unique chunks')
+	print(f'Files:          {len(result["added_files"])} added, {len(result["removed_files"])} removed, {len(result["changed_files"])} changed')
+	for name, size, file_new_bytes in changed_files:
+		print(f'  {"+" if name not in old_files else "M"} {name}: {format_bytes(file_new_bytes)} new of {format_bytes(size)}')
+	for name in result['removed_files']:
+		print(f'  - {name}')
+	return 0
+
+
+def add_fastcdc_arguments(parser: argparse.ArgumentParser):
+	group = parser.add_argument_group('chunking parameters')
+	group.add_argument('-a', '--algorithm', choices=list(ALGORITHMS.keys()), default='fastcdc', help='The chunking algorithm')
+	group.add_argument('--avg-size', type=parse_size, default=None, help='The average chunk size, e.g. 65536 or 64K. Default: the default of the algorithm')
+	group.add_argument('--min-size', type=parse_size, default=None, help='The minimum chunk size. Default: the default of the algorithm')
+	group.add_argument('--max-size', type=parse_size, default=None, help='The maximum chunk size. Default: the default of the algorithm')
+	group.add_argument('--normalized-chunking', '--nc', type=int, choices=[0, 1, 2, 3], default=None, help='The normalized chunking level of fastcdc. Default: 1')
+	group.add_argument('--seed', type=int, default=None, help='The gear table seed of fastcdc. Default: 0')
+	group.add_argument('--hash', default='sha256', help='The hashlib algorithm of chunk digests')
+	group.add_argument('-j', '--workers', type=int, default=None, help='The number of worker processes. Default: the CPU count')
+
+
+def create_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(prog='python -m pyfastcdc', description='Content-defined chunking with FastCDC')
+	parser.add_argument('--version', action='version', version=f'pyfastcdc {__version__}')
+	subparsers = parser.add_subparsers(dest='command', metavar='command')
+	subparsers.required = True
+
+	chunk_parser = subparsers.add_parser('chunk', help='Chunk files or directory trees in parallel into a manifest')
+	chunk_parser.add_argument('paths', type=Path, nargs='+', help='Files or directories to chunk. Files in directories are stored relative to the directory, and the stored names must be unique')
+	chunk_parser.add_argument('-o', '--output', type=Path, required=True, help='The manifest file to write')
+	chunk_parser.add_argument('--format', choices=['json', 'binary'], default=None, help='The manifest format. Default: json if the output ends with .json, otherwise binary')
+	add_fastcdc_arguments(chunk_parser)
+	chunk_parser.set_defaults(func=command_chunk)
+
+	stats_parser = subparsers.add_parser('stats', help='Report the dedup ratio and the chunk size distribution of files or directory trees')
+	stats_parser.add_argument('paths', type=Path, nargs='+', help='Files or directories to analyze')
+	stats_parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+	add_fastcdc_arguments(stats_parser)
+	stats_parser.set_defaults(func=command_stats)
+
+	diff_parser = subparsers.add_parser('diff', help='Compare two manifests, e.g. to estimate the transfer size of a new backup')
+	diff_parser.add_argument('old', type=Path, help='The old manifest')
+	diff_parser.add_argument('new', type=Path, help='The new manifest')
+	diff_parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+	diff_parser.set_defaults(func=command_diff)
+	return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = create_parser()
+	args = parser.parse_args(argv)
+	try:
+		return args.func(args)
+	except (OSError, ValueError) as e:
+		print(f'Error: {e}', file=sys.stderr)
+		return 1
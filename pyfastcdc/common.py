@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Callable, Iterable, NamedTuple, Optional, Tuple, Union
 
 from typing_extensions import Literal, Protocol
 
@@ -12,4 +12,39 @@ class _BinaryStreamReaderWithReadinto(Protocol):
 
 
 BinaryStreamReader = Union[_BinaryStreamReaderWithRead, _BinaryStreamReaderWithReadinto]
+
+
+class BinaryStreamWriter(Protocol):
+	def write(self, b: Union[bytes, memoryview]) -> Optional[int]: ...
+
+
+class ObjectStore(Protocol):
+	def put_object(self, key: str, data: bytes) -> None: ...
+
+
 NormalizedChunking = Literal[0, 1, 2, 3]
+
+Sketch = Tuple[int, int, int]
+
+Boundaries = Union[Iterable[int], Callable[[int], Optional[int]]]
+
+CompressionCodec = Literal['gzip', 'bz2', 'lzma', 'zlib']
+
+
+class ChunkLike(Protocol):
+	@property
+	def offset(self) -> int: ...
+
+	@property
+	def length(self) -> int: ...
+
+	@property
+	def data(self) -> memoryview: ...
+
+
+class TraceSpan(NamedTuple):
+	name: str
+	thread_id: int
+	start_ns: int
+	end_ns: int
+	size: int
@@ -0,0 +1,124 @@
+import bz2
+import lzma
+import os
+import zlib
+from typing import Any, BinaryIO, Iterator, Optional, Union
+
+from pyfastcdc import utils
+from pyfastcdc.background import BackgroundIterator
+from pyfastcdc.common import BinaryStreamReader, CompressionCodec
+
+DECOMPRESS_QUEUE_BLOCKS = 4  # the amount of decompressed blocks buffered ahead of the chunker
+
+_CODECS = ('gzip', 'bz2', 'lzma', 'zlib')
+_MAGICS = (
+	(b'\x1f\x8b', 'gzip'),
+	(b'BZh', 'bz2'),
+	(b'\xfd7zXZ\x00', 'lzma'),
+)
+_MAGIC_MAX_LEN = max(len(magic) for magic, _ in _MAGICS)
+
+
+def _create_decompressor(codec: CompressionCodec) -> Any:
+	if codec == 'gzip':
+		return zlib.decompressobj(16 + zlib.MAX_WBITS)
+	elif codec == 'zlib':
+		return zlib.decompressobj()
+	elif codec == 'bz2':
+		return bz2.BZ2Decompressor()
+	else:
+		return lzma.LZMADecompressor()
+
+
+def _detect_codec(head: bytes) -> CompressionCodec:
+	for magic, codec in _MAGICS:
+		if head.startswith(magic):
+			return codec
+	raise ValueError('unknown compression format, the codec needs to be specified')
+
+
+def _read_blocks(stream: BinaryStreamReader, block_size: int) -> Iterator[Union[bytes, bytearray]]:
+	blocks = utils.create_read_iter(stream, block_size)
+	if blocks is not None:
+		yield from blocks
+		return
+
+	readinto_func = utils.create_readinto_func(stream)
+	while True:
+		buf = bytearray(block_size)
+		n = readinto_func(memoryview(buf))
+		if n == 0:
+			break
+		del buf[n:]
+		yield buf  # a new buffer per block, and the decompressors take bytearray as is, so no need to copy it
+
+
+def _chain_head(head: bytes, blocks: Iterator[Union[bytes, bytearray]]) -> Iterator[Union[bytes, bytearray]]:
+	yield head
+	yield from blocks
+
+
+def _decompress_blocks(stream: BinaryStreamReader, codec: Optional[CompressionCodec], block_size: int, file: Optional[BinaryIO]) -> Iterator[bytes]:
+	try:
+		compressed_blocks = _read_blocks(stream, block_size)
+		if codec is None:
+			head = b''
+			for data in compressed_blocks:
+				head += data
+				if len(head) >= _MAGIC_MAX_LEN:
+					break
+			if len(head) == 0:
+				return
+			codec = _detect_codec(head)
+			compressed_blocks = _chain_head(head, compressed_blocks)
+
+		decompressor = None
+		for data in compressed_blocks:
+			# bz2 and lzma keep the unconsumed input internally, until needs_input is set
+			while len(data) > 0 or (decompressor is not None and not decompressor.eof and not getattr(decompressor, 'needs_input', True)):
+				if decompressor is None or decompressor.eof:
+					if codec == 'gzip' and decompressor is not None:
+						# gzip files might be padded with zeros after a member, which gzip.open() skips too
+						data = bytes(data).lstrip(b'\x00')
+						if len(data) == 0:
+							break
+					decompressor = _create_decompressor(codec)  # the first stream, or the next one of concatenated streams
+				block = decompressor.decompress(data, block_size)
+				if decompressor.eof:
+					data = decompressor.unused_data
+				else:
+					data = getattr(decompressor, 'unconsumed_tail', b'')
+				if len(block) > 0:
+					yield block
+
+		if decompressor is not None and not decompressor.eof:
+			# zlib might hold some output of the fully consumed input
+			if hasattr(decompressor, 'flush'):
+				block = decompressor.flush()
+				if len(block) > 0:
+					yield block
+			if not decompressor.eof:
+				raise EOFError('compressed input ended before the end-of-stream marker was reached')
+	finally:
+		if file is not None:
+			file.close()
+
+
+def create_decompress_iter(source: Union[str, bytes, os.PathLike, BinaryStreamReader], codec: Optional[CompressionCodec], block_size: int) -> Iterator[bytes]:
+	if codec is not None and codec not in _CODECS:
+		raise ValueError(f'unsupported codec {codec!r}, should be one of {_CODECS}')
+
+	if isinstance(source, (str, bytes, os.PathLike)):
+		file = open(source, 'rb')
+		stream = file
+	else:
+		file = None
+		stream = source
+
+	return BackgroundIterator(
+		_decompress_blocks(stream, codec, block_size, file),
+		max_items=DECOMPRESS_QUEUE_BLOCKS,
+		max_bytes=None,
+		size_func=len,
+		thread_name='pyfastcdc-decompress',
+	)
@@ -1,7 +1,16 @@
-from pyfastcdc.cy.fastcdc import FastCDC
+from pyfastcdc.cy.bloom import BloomFilter
+from pyfastcdc.cy.fastcdc import AECDC, FastCDC, FastCDC2016, RAMCDC
 from pyfastcdc.cy.chunk import Chunk
+from pyfastcdc.cy.stats import ChunkerStats
+from pyfastcdc.cy.trace import ChunkTracer
 
 __all__ = [
+	'AECDC',
+	'BloomFilter',
 	'FastCDC',
+	'FastCDC2016',
+	'RAMCDC',
 	'Chunk',
+	'ChunkerStats',
+	'ChunkTracer',
 ]
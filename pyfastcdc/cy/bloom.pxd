@@ -0,0 +1,22 @@
+cimport cython
+from libc.stdint cimport uint8_t, uint32_t, uint64_t
+
+
+cdef class BloomFilter:
+	cdef object header
+	cdef object buf_obj
+	cdef object synced_mmap
+	cdef uint8_t[:] buf_view
+	cdef uint8_t* bits
+	cdef uint64_t num_bits
+	cdef uint32_t num_hashes
+	cdef uint64_t num_added
+	cdef cython.pymutex lock
+
+	cdef _setup(self, header, buf_obj, synced_mmap)
+	cdef int _ensure_open(self) except -1
+
+	# C-level API on raw keys, for other Cython extensions to cimport.
+	# The caller holds the lock, and checks that the filter is open, i.e. bits is not NULL, under it
+	cdef bint add_raw(self, const uint8_t* key, uint64_t key_size) noexcept nogil
+	cdef bint contains_raw(self, const uint8_t* key, uint64_t key_size) noexcept nogil
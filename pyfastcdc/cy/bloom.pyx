@@ -0,0 +1,204 @@
+import mmap
+from pathlib import Path
+from typing import List, Union
+
+from libc.stdint cimport uint8_t, uint32_t, uint64_t
+
+from pyfastcdc import _bloom_format, utils
+from pyfastcdc.cy.murmur3 cimport murmur3_x64_128
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+cdef class BloomFilter:
+	def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+		header = _bloom_format.create_bloom_filter_header(capacity, false_positive_rate)
+		buf = bytearray(_bloom_format.BLOOM_FILTER_HEADER_SIZE + header.bit_count // 8)
+		self._setup(header, buf, None)
+
+	@classmethod
+	def load(cls, file_path: Union[str, bytes, Path], *, writable: bool = False) -> BloomFilter:
+		mmap_obj, header = _bloom_format.mmap_bloom_filter_file(file_path, writable)
+		cdef BloomFilter bloom_filter = cls.__new__(cls)
+		bloom_filter._setup(header, mmap_obj, mmap_obj if writable else None)
+		return bloom_filter
+
+	cdef _setup(self, header, buf_obj, synced_mmap):
+		cdef uint64_t header_size = _bloom_format.BLOOM_FILTER_HEADER_SIZE
+		self.header = header
+		self.buf_obj = buf_obj
+		self.synced_mmap = synced_mmap
+		self.buf_view = buf_obj
+		self.bits = &self.buf_view[0] + header_size
+		self.num_bits = header.bit_count
+		self.num_hashes = header.hash_count
+		self.num_added = header.count
+
+	cdef int _ensure_open(self) except -1:
+		if self.bits == NULL:
+			raise ValueError('bloom filter is closed')
+		return 0
+
+	cdef bint add_raw(self, const uint8_t* key, uint64_t key_size) noexcept nogil:
+		cdef uint64_t hashes[2]
+		cdef uint64_t pos
+		cdef uint8_t mask
+		cdef bint added = False
+		cdef uint32_t i
+		murmur3_x64_128(key, key_size, 0, hashes)
+		for i in range(self.num_hashes):
+			pos = (hashes[0] + i * hashes[1]) % self.num_bits
+			mask = 1 << (pos & 7)
+			if not (self.bits[pos >> 3] & mask):
+				self.bits[pos >> 3] |= mask
+				added = True
+		if added:
+			self.num_added += 1
+		return added
+
+	cdef bint contains_raw(self, const uint8_t* key, uint64_t key_size) noexcept nogil:
+		cdef uint64_t hashes[2]
+		cdef uint64_t pos
+		cdef uint32_t i
+		murmur3_x64_128(key, key_size, 0, hashes)
+		for i in range(self.num_hashes):
+			pos = (hashes[0] + i * hashes[1]) % self.num_bits
+			if not (self.bits[pos >> 3] & (1 << (pos & 7))):
+				return False
+		return True
+
+	def add(self, key: Union[bytes, bytearray, memoryview]) -> bool:
+		cdef const uint8_t[:] key_view = utils.create_memoryview_from_buffer(key)
+		cdef const uint8_t* key_ptr = &key_view[0] if key_view.shape[0] > 0 else NULL
+		cdef bint added = False
+		cdef bint closed
+		with nogil:
+			self.lock.acquire()
+			closed = self.bits == NULL
+			if not closed:
+				added = self.add_raw(key_ptr, key_view.shape[0])
+			self.lock.release()
+		if closed:
+			self._ensure_open()
+		return added
+
+	def add_many(self, keys: Union[bytes, bytearray, memoryview], key_size: int) -> int:
+		cdef const uint8_t[:] keys_view = _split_keys(keys, key_size)
+		cdef uint64_t size = key_size
+		cdef uint64_t key_count = keys_view.shape[0] // size
+		cdef uint64_t added = 0
+		cdef uint64_t i
+		cdef bint closed
+		self._ensure_open()
+		if key_count == 0:
+			return 0
+		with nogil:
+			self.lock.acquire()
+			closed = self.bits == NULL
+			if not closed:
+				for i in range(key_count):
+					added += self.add_raw(&keys_view[0] + i * size, size)
+			self.lock.release()
+		if closed:
+			self._ensure_open()
+		return added
+
+	def __contains__(self, key: Union[bytes, bytearray, memoryview]) -> bool:
+		cdef const uint8_t[:] key_view = utils.create_memoryview_from_buffer(key)
+		cdef const uint8_t* key_ptr = &key_view[0] if key_view.shape[0] > 0 else NULL
+		cdef bint result = False
+		cdef bint closed
+		with nogil:
+			self.lock.acquire()
+			closed = self.bits == NULL
+			if not closed:
+				result = self.contains_raw(key_ptr, key_view.shape[0])
+			self.lock.release()
+		if closed:
+			self._ensure_open()
+		return result
+
+	def contains_many(self, keys: Union[bytes, bytearray, memoryview], key_size: int) -> List[bool]:
+		cdef const uint8_t[:] keys_view = _split_keys(keys, key_size)
+		cdef uint64_t size = key_size
+		cdef uint64_t key_count = keys_view.shape[0] // size
+		cdef bytearray results = bytearray(key_count)
+		cdef uint8_t[:] results_view = results
+		cdef uint64_t i
+		cdef bint closed
+		self._ensure_open()
+		if key_count == 0:
+			return []
+		with nogil:
+			self.lock.acquire()
+			closed = self.bits == NULL
+			if not closed:
+				for i in range(key_count):
+					results_view[i] = self.contains_raw(&keys_view[0] + i * size, size)
+			self.lock.release()
+		if closed:
+			self._ensure_open()
+		return [result != 0 for result in results]
+
+	def save(self, file_path: Union[str, bytes, Path]):
+		self._ensure_open()
+		with open(file_path, 'wb') as f:
+			f.write(_bloom_format.pack_bloom_filter_header(self._current_header()))
+			f.write(memoryview(self.buf_obj)[_bloom_format.BLOOM_FILTER_HEADER_SIZE:])
+
+	def flush(self):
+		if self.synced_mmap is not None:
+			self.buf_obj[:_bloom_format.BLOOM_FILTER_HEADER_SIZE] = _bloom_format.pack_bloom_filter_header(self._current_header())
+			self.synced_mmap.flush()
+
+	def close(self):
+		# the bits are read and written under the lock, so they must not be unmapped while the lock is held by others
+		self.lock.acquire()
+		try:
+			if isinstance(self.buf_obj, mmap.mmap) and not self.buf_obj.closed:
+				self.flush()
+				self.buf_view = None
+				self.bits = NULL
+				self.buf_obj.close()
+		finally:
+			self.lock.release()
+
+	def __enter__(self) -> BloomFilter:
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def _current_header(self):
+		return self.header._replace(count=self.num_added)
+
+	@property
+	def capacity(self) -> int:
+		return self.header.capacity
+
+	@property
+	def false_positive_rate(self) -> float:
+		return self.header.false_positive_rate
+
+	@property
+	def bit_count(self) -> int:
+		return self.num_bits
+
+	@property
+	def hash_count(self) -> int:
+		return self.num_hashes
+
+	@property
+	def count(self) -> int:
+		return self.num_added
+
+	def __repr__(self) -> str:
+		return f'<BloomFilter capacity={self.capacity} false_positive_rate={self.false_positive_rate} count={self.count}>'
+
+
+cdef memoryview _split_keys(keys, key_size: int):
+	keys = utils.create_memoryview_from_buffer(keys)
+	if key_size <= 0:
+		raise ValueError(f'key_size {key_size} should be positive')
+	if len(keys) % key_size != 0:
+		raise ValueError(f'the size of keys {len(keys)} is not a multiple of key_size {key_size}')
+	return keys
@@ -3,8 +3,14 @@ from libc.stdint cimport uint64_t
 cdef class Chunk:
     cdef readonly uint64_t offset
     cdef readonly uint64_t length
-    cdef readonly memoryview data
     cdef readonly uint64_t gear_hash
+    cdef readonly bytes fingerprint
+    cdef readonly tuple sketch
+
+    # the data view is sliced from data_base on first access, most consumers only read the offset and length
+    cdef memoryview data_view
+    cdef memoryview data_base
+    cdef uint64_t data_start
 
     @staticmethod
-    cdef Chunk _cy_create(uint64_t offset, uint64_t length, memoryview data, uint64_t gear_hash)
+    cdef Chunk _cy_create(uint64_t offset, uint64_t length, memoryview data_base, uint64_t data_start, uint64_t gear_hash, bytes fingerprint, tuple sketch)
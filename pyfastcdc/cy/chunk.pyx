@@ -1,21 +1,50 @@
+from typing import Optional
+
+from pyfastcdc.common import Sketch
+
+cimport cython
 from libc.stdint cimport uint64_t
 
 
+# chunks are usually dropped right after being consumed, so a small freelist saves most of the object allocations
+@cython.freelist(16)
 cdef class Chunk:
-    def __init__(self, offset: int, length: int, data: memoryview, gear_hash: int):
+    def __init__(self, offset: int, length: int, data: memoryview, gear_hash: int, fingerprint: Optional[bytes] = None, sketch: Optional[Sketch] = None):
         self.offset = offset
         self.length = length
-        self.data = data
+        self.data_view = data
         self.gear_hash = gear_hash
+        self.fingerprint = fingerprint
+        self.sketch = sketch
 
     @staticmethod
-    cdef Chunk _cy_create(uint64_t offset, uint64_t length, memoryview data, uint64_t gear_hash):
+    cdef Chunk _cy_create(uint64_t offset, uint64_t length, memoryview data_base, uint64_t data_start, uint64_t gear_hash, bytes fingerprint, tuple sketch):
         cdef Chunk c = Chunk.__new__(Chunk)
         c.offset = offset
         c.length = length
-        c.data = data
+        c.data_base = data_base
+        c.data_start = data_start
         c.gear_hash = gear_hash
+        c.fingerprint = fingerprint
+        c.sketch = sketch
         return c
 
+    @property
+    def data(self) -> memoryview:
+        # chunks might be read by multiple threads, the critical section is a no-op on regular builds
+        with cython.critical_section(self):
+            if self.data_view is None:
+                self.data_view = self.data_base[self.data_start:self.data_start + self.length]
+                self.data_base = None
+            return self.data_view
+
+    def __reduce__(self):
+        # memoryview is not picklable, the chunk data is copied into a bytes object instead
+        return _restore_chunk, (self.offset, self.length, bytes(self.data), self.gear_hash, self.fingerprint, self.sketch)
+
     def __repr__(self) -> str:
         return f'<Chunk offset={self.offset} length={self.length} gear_hash={self.gear_hash}>'
+
+
+def _restore_chunk(offset: int, length: int, data: bytes, gear_hash: int, fingerprint: Optional[bytes], sketch: Optional[Sketch]) -> Chunk:
+    return Chunk(offset, length, memoryview(data), gear_hash, fingerprint, sketch)
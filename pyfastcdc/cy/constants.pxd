@@ -1,5 +1,6 @@
 from libc.stdint cimport uint64_t
 
-cdef uint64_t[26] MASKS
+cdef uint64_t[31] MASKS
 cdef uint64_t[256] GEAR
 cdef uint64_t[256] GEAR_LS
+cdef uint64_t[256] GEAR_2016
@@ -0,0 +1,57 @@
+from libc.stdint cimport uint8_t, uint32_t, uint64_t
+
+# The C-level API of the FastCDC kernel, for other Cython extensions to cimport:
+#
+#     from pyfastcdc.cy.fastcdc cimport FastCDC, CutResult, cut_gear
+#
+# Plain C extensions can use the PyCapsule described in pyfastcdc/include/pyfastcdc.h instead.
+# Declarations in this file are kept backward compatible across minor versions
+
+
+# The chunking algorithm of a FastCDC instance, i.e. which class it is
+cdef enum:
+	ALGORITHM_FASTCDC = 0  # FastCDC 2020
+	ALGORITHM_FASTCDC_2016 = 1  # FastCDC2016
+	ALGORITHM_AE = 2  # AECDC
+	ALGORITHM_RAM = 3  # RAMCDC
+
+
+# The parameters of a FastCDC instance. They never change once the instance is initialized,
+# so they can be read without the GIL as long as the FastCDC instance is alive
+cdef struct FastCDCConfig:
+	uint32_t avg_size
+	uint32_t min_size
+	uint32_t max_size
+	uint8_t normalized_chunking
+	uint64_t seed
+	bint fingerprint
+	bint sketch
+	uint64_t mask_s
+	uint64_t mask_l
+	uint64_t mask_s_ls
+	uint64_t mask_l_ls
+	const uint64_t* gear
+	const uint64_t* gear_ls
+	uint8_t algorithm  # one of the ALGORITHM_* values
+	uint64_t center_size  # ALGORITHM_FASTCDC_2016 only, where the cut mask switches from mask_s to mask_l
+	uint64_t window_size  # ALGORITHM_AE and ALGORITHM_RAM only
+
+
+cdef struct CutResult:
+	uint64_t gear_hash  # the gear hash at the cut point, the same as Chunk.gear_hash
+	uint64_t cut_offset  # the length of the chunk that starts at the beginning of the buffer
+
+
+cdef class FastCDC:
+	cdef FastCDCConfig config
+	cdef uint64_t* gear_holder
+	cdef uint64_t* gear_holder_ls
+	cdef bint initialized
+	cdef object zero_chunk  # the chunk that a run of zeros starts with, computed on the first sparse cut
+
+
+# Finds the end of the chunk that starts at the beginning of the given buffer, with the algorithm of the config,
+# so FastCDC2016, AECDC and RAMCDC instances, which are FastCDC subclasses, are cut correctly too. At most max_size bytes are read.
+# The cut is final, unless cut_offset == buf_len < max_size, i.e. the chunk might be longer if more data follows.
+# Call it repeatedly with the buffer advanced by cut_offset to cut the whole input, like FastCDC.cut_buf() does
+cdef CutResult cut_gear(const FastCDCConfig* config, const uint8_t* buf, uint64_t buf_len) noexcept nogil
@@ -1,43 +1,55 @@
 from pathlib import Path
-from typing import Optional, Union, Iterator
+from typing import Optional, Union, Iterable, Iterator, List, Tuple
 
 import cython
+from cpython.bytes cimport PyBytes_FromStringAndSize
 from cpython.mem cimport PyMem_Malloc, PyMem_Free
-from libc.stdint cimport uint8_t, uint32_t, uint64_t
-from libc.string cimport memmove
+from cpython.pycapsule cimport PyCapsule_New
+from libc.stdint cimport uint8_t, uint32_t, uint64_t, UINT64_MAX
+from libc.string cimport memcmp, memmove
 
-from pyfastcdc import utils
-from pyfastcdc.common import BinaryStreamReader, NormalizedChunking
+from pyfastcdc import compression, utils
+from pyfastcdc.common import BinaryStreamReader, Boundaries, CompressionCodec, NormalizedChunking
 from pyfastcdc.cy.chunk cimport Chunk
-from pyfastcdc.cy.constants cimport GEAR, GEAR_LS, MASKS
+from pyfastcdc.cy.constants cimport GEAR, GEAR_2016, GEAR_LS, MASKS
+from pyfastcdc.cy.murmur3 cimport murmur3_x64_128
+from pyfastcdc.cy.sketch cimport SKETCH_SUPER_FEATURES, create_sketch
+from pyfastcdc.cy.stats cimport (
+	ChunkerStats, monotonic_ns,
+	CUT_REASON_MASK_S, CUT_REASON_MASK_L, CUT_REASON_EXTREMUM, CUT_REASON_MAX_SIZE, CUT_REASON_BOUNDARY, CUT_REASON_END, CUT_REASON_ZERO,
+)
+from pyfastcdc.cy.trace cimport ChunkTracer, SPAN_NEXT, SPAN_READ, SPAN_SCAN, SPAN_SHIFT, SPAN_YIELD
+from pyfastcdc.pool import BufferPool
 from pyfastcdc.utils import ReadintoFunc
 
-cdef struct _Config:
-	uint32_t avg_size
-	uint32_t min_size
-	uint32_t max_size
-	uint64_t mask_s
-	uint64_t mask_l
-	uint64_t mask_s_ls
-	uint64_t mask_l_ls
-	const uint64_t* gear
-	const uint64_t* gear_ls
+cdef extern from *:
+	"""
+	#ifdef Py_GIL_DISABLED
+	#define PYFASTCDC_FREE_THREADED 1
+	#else
+	#define PYFASTCDC_FREE_THREADED 0
+	#endif
+	"""
+	const bint FREE_THREADED "PYFASTCDC_FREE_THREADED"
 
+READ_ITER_BLOCK_SIZE_FACTOR = 4  # read() size of streams without readinto(), in the unit of max_size
+READ_ITER_BLOCK_SIZE_LIMIT = 64 * 1048576  # keep read() sizes reasonable for huge max_size, chunks across blocks are copied anyway
+STREAM_READ_SIZE_LIMIT = 64 * 1048576  # cut_stream() buffers max_size plus up to this many bytes
 
 cdef uint64_t MIN_SIZE_LOWER_BOUND = 64
 cdef uint64_t AVG_SIZE_LOWER_BOUND = 256
 cdef uint64_t MAX_SIZE_LOWER_BOUND = 1024
-cdef uint64_t MIN_SIZE_UPPER_BOUND = 1 * 1048576
-cdef uint64_t AVG_SIZE_UPPER_BOUND = 4 * 1048576
-cdef uint64_t MAX_SIZE_UPPER_BOUND = 16 * 1048576
+cdef uint64_t MIN_SIZE_UPPER_BOUND = 32 * 1048576
+cdef uint64_t AVG_SIZE_UPPER_BOUND = 128 * 1048576
+cdef uint64_t MAX_SIZE_UPPER_BOUND = 512 * 1048576
+
+
+cdef inline uint64_t _get_read_iter_block_size(const FastCDCConfig* config):
+	return min(<uint64_t>config.max_size * READ_ITER_BLOCK_SIZE_FACTOR, <uint64_t>READ_ITER_BLOCK_SIZE_LIMIT)
 
 
 # docstrings are in pyfastcdc/__init__.pyi
 cdef class FastCDC:
-	cdef _Config config
-	cdef uint64_t* gear_holder
-	cdef uint64_t* gear_holder_ls
-
 	def __init__(
 			self,
 			avg_size: int = 16384,
@@ -46,17 +58,22 @@ cdef class FastCDC:
 			max_size: Optional[int] = None,
 			normalized_chunking: NormalizedChunking = 1,
 			seed: int = 0,
+			fingerprint: bool = False,
+			sketch: bool = False,
 	):
+		# the config is shared with chunkers and read without holding any lock, so it must never change once initialized
+		if self.initialized:
+			raise RuntimeError('FastCDC instance is already initialized')
 		if min_size is None:
 			min_size = avg_size // 4
 		if max_size is None:
 			max_size = avg_size * 4
 		if not (AVG_SIZE_LOWER_BOUND <= avg_size <= AVG_SIZE_UPPER_BOUND):
-			raise ValueError(f'min_size {avg_size} is out of range [{AVG_SIZE_LOWER_BOUND}, {AVG_SIZE_UPPER_BOUND}]')
+			raise ValueError(f'avg_size {avg_size} is out of range [{AVG_SIZE_LOWER_BOUND}, {AVG_SIZE_UPPER_BOUND}]')
 		if not (MIN_SIZE_LOWER_BOUND <= min_size <= MIN_SIZE_UPPER_BOUND):
 			raise ValueError(f'min_size {min_size} is out of range [{MIN_SIZE_LOWER_BOUND}, {MIN_SIZE_UPPER_BOUND}]')
 		if not (MAX_SIZE_LOWER_BOUND <= max_size <= MAX_SIZE_UPPER_BOUND):
-			raise ValueError(f'min_size {max_size} is out of range [{MAX_SIZE_LOWER_BOUND}, {MAX_SIZE_UPPER_BOUND}]')
+			raise ValueError(f'max_size {max_size} is out of range [{MAX_SIZE_LOWER_BOUND}, {MAX_SIZE_UPPER_BOUND}]')
 		if not (min_size <= avg_size <= max_size):
 			raise ValueError(f'avg_size {avg_size} is out of range [{min_size}, {max_size}]')
 		if not (0 <= normalized_chunking <= 3):
@@ -65,6 +82,10 @@ cdef class FastCDC:
 		self.config.avg_size = avg_size
 		self.config.min_size = min_size
 		self.config.max_size = max_size
+		self.config.normalized_chunking = normalized_chunking
+		self.config.seed = seed
+		self.config.fingerprint = fingerprint
+		self.config.sketch = sketch
 
 		bits = avg_size.bit_length() - 1
 		self.config.mask_s = MASKS[bits + normalized_chunking]
@@ -87,6 +108,8 @@ cdef class FastCDC:
 			self.config.gear = self.gear_holder
 			self.config.gear_ls = self.gear_holder_ls
 
+		self.initialized = True
+
 	def __dealloc__(self):
 		if self.gear_holder:
 			PyMem_Free(self.gear_holder)
@@ -95,14 +118,35 @@ cdef class FastCDC:
 			PyMem_Free(self.gear_holder_ls)
 			self.gear_holder_ls = NULL
 
-	def cut_buf(self, buf: Union[bytes, bytearray, memoryview]) -> Iterator[Chunk]:
-		return BufferChunker(self, utils.create_memoryview_from_buffer(buf))
+	def __reduce__(self):
+		return utils.reconstruct, (type(self), (self.avg_size,), {
+			'min_size': self.min_size,
+			'max_size': self.max_size,
+			'normalized_chunking': self.normalized_chunking,
+			'seed': self.seed,
+			'fingerprint': self.fingerprint,
+			'sketch': self.sketch,
+		})
+
+	def cut_buf(self, buf: Union[bytes, bytearray, memoryview], *, boundaries: Optional[Boundaries] = None, sparse: bool = False, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		return BufferChunker(self, utils.create_memoryview_from_buffer(buf), boundaries, sparse, stats=stats, tracer=tracer)
 
-	def cut_file(self, file_path: Union[str, bytes, Path]) -> Iterator[Chunk]:
-		return FileMmapChunker(self, file_path)
+	def cut_file(self, file_path: Union[str, bytes, Path], *, boundaries: Optional[Boundaries] = None, sparse: bool = False, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		return FileMmapChunker(self, file_path, boundaries, sparse, stats, tracer)
 
-	def cut_stream(self, stream: BinaryStreamReader) -> Iterator[Chunk]:
-		return StreamChunker(self, utils.create_readinto_func(stream))
+	def cut_stream(self, stream: BinaryStreamReader, *, boundaries: Optional[Boundaries] = None, buffer_pool: Optional[BufferPool] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		if buffer_pool is None:
+			blocks = utils.create_read_iter(stream, _get_read_iter_block_size(&self.config))
+			if blocks is not None:
+				return IterChunker(self, blocks, boundaries, stats, tracer)
+		return StreamChunker(self, utils.create_readinto_func(stream), boundaries, buffer_pool, stats, tracer)
+
+	def cut_iter(self, blocks: Iterable[Union[bytes, bytearray, memoryview]], *, boundaries: Optional[Boundaries] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		return IterChunker(self, blocks, boundaries, stats, tracer)
+
+	def cut_compressed(self, source: Union[str, bytes, Path, BinaryStreamReader], *, codec: Optional[CompressionCodec] = None, boundaries: Optional[Boundaries] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		blocks = compression.create_decompress_iter(source, codec, _get_read_iter_block_size(&self.config))
+		return IterChunker(self, blocks, boundaries, stats, tracer)
 
 	@property
 	def avg_size(self) -> int:
@@ -116,19 +160,108 @@ cdef class FastCDC:
 	def max_size(self) -> int:
 		return self.config.max_size
 
+	@property
+	def normalized_chunking(self) -> NormalizedChunking:
+		return self.config.normalized_chunking
+
+	@property
+	def seed(self) -> int:
+		return self.config.seed
 
-cdef struct _CutResult:
-	uint64_t gear_hash
-	uint64_t cut_offset
+	@property
+	def fingerprint(self) -> bool:
+		return self.config.fingerprint
+
+	@property
+	def sketch(self) -> bool:
+		return self.config.sketch
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+cdef class FastCDC2016(FastCDC):
+	def __init__(
+			self,
+			avg_size: int = 8192,
+			*,
+			min_size: Optional[int] = None,
+			max_size: Optional[int] = None,
+			fingerprint: bool = False,
+			sketch: bool = False,
+	):
+		if max_size is None:
+			max_size = min(avg_size * 8, MAX_SIZE_UPPER_BOUND)
+		FastCDC.__init__(self, avg_size, min_size=min_size, max_size=max_size, normalized_chunking=0, fingerprint=fingerprint, sketch=sketch)
+		params = utils.get_fastcdc2016_params(self.config.avg_size, self.config.min_size, self.config.max_size)
+		self.config.algorithm = ALGORITHM_FASTCDC_2016
+		self.config.mask_s = params.mask_s
+		self.config.mask_l = params.mask_l
+		self.config.center_size = params.center_size
+		self.config.gear = GEAR_2016
+
+	def __reduce__(self):
+		return utils.reconstruct, (type(self), (self.avg_size,), {
+			'min_size': self.min_size,
+			'max_size': self.max_size,
+			'fingerprint': self.fingerprint,
+			'sketch': self.sketch,
+		})
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+cdef class AECDC(FastCDC):
+	def __init__(
+			self,
+			avg_size: int = 16384,
+			*,
+			min_size: Optional[int] = None,
+			max_size: Optional[int] = None,
+			fingerprint: bool = False,
+			sketch: bool = False,
+	):
+		FastCDC.__init__(self, avg_size, min_size=min_size, max_size=max_size, normalized_chunking=0, fingerprint=fingerprint, sketch=sketch)
+		self.config.algorithm = ALGORITHM_AE
+		self.config.window_size = utils.get_ae_window_size(self.config.avg_size, self.config.min_size)
+
+	def __reduce__(self):
+		return utils.reconstruct, (type(self), (self.avg_size,), {
+			'min_size': self.min_size,
+			'max_size': self.max_size,
+			'fingerprint': self.fingerprint,
+			'sketch': self.sketch,
+		})
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+cdef class RAMCDC(FastCDC):
+	def __init__(
+			self,
+			avg_size: int = 16384,
+			*,
+			min_size: Optional[int] = None,
+			max_size: Optional[int] = None,
+			fingerprint: bool = False,
+			sketch: bool = False,
+	):
+		FastCDC.__init__(self, avg_size, min_size=min_size, max_size=max_size, normalized_chunking=0, fingerprint=fingerprint, sketch=sketch)
+		self.config.algorithm = ALGORITHM_RAM
+		self.config.window_size = utils.get_ram_window_size(self.config.avg_size, self.config.min_size)
+
+	def __reduce__(self):
+		return utils.reconstruct, (type(self), (self.avg_size,), {
+			'min_size': self.min_size,
+			'max_size': self.max_size,
+			'fingerprint': self.fingerprint,
+			'sketch': self.sketch,
+		})
 
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.cdivision(True)
-cdef _CutResult _cut_gear(const _Config* config, const uint8_t* buf, uint64_t buf_len) noexcept nogil:
+cdef CutResult _cut_gear_2020(const FastCDCConfig* config, const uint8_t* buf, uint64_t buf_len) noexcept nogil:
 	cdef uint64_t remaining = buf_len
 	if remaining <= config.min_size:
-		return _CutResult(0, remaining)
+		return CutResult(0, remaining)
 	cdef uint64_t center = config.avg_size
 	if remaining > config.max_size:
 		remaining = config.max_size
@@ -151,155 +284,725 @@ cdef _CutResult _cut_gear(const _Config* config, const uint8_t* buf, uint64_t bu
 	for pos in range(start_pos, mid_pos, 2):
 		gear_hash = (gear_hash << 2) + gear_ls_ptr[buf[pos]]
 		if (gear_hash & mask_s_ls) == 0:
-			return _CutResult(gear_hash, pos)
+			return CutResult(gear_hash, pos)
 		gear_hash = gear_hash + gear_ptr[buf[pos + 1]]
 		if (gear_hash & mask_s) == 0:
-			return _CutResult(gear_hash, pos + 1)
+			return CutResult(gear_hash, pos + 1)
 
 	for pos in range(mid_pos, end_pos, 2):
 		gear_hash = ((gear_hash << 2) + gear_ls_ptr[buf[pos]])
 		if (gear_hash & mask_l_ls) == 0:
-			return _CutResult(gear_hash, pos)
+			return CutResult(gear_hash, pos)
 		gear_hash = gear_hash + gear_ptr[buf[pos + 1]]
 		if (gear_hash & mask_l) == 0:
-			return _CutResult(gear_hash, pos + 1)
+			return CutResult(gear_hash, pos + 1)
+
+	return CutResult(gear_hash, remaining)
+
+
+# FastCDC 2016 as iscc/fastcdc-py implements it: a 32-bit gear hash that shifts right, one byte per step
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef CutResult _cut_gear_2016(const FastCDCConfig* config, const uint8_t* buf, uint64_t buf_len) noexcept nogil:
+	cdef uint64_t remaining = buf_len
+	if remaining <= config.min_size:
+		return CutResult(0, remaining)
+	if remaining > config.max_size:
+		remaining = config.max_size
+	cdef uint64_t center = min(config.center_size, remaining)
+
+	cdef uint64_t pos = config.min_size
+	cdef uint64_t gear_hash = 0
+	cdef uint64_t mask_s = config.mask_s
+	cdef uint64_t mask_l = config.mask_l
+	cdef const uint64_t* gear_ptr = config.gear
+
+	while pos < center:
+		gear_hash = (gear_hash >> 1) + gear_ptr[buf[pos]]
+		if (gear_hash & mask_s) == 0:
+			return CutResult(gear_hash, pos + 1)
+		pos += 1
+	while pos < remaining:
+		gear_hash = (gear_hash >> 1) + gear_ptr[buf[pos]]
+		if (gear_hash & mask_l) == 0:
+			return CutResult(gear_hash, pos + 1)
+		pos += 1
+
+	return CutResult(gear_hash, remaining)
 
-	return _CutResult(gear_hash, remaining)
 
+# Asymmetric Extremum. The value at a position is its preceding 8 bytes as a big-endian uint64.
+# Cuts right after the first position that is window_size positions after the max value, without a greater value between them
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef CutResult _cut_ae(const FastCDCConfig* config, const uint8_t* buf, uint64_t buf_len) noexcept nogil:
+	cdef uint64_t remaining = buf_len
+	if remaining <= config.min_size:
+		return CutResult(0, remaining)
+	if remaining > config.max_size:
+		remaining = config.max_size
 
-cdef class BufferChunker:
+	cdef uint64_t window_size = config.window_size
+	cdef uint64_t pos = 0
+	cdef uint64_t value = 0
+	for pos in range(<uint64_t>config.min_size - 7, <uint64_t>config.min_size + 1):
+		value = (value << 8) | buf[pos]
+	cdef uint64_t max_value = value
+	cdef uint64_t max_pos = config.min_size
+
+	for pos in range(config.min_size + 1, remaining):
+		value = (value << 8) | buf[pos]
+		if value > max_value:
+			max_value = value
+			max_pos = pos
+		elif pos == max_pos + window_size:
+			return CutResult(0, pos + 1)
+
+	return CutResult(0, remaining)
+
+
+# Rapid Asymmetric Maximum. Cuts right after the first byte after the window that is not less than the max byte in the window
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef CutResult _cut_ram(const FastCDCConfig* config, const uint8_t* buf, uint64_t buf_len) noexcept nogil:
+	cdef uint64_t remaining = buf_len
+	if remaining <= config.min_size:
+		return CutResult(0, remaining)
+	if remaining > config.max_size:
+		remaining = config.max_size
+
+	cdef uint64_t window_end = min(config.min_size + config.window_size, remaining)
+	cdef uint64_t pos = 0
+	cdef uint8_t max_value = 0
+	for pos in range(config.min_size, window_end):
+		if buf[pos] > max_value:
+			max_value = buf[pos]
+			if max_value == 255:
+				break
+
+	for pos in range(window_end, remaining):
+		if buf[pos] >= max_value:
+			return CutResult(0, pos + 1)
+
+	return CutResult(0, remaining)
+
+
+# the kernel of the algorithm of the config. Inlined into the chunkers, while cut_gear() is the exported one
+cdef inline CutResult _cut(const FastCDCConfig* config, const uint8_t* buf, uint64_t buf_len) noexcept nogil:
+	if config.algorithm == ALGORITHM_FASTCDC:
+		return _cut_gear_2020(config, buf, buf_len)
+	elif config.algorithm == ALGORITHM_FASTCDC_2016:
+		return _cut_gear_2016(config, buf, buf_len)
+	elif config.algorithm == ALGORITHM_AE:
+		return _cut_ae(config, buf, buf_len)
+	else:
+		return _cut_ram(config, buf, buf_len)
+
+
+cdef CutResult cut_gear(const FastCDCConfig* config, const uint8_t* buf, uint64_t buf_len) noexcept nogil:
+	return _cut(config, buf, buf_len)
+
+
+# _cut(), plus adding the time spent in it to the stats and the tracer if any
+cdef inline CutResult _cut_observed(ChunkerStats stats, ChunkTracer tracer, const FastCDCConfig* config, const uint8_t* buf, uint64_t buf_len):
+	cdef CutResult res
+	cdef uint64_t start_ns
+	cdef uint64_t end_ns
+	if stats is None and tracer is None:
+		with nogil:
+			res = _cut(config, buf, buf_len)
+		return res
+	with nogil:
+		start_ns = monotonic_ns()
+		res = _cut(config, buf, buf_len)
+		end_ns = monotonic_ns()
+	if stats is not None:
+		stats._add_cut_time(end_ns - start_ns)
+	if tracer is not None:
+		tracer._add_span(SPAN_SCAN, start_ns, end_ns, res.cut_offset)
+	return res
+
+
+# Why the cut of the final _cut() call of a chunk happened, where cut_len is the buf_len passed to it.
+# A cut at the end of the scanned data is forced. A content-defined cut right there is rare, and counted as forced too
+cdef int _get_cut_reason(const FastCDCConfig* config, CutResult res, uint64_t cut_len, uint64_t limit) noexcept nogil:
+	cdef uint64_t center
+	if res.cut_offset >= min(cut_len, <uint64_t>config.max_size):
+		if res.cut_offset == limit:
+			return CUT_REASON_BOUNDARY
+		elif res.cut_offset == config.max_size:
+			return CUT_REASON_MAX_SIZE
+		return CUT_REASON_END
+
+	if config.algorithm == ALGORITHM_FASTCDC:
+		center = (min(<uint64_t>config.avg_size, cut_len) // 2) * 2
+		# the mask_s phase cuts before the center, and the mask_l phase cuts at or after it
+		if res.cut_offset < center:
+			return CUT_REASON_MASK_S
+		return CUT_REASON_MASK_L
+	elif config.algorithm == ALGORITHM_FASTCDC_2016:
+		return CUT_REASON_MASK_S if res.cut_offset <= min(config.center_size, cut_len) else CUT_REASON_MASK_L
+	else:
+		return CUT_REASON_EXTREMUM
+
+
+cdef bytes _create_fingerprint(const uint8_t* buf, uint64_t buf_len):
+	cdef uint64_t hashes[2]
+	cdef uint8_t result[16]
+	cdef int i
+	with nogil:
+		murmur3_x64_128(buf, buf_len, 0, hashes)
+		for i in range(8):
+			result[i] = <uint8_t>(hashes[0] >> (i * 8))
+			result[8 + i] = <uint8_t>(hashes[1] >> (i * 8))
+	return PyBytes_FromStringAndSize(<char*>result, 16)
+
+
+cdef tuple _create_sketch(const uint8_t* buf, uint64_t buf_len):
+	cdef uint64_t super_features[SKETCH_SUPER_FEATURES]
+	with nogil:
+		create_sketch(buf, buf_len, super_features)
+	return (super_features[0], super_features[1], super_features[2])
+
+
+# the chunk data is data_base[data_start:data_start + length], which is sliced lazily by the chunk
+cdef inline Chunk _create_chunk(const FastCDCConfig* config, uint64_t offset, memoryview data_base, uint64_t data_start, const uint8_t* data_ptr, uint64_t length, uint64_t gear_hash):
+	return Chunk._cy_create(
+		offset=offset,
+		length=length,
+		data_base=data_base,
+		data_start=data_start,
+		gear_hash=gear_hash,
+		fingerprint=_create_fingerprint(data_ptr, length) if config.fingerprint else None,
+		sketch=_create_sketch(data_ptr, length) if config.sketch else None,
+	)
+
+
+cdef class _BoundaryTracker:
+	cdef object next_boundary_func
+	cdef uint64_t next_boundary
+	cdef bint exhausted
+
+	def __init__(self, boundaries: Optional[Boundaries]):
+		self.next_boundary_func = utils.create_next_boundary_func(boundaries) if boundaries is not None else None
+		self.next_boundary = 0
+		self.exhausted = boundaries is None
+
+	# returns the max length of the chunk at the given offset so it won't cross the next forced boundary, or UINT64_MAX if no limit
+	cdef inline uint64_t get_limit(self, uint64_t offset) except? 0:
+		if self.exhausted:
+			return UINT64_MAX
+		if self.next_boundary <= offset:
+			boundary = self.next_boundary_func(offset)
+			if boundary is None:
+				self.exhausted = True
+				return UINT64_MAX
+			self.next_boundary = boundary
+		return self.next_boundary - offset
+
+
+# The chunk that a run of zeros starts with. The cut point of a chunk only depends on its own data,
+# so it's computed once per FastCDC instance. Its data is left empty, only the other fields are used
+cdef Chunk _get_zero_chunk(FastCDC fastcdc):
+	cdef bytes zeros
+	cdef const uint8_t* zeros_ptr
+	cdef CutResult res
+	with cython.critical_section(fastcdc):
+		if fastcdc.zero_chunk is None:
+			zeros = bytes(fastcdc.config.max_size)
+			zeros_ptr = zeros
+			res = _cut(&fastcdc.config, zeros_ptr, fastcdc.config.max_size)
+			fastcdc.zero_chunk = _create_chunk(&fastcdc.config, 0, memoryview(b''), 0, zeros_ptr, res.cut_offset, res.gear_hash)
+		return fastcdc.zero_chunk
+
+
+# Creates chunks that consist of zeros only without gear hashing, e.g. for holes of sparse files.
+# All zero chunks are cut at the same length, see _get_zero_chunk()
+cdef class _ZeroRegionScanner:
+	cdef object fastcdc
+	cdef const FastCDCConfig* config
+	cdef memoryview buf
+	cdef const uint8_t[:] buf_view
+	cdef list holes
+	cdef Py_ssize_t hole_index
+	cdef Chunk zero_chunk
+
+	def __init__(self, fastcdc: FastCDC, buf: memoryview, holes: List[Tuple[int, int]]):
+		self.fastcdc = fastcdc  # keep ref
+		self.config = &(<FastCDC>fastcdc).config
+		self.buf = buf
+		self.buf_view = buf
+		self.holes = holes
+		self.hole_index = 0
+		self.zero_chunk = _get_zero_chunk(fastcdc)
+
+	# returns None if the chunk at the given offset is not a zero chunk
+	cdef Chunk create_chunk(self, uint64_t offset, uint64_t avail_len):
+		cdef Chunk zero_chunk = self.zero_chunk
+		# the cut kernel of FastCDC steps 2 bytes at a time, so it needs 2 bytes after the zero chunk end
+		# to reach the same cut. With less bytes available, the chunk end might be cut differently.
+		# A cut before max_size is decided with the gear hash of the byte right after the chunk, which must be a zero too
+		if avail_len < zero_chunk.length + 2 and avail_len < self.config.max_size:
+			return None
+		cdef uint64_t end_pos = offset + zero_chunk.length
+		if not self._is_zero(offset, end_pos + 1 if zero_chunk.length < self.config.max_size else end_pos):
+			return None
+		return Chunk._cy_create(
+			offset=offset,
+			length=zero_chunk.length,
+			data_base=self.buf,
+			data_start=offset,
+			gear_hash=zero_chunk.gear_hash,
+			fingerprint=zero_chunk.fingerprint,
+			sketch=zero_chunk.sketch,
+		)
+
+	cdef bint _is_zero(self, uint64_t start, uint64_t end) except -1:
+		cdef list holes = self.holes
+		cdef uint64_t pos = start
+		cdef uint64_t scan_end
+		cdef const uint8_t* scan_ptr
+		cdef bint is_zero
+		while pos < end:
+			while self.hole_index < len(holes) and holes[self.hole_index][1] <= pos:
+				self.hole_index += 1
+			if self.hole_index < len(holes) and holes[self.hole_index][0] <= pos:
+				pos = holes[self.hole_index][1]  # holes are zeros, no need to read them
+				continue
+			scan_end = end if self.hole_index == len(holes) else min(end, <uint64_t>holes[self.hole_index][0])
+			scan_ptr = &self.buf_view[0] + pos
+			with nogil:
+				is_zero = scan_ptr[0] == 0 and memcmp(scan_ptr, scan_ptr + 1, scan_end - pos - 1) == 0
+			if not is_zero:
+				return False
+			pos = scan_end
+		return True
+
+
+# Chunkers are not meant to be shared between threads. Since __next__ releases the GIL while cutting,
+# a concurrent or re-entrant __next__ call is detected and rejected, like what generators do
+cdef class _Chunker:
+	cdef bint executing
+	cdef cython.pymutex lock
+	cdef ChunkerStats stats  # None if stats are not gathered
+	cdef ChunkTracer tracer  # None if not traced
+	cdef uint64_t last_return_ns  # when __next__() last returned, 0 if never, for the yield spans
+	cdef uint64_t last_length  # the length of the chunk last returned, for the yield spans
+
+	def __next__(self) -> Chunk:
+		self._enter()
+		try:
+			if self.stats is None and self.tracer is None:
+				return self._next()
+			return self._next_observed()
+		finally:
+			self._leave()
+
+	# _next(), plus adding the time spent in it, and in the consumer since the last call, to the stats and the tracer
+	cdef Chunk _next_observed(self):
+		cdef uint64_t start_ns = monotonic_ns()
+		cdef uint64_t end_ns
+		cdef Chunk chunk = None
+		if self.tracer is not None and self.last_return_ns != 0:
+			self.tracer._add_span(SPAN_YIELD, self.last_return_ns, start_ns, self.last_length)
+		try:
+			chunk = self._next()
+			return chunk
+		finally:
+			end_ns = monotonic_ns()
+			if self.stats is not None:
+				self.stats._add_total_time(end_ns - start_ns)
+			if self.tracer is not None:
+				self.last_return_ns = end_ns
+				self.last_length = chunk.length if chunk is not None else 0
+				self.tracer._add_span(SPAN_NEXT, start_ns, end_ns, self.last_length)
+
+	# the start time of an optional span, 0 if not traced
+	cdef inline uint64_t _span_start(self) noexcept:
+		return monotonic_ns() if self.tracer is not None else 0
+
+	cdef inline int _span_end(self, int span, uint64_t start_ns, uint64_t size) except -1:
+		if self.tracer is not None:
+			self.tracer._add_span(span, start_ns, monotonic_ns(), size)
+		return 0
+
+	# adds a read that started at start_ns to the stats and the tracer
+	cdef int _add_read(self, uint64_t start_ns, uint64_t n_read) except -1:
+		cdef uint64_t end_ns = monotonic_ns()
+		if self.stats is not None:
+			self.stats._add_read(n_read, end_ns - start_ns)
+		if self.tracer is not None:
+			self.tracer._add_span(SPAN_READ, start_ns, end_ns, n_read)
+		return 0
+
+	def __iter__(self):
+		return self
+
+	# implemented by subclasses. cdef methods cannot be abstract, so it fails at the first chunk instead
+	cdef Chunk _next(self):
+		raise NotImplementedError(f'{type(self).__name__} does not implement _next()')
+
+	cdef inline int _enter(self) except -1:
+		if FREE_THREADED:
+			self.lock.acquire()
+		try:
+			if self.executing:
+				raise ValueError('chunker already executing')
+			self.executing = True
+		finally:
+			if FREE_THREADED:
+				self.lock.release()
+		return 0
+
+	cdef inline void _leave(self) noexcept:
+		if FREE_THREADED:
+			self.lock.acquire()
+		self.executing = False
+		if FREE_THREADED:
+			self.lock.release()
+
+
+cdef class BufferChunker(_Chunker):
 	cdef object fastcdc
-	cdef const _Config * config
+	cdef const FastCDCConfig * config
 	cdef memoryview buf
 	cdef const uint8_t[:] buf_view
 	cdef uint64_t buf_capacity
 	cdef uint64_t offset
+	cdef _BoundaryTracker boundary_tracker
+	cdef _ZeroRegionScanner zero_scanner
 
-	def __init__(self, fastcdc: FastCDC, buf: memoryview):
+	def __init__(self, fastcdc: FastCDC, buf: memoryview, boundaries: Optional[Boundaries] = None, sparse: bool = False, holes: Optional[List[Tuple[int, int]]] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None):
 		self.fastcdc = fastcdc  # keep ref
 		self.config = &fastcdc.config
+		self.stats = stats
+		self.tracer = tracer
 		self.buf = buf
 		self.buf_view = buf
 		self.buf_capacity = len(buf)
 		self.offset = 0
+		self.boundary_tracker = _BoundaryTracker(boundaries)
+		self.zero_scanner = _ZeroRegionScanner(fastcdc, buf, holes or []) if sparse else None
 
-	def __next__(self) -> Chunk:
+	cdef Chunk _next(self):
 		if self.offset >= self.buf_capacity:
 			raise StopIteration()
 
 		cdef const uint8_t* remaining_buf = &self.buf_view[0] + self.offset
-		cdef uint64_t remaining_len = self.buf_capacity - self.offset
-		cdef _CutResult res
-		with nogil:
-			res = _cut_gear(self.config, remaining_buf, remaining_len)
-		cdef uint64_t end_pos = self.offset + res.cut_offset
-
-		chunk = Chunk._cy_create(
-			offset=self.offset,
-			length=res.cut_offset,
-			data=self.buf[self.offset:end_pos],
-			gear_hash=res.gear_hash,
-		)
+		cdef uint64_t limit = self.boundary_tracker.get_limit(self.offset)
+		cdef uint64_t remaining_len = min(self.buf_capacity - self.offset, limit)
+		cdef Chunk chunk
+		if self.zero_scanner is not None:
+			chunk = self.zero_scanner.create_chunk(self.offset, remaining_len)
+			if chunk is not None:
+				if self.stats is not None:
+					self.stats._add_chunk(chunk.length, CUT_REASON_ZERO)
+				self.offset += chunk.length
+				return chunk
+
+		cdef CutResult res = _cut_observed(self.stats, self.tracer, self.config, remaining_buf, remaining_len)
+		if self.stats is not None:
+			self.stats._add_chunk(res.cut_offset, _get_cut_reason(self.config, res, remaining_len, limit))
+
+		chunk = _create_chunk(self.config, self.offset, self.buf, self.offset, remaining_buf, res.cut_offset, res.gear_hash)
 		self.offset += res.cut_offset
 		return chunk
 
-	def __iter__(self):
-		return self
-
 
 cdef class FileMmapChunker(BufferChunker):
 	cdef object mmap_file
 
-	def __init__(self, fastcdc: FastCDC, file_path: Union[str, bytes, Path]):
-		self.mmap_file = utils.create_mmap_from_file(file_path)
-		BufferChunker.__init__(self, fastcdc, self.mmap_file.data)
+	def __init__(self, fastcdc: FastCDC, file_path: Union[str, bytes, Path], boundaries: Optional[Boundaries] = None, sparse: bool = False, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None):
+		self.mmap_file = utils.create_mmap_from_file(file_path, find_holes=sparse)
+		BufferChunker.__init__(self, fastcdc, self.mmap_file.data, boundaries, sparse, self.mmap_file.holes, stats, tracer)
 
 
-cdef class StreamChunker:
+cdef class StreamChunker(_Chunker):
 	cdef object fastcdc
-	cdef const _Config * config
+	cdef const FastCDCConfig * config
 	cdef object readinto_func
 	cdef uint64_t max_size
 
 	cdef uint64_t offset
 	cdef uint64_t last_chunk_len
 	cdef uint8_t eof
+	cdef bint closed
 
+	cdef object buffer_pool
 	cdef uint64_t buf_capacity
 	cdef bytearray buf_obj
 	cdef memoryview buf_obj_mv
 	cdef uint8_t[:] buf_view
 	cdef uint64_t buf_read_len
 	cdef uint64_t buf_write_len
+	cdef _BoundaryTracker boundary_tracker
 
-	def __init__(self, fastcdc: FastCDC, readinto_func: ReadintoFunc):
+	def __init__(self, fastcdc: FastCDC, readinto_func: ReadintoFunc, boundaries: Optional[Boundaries] = None, buffer_pool: Optional[BufferPool] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None):
 		self.fastcdc = fastcdc  # keep ref
 		self.config = &fastcdc.config
+		self.stats = stats
+		self.tracer = tracer
 		self.readinto_func = readinto_func
 		self.max_size = fastcdc.config.max_size
+		self.boundary_tracker = _BoundaryTracker(boundaries)
 
 		self.offset = 0
 		self.last_chunk_len = 0
 		self.eof = 0
+		self.closed = False
 
-		self.buf_capacity = self.max_size + max(8 * 1024u, self.config.max_size)
-		self.buf_obj = bytearray(self.buf_capacity)
-		self.buf_obj_mv = memoryview(self.buf_obj)
-		self.buf_view = self.buf_obj
+		# the buffer is allocated on the first read, and released when the stream is exhausted or the chunker is closed
+		self.buffer_pool = buffer_pool
+		self.buf_capacity = self.max_size + min(max(8 * 1024u, self.max_size), <uint64_t>STREAM_READ_SIZE_LIMIT)
+		self.buf_obj = None
 		self.buf_read_len = 0
 		self.buf_write_len = 0
 
-	def __next__(self) -> Chunk:
-		cdef uint64_t remaining_buf_len = 0
-		cdef Py_ssize_t n_read = 0
-		cdef uint8_t* buf_ptr = &self.buf_view[0]
+	def close(self):
+		self._enter()
+		try:
+			self._close(True)
+		finally:
+			self._leave()
+
+	def __del__(self):
+		# the last yielded chunk might still view the buffer, so it must not be handed out again
+		self._close(False)
+
+	cdef _close(self, bint reuse):
+		self.closed = True
+		if self.buf_obj is None:
+			return
+		buf_obj = self.buf_obj
+		self.buf_obj = None
+		self.buf_obj_mv = None
+		self.buf_view = None
+		if self.buffer_pool is not None:
+			if reuse:
+				self.buffer_pool.release(buf_obj)
+			else:
+				self.buffer_pool._discard(buf_obj)
+
+	cdef Chunk _next(self):
+		if self.closed:
+			raise StopIteration()
+		if self.buf_obj is None:
+			self.buf_obj = self.buffer_pool.acquire(self.buf_capacity) if self.buffer_pool is not None else bytearray(self.buf_capacity)
+			self.buf_obj_mv = memoryview(self.buf_obj)
+			self.buf_view = self.buf_obj
 
 		if self.last_chunk_len > 0:
-			self.__release_last_chunk()
-
-		remaining_buf_len = self.buf_write_len - self.buf_read_len
-		if not self.eof and remaining_buf_len < self.max_size:
-			while self.buf_write_len < self.buf_capacity:
-				n_read = self.readinto_func(self.buf_obj_mv[self.buf_write_len:])
-				if n_read <= 0:
-					self.eof = 1
-					break
-				self.buf_write_len += n_read
+			self.buf_read_len += self.last_chunk_len
+			self.offset += self.last_chunk_len
+			self.last_chunk_len = 0
+
+		cdef uint8_t* buf_ptr = &self.buf_view[0]
+		cdef uint64_t remaining_buf_len = self.buf_write_len - self.buf_read_len
+		cdef uint64_t limit = self.boundary_tracker.get_limit(self.offset)
+		cdef CutResult res
+		cdef bint cut_done = False
+		# The buffer is refilled when less than max_size bytes remain. With a huge max_size, the buffer is smaller
+		# than 2 * max_size and a refill could move lots of data. A cut found before the end of the buffered data
+		# is final, so try the buffered data first in that case, and refill only if the chunk might extend beyond it
+		if remaining_buf_len > 0 and (self.eof or remaining_buf_len >= self.max_size or remaining_buf_len > self.buf_capacity - self.max_size):
+			res = _cut_observed(self.stats, self.tracer, self.config, buf_ptr + self.buf_read_len, min(remaining_buf_len, limit))
+			cut_done = self.eof or remaining_buf_len >= self.max_size or res.cut_offset < remaining_buf_len
+		if not cut_done and not self.eof:
+			self.__fill_buf()
+			remaining_buf_len = self.buf_write_len
+			if remaining_buf_len > 0:
+				res = _cut_observed(self.stats, self.tracer, self.config, buf_ptr, min(remaining_buf_len, limit))
 
-		remaining_buf_len = self.buf_write_len - self.buf_read_len
 		if remaining_buf_len == 0:
+			self._close(True)
 			raise StopIteration()
 
-		cdef _CutResult res
-		with nogil:
-			res = _cut_gear(self.config, buf_ptr + self.buf_read_len, remaining_buf_len)
-
 		cdef uint64_t chunk_len = res.cut_offset
-		if chunk_len == 0:  # last part of the file
-			chunk_len = remaining_buf_len
-
+		if self.stats is not None:
+			self.stats._add_chunk(chunk_len, _get_cut_reason(self.config, res, min(remaining_buf_len, limit), limit))
 		self.last_chunk_len = chunk_len
-		return Chunk(
-			offset=self.offset,
-			length=chunk_len,
-			data=self.buf_obj_mv[self.buf_read_len:self.buf_read_len + chunk_len],
-			gear_hash=res.gear_hash,
+		return _create_chunk(
+			self.config, self.offset, self.buf_obj_mv, self.buf_read_len,
+			buf_ptr + self.buf_read_len, chunk_len, res.gear_hash,
 		)
 
-	cdef __release_last_chunk(self):
+	cdef __fill_buf(self):
 		cdef uint8_t* buf_ptr = &self.buf_view[0]
+		cdef uint64_t remaining_buf_len = self.buf_write_len - self.buf_read_len
+		cdef Py_ssize_t n_read = 0
 
-		self.buf_read_len += self.last_chunk_len
-		self.offset += self.last_chunk_len
-		self.last_chunk_len = 0
-		if self.buf_read_len > self.buf_write_len:
-			raise AssertionError(f'buf_read_len {self.buf_read_len} is greater than buf_write_len {self.buf_write_len}')
+		cdef uint64_t start_ns = self._span_start()
+		memmove(buf_ptr, buf_ptr + self.buf_read_len, remaining_buf_len)
+		self._span_end(SPAN_SHIFT, start_ns, remaining_buf_len)
+		if self.stats is not None:
+			self.stats._add_copy(remaining_buf_len)
+		self.buf_read_len = 0
+		self.buf_write_len = remaining_buf_len
+		cdef bint timed = self.stats is not None or self.tracer is not None
+		while self.buf_write_len < self.buf_capacity:
+			if timed:
+				start_ns = monotonic_ns()
+			n_read = self.readinto_func(self.buf_obj_mv[self.buf_write_len:])
+			if timed:
+				self._add_read(start_ns, max(n_read, 0))
+			if n_read <= 0:
+				self.eof = 1
+				break
+			self.buf_write_len += n_read
+
+
+cdef class IterChunker(_Chunker):
+	cdef object fastcdc
+	cdef const FastCDCConfig * config
+	cdef object blocks
+	cdef uint64_t max_size
 
-		cdef uint64_t remaining_buf_len = self.buf_write_len - self.buf_read_len
-		if remaining_buf_len < self.max_size:
-			memmove(buf_ptr, buf_ptr + self.buf_read_len, remaining_buf_len)
-			self.buf_read_len = 0
-			self.buf_write_len = remaining_buf_len
+	cdef uint64_t offset
+	cdef bint eof
+	cdef memoryview block
+	cdef const uint8_t[:] block_view
+	cdef uint64_t block_len
+	cdef uint64_t block_pos
+
+	# Holds a copy of the data around a block edge. Chunks are cut in place from blocks,
+	# except chunks that might span block edges, which are cut from the carry.
+	# The last carry_block_len bytes of the carry are copied from the current block, right before block_pos
+	cdef bytearray carry
+	cdef uint64_t carry_block_len
+	cdef _BoundaryTracker boundary_tracker
+
+	def __init__(self, fastcdc: FastCDC, blocks: Iterable[Union[bytes, bytearray, memoryview]], boundaries: Optional[Boundaries] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None):
+		self.fastcdc = fastcdc  # keep ref
+		self.config = &fastcdc.config
+		self.stats = stats
+		self.tracer = tracer
+		self.blocks = iter(blocks)
+		self.max_size = fastcdc.config.max_size
+		self.boundary_tracker = _BoundaryTracker(boundaries)
 
-	def __iter__(self):
-		return self
+		self.offset = 0
+		self.eof = False
+		self.block = None
+		self.block_len = 0
+		self.block_pos = 0
+
+		self.carry = None
+		self.carry_block_len = 0
+
+	cdef bint _next_block(self) except -1:
+		cdef bint timed = self.stats is not None or self.tracer is not None
+		cdef uint64_t start_ns = monotonic_ns() if timed else 0
+		for block in self.blocks:
+			block = utils.create_memoryview_from_buffer(block)
+			if timed:
+				self._add_read(start_ns, len(block))
+			if len(block) > 0:
+				self.block = block
+				self.block_view = block
+				self.block_len = len(block)
+				self.block_pos = 0
+				return True
+			if timed:
+				start_ns = monotonic_ns()
+		if timed:
+			self._add_read(start_ns, 0)
+		self.eof = True
+		return False
+
+	cdef Chunk _next(self):
+		cdef const uint8_t* avail_ptr
+		cdef uint64_t avail_len
+		cdef uint64_t block_pos
+		cdef memoryview block
+		cdef CutResult res
+		cdef Chunk chunk
+		cdef uint64_t start_ns
+
+		cdef uint64_t limit = self.boundary_tracker.get_limit(self.offset)
+		# the amount of data that is enough to determine the cut point
+		cdef uint64_t required_len = min(self.max_size, limit)
+
+		if self.carry is None:
+			while self.block_pos == self.block_len:
+				if self.eof or not self._next_block():
+					raise StopIteration()
+
+			block = self.block  # keep ref, _next_block() might replace it
+			block_pos = self.block_pos
+			avail_ptr = &self.block_view[0] + block_pos
+			avail_len = min(self.block_len - block_pos, limit)
+			res = _cut_observed(self.stats, self.tracer, self.config, avail_ptr, avail_len)
+
+			# A cut point found before the end of the available data is final, no matter what data comes next
+			if res.cut_offset < avail_len or avail_len >= required_len or self.eof or not self._next_block():
+				if self.stats is not None:
+					self.stats._add_chunk(res.cut_offset, _get_cut_reason(self.config, res, avail_len, limit))
+				self.block_pos += res.cut_offset
+				return self._create_chunk(block, block_pos, avail_ptr, res.cut_offset, res.gear_hash)
+			start_ns = self._span_start()
+			self.carry = bytearray(block[block_pos:])
+			self._span_end(SPAN_SHIFT, start_ns, len(self.carry))
+			self.carry_block_len = 0
+			if self.stats is not None:
+				self.stats._add_copy(len(self.carry))
+
+		cdef bytearray carry = self.carry
+		cdef uint64_t n
+		while <uint64_t>len(carry) < required_len and not self.eof:
+			if self.block_pos == self.block_len:
+				if not self._next_block():
+					break
+				self.carry_block_len = 0
+			n = min(self.block_len - self.block_pos, required_len - len(carry))
+			start_ns = self._span_start()
+			carry += self.block[self.block_pos:self.block_pos + n]
+			self._span_end(SPAN_SHIFT, start_ns, n)
+			if self.stats is not None:
+				self.stats._add_copy(n)
+			self.block_pos += n
+			self.carry_block_len += n
+
+		cdef const uint8_t[:] carry_view = carry
+		cdef uint64_t carry_len = len(carry)
+		res = _cut_observed(self.stats, self.tracer, self.config, &carry_view[0], min(carry_len, limit))
+		if self.stats is not None:
+			self.stats._add_chunk(res.cut_offset, _get_cut_reason(self.config, res, min(carry_len, limit), limit))
+
+		if res.cut_offset >= carry_len - self.carry_block_len:
+			# back to cutting in place
+			self.block_pos -= carry_len - res.cut_offset
+			self.carry = None
+		else:
+			# never modify the carry after a chunk refers to it
+			start_ns = self._span_start()
+			self.carry = carry[res.cut_offset:]
+			self._span_end(SPAN_SHIFT, start_ns, carry_len - res.cut_offset)
+			if self.stats is not None:
+				self.stats._add_copy(carry_len - res.cut_offset)
+		return self._create_chunk(memoryview(carry), 0, &carry_view[0], res.cut_offset, res.gear_hash)
+
+	cdef inline Chunk _create_chunk(self, memoryview data_base, uint64_t data_start, const uint8_t* data_ptr, uint64_t length, uint64_t gear_hash):
+		cdef Chunk chunk = _create_chunk(self.config, self.offset, data_base, data_start, data_ptr, length, gear_hash)
+		self.offset += length
+		return chunk
+
+
+# The C API for plain C extensions. The layout must match pyfastcdc_capi in pyfastcdc/include/pyfastcdc.h,
+# and the version must be bumped when new members are appended
+cdef struct _CApi:
+	uint32_t version
+	const FastCDCConfig* (*get_config)(object) except NULL
+	CutResult (*cut_gear)(const FastCDCConfig*, const uint8_t*, uint64_t) noexcept nogil
+
+
+cdef const FastCDCConfig* _capi_get_config(object fastcdc) except NULL:
+	if not isinstance(fastcdc, FastCDC):
+		raise TypeError(f'expected a FastCDC instance, got {type(fastcdc).__name__}')
+	return &(<FastCDC>fastcdc).config
+
+
+cdef _CApi _c_api
+_c_api.version = 1
+_c_api.get_config = _capi_get_config
+_c_api.cut_gear = cut_gear
+_C_API = PyCapsule_New(&_c_api, b'pyfastcdc.cy.fastcdc._C_API', NULL)
@@ -0,0 +1,96 @@
+from libc.stdint cimport uint8_t, uint64_t
+
+# MurmurHash3_x64_128 by Austin Appleby (public domain)
+# https://github.com/aappleby/smhasher/blob/master/src/MurmurHash3.cpp
+# Input blocks are always read as little-endian, so the output is the same on all platforms
+
+cdef extern from *:
+	"""
+	#if defined(_MSC_VER)
+	#define PYFASTCDC_ROTL64(x, r) _rotl64(x, r)
+	#else
+	#define PYFASTCDC_ROTL64(x, r) (((x) << (r)) | ((x) >> (64 - (r))))
+	#endif
+	"""
+	uint64_t _rotl64 "PYFASTCDC_ROTL64"(uint64_t x, int r) noexcept nogil
+
+
+cdef inline uint64_t _load_le64(const uint8_t* p) noexcept nogil:
+	return (
+		(<uint64_t>p[0]) | (<uint64_t>p[1] << 8) | (<uint64_t>p[2] << 16) | (<uint64_t>p[3] << 24) |
+		(<uint64_t>p[4] << 32) | (<uint64_t>p[5] << 40) | (<uint64_t>p[6] << 48) | (<uint64_t>p[7] << 56)
+	)
+
+
+cdef inline uint64_t _fmix64(uint64_t k) noexcept nogil:
+	k ^= k >> 33
+	k *= 0xff51afd7ed558ccdULL
+	k ^= k >> 33
+	k *= 0xc4ceb9fe1a85ec53ULL
+	k ^= k >> 33
+	return k
+
+
+# stores the hash into out[0] (h1) and out[1] (h2)
+cdef inline void murmur3_x64_128(const uint8_t* data, uint64_t length, uint64_t seed, uint64_t* out) noexcept nogil:
+	cdef uint64_t nblocks = length // 16
+	cdef uint64_t h1 = seed
+	cdef uint64_t h2 = seed
+	cdef uint64_t c1 = 0x87c37b91114253d5ULL
+	cdef uint64_t c2 = 0x4cf5ad432745937fULL
+	cdef uint64_t k1, k2
+	cdef uint64_t i
+	cdef const uint8_t* block
+
+	for i in range(nblocks):
+		block = data + i * 16
+		k1 = _load_le64(block)
+		k2 = _load_le64(block + 8)
+
+		k1 *= c1
+		k1 = _rotl64(k1, 31)
+		k1 *= c2
+		h1 ^= k1
+
+		h1 = _rotl64(h1, 27)
+		h1 += h2
+		h1 = h1 * 5 + 0x52dce729
+
+		k2 *= c2
+		k2 = _rotl64(k2, 33)
+		k2 *= c1
+		h2 ^= k2
+
+		h2 = _rotl64(h2, 31)
+		h2 += h1
+		h2 = h2 * 5 + 0x38495ab5
+
+	cdef const uint8_t* tail = data + nblocks * 16
+	cdef uint64_t tail_len = length & 15
+	k1 = 0
+	k2 = 0
+	if tail_len > 8:
+		for i in range(8, tail_len):
+			k2 ^= (<uint64_t>tail[i]) << ((i - 8) * 8)
+		k2 *= c2
+		k2 = _rotl64(k2, 33)
+		k2 *= c1
+		h2 ^= k2
+	if tail_len > 0:
+		for i in range(min(tail_len, 8)):
+			k1 ^= (<uint64_t>tail[i]) << (i * 8)
+		k1 *= c1
+		k1 = _rotl64(k1, 31)
+		k1 *= c2
+		h1 ^= k1
+
+	h1 ^= length
+	h2 ^= length
+	h1 += h2
+	h2 += h1
+	h1 = _fmix64(h1)
+	h2 = _fmix64(h2)
+	h1 += h2
+	h2 += h1
+	out[0] = h1
+	out[1] = h2
@@ -0,0 +1,57 @@
+from libc.stdint cimport uint8_t, uint64_t
+
+from pyfastcdc.cy.constants cimport GEAR
+from pyfastcdc.cy.murmur3 cimport murmur3_x64_128
+
+# Finesse-style resemblance sketch, see pyfastcdc/py/sketch.py for the pure python version
+# Paper: Finesse: Fine-Grained Feature Locality based Fast Resemblance Detection for Post-Deduplication Delta Compression
+
+cdef enum:
+	SKETCH_FEATURES = 12
+	SKETCH_SUPER_FEATURES = 3
+	SKETCH_GROUP_SIZE = SKETCH_SUPER_FEATURES  # each group provides one feature to each super-feature
+
+
+cdef inline void _sort3_desc(uint64_t* a) noexcept nogil:
+	if a[0] < a[1]:
+		a[0], a[1] = a[1], a[0]
+	if a[1] < a[2]:
+		a[1], a[2] = a[2], a[1]
+	if a[0] < a[1]:
+		a[0], a[1] = a[1], a[0]
+
+
+# stores the super-features into out[0 .. SKETCH_SUPER_FEATURES - 1]
+cdef inline void create_sketch(const uint8_t* buf, uint64_t length, uint64_t* out) noexcept nogil:
+	cdef uint64_t features[SKETCH_FEATURES]
+	cdef uint64_t hashes[2]
+	cdef uint8_t sf_buf[32]
+	cdef uint64_t gear_hash = 0
+	cdef uint64_t feature, value
+	cdef uint64_t start = 0
+	cdef uint64_t end, pos
+	cdef int i, j, k
+
+	# the max gear hash of each of the 12 sub-chunks
+	for i in range(SKETCH_FEATURES):
+		end = (i + 1) * length // SKETCH_FEATURES
+		feature = 0
+		for pos in range(start, end):
+			gear_hash = (gear_hash << 1) + GEAR[buf[pos]]
+			feature = gear_hash if gear_hash > feature else feature  # branchless
+		features[i] = feature
+		start = end
+
+	# sort features inside each group of adjacent sub-chunks,
+	# so that a small shift of content between them does not change the super-features
+	for i in range(SKETCH_FEATURES // SKETCH_GROUP_SIZE):
+		_sort3_desc(features + i * SKETCH_GROUP_SIZE)
+
+	# the j-th super-feature is the hash of the j-th largest feature of all groups
+	for j in range(SKETCH_SUPER_FEATURES):
+		for i in range(SKETCH_FEATURES // SKETCH_GROUP_SIZE):
+			value = features[i * SKETCH_GROUP_SIZE + j]
+			for k in range(8):
+				sf_buf[i * 8 + k] = <uint8_t>(value >> (k * 8))
+		murmur3_x64_128(sf_buf, 32, 0, hashes)
+		out[j] = hashes[0]
@@ -0,0 +1,65 @@
+cimport cython
+from libc.stdint cimport uint64_t
+
+cdef extern from *:
+	"""
+	#ifdef _WIN32
+	#ifndef WIN32_LEAN_AND_MEAN
+	#define WIN32_LEAN_AND_MEAN
+	#endif
+	#include <windows.h>
+	static CYTHON_INLINE uint64_t pyfastcdc_monotonic_ns(void) {
+		static LARGE_INTEGER frequency;
+		LARGE_INTEGER counter;
+		if (frequency.QuadPart == 0) {
+			QueryPerformanceFrequency(&frequency);
+		}
+		QueryPerformanceCounter(&counter);
+		return (uint64_t)(counter.QuadPart / frequency.QuadPart) * 1000000000ULL + (uint64_t)(counter.QuadPart % frequency.QuadPart) * 1000000000ULL / (uint64_t)frequency.QuadPart;
+	}
+	#else
+	#include <time.h>
+	static CYTHON_INLINE uint64_t pyfastcdc_monotonic_ns(void) {
+		struct timespec ts;
+		clock_gettime(CLOCK_MONOTONIC, &ts);
+		return (uint64_t)ts.tv_sec * 1000000000ULL + (uint64_t)ts.tv_nsec;
+	}
+	#endif
+	"""
+	uint64_t monotonic_ns "pyfastcdc_monotonic_ns"() noexcept nogil
+
+# the same order as utils.CUT_REASONS
+cdef enum:
+	CUT_REASON_MASK_S = 0
+	CUT_REASON_MASK_L = 1
+	CUT_REASON_EXTREMUM = 2
+	CUT_REASON_MAX_SIZE = 3
+	CUT_REASON_BOUNDARY = 4
+	CUT_REASON_END = 5
+	CUT_REASON_ZERO = 6
+	CUT_REASON_COUNT = 7
+
+cdef enum:
+	HISTOGRAM_BUCKETS = 65
+
+
+cdef class ChunkerStats:
+	cdef readonly uint64_t chunk_count
+	cdef readonly uint64_t total_bytes
+	cdef readonly uint64_t read_count
+	cdef readonly uint64_t read_bytes
+	cdef readonly uint64_t read_ns
+	cdef readonly uint64_t copy_bytes
+	cdef readonly uint64_t cut_ns
+	cdef readonly uint64_t total_ns
+	cdef uint64_t cut_counts_by_reason[CUT_REASON_COUNT]
+	cdef uint64_t chunk_size_buckets[HISTOGRAM_BUCKETS]
+	cdef uint64_t read_time_buckets[HISTOGRAM_BUCKETS]
+	cdef cython.pymutex lock
+
+	# C-level API for chunkers
+	cdef void _add_chunk(self, uint64_t length, int cut_reason) noexcept nogil
+	cdef void _add_read(self, uint64_t n_read, uint64_t cost_ns) noexcept nogil
+	cdef void _add_copy(self, uint64_t n_copied) noexcept nogil
+	cdef void _add_cut_time(self, uint64_t cost_ns) noexcept nogil
+	cdef void _add_total_time(self, uint64_t cost_ns) noexcept nogil
@@ -0,0 +1,119 @@
+from typing import Any, Dict, List, Optional
+
+from libc.stdint cimport uint64_t
+from libc.string cimport memset
+
+from pyfastcdc import _export, utils
+
+
+cdef inline int _get_histogram_bucket(uint64_t value) noexcept nogil:
+	# the same as utils.get_histogram_bucket()
+	cdef int bucket = 0
+	if value <= 1:
+		return 0
+	value -= 1
+	while value:
+		value >>= 1
+		bucket += 1
+	return bucket
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+cdef class ChunkerStats:
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		with nogil:
+			self.lock.acquire()
+			self.chunk_count = 0
+			self.total_bytes = 0
+			self.read_count = 0
+			self.read_bytes = 0
+			self.read_ns = 0
+			self.copy_bytes = 0
+			self.cut_ns = 0
+			self.total_ns = 0
+			memset(self.cut_counts_by_reason, 0, sizeof(self.cut_counts_by_reason))
+			memset(self.chunk_size_buckets, 0, sizeof(self.chunk_size_buckets))
+			memset(self.read_time_buckets, 0, sizeof(self.read_time_buckets))
+			self.lock.release()
+
+	cdef void _add_chunk(self, uint64_t length, int cut_reason) noexcept nogil:
+		self.lock.acquire()
+		self.chunk_count += 1
+		self.total_bytes += length
+		self.cut_counts_by_reason[cut_reason] += 1
+		self.chunk_size_buckets[_get_histogram_bucket(length)] += 1
+		self.lock.release()
+
+	cdef void _add_read(self, uint64_t n_read, uint64_t cost_ns) noexcept nogil:
+		self.lock.acquire()
+		self.read_count += 1
+		self.read_bytes += n_read
+		self.read_ns += cost_ns
+		self.read_time_buckets[_get_histogram_bucket(cost_ns)] += 1
+		self.lock.release()
+
+	cdef void _add_copy(self, uint64_t n_copied) noexcept nogil:
+		self.lock.acquire()
+		self.copy_bytes += n_copied
+		self.lock.release()
+
+	cdef void _add_cut_time(self, uint64_t cost_ns) noexcept nogil:
+		self.lock.acquire()
+		self.cut_ns += cost_ns
+		self.lock.release()
+
+	cdef void _add_total_time(self, uint64_t cost_ns) noexcept nogil:
+		self.lock.acquire()
+		self.total_ns += cost_ns
+		self.lock.release()
+
+	@property
+	def cut_counts(self) -> Dict[str, int]:
+		return {reason: self.cut_counts_by_reason[i] for i, reason in enumerate(utils.CUT_REASONS)}
+
+	@property
+	def chunk_size_histogram(self) -> List[int]:
+		return [self.chunk_size_buckets[i] for i in range(HISTOGRAM_BUCKETS)]
+
+	@property
+	def read_time_histogram(self) -> List[int]:
+		return [self.read_time_buckets[i] for i in range(HISTOGRAM_BUCKETS)]
+
+	def to_dict(self) -> Dict[str, Any]:
+		cdef ChunkerStats snapshot = ChunkerStats.__new__(ChunkerStats)
+		with nogil:
+			self.lock.acquire()
+			snapshot.chunk_count = self.chunk_count
+			snapshot.total_bytes = self.total_bytes
+			snapshot.read_count = self.read_count
+			snapshot.read_bytes = self.read_bytes
+			snapshot.read_ns = self.read_ns
+			snapshot.copy_bytes = self.copy_bytes
+			snapshot.cut_ns = self.cut_ns
+			snapshot.total_ns = self.total_ns
+			snapshot.cut_counts_by_reason = self.cut_counts_by_reason
+			snapshot.chunk_size_buckets = self.chunk_size_buckets
+			snapshot.read_time_buckets = self.read_time_buckets
+			self.lock.release()
+		return {
+			'chunk_count': snapshot.chunk_count,
+			'total_bytes': snapshot.total_bytes,
+			'cut_counts': snapshot.cut_counts,
+			'chunk_size_histogram': snapshot.chunk_size_histogram,
+			'read_count': snapshot.read_count,
+			'read_bytes': snapshot.read_bytes,
+			'read_ns': snapshot.read_ns,
+			'read_time_histogram': snapshot.read_time_histogram,
+			'copy_bytes': snapshot.copy_bytes,
+			'cut_ns': snapshot.cut_ns,
+			'total_ns': snapshot.total_ns,
+		}
+
+	def to_prometheus(self, *, prefix: str = 'pyfastcdc', labels: Optional[Dict[str, str]] = None) -> str:
+		return _export.format_chunker_stats_prometheus(self.to_dict(), prefix, labels)
+
+	def __repr__(self) -> str:
+		return f'<ChunkerStats chunk_count={self.chunk_count} total_bytes={self.total_bytes} read_count={self.read_count}>'
@@ -0,0 +1,31 @@
+cimport cython
+from libc.stdint cimport uint64_t
+
+# the same order as utils.TRACE_SPAN_NAMES
+cdef enum:
+	SPAN_NEXT = 0
+	SPAN_READ = 1
+	SPAN_SCAN = 2
+	SPAN_SHIFT = 3
+	SPAN_YIELD = 4
+
+
+cdef struct SpanRecord:
+	uint64_t thread_id
+	uint64_t start_ns
+	uint64_t end_ns
+	uint64_t size
+	int span
+
+
+cdef class ChunkTracer:
+	cdef object callback
+	cdef readonly uint64_t max_spans
+	cdef readonly uint64_t dropped_span_count
+	cdef SpanRecord* records
+	cdef uint64_t record_count
+	cdef uint64_t record_capacity
+	cdef cython.pymutex lock
+
+	# C-level API for chunkers
+	cdef int _add_span(self, int span, uint64_t start_ns, uint64_t end_ns, uint64_t size) except -1
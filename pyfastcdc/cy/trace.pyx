@@ -0,0 +1,80 @@
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from cpython.pythread cimport PyThread_get_thread_ident
+from libc.stdint cimport uint64_t
+from libc.stdlib cimport free, realloc
+
+from pyfastcdc import _export, utils
+from pyfastcdc.common import TraceSpan
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+cdef class ChunkTracer:
+	def __init__(self, *, callback: Optional[Callable[[TraceSpan], None]] = None, max_spans: int = 1000000):
+		if max_spans < 0:
+			raise ValueError(f'max_spans {max_spans} should not be negative')
+		self.callback = callback
+		self.max_spans = max_spans
+		self.reset()
+
+	def __dealloc__(self):
+		free(self.records)
+
+	def reset(self):
+		with nogil:
+			self.lock.acquire()
+			self.record_count = 0
+			self.dropped_span_count = 0
+			self.lock.release()
+
+	cdef int _add_span(self, int span, uint64_t start_ns, uint64_t end_ns, uint64_t size) except -1:
+		cdef uint64_t thread_id = <uint64_t>PyThread_get_thread_ident()
+		cdef uint64_t new_capacity
+		cdef SpanRecord* new_records
+		cdef bint out_of_memory = False
+		with nogil:
+			self.lock.acquire()
+			if self.record_count >= self.max_spans:
+				self.dropped_span_count += 1
+			else:
+				if self.record_count == self.record_capacity:
+					new_capacity = min(max(self.record_capacity * 2, 4096), self.max_spans)
+					new_records = <SpanRecord*>realloc(self.records, new_capacity * sizeof(SpanRecord))
+					if new_records == NULL:
+						out_of_memory = True
+					else:
+						self.records = new_records
+						self.record_capacity = new_capacity
+				if not out_of_memory:
+					self.records[self.record_count] = SpanRecord(thread_id, start_ns, end_ns, size, span)
+					self.record_count += 1
+			self.lock.release()
+		if out_of_memory:
+			raise MemoryError()
+		if self.callback is not None:
+			self.callback(TraceSpan(utils.TRACE_SPAN_NAMES[span], thread_id, start_ns, end_ns, size))
+		return 0
+
+	@property
+	def spans(self) -> List[TraceSpan]:
+		cdef list spans = []
+		cdef SpanRecord record
+		cdef uint64_t i
+		self.lock.acquire()
+		try:
+			for i in range(self.record_count):
+				record = self.records[i]
+				spans.append(TraceSpan(utils.TRACE_SPAN_NAMES[record.span], record.thread_id, record.start_ns, record.end_ns, record.size))
+		finally:
+			self.lock.release()
+		return spans
+
+	def to_chrome_trace(self) -> Dict[str, Any]:
+		return _export.format_chrome_trace(self.spans)
+
+	def save_chrome_trace(self, file_path: Union[str, bytes, Path]):
+		_export.save_chrome_trace(self.spans, file_path)
+
+	def __repr__(self) -> str:
+		return f'<ChunkTracer spans={self.record_count} dropped_span_count={self.dropped_span_count}>'
@@ -0,0 +1,97 @@
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Union
+
+from pyfastcdc import utils
+from pyfastcdc.common import BinaryStreamWriter, ChunkLike
+from pyfastcdc.manifest import ChunkManifest
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class DeltaCopy(NamedTuple):
+	start: int
+	end: int
+
+
+class DeltaLiteral(NamedTuple):
+	data: bytes
+
+
+DeltaOp = Union[DeltaCopy, DeltaLiteral]
+
+
+def compute_delta(manifest: ChunkManifest, chunks: Iterable[ChunkLike], *, max_literal_size: int = 1048576) -> Iterator[DeltaOp]:
+	if max_literal_size <= 0:
+		raise ValueError(f'max_literal_size {max_literal_size} should be positive')
+
+	hash_func = utils.create_hash_func(manifest.hash_name)
+	first_index_by_digest: Dict[bytes, int] = {}
+	for i, entry in enumerate(manifest):
+		first_index_by_digest.setdefault(entry.digest, i)
+
+	copy_start = -1
+	copy_end = -1
+	literal = bytearray()
+
+	for chunk in chunks:
+		digest = hash_func(chunk.data)
+		index = first_index_by_digest.get(digest)
+		if index is None:
+			if copy_start >= 0:
+				yield DeltaCopy(copy_start, copy_end)
+				copy_start = copy_end = -1
+			if len(literal) > 0 and len(literal) + chunk.length > max_literal_size:
+				yield DeltaLiteral(bytes(literal))
+				literal.clear()
+			literal += chunk.data  # copy now, chunk.data might be invalidated by the next chunk
+			continue
+
+		if len(literal) > 0:
+			yield DeltaLiteral(bytes(literal))
+			literal.clear()
+
+		# prefer extending the current copy run, so consecutive old chunks collapse into a single op
+		if copy_start >= 0 and copy_end < len(manifest) and manifest[copy_end].digest == digest:
+			copy_end += 1
+			continue
+		if copy_start >= 0:
+			yield DeltaCopy(copy_start, copy_end)
+		copy_start = index
+		copy_end = copy_start + 1
+
+	if copy_start >= 0:
+		yield DeltaCopy(copy_start, copy_end)
+	if len(literal) > 0:
+		yield DeltaLiteral(bytes(literal))
+
+
+def apply_delta(manifest: ChunkManifest, ops: Iterable[DeltaOp], old: Union[bytes, bytearray, memoryview, str, Path], output: BinaryStreamWriter) -> int:
+	mmap_file: Optional[utils.MmapFile] = None
+	if isinstance(old, (str, Path)):
+		mmap_file = utils.create_mmap_from_file(old)
+		old_buf = mmap_file.data
+	else:
+		old_buf = utils.create_memoryview_from_buffer(old)
+
+	try:
+		if len(old_buf) != manifest.total_size:
+			raise ValueError(f'old data size {len(old_buf)} does not match the manifest size {manifest.total_size}')
+
+		written = 0
+		for op in ops:
+			if isinstance(op, DeltaCopy):
+				if not (0 <= op.start < op.end <= len(manifest)):
+					raise ValueError(f'copy range [{op.start}, {op.end}) is out of range [0, {len(manifest)})')
+				begin = manifest[op.start].offset
+				last = manifest[op.end - 1]
+				with old_buf[begin:last.offset + last.length] as data:  # released at once, so the mmap can be closed
+					output.write(data)
+					written += len(data)
+			elif isinstance(op, DeltaLiteral):
+				output.write(op.data)
+				written += len(op.data)
+			else:
+				raise TypeError(f'unknown delta op {op!r}')
+		return written
+	finally:
+		if mmap_file is not None:
+			mmap_file.close()
@@ -0,0 +1,78 @@
+/*
+ * The C API of pyfastcdc, for C extensions that call the FastCDC kernel on raw buffers
+ * without going through Python objects. The compiled pyfastcdc Cython extension is required
+ *
+ * Usage:
+ *
+ *     const pyfastcdc_capi* api = pyfastcdc_import();  // once, e.g. in the module init function
+ *     if (api == NULL) return NULL;
+ *
+ *     const pyfastcdc_config* config = api->get_config(fastcdc);  // fastcdc is a pyfastcdc.FastCDC instance
+ *     if (config == NULL) return NULL;
+ *
+ *     Py_BEGIN_ALLOW_THREADS
+ *     for (uint64_t offset = 0; offset < len;) {
+ *         pyfastcdc_cut_result res = api->cut_gear(config, buf + offset, len - offset);
+ *         // the chunk is buf[offset, offset + res.cut_offset)
+ *         offset += res.cut_offset;
+ *     }
+ *     Py_END_ALLOW_THREADS
+ *
+ * The include directory is returned by pyfastcdc.get_include()
+ */
+
+#ifndef PYFASTCDC_H
+#define PYFASTCDC_H
+
+#include <Python.h>
+#include <stdint.h>
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+#define PYFASTCDC_CAPI_NAME "pyfastcdc.cy.fastcdc._C_API"
+#define PYFASTCDC_CAPI_VERSION 1
+
+/* The parameters of a FastCDC instance. Valid as long as the FastCDC instance is alive */
+typedef struct pyfastcdc_config pyfastcdc_config;
+
+typedef struct {
+	uint64_t gear_hash;  /* the gear hash at the cut point, the same as Chunk.gear_hash */
+	uint64_t cut_offset;  /* the length of the chunk that starts at the beginning of the buffer */
+} pyfastcdc_cut_result;
+
+typedef struct {
+	/* The API version. Members are only appended, and a newer version is backward compatible */
+	uint32_t version;
+
+	/*
+	 * Returns the config of the given pyfastcdc.FastCDC object, or of its subclasses, e.g. FastCDC2016.
+	 * Returns NULL with an exception set if the object is not a Cython FastCDC instance. Requires the GIL
+	 */
+	const pyfastcdc_config* (*get_config)(PyObject* fastcdc);
+
+	/*
+	 * Finds the end of the chunk that starts at the beginning of the given buffer, with the algorithm of the config.
+	 * At most max_size bytes are read.
+	 * The cut is final, unless cut_offset == buf_len < max_size, i.e. the chunk might be longer if more data follows.
+	 * Does not require the GIL
+	 */
+	pyfastcdc_cut_result (*cut_gear)(const pyfastcdc_config* config, const uint8_t* buf, uint64_t buf_len);
+} pyfastcdc_capi;
+
+/* Imports the C API. Returns NULL with an exception set on failure. Requires the GIL */
+static inline const pyfastcdc_capi* pyfastcdc_import(void) {
+	const pyfastcdc_capi* api = (const pyfastcdc_capi*)PyCapsule_Import(PYFASTCDC_CAPI_NAME, 0);
+	if (api != NULL && api->version < PYFASTCDC_CAPI_VERSION) {
+		PyErr_Format(PyExc_ImportError, "pyfastcdc C API version %u is older than the required version %d", api->version, PYFASTCDC_CAPI_VERSION);
+		return NULL;
+	}
+	return api;
+}
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif  /* PYFASTCDC_H */
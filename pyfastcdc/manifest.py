@@ -0,0 +1,66 @@
+from typing import Iterable, Iterator, List, NamedTuple, Union, overload
+
+from pyfastcdc import utils
+from pyfastcdc.common import ChunkLike
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class ManifestEntry(NamedTuple):
+	offset: int
+	length: int
+	digest: bytes
+
+
+class ChunkManifest:
+	def __init__(self, entries: Iterable[ManifestEntry] = (), *, hash_name: str = 'sha256'):
+		utils.create_hash_func(hash_name)  # validate
+		self.__hash_name = hash_name
+		self.__entries: List[ManifestEntry] = []
+		for entry in entries:
+			self.append(entry)
+
+	@classmethod
+	def from_chunks(cls, chunks: Iterable[ChunkLike], *, hash_name: str = 'sha256') -> 'ChunkManifest':
+		hash_func = utils.create_hash_func(hash_name)
+		manifest = cls(hash_name=hash_name)
+		for chunk in chunks:
+			manifest.append(ManifestEntry(chunk.offset, chunk.length, hash_func(chunk.data)))
+		return manifest
+
+	def append(self, entry: ManifestEntry):
+		if entry.offset != self.total_size:
+			raise ValueError(f'entry offset {entry.offset} does not match the current manifest size {self.total_size}')
+		self.__entries.append(entry)
+
+	@property
+	def hash_name(self) -> str:
+		return self.__hash_name
+
+	@property
+	def total_size(self) -> int:
+		if len(self.__entries) == 0:
+			return 0
+		last = self.__entries[-1]
+		return last.offset + last.length
+
+	def __len__(self) -> int:
+		return len(self.__entries)
+
+	def __iter__(self) -> Iterator[ManifestEntry]:
+		return iter(self.__entries)
+
+	@overload
+	def __getitem__(self, index: int) -> ManifestEntry: ...
+	@overload
+	def __getitem__(self, index: slice) -> List[ManifestEntry]: ...
+
+	def __getitem__(self, index: Union[int, slice]) -> Union[ManifestEntry, List[ManifestEntry]]:
+		return self.__entries[index]
+
+	def __eq__(self, other: object) -> bool:
+		if not isinstance(other, ChunkManifest):
+			return NotImplemented
+		return self.__hash_name == other.__hash_name and self.__entries == other.__entries
+
+	def __repr__(self) -> str:
+		return f'<{self.__class__.__name__} hash_name={self.__hash_name} chunks={len(self.__entries)} size={self.total_size}>'
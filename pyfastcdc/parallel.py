@@ -0,0 +1,183 @@
+import array
+import collections
+import itertools
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from pyfastcdc import utils
+from pyfastcdc.manifest import ChunkManifest, ManifestEntry
+
+if TYPE_CHECKING:
+	from pyfastcdc import FastCDC
+
+
+class _SharedResult(NamedTuple):
+	chunk_count: int
+	digest_size: int
+	shm_name: Optional[str]
+	payload: Optional[bytes]  # used when shared memory is unavailable
+
+
+def _use_shared_memory() -> bool:
+	# On Windows a shared memory block is destroyed once its last handle is closed,
+	# which happens before the parent process gets the chance to open it
+	if os.name == 'nt':
+		return False
+	try:
+		from multiprocessing import shared_memory  # noqa: F401, python 3.8+
+	except ImportError:
+		return False
+	return True
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class ChunkBoundaries:
+	def __init__(self, file_path: Union[str, bytes, Path], lengths: 'array.array[int]', gear_hashes: 'array.array[int]', digests: Optional[List[bytes]], hash_name: Optional[str]):
+		self.file_path = file_path
+		self.offsets: 'array.array[int]' = array.array('Q', itertools.chain((0,), itertools.accumulate(lengths)))
+		self.offsets.pop()
+		self.lengths = lengths
+		self.gear_hashes = gear_hashes
+		self.digests = digests
+		self.hash_name = hash_name
+
+	def __len__(self) -> int:
+		return len(self.lengths)
+
+	def to_manifest(self) -> ChunkManifest:
+		if self.digests is None or self.hash_name is None:
+			raise ValueError('digests are not available, pass hash_name to cut_files_parallel() to calculate them')
+		return ChunkManifest(
+			(ManifestEntry(offset, length, digest) for offset, length, digest in zip(self.offsets, self.lengths, self.digests)),
+			hash_name=self.hash_name,
+		)
+
+	def __repr__(self) -> str:
+		return f'<{self.__class__.__name__} file_path={self.file_path!r} chunks={len(self)}>'
+
+
+def _cut_file_into_shared_memory(cdc: 'FastCDC', file_path: Union[str, bytes, Path], hash_name: Optional[str]) -> _SharedResult:
+	hash_func = utils.create_hash_func(hash_name) if hash_name is not None else None
+	lengths = array.array('Q')
+	gear_hashes = array.array('Q')
+	digests = bytearray()
+	for chunk in cdc.cut_file(file_path):
+		lengths.append(chunk.length)
+		gear_hashes.append(chunk.gear_hash)
+		if hash_func is not None:
+			digests += hash_func(chunk.data)
+
+	chunk_count = len(lengths)
+	if chunk_count == 0:
+		return _SharedResult(0, 0, None, None)
+	digest_size = len(digests) // chunk_count
+
+	payload = lengths.tobytes() + gear_hashes.tobytes() + digests
+	if not _use_shared_memory():
+		return _SharedResult(chunk_count, digest_size, None, bytes(payload))
+
+	from multiprocessing import resource_tracker, shared_memory
+	shm = shared_memory.SharedMemory(create=True, size=len(payload))
+	try:
+		shm.buf[:len(payload)] = payload
+	except BaseException:
+		shm.close()
+		shm.unlink()
+		raise
+	shm.close()
+	# The block is unlinked by the parent process. Stop the resource tracker of this worker process
+	# from tracking it, or it will complain about leaked / missing blocks at shutdown
+	resource_tracker.unregister(shm._name, 'shared_memory')  # noqa
+	return _SharedResult(chunk_count, digest_size, shm.name, None)
+
+
+def _collect_shared_result(result: _SharedResult, file_path: Union[str, bytes, Path], hash_name: Optional[str]) -> ChunkBoundaries:
+	lengths = array.array('Q')
+	gear_hashes = array.array('Q')
+	digests: Optional[List[bytes]] = [] if hash_name is not None else None
+
+	def load(buf: memoryview):
+		array_size = result.chunk_count * lengths.itemsize
+		lengths.frombytes(buf[:array_size])
+		gear_hashes.frombytes(buf[array_size:array_size * 2])
+		if digests is not None:
+			size = result.digest_size
+			digest_buf = bytes(buf[array_size * 2:array_size * 2 + result.chunk_count * size])
+			digests.extend(digest_buf[i:i + size] for i in range(0, len(digest_buf), size))
+
+	if result.shm_name is not None:
+		from multiprocessing import shared_memory
+		shm = shared_memory.SharedMemory(name=result.shm_name)
+		try:
+			load(shm.buf)
+		finally:
+			shm.close()
+			shm.unlink()
+	elif result.payload is not None:
+		load(memoryview(result.payload))
+	return ChunkBoundaries(file_path, lengths, gear_hashes, digests, hash_name)
+
+
+def _discard_shared_result(future: 'Future[_SharedResult]'):
+	if future.cancel() or future.exception() is not None:
+		return
+	shm_name = future.result().shm_name
+	if shm_name is not None:
+		from multiprocessing import shared_memory
+		shm = shared_memory.SharedMemory(name=shm_name)
+		shm.close()
+		shm.unlink()
+
+
+def _cut_files_parallel(
+		cdc: 'FastCDC',
+		file_paths: Iterator[Union[str, bytes, Path]],
+		hash_name: Optional[str],
+		max_workers: Optional[int],
+		executor: Executor,
+		own_executor: bool,
+) -> Iterator[ChunkBoundaries]:
+	# keep a bounded window of files in flight, so results waiting in shared memory don't pile up
+	# when the consumer is slower than the workers, or when there are many files
+	max_pending = 2 * (max_workers or os.cpu_count() or 1)
+	pending: Deque[Tuple[Union[str, bytes, Path], 'Future[_SharedResult]']] = collections.deque()
+	try:
+		while True:
+			while len(pending) < max_pending:
+				file_path = next(file_paths, None)
+				if file_path is None:
+					break
+				pending.append((file_path, executor.submit(_cut_file_into_shared_memory, cdc, file_path, hash_name)))
+			if len(pending) == 0:
+				break
+			file_path, future = pending[0]
+			result = future.result()
+			pending.popleft()
+			yield _collect_shared_result(result, file_path, hash_name)
+	finally:
+		for _, future in pending:
+			_discard_shared_result(future)
+		if own_executor:
+			executor.shutdown(wait=True)
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+def cut_files_parallel(
+		cdc: 'FastCDC',
+		file_paths: Iterable[Union[str, bytes, Path]],
+		*,
+		hash_name: Optional[str] = None,
+		max_workers: Optional[int] = None,
+		executor: Optional[Executor] = None,
+) -> Iterator[ChunkBoundaries]:
+	# not a generator itself, so that invalid arguments are reported at the call
+	if hash_name is not None:
+		utils.create_hash_func(hash_name)  # validate before sending to workers
+	file_path_iter = iter(file_paths)
+
+	own_executor = executor is None
+	if executor is None:
+		executor = ProcessPoolExecutor(max_workers=max_workers)
+	return _cut_files_parallel(cdc, file_path_iter, hash_name, max_workers, executor, own_executor)
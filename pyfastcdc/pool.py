@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class BufferPool:
+	def __init__(self, max_bytes: int, *, timeout: Optional[float] = None):
+		if max_bytes <= 0:
+			raise ValueError(f'max_bytes {max_bytes} should be positive')
+		if timeout is not None and timeout < 0:
+			raise ValueError(f'timeout {timeout} should not be negative')
+		self.__max_bytes = max_bytes
+		self.__timeout = timeout
+		self.__cond = threading.Condition()
+		self.__free_buffers: Dict[int, List[bytearray]] = {}
+		self.__free_bytes = 0
+		self.__used_bytes = 0
+		self.__acquired_ids: Set[int] = set()  # buffers that are handed out and not released yet
+
+	def acquire(self, size: int) -> bytearray:
+		if size <= 0:
+			raise ValueError(f'size {size} should be positive')
+		if size > self.__max_bytes:
+			raise ValueError(f'size {size} is greater than max_bytes {self.__max_bytes}')
+
+		deadline = time.monotonic() + self.__timeout if self.__timeout is not None else None
+		with self.__cond:
+			while True:
+				free_list = self.__free_buffers.get(size)
+				if free_list:
+					self.__free_bytes -= size
+					self.__used_bytes += size
+					buf = free_list.pop()
+					self.__acquired_ids.add(id(buf))
+					return buf
+
+				# drop cached buffers of other sizes to make room
+				for free_list in self.__free_buffers.values():
+					while free_list and self.__used_bytes + self.__free_bytes + size > self.__max_bytes:
+						self.__free_bytes -= len(free_list.pop())
+				if self.__used_bytes + self.__free_bytes + size <= self.__max_bytes:
+					self.__used_bytes += size
+					break
+
+				if deadline is None:
+					self.__cond.wait()
+				else:
+					remaining = deadline - time.monotonic()
+					if remaining <= 0:
+						raise TimeoutError(f'timed out waiting for {size} bytes from the buffer pool')
+					self.__cond.wait(remaining)
+
+		try:
+			buf = bytearray(size)
+		except BaseException:
+			with self.__cond:
+				self.__used_bytes -= size
+				self.__cond.notify_all()
+			raise
+		with self.__cond:
+			self.__acquired_ids.add(id(buf))
+		return buf
+
+	def release(self, buf: bytearray):
+		size = len(buf)
+		with self.__cond:
+			if id(buf) not in self.__acquired_ids:
+				raise ValueError('the buffer is not acquired from this pool, or is already released')
+			self.__acquired_ids.remove(id(buf))
+			self.__used_bytes -= size
+			self.__free_buffers.setdefault(size, []).append(buf)
+			self.__free_bytes += size
+			self.__cond.notify_all()
+
+	def _discard(self, buf: bytearray):
+		# give the budget back, but do not cache the buffer, since something might still be viewing it
+		size = len(buf)
+		with self.__cond:
+			if id(buf) not in self.__acquired_ids:
+				raise ValueError('the buffer is not acquired from this pool, or is already released')
+			self.__acquired_ids.remove(id(buf))
+			self.__used_bytes -= size
+			self.__cond.notify_all()
+
+	@property
+	def max_bytes(self) -> int:
+		return self.__max_bytes
+
+	@property
+	def used_bytes(self) -> int:
+		return self.__used_bytes
+
+	@property
+	def cached_bytes(self) -> int:
+		return self.__free_bytes
+
+	def __repr__(self) -> str:
+		return f'<BufferPool max_bytes={self.__max_bytes} used_bytes={self.__used_bytes} cached_bytes={self.__free_bytes}>'
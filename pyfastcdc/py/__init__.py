@@ -1,7 +1,16 @@
-from pyfastcdc.py.fastcdc import FastCDC
+from pyfastcdc.py.bloom import BloomFilter
+from pyfastcdc.py.fastcdc import AECDC, FastCDC, FastCDC2016, RAMCDC
 from pyfastcdc.py.chunk import Chunk
+from pyfastcdc.py.stats import ChunkerStats
+from pyfastcdc.py.trace import ChunkTracer
 
 __all__ = [
+	'AECDC',
+	'BloomFilter',
 	'FastCDC',
+	'FastCDC2016',
+	'RAMCDC',
 	'Chunk',
+	'ChunkerStats',
+	'ChunkTracer',
 ]
@@ -0,0 +1,131 @@
+import mmap
+import struct
+import threading
+from pathlib import Path
+from typing import List, Optional, Union
+
+from pyfastcdc import _bloom_format, utils
+from pyfastcdc.py.murmur3 import murmur3_x64_128
+
+_UINT64_MASK = (1 << 64) - 1
+_HASHES = struct.Struct('<QQ')
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class BloomFilter:
+	def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+		header = _bloom_format.create_bloom_filter_header(capacity, false_positive_rate)
+		buf = bytearray(_bloom_format.BLOOM_FILTER_HEADER_SIZE + header.bit_count // 8)
+		self.__setup(header, buf, None)
+
+	@classmethod
+	def load(cls, file_path: Union[str, bytes, Path], *, writable: bool = False) -> 'BloomFilter':
+		mmap_obj, header = _bloom_format.mmap_bloom_filter_file(file_path, writable)
+		bloom_filter = cls.__new__(cls)
+		bloom_filter.__setup(header, mmap_obj, mmap_obj if writable else None)
+		return bloom_filter
+
+	def __setup(self, header: _bloom_format.BloomFilterHeader, buf: Union[bytearray, mmap.mmap], synced_mmap: Optional[mmap.mmap]):
+		self.__header = header
+		self.__count = header.count
+		self.__buf = buf
+		self.__bits = memoryview(buf)[_bloom_format.BLOOM_FILTER_HEADER_SIZE:]
+		self.__synced_mmap = synced_mmap
+		self.__lock = threading.Lock()
+
+	def __bit_positions(self, key: memoryview) -> List[int]:
+		h1, h2 = _HASHES.unpack(murmur3_x64_128(key))
+		bit_count = self.__header.bit_count
+		return [((h1 + i * h2) & _UINT64_MASK) % bit_count for i in range(self.__header.hash_count)]
+
+	def __add(self, key: memoryview) -> bool:
+		bits = self.__bits
+		added = False
+		for pos in self.__bit_positions(key):
+			byte = bits[pos >> 3]
+			mask = 1 << (pos & 7)
+			if not (byte & mask):
+				bits[pos >> 3] = byte | mask
+				added = True
+		if added:
+			self.__count += 1
+		return added
+
+	def __contains(self, key: memoryview) -> bool:
+		bits = self.__bits
+		return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self.__bit_positions(key))
+
+	def add(self, key: Union[bytes, bytearray, memoryview]) -> bool:
+		key = utils.create_memoryview_from_buffer(key)
+		with self.__lock:
+			return self.__add(key)
+
+	def add_many(self, keys: Union[bytes, bytearray, memoryview], key_size: int) -> int:
+		keys = _split_keys(keys, key_size)
+		with self.__lock:
+			return sum(self.__add(keys[i:i + key_size]) for i in range(0, len(keys), key_size))
+
+	def __contains__(self, key: Union[bytes, bytearray, memoryview]) -> bool:
+		return self.__contains(utils.create_memoryview_from_buffer(key))
+
+	def contains_many(self, keys: Union[bytes, bytearray, memoryview], key_size: int) -> List[bool]:
+		keys = _split_keys(keys, key_size)
+		return [self.__contains(keys[i:i + key_size]) for i in range(0, len(keys), key_size)]
+
+	def save(self, file_path: Union[str, bytes, Path]):
+		with open(file_path, 'wb') as f:
+			f.write(_bloom_format.pack_bloom_filter_header(self.__current_header()))
+			f.write(self.__bits)
+
+	def flush(self):
+		if self.__synced_mmap is not None:
+			self.__buf[:_bloom_format.BLOOM_FILTER_HEADER_SIZE] = _bloom_format.pack_bloom_filter_header(self.__current_header())
+			self.__synced_mmap.flush()
+
+	def close(self):
+		with self.__lock:
+			if isinstance(self.__buf, mmap.mmap) and not self.__buf.closed:
+				self.flush()
+				self.__bits.release()
+				self.__buf.close()
+
+	def __enter__(self) -> 'BloomFilter':
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def __current_header(self) -> _bloom_format.BloomFilterHeader:
+		return self.__header._replace(count=self.__count)
+
+	@property
+	def capacity(self) -> int:
+		return self.__header.capacity
+
+	@property
+	def false_positive_rate(self) -> float:
+		return self.__header.false_positive_rate
+
+	@property
+	def bit_count(self) -> int:
+		return self.__header.bit_count
+
+	@property
+	def hash_count(self) -> int:
+		return self.__header.hash_count
+
+	@property
+	def count(self) -> int:
+		return self.__count
+
+	def __repr__(self) -> str:
+		return f'<{self.__class__.__name__} capacity={self.capacity} false_positive_rate={self.false_positive_rate} count={self.count}>'
+
+
+def _split_keys(keys: Union[bytes, bytearray, memoryview], key_size: int) -> memoryview:
+	keys = utils.create_memoryview_from_buffer(keys)
+	if key_size <= 0:
+		raise ValueError(f'key_size {key_size} should be positive')
+	if len(keys) % key_size != 0:
+		raise ValueError(f'the size of keys {len(keys)} is not a multiple of key_size {key_size}')
+	return keys
@@ -1,11 +1,26 @@
+from typing import Optional
+
+from pyfastcdc.common import Sketch
+
+
 class Chunk:
-	__slots__ = ('offset', 'length', 'data', 'gear_hash')
+	__slots__ = ('offset', 'length', 'data', 'gear_hash', 'fingerprint', 'sketch')
 
-	def __init__(self, offset: int, length: int, data: memoryview, gear_hash: int):
+	def __init__(self, offset: int, length: int, data: memoryview, gear_hash: int, fingerprint: Optional[bytes] = None, sketch: Optional[Sketch] = None):
 		self.offset = offset
 		self.length = length
 		self.data = data
 		self.gear_hash = gear_hash
+		self.fingerprint = fingerprint
+		self.sketch = sketch
+
+	def __reduce__(self):
+		# memoryview is not picklable, the chunk data is copied into a bytes object instead
+		return _restore_chunk, (self.offset, self.length, bytes(self.data), self.gear_hash, self.fingerprint, self.sketch)
 
 	def __repr__(self) -> str:
 		return f'<{self.__class__.__name__} offset={self.offset} length={self.length} gear_hash={self.gear_hash}>'
+
+
+def _restore_chunk(offset: int, length: int, data: bytes, gear_hash: int, fingerprint: Optional[bytes], sketch: Optional[Sketch]) -> Chunk:
+	return Chunk(offset, length, memoryview(data), gear_hash, fingerprint, sketch)
@@ -1,14 +1,29 @@
+import abc
 import array
 from pathlib import Path
-from typing import Optional, ClassVar, Union, Iterator
+from typing import Optional, ClassVar, Union, Iterable, Iterator, List, Tuple
 
-from pyfastcdc import utils
-from pyfastcdc.common import BinaryStreamReader, NormalizedChunking
+from pyfastcdc import compression, utils
+from pyfastcdc.common import BinaryStreamReader, Boundaries, CompressionCodec, NormalizedChunking
 from pyfastcdc.py.chunk import Chunk
-from pyfastcdc.py.constants import MASKS, GEAR, GEAR_LS
+from pyfastcdc.py.constants import MASKS, GEAR, GEAR_2016, GEAR_LS
+from pyfastcdc.py.murmur3 import murmur3_x64_128
+from pyfastcdc.py.sketch import create_sketch
+from pyfastcdc.py.stats import ChunkerStats
+from pyfastcdc.py.trace import ChunkTracer, SPAN_NEXT, SPAN_READ, SPAN_SCAN, SPAN_SHIFT, SPAN_YIELD
+from pyfastcdc.pool import BufferPool
 from pyfastcdc.utils import ReadintoFunc
 
 _UINT64_MASK = (1 << 64) - 1
+READ_ITER_BLOCK_SIZE_FACTOR = 4  # read() size of streams without readinto(), in the unit of max_size
+READ_ITER_BLOCK_SIZE_LIMIT = 64 * 1048576  # keep read() sizes reasonable for huge max_size, chunks across blocks are copied anyway
+STREAM_READ_SIZE_LIMIT = 64 * 1048576  # cut_stream() buffers max_size plus up to this many bytes
+
+# the chunking algorithm of a config, i.e. which class it is from
+_ALGORITHM_FASTCDC = 0
+_ALGORITHM_FASTCDC_2016 = 1
+_ALGORITHM_AE = 2
+_ALGORITHM_RAM = 3
 
 
 class _Config:
@@ -16,12 +31,19 @@ class _Config:
 	min_size: int
 	max_size: int
 	normalized_chunking: NormalizedChunking
+	seed: int
+	fingerprint: bool
+	sketch: bool
 	mask_s: int
 	mask_l: int
 	mask_s_ls: int
 	mask_l_ls: int
 	gear: 'array.array[int]'
 	gear_ls: 'array.array[int]'
+	algorithm: int
+	center_size: int  # FastCDC 2016 only, where the cut mask switches from mask_s to mask_l
+	window_size: int  # AE and RAM only
+	zero_chunk: Optional[Chunk] = None  # see _get_zero_chunk()
 
 	def __init__(
 			self,
@@ -29,23 +51,35 @@ class _Config:
 			min_size: int,
 			max_size: int,
 			normalized_chunking: NormalizedChunking,
+			seed: int,
+			fingerprint: bool,
+			sketch: bool,
 			mask_s: int,
 			mask_l: int,
 			mask_s_ls: int,
 			mask_l_ls: int,
 			gear: 'array.array[int]',
 			gear_ls: 'array.array[int]',
+			algorithm: int = _ALGORITHM_FASTCDC,
+			center_size: int = 0,
+			window_size: int = 0,
 	):
 		self.avg_size = avg_size
 		self.min_size = min_size
 		self.max_size = max_size
 		self.normalized_chunking = normalized_chunking
+		self.seed = seed
+		self.fingerprint = fingerprint
+		self.sketch = sketch
 		self.mask_s = mask_s
 		self.mask_l = mask_l
 		self.mask_s_ls = mask_s_ls
 		self.mask_l_ls = mask_l_ls
 		self.gear = gear
 		self.gear_ls = gear_ls
+		self.algorithm = algorithm
+		self.center_size = center_size
+		self.window_size = window_size
 
 
 # docstrings are in pyfastcdc/__init__.pyi
@@ -53,9 +87,9 @@ class FastCDC:
 	MIN_SIZE_LOWER_BOUND: ClassVar[int] = 64
 	AVG_SIZE_LOWER_BOUND: ClassVar[int] = 256
 	MAX_SIZE_LOWER_BOUND: ClassVar[int] = 1024
-	MIN_SIZE_UPPER_BOUND: ClassVar[int] = 1 * 1048576
-	AVG_SIZE_UPPER_BOUND: ClassVar[int] = 4 * 1048576
-	MAX_SIZE_UPPER_BOUND: ClassVar[int] = 16 * 1048576
+	MIN_SIZE_UPPER_BOUND: ClassVar[int] = 32 * 1048576
+	AVG_SIZE_UPPER_BOUND: ClassVar[int] = 128 * 1048576
+	MAX_SIZE_UPPER_BOUND: ClassVar[int] = 512 * 1048576
 
 	def __init__(
 			self,
@@ -65,17 +99,19 @@ class FastCDC:
 			max_size: Optional[int] = None,
 			normalized_chunking: NormalizedChunking = 1,
 			seed: int = 0,
+			fingerprint: bool = False,
+			sketch: bool = False,
 	):
 		if min_size is None:
 			min_size = avg_size // 4
 		if max_size is None:
 			max_size = avg_size * 4
 		if not (self.AVG_SIZE_LOWER_BOUND <= avg_size <= self.AVG_SIZE_UPPER_BOUND):
-			raise ValueError(f'min_size {avg_size} is out of range [{self.AVG_SIZE_LOWER_BOUND}, {self.AVG_SIZE_UPPER_BOUND}]')
+			raise ValueError(f'avg_size {avg_size} is out of range [{self.AVG_SIZE_LOWER_BOUND}, {self.AVG_SIZE_UPPER_BOUND}]')
 		if not (self.MIN_SIZE_LOWER_BOUND <= min_size <= self.MIN_SIZE_UPPER_BOUND):
 			raise ValueError(f'min_size {min_size} is out of range [{self.MIN_SIZE_LOWER_BOUND}, {self.MIN_SIZE_UPPER_BOUND}]')
 		if not (self.MAX_SIZE_LOWER_BOUND <= max_size <= self.MAX_SIZE_UPPER_BOUND):
-			raise ValueError(f'min_size {max_size} is out of range [{self.MAX_SIZE_LOWER_BOUND}, {self.MAX_SIZE_UPPER_BOUND}]')
+			raise ValueError(f'max_size {max_size} is out of range [{self.MAX_SIZE_LOWER_BOUND}, {self.MAX_SIZE_UPPER_BOUND}]')
 		if not (min_size <= avg_size <= max_size):
 			raise ValueError(f'avg_size {avg_size} is out of range [{min_size}, {max_size}]')
 		if not (0 <= normalized_chunking <= 3):
@@ -100,6 +136,9 @@ class FastCDC:
 			min_size=min_size,
 			max_size=max_size,
 			normalized_chunking=normalized_chunking,
+			seed=seed,
+			fingerprint=bool(fingerprint),
+			sketch=bool(sketch),
 			mask_s=mask_s,
 			mask_l=mask_l,
 			mask_s_ls=mask_s_ls,
@@ -108,14 +147,35 @@ class FastCDC:
 			gear_ls=gear_ls,
 		)
 
-	def cut_buf(self, buf: Union[bytes, bytearray, memoryview]) -> Iterator[Chunk]:
-		return BufferChunker(self.config, utils.create_memoryview_from_buffer(buf))
+	def __reduce__(self):
+		return utils.reconstruct, (type(self), (self.avg_size,), {
+			'min_size': self.min_size,
+			'max_size': self.max_size,
+			'normalized_chunking': self.normalized_chunking,
+			'seed': self.seed,
+			'fingerprint': self.fingerprint,
+			'sketch': self.sketch,
+		})
+
+	def cut_buf(self, buf: Union[bytes, bytearray, memoryview], *, boundaries: Optional[Boundaries] = None, sparse: bool = False, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		return BufferChunker(self.config, utils.create_memoryview_from_buffer(buf), boundaries, sparse, stats=stats, tracer=tracer)
+
+	def cut_file(self, file_path: Union[str, bytes, Path], *, boundaries: Optional[Boundaries] = None, sparse: bool = False, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		return FileMmapChunker(self.config, file_path, boundaries, sparse, stats, tracer)
+
+	def cut_stream(self, stream: BinaryStreamReader, *, boundaries: Optional[Boundaries] = None, buffer_pool: Optional[BufferPool] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		if buffer_pool is None:
+			blocks = utils.create_read_iter(stream, min(self.config.max_size * READ_ITER_BLOCK_SIZE_FACTOR, READ_ITER_BLOCK_SIZE_LIMIT))
+			if blocks is not None:
+				return IterChunker(self.config, blocks, boundaries, stats, tracer)
+		return StreamChunker(self.config, utils.create_readinto_func(stream), boundaries, buffer_pool, stats, tracer)
 
-	def cut_file(self, file_path: Union[str, bytes, Path]) -> Iterator[Chunk]:
-		return FileMmapChunker(self.config, file_path)
+	def cut_iter(self, blocks: Iterable[Union[bytes, bytearray, memoryview]], *, boundaries: Optional[Boundaries] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		return IterChunker(self.config, blocks, boundaries, stats, tracer)
 
-	def cut_stream(self, stream: BinaryStreamReader) -> Iterator[Chunk]:
-		return StreamChunker(self.config, utils.create_readinto_func(stream))
+	def cut_compressed(self, source: Union[str, bytes, Path, BinaryStreamReader], *, codec: Optional[CompressionCodec] = None, boundaries: Optional[Boundaries] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None) -> Iterator[Chunk]:
+		blocks = compression.create_decompress_iter(source, codec, min(self.config.max_size * READ_ITER_BLOCK_SIZE_FACTOR, READ_ITER_BLOCK_SIZE_LIMIT))
+		return IterChunker(self.config, blocks, boundaries, stats, tracer)
 
 	@property
 	def avg_size(self) -> int:
@@ -129,6 +189,100 @@ class FastCDC:
 	def max_size(self) -> int:
 		return self.config.max_size
 
+	@property
+	def normalized_chunking(self) -> NormalizedChunking:
+		return self.config.normalized_chunking
+
+	@property
+	def seed(self) -> int:
+		return self.config.seed
+
+	@property
+	def fingerprint(self) -> bool:
+		return self.config.fingerprint
+
+	@property
+	def sketch(self) -> bool:
+		return self.config.sketch
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class FastCDC2016(FastCDC):
+	def __init__(
+			self,
+			avg_size: int = 8192,
+			*,
+			min_size: Optional[int] = None,
+			max_size: Optional[int] = None,
+			fingerprint: bool = False,
+			sketch: bool = False,
+	):
+		if max_size is None:
+			max_size = min(avg_size * 8, self.MAX_SIZE_UPPER_BOUND)
+		super().__init__(avg_size, min_size=min_size, max_size=max_size, normalized_chunking=0, fingerprint=fingerprint, sketch=sketch)
+		params = utils.get_fastcdc2016_params(self.config.avg_size, self.config.min_size, self.config.max_size)
+		self.config.algorithm = _ALGORITHM_FASTCDC_2016
+		self.config.mask_s = params.mask_s
+		self.config.mask_l = params.mask_l
+		self.config.center_size = params.center_size
+		self.config.gear = GEAR_2016
+
+	def __reduce__(self):
+		return utils.reconstruct, (type(self), (self.avg_size,), {
+			'min_size': self.min_size,
+			'max_size': self.max_size,
+			'fingerprint': self.fingerprint,
+			'sketch': self.sketch,
+		})
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class AECDC(FastCDC):
+	def __init__(
+			self,
+			avg_size: int = 16384,
+			*,
+			min_size: Optional[int] = None,
+			max_size: Optional[int] = None,
+			fingerprint: bool = False,
+			sketch: bool = False,
+	):
+		super().__init__(avg_size, min_size=min_size, max_size=max_size, normalized_chunking=0, fingerprint=fingerprint, sketch=sketch)
+		self.config.algorithm = _ALGORITHM_AE
+		self.config.window_size = utils.get_ae_window_size(self.config.avg_size, self.config.min_size)
+
+	def __reduce__(self):
+		return utils.reconstruct, (type(self), (self.avg_size,), {
+			'min_size': self.min_size,
+			'max_size': self.max_size,
+			'fingerprint': self.fingerprint,
+			'sketch': self.sketch,
+		})
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class RAMCDC(FastCDC):
+	def __init__(
+			self,
+			avg_size: int = 16384,
+			*,
+			min_size: Optional[int] = None,
+			max_size: Optional[int] = None,
+			fingerprint: bool = False,
+			sketch: bool = False,
+	):
+		super().__init__(avg_size, min_size=min_size, max_size=max_size, normalized_chunking=0, fingerprint=fingerprint, sketch=sketch)
+		self.config.algorithm = _ALGORITHM_RAM
+		self.config.window_size = utils.get_ram_window_size(self.config.avg_size, self.config.min_size)
+
+	def __reduce__(self):
+		return utils.reconstruct, (type(self), (self.avg_size,), {
+			'min_size': self.min_size,
+			'max_size': self.max_size,
+			'fingerprint': self.fingerprint,
+			'sketch': self.sketch,
+		})
+
 
 class _CutResult:
 	gear_hash: int
@@ -182,87 +336,516 @@ def _cut_gear(config: _Config, buf: memoryview) -> _CutResult:
 	return _CutResult(gear_hash, remaining)
 
 
-class BufferChunker(Iterator[Chunk]):
-	def __init__(self, config: _Config, buf: memoryview):
+# FastCDC 2016 as iscc/fastcdc-py implements it: a 32-bit gear hash that shifts right, one byte per step
+def _cut_gear_2016(config: _Config, buf: memoryview) -> _CutResult:
+	remaining = len(buf)
+	if remaining <= config.min_size:
+		return _CutResult(0, remaining)
+	if remaining > config.max_size:
+		remaining = config.max_size
+	center = min(config.center_size, remaining)
+
+	# speed up variable lookup
+	gear = config.gear
+	mask_s = config.mask_s
+	mask_l = config.mask_l
+
+	# no need to mask to 32 bits, the hash never exceeds 2 * max(gear)
+	gear_hash = 0
+	for pos in range(config.min_size, center):
+		gear_hash = (gear_hash >> 1) + gear[buf[pos]]
+		if not (gear_hash & mask_s):
+			return _CutResult(gear_hash, pos + 1)
+	for pos in range(max(config.min_size, center), remaining):
+		gear_hash = (gear_hash >> 1) + gear[buf[pos]]
+		if not (gear_hash & mask_l):
+			return _CutResult(gear_hash, pos + 1)
+
+	return _CutResult(gear_hash, remaining)
+
+
+# Asymmetric Extremum. The value at a position is its preceding 8 bytes as a big-endian uint64.
+# Cuts right after the first position that is window_size positions after the max value, without a greater value between them
+def _cut_ae(config: _Config, buf: memoryview) -> _CutResult:
+	remaining = len(buf)
+	if remaining <= config.min_size:
+		return _CutResult(0, remaining)
+	if remaining > config.max_size:
+		remaining = config.max_size
+
+	window_size = config.window_size
+	mask64 = _UINT64_MASK
+	max_value = int.from_bytes(buf[config.min_size - 7:config.min_size + 1], 'big')
+	max_pos = config.min_size
+	value = max_value
+	for pos in range(config.min_size + 1, remaining):
+		value = ((value << 8) | buf[pos]) & mask64
+		if value > max_value:
+			max_value = value
+			max_pos = pos
+		elif pos == max_pos + window_size:
+			return _CutResult(0, pos + 1)
+
+	return _CutResult(0, remaining)
+
+
+# Rapid Asymmetric Maximum. Cuts right after the first byte after the window that is not less than the max byte in the window
+def _cut_ram(config: _Config, buf: memoryview) -> _CutResult:
+	remaining = len(buf)
+	if remaining <= config.min_size:
+		return _CutResult(0, remaining)
+	if remaining > config.max_size:
+		remaining = config.max_size
+
+	window_end = min(config.min_size + config.window_size, remaining)
+	max_value = max(buf[config.min_size:window_end])
+	for pos in range(window_end, remaining):
+		if buf[pos] >= max_value:
+			return _CutResult(0, pos + 1)
+
+	return _CutResult(0, remaining)
+
+
+# the same as _cut_gear(), but for configs of all algorithms
+def _cut(config: _Config, buf: memoryview) -> _CutResult:
+	algorithm = config.algorithm
+	if algorithm == _ALGORITHM_FASTCDC:
+		return _cut_gear(config, buf)
+	elif algorithm == _ALGORITHM_FASTCDC_2016:
+		return _cut_gear_2016(config, buf)
+	elif algorithm == _ALGORITHM_AE:
+		return _cut_ae(config, buf)
+	else:
+		return _cut_ram(config, buf)
+
+
+# _cut(), plus adding the time spent in it to the stats and the tracer if any
+def _cut_observed(stats: Optional[ChunkerStats], tracer: Optional[ChunkTracer], config: _Config, buf: memoryview) -> _CutResult:
+	if stats is None and tracer is None:
+		return _cut(config, buf)
+	start_ns = utils.perf_counter_ns()
+	res = _cut(config, buf)
+	end_ns = utils.perf_counter_ns()
+	if stats is not None:
+		stats._add_cut_time(end_ns - start_ns)
+	if tracer is not None:
+		tracer._add_span(SPAN_SCAN, start_ns, end_ns, res.cut_offset)
+	return res
+
+
+_CUT_REASON_MASK_S = 0
+_CUT_REASON_MASK_L = 1
+_CUT_REASON_EXTREMUM = 2
+_CUT_REASON_MAX_SIZE = 3
+_CUT_REASON_BOUNDARY = 4
+_CUT_REASON_END = 5
+_CUT_REASON_ZERO = 6
+
+
+# Why the cut of the final _cut() call of a chunk happened, where cut_len is the length of the buffer passed to it, as an index of utils.CUT_REASONS.
+# A cut at the end of the scanned data is forced. A content-defined cut right there is rare, and counted as forced too
+def _get_cut_reason(config: _Config, res: _CutResult, cut_len: int, limit: Optional[int]) -> int:
+	if res.cut_offset >= min(cut_len, config.max_size):
+		if res.cut_offset == limit:
+			return _CUT_REASON_BOUNDARY
+		elif res.cut_offset == config.max_size:
+			return _CUT_REASON_MAX_SIZE
+		return _CUT_REASON_END
+
+	if config.algorithm == _ALGORITHM_FASTCDC:
+		center = (min(config.avg_size, cut_len) // 2) * 2
+		# the mask_s phase cuts before the center, and the mask_l phase cuts at or after it
+		if res.cut_offset < center:
+			return _CUT_REASON_MASK_S
+		return _CUT_REASON_MASK_L
+	elif config.algorithm == _ALGORITHM_FASTCDC_2016:
+		return _CUT_REASON_MASK_S if res.cut_offset <= min(config.center_size, cut_len) else _CUT_REASON_MASK_L
+	else:
+		return _CUT_REASON_EXTREMUM
+
+
+def _create_chunk(config: _Config, offset: int, data: memoryview, gear_hash: int) -> Chunk:
+	return Chunk(
+		offset=offset,
+		length=len(data),
+		data=data,
+		gear_hash=gear_hash,
+		fingerprint=murmur3_x64_128(data) if config.fingerprint else None,
+		sketch=create_sketch(data) if config.sketch else None,
+	)
+
+
+class _BoundaryTracker:
+	def __init__(self, boundaries: Optional[Boundaries]):
+		self.next_boundary_func = utils.create_next_boundary_func(boundaries) if boundaries is not None else None
+		self.next_boundary: Optional[int] = 0
+
+	# returns the max length of the chunk at the given offset so it won't cross the next forced boundary, or None if no limit
+	def get_limit(self, offset: int) -> Optional[int]:
+		if self.next_boundary_func is None:
+			return None
+		if self.next_boundary is not None and self.next_boundary <= offset:
+			self.next_boundary = self.next_boundary_func(offset)
+		if self.next_boundary is None:
+			return None
+		return self.next_boundary - offset
+
+
+_ZERO_PAGE = bytes(65536)
+
+
+# The chunk that a run of zeros starts with. The cut point of a chunk only depends on its own data,
+# so it's computed once per config. Its data is left empty, only the other fields are used
+def _get_zero_chunk(config: _Config) -> Chunk:
+	zero_chunk = config.zero_chunk
+	if zero_chunk is None:
+		zeros = memoryview(bytes(config.max_size))
+		res = _cut(config, zeros)
+		zero_chunk = _create_chunk(config, 0, zeros[:res.cut_offset], res.gear_hash)
+		zero_chunk.data = memoryview(b'')
+		config.zero_chunk = zero_chunk
+	return zero_chunk
+
+
+# Creates chunks that consist of zeros only without gear hashing, e.g. for holes of sparse files.
+# All zero chunks are cut at the same length, see _get_zero_chunk()
+class _ZeroRegionScanner:
+	def __init__(self, config: _Config, buf: memoryview, holes: List[Tuple[int, int]]):
 		self.config = config
 		self.buf = buf
-		self.offset = 0
+		self.holes = holes
+		self.hole_index = 0
+		self.zero_chunk = _get_zero_chunk(config)
+
+	# returns None if the chunk at the given offset is not a zero chunk
+	def create_chunk(self, offset: int, avail_len: int) -> Optional[Chunk]:
+		zero_chunk = self.zero_chunk
+		# the cut kernel of FastCDC steps 2 bytes at a time, so it needs 2 bytes after the zero chunk end
+		# to reach the same cut. With less bytes available, the chunk end might be cut differently.
+		# A cut before max_size is decided with the gear hash of the byte right after the chunk, which must be a zero too
+		if avail_len < zero_chunk.length + 2 and avail_len < self.config.max_size:
+			return None
+		end_pos = offset + zero_chunk.length
+		if not self.__is_zero(offset, end_pos + 1 if zero_chunk.length < self.config.max_size else end_pos):
+			return None
+		return Chunk(
+			offset=offset,
+			length=zero_chunk.length,
+			data=self.buf[offset:end_pos],
+			gear_hash=zero_chunk.gear_hash,
+			fingerprint=zero_chunk.fingerprint,
+			sketch=zero_chunk.sketch,
+		)
+
+	def __is_zero(self, start: int, end: int) -> bool:
+		holes = self.holes
+		pos = start
+		while pos < end:
+			while self.hole_index < len(holes) and holes[self.hole_index][1] <= pos:
+				self.hole_index += 1
+			if self.hole_index < len(holes) and holes[self.hole_index][0] <= pos:
+				pos = holes[self.hole_index][1]  # holes are zeros, no need to read them
+				continue
+			scan_end = end if self.hole_index == len(holes) else min(end, holes[self.hole_index][0])
+			if self.buf[pos] != 0:
+				return False
+			while pos < scan_end:
+				page_end = min(scan_end, pos + len(_ZERO_PAGE))
+				if self.buf[pos:page_end].tobytes() != _ZERO_PAGE[:page_end - pos]:
+					return False
+				pos = page_end
+		return True
+
+
+# Adds the time spent in __next__(), and in the consumer between the calls, to the stats and the tracer,
+# for chunkers that implement _next() instead
+class _Chunker(Iterator[Chunk]):
+	stats: Optional[ChunkerStats]  # None if stats are not gathered
+	tracer: Optional[ChunkTracer]  # None if not traced
+	last_return_ns = 0  # when __next__() last returned, 0 if never, for the yield spans
+	last_length = 0  # the length of the chunk last returned, for the yield spans
 
 	def __next__(self) -> Chunk:
+		if self.stats is None and self.tracer is None:
+			return self._next()
+		start_ns = utils.perf_counter_ns()
+		if self.tracer is not None and self.last_return_ns != 0:
+			self.tracer._add_span(SPAN_YIELD, self.last_return_ns, start_ns, self.last_length)
+		chunk = None
+		try:
+			chunk = self._next()
+			return chunk
+		finally:
+			end_ns = utils.perf_counter_ns()
+			if self.stats is not None:
+				self.stats._add_total_time(end_ns - start_ns)
+			if self.tracer is not None:
+				self.last_return_ns = end_ns
+				self.last_length = chunk.length if chunk is not None else 0
+				self.tracer._add_span(SPAN_NEXT, start_ns, end_ns, self.last_length)
+
+	@abc.abstractmethod
+	def _next(self) -> Chunk:
+		...
+
+	# the start time of an optional span, 0 if not traced
+	def _span_start(self) -> int:
+		return utils.perf_counter_ns() if self.tracer is not None else 0
+
+	def _span_end(self, span: int, start_ns: int, size: int):
+		if self.tracer is not None:
+			self.tracer._add_span(span, start_ns, utils.perf_counter_ns(), size)
+
+	# adds a read that started at start_ns to the stats and the tracer
+	def _add_read(self, start_ns: int, n_read: int):
+		end_ns = utils.perf_counter_ns()
+		if self.stats is not None:
+			self.stats._add_read(n_read, end_ns - start_ns)
+		if self.tracer is not None:
+			self.tracer._add_span(SPAN_READ, start_ns, end_ns, n_read)
+
+
+class BufferChunker(_Chunker):
+	def __init__(self, config: _Config, buf: memoryview, boundaries: Optional[Boundaries] = None, sparse: bool = False, holes: Optional[List[Tuple[int, int]]] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None):
+		self.config = config
+		self.stats = stats
+		self.tracer = tracer
+		self.buf = buf
+		self.offset = 0
+		self.boundary_tracker = _BoundaryTracker(boundaries)
+		self.zero_scanner = _ZeroRegionScanner(config, buf, holes or []) if sparse else None
+
+	def _next(self) -> Chunk:
 		if self.offset >= len(self.buf):
 			raise StopIteration()
 
-		res = _cut_gear(self.config, self.buf[self.offset:])
+		limit = self.boundary_tracker.get_limit(self.offset)
+		if self.zero_scanner is not None:
+			avail_len = len(self.buf) - self.offset
+			chunk = self.zero_scanner.create_chunk(self.offset, avail_len if limit is None else min(avail_len, limit))
+			if chunk is not None:
+				if self.stats is not None:
+					self.stats._add_chunk(chunk.length, _CUT_REASON_ZERO)
+				self.offset += chunk.length
+				return chunk
+
+		remaining_buf = self.buf[self.offset:] if limit is None else self.buf[self.offset:self.offset + limit]
+		res = _cut_observed(self.stats, self.tracer, self.config, remaining_buf)
 		end_pos = self.offset + res.cut_offset
+		if self.stats is not None:
+			self.stats._add_chunk(res.cut_offset, _get_cut_reason(self.config, res, len(remaining_buf), limit))
 
-		chunk = Chunk(
-			offset=self.offset,
-			length=res.cut_offset,
-			data=self.buf[self.offset:end_pos],
-			gear_hash=res.gear_hash,
-		)
+		chunk = _create_chunk(self.config, self.offset, self.buf[self.offset:end_pos], res.gear_hash)
 		self.offset += res.cut_offset
 		return chunk
 
 
 class FileMmapChunker(BufferChunker):
-	def __init__(self, config: _Config, file_path: Union[str, bytes, Path]):
-		self.mmap_file = utils.create_mmap_from_file(file_path)
-		super().__init__(config, self.mmap_file.data)
+	def __init__(self, config: _Config, file_path: Union[str, bytes, Path], boundaries: Optional[Boundaries] = None, sparse: bool = False, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None):
+		self.mmap_file = utils.create_mmap_from_file(file_path, find_holes=sparse)
+		super().__init__(config, self.mmap_file.data, boundaries, sparse, self.mmap_file.holes, stats, tracer)
 
 
-class StreamChunker(Iterator[Chunk]):
-	def __init__(self, config: _Config, readinto_func: ReadintoFunc):
+class StreamChunker(_Chunker):
+	def __init__(self, config: _Config, readinto_func: ReadintoFunc, boundaries: Optional[Boundaries] = None, buffer_pool: Optional[BufferPool] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None):
 		self.config = config
+		self.stats = stats
+		self.tracer = tracer
 		self.readinto_func = readinto_func
+		self.boundary_tracker = _BoundaryTracker(boundaries)
 
 		self.offset = 0
 		self.last_chunk_len = 0
 		self.eof = False
+		self.closed = False
 
-		self.buf_capacity = self.config.max_size + max(8 * 1024, self.config.max_size)
-		self.buf = bytearray(self.buf_capacity)
+		# the buffer is allocated on the first read, and released when the stream is exhausted or the chunker is closed
+		self.buffer_pool = buffer_pool
+		self.buf_capacity = self.config.max_size + min(max(8 * 1024, self.config.max_size), STREAM_READ_SIZE_LIMIT)
+		self.buf: Optional[bytearray] = None
 		self.buf_read_len = 0
 		self.buf_write_len = 0
 
-	def __next__(self) -> Chunk:
+	def close(self):
+		self.__close(reuse=True)
+
+	def __del__(self):
+		# the last yielded chunk might still view the buffer, so it must not be handed out again
+		self.__close(reuse=False)
+
+	def __close(self, reuse: bool):
+		self.closed = True
+		if self.buf is None:
+			return
+		buf, self.buf = self.buf, None
+		if self.buffer_pool is not None:
+			if reuse:
+				self.buffer_pool.release(buf)
+			else:
+				self.buffer_pool._discard(buf)
+
+	def _next(self) -> Chunk:
+		if self.closed:
+			raise StopIteration()
+		if self.buf is None:
+			self.buf = self.buffer_pool.acquire(self.buf_capacity) if self.buffer_pool is not None else bytearray(self.buf_capacity)
+
 		if self.last_chunk_len > 0:
-			self.__release_last_chunk()
+			self.buf_read_len += self.last_chunk_len
+			self.offset += self.last_chunk_len
+			self.last_chunk_len = 0
 
 		remaining_buf_len = self.buf_write_len - self.buf_read_len
-		if not self.eof and remaining_buf_len < self.config.max_size:
-			while self.buf_write_len < self.buf_capacity:
-				n_read = self.readinto_func(memoryview(self.buf)[self.buf_write_len:])
-				if n_read == 0:
-					break
-				self.buf_write_len += n_read
+		limit = self.boundary_tracker.get_limit(self.offset)
+		res: Optional[_CutResult] = None
+		# The buffer is refilled when less than max_size bytes remain. With a huge max_size, the buffer is smaller
+		# than 2 * max_size and a refill could move lots of data. A cut found before the end of the buffered data
+		# is final, so try the buffered data first in that case, and refill only if the chunk might extend beyond it
+		if remaining_buf_len > 0 and (self.eof or remaining_buf_len >= self.config.max_size or remaining_buf_len > self.buf_capacity - self.config.max_size):
+			res = self.__cut_buf(remaining_buf_len, limit)
+			if not (self.eof or remaining_buf_len >= self.config.max_size or res.cut_offset < remaining_buf_len):
+				res = None
+		if res is None and not self.eof:
+			self.__fill_buf()
+			remaining_buf_len = self.buf_write_len
+			if remaining_buf_len > 0:
+				res = self.__cut_buf(remaining_buf_len, limit)
 
-		remaining_buf_len = self.buf_write_len - self.buf_read_len
 		if remaining_buf_len == 0:
+			self.__close(reuse=True)
 			raise StopIteration()
 
-		res = _cut_gear(self.config, memoryview(self.buf)[self.buf_read_len:self.buf_write_len])
 		chunk_len = res.cut_offset
-		if res.cut_offset == 0:  # last part of the file
-			chunk_len = remaining_buf_len
-
 		self.last_chunk_len = chunk_len
-		return Chunk(
-			offset=self.offset,
-			length=chunk_len,
-			data=memoryview(self.buf)[self.buf_read_len:self.buf_read_len + chunk_len],
-			gear_hash=res.gear_hash,
-		)
+		if self.stats is not None:
+			self.stats._add_chunk(chunk_len, _get_cut_reason(self.config, res, remaining_buf_len if limit is None else min(remaining_buf_len, limit), limit))
+		return _create_chunk(self.config, self.offset, memoryview(self.buf)[self.buf_read_len:self.buf_read_len + chunk_len], res.gear_hash)
 
-	def __release_last_chunk(self):
-		self.buf_read_len += self.last_chunk_len
-		self.offset += self.last_chunk_len
-		self.last_chunk_len = 0
-		if self.buf_read_len > self.buf_write_len:
-			raise AssertionError(f'buf_read_len {self.buf_read_len} is greater than buf_write_len {self.buf_write_len}')
+	def __cut_buf(self, remaining_buf_len: int, limit: Optional[int]) -> _CutResult:
+		if limit is not None and limit < remaining_buf_len:
+			remaining_buf_len = limit
+		return _cut_observed(self.stats, self.tracer, self.config, memoryview(self.buf)[self.buf_read_len:self.buf_read_len + remaining_buf_len])
 
+	def __fill_buf(self):
 		remaining_buf_len = self.buf_write_len - self.buf_read_len
-		if remaining_buf_len < self.config.max_size:
-			self.buf[:remaining_buf_len] = self.buf[self.buf_read_len:self.buf_write_len]
-			self.buf_read_len = 0
-			self.buf_write_len = remaining_buf_len
+		start_ns = self._span_start()
+		self.buf[:remaining_buf_len] = self.buf[self.buf_read_len:self.buf_write_len]
+		self._span_end(SPAN_SHIFT, start_ns, remaining_buf_len)
+		if self.stats is not None:
+			self.stats._add_copy(remaining_buf_len)
+		self.buf_read_len = 0
+		self.buf_write_len = remaining_buf_len
+		timed = self.stats is not None or self.tracer is not None
+		while self.buf_write_len < self.buf_capacity:
+			start_ns = utils.perf_counter_ns() if timed else 0
+			n_read = self.readinto_func(memoryview(self.buf)[self.buf_write_len:])
+			if timed:
+				self._add_read(start_ns, n_read)
+			if n_read == 0:
+				self.eof = True
+				break
+			self.buf_write_len += n_read
+
+
+class IterChunker(_Chunker):
+	def __init__(self, config: _Config, blocks: Iterable[Union[bytes, bytearray, memoryview]], boundaries: Optional[Boundaries] = None, stats: Optional[ChunkerStats] = None, tracer: Optional[ChunkTracer] = None):
+		self.config = config
+		self.stats = stats
+		self.tracer = tracer
+		self.blocks = iter(blocks)
+		self.boundary_tracker = _BoundaryTracker(boundaries)
+
+		self.offset = 0
+		self.eof = False
+		self.block = memoryview(b'')
+		self.block_pos = 0
+
+		# Holds a copy of the data around a block edge. Chunks are cut in place from blocks,
+		# except chunks that might span block edges, which are cut from the carry.
+		# The last carry_block_len bytes of the carry are copied from the current block, right before block_pos
+		self.carry: Optional[bytearray] = None
+		self.carry_block_len = 0
+
+	def __next_block(self) -> bool:
+		timed = self.stats is not None or self.tracer is not None
+		start_ns = utils.perf_counter_ns() if timed else 0
+		for block in self.blocks:
+			block = utils.create_memoryview_from_buffer(block)
+			if timed:
+				self._add_read(start_ns, len(block))
+			if len(block) > 0:
+				self.block = block
+				self.block_pos = 0
+				return True
+			if timed:
+				start_ns = utils.perf_counter_ns()
+		if timed:
+			self._add_read(start_ns, 0)
+		self.eof = True
+		return False
+
+	def _next(self) -> Chunk:
+		limit = self.boundary_tracker.get_limit(self.offset)
+		# the amount of data that is enough to determine the cut point
+		required_len = self.config.max_size if limit is None else min(self.config.max_size, limit)
+
+		if self.carry is None:
+			avail = self.block[self.block_pos:]
+			while len(avail) == 0:
+				if self.eof or not self.__next_block():
+					raise StopIteration()
+				avail = self.block
+
+			if limit is not None and limit < len(avail):
+				avail = avail[:limit]
+			res = _cut_observed(self.stats, self.tracer, self.config, avail)
+			# A cut point found before the end of the available data is final, no matter what data comes next
+			if res.cut_offset < len(avail) or len(avail) >= required_len or self.eof or not self.__next_block():
+				if self.stats is not None:
+					self.stats._add_chunk(res.cut_offset, _get_cut_reason(self.config, res, len(avail), limit))
+				self.block_pos += res.cut_offset
+				return self.__create_chunk(avail[:res.cut_offset], res.gear_hash)
+			start_ns = self._span_start()
+			self.carry = bytearray(avail)
+			self._span_end(SPAN_SHIFT, start_ns, len(self.carry))
+			self.carry_block_len = 0
+			if self.stats is not None:
+				self.stats._add_copy(len(self.carry))
+
+		carry = self.carry
+		while len(carry) < required_len and not self.eof:
+			if self.block_pos == len(self.block):
+				if not self.__next_block():
+					break
+				self.carry_block_len = 0
+			n = min(len(self.block) - self.block_pos, required_len - len(carry))
+			start_ns = self._span_start()
+			carry += self.block[self.block_pos:self.block_pos + n]
+			self._span_end(SPAN_SHIFT, start_ns, n)
+			if self.stats is not None:
+				self.stats._add_copy(n)
+			self.block_pos += n
+			self.carry_block_len += n
+
+		carry_view = memoryview(carry) if limit is None else memoryview(carry)[:limit]
+		res = _cut_observed(self.stats, self.tracer, self.config, carry_view)
+		if self.stats is not None:
+			self.stats._add_chunk(res.cut_offset, _get_cut_reason(self.config, res, len(carry_view), limit))
+		block_data_start = len(carry) - self.carry_block_len
+		if res.cut_offset >= block_data_start:
+			# back to cutting in place
+			self.block_pos -= len(carry) - res.cut_offset
+			self.carry = None
+		else:
+			# never modify the carry after a chunk refers to it
+			start_ns = self._span_start()
+			self.carry = carry[res.cut_offset:]
+			self._span_end(SPAN_SHIFT, start_ns, len(carry) - res.cut_offset)
+			if self.stats is not None:
+				self.stats._add_copy(len(carry) - res.cut_offset)
+		return self.__create_chunk(memoryview(carry)[:res.cut_offset], res.gear_hash)
+
+	def __create_chunk(self, data: memoryview, gear_hash: int) -> Chunk:
+		chunk = _create_chunk(self.config, self.offset, data, gear_hash)
+		self.offset += len(data)
+		return chunk
@@ -0,0 +1,74 @@
+import struct
+
+# MurmurHash3_x64_128 by Austin Appleby (public domain), see pyfastcdc/cy/murmur3.pxd
+
+_UINT64_MASK = (1 << 64) - 1
+_C1 = 0x87c37b91114253d5
+_C2 = 0x4cf5ad432745937f
+_BLOCK = struct.Struct('<QQ')
+
+
+def _rotl64(x: int, r: int) -> int:
+	return ((x << r) | (x >> (64 - r))) & _UINT64_MASK
+
+
+def _fmix64(k: int) -> int:
+	k ^= k >> 33
+	k = (k * 0xff51afd7ed558ccd) & _UINT64_MASK
+	k ^= k >> 33
+	k = (k * 0xc4ceb9fe1a85ec53) & _UINT64_MASK
+	k ^= k >> 33
+	return k
+
+
+def murmur3_x64_128(data: memoryview, seed: int = 0) -> bytes:
+	"""
+	:return: h1 and h2 in little-endian, 16 bytes in total
+	"""
+	length = len(data)
+	nblocks = length // 16
+	h1 = h2 = seed & _UINT64_MASK
+	mask64 = _UINT64_MASK
+
+	for k1, k2 in _BLOCK.iter_unpack(data[:nblocks * 16]):
+		k1 = (k1 * _C1) & mask64
+		k1 = _rotl64(k1, 31)
+		k1 = (k1 * _C2) & mask64
+		h1 ^= k1
+
+		h1 = _rotl64(h1, 27)
+		h1 = (h1 + h2) & mask64
+		h1 = (h1 * 5 + 0x52dce729) & mask64
+
+		k2 = (k2 * _C2) & mask64
+		k2 = _rotl64(k2, 33)
+		k2 = (k2 * _C1) & mask64
+		h2 ^= k2
+
+		h2 = _rotl64(h2, 31)
+		h2 = (h2 + h1) & mask64
+		h2 = (h2 * 5 + 0x38495ab5) & mask64
+
+	tail = bytes(data[nblocks * 16:])
+	if len(tail) > 8:
+		k2 = int.from_bytes(tail[8:], 'little')
+		k2 = (k2 * _C2) & mask64
+		k2 = _rotl64(k2, 33)
+		k2 = (k2 * _C1) & mask64
+		h2 ^= k2
+	if len(tail) > 0:
+		k1 = int.from_bytes(tail[:8], 'little')
+		k1 = (k1 * _C1) & mask64
+		k1 = _rotl64(k1, 31)
+		k1 = (k1 * _C2) & mask64
+		h1 ^= k1
+
+	h1 ^= length
+	h2 ^= length
+	h1 = (h1 + h2) & mask64
+	h2 = (h2 + h1) & mask64
+	h1 = _fmix64(h1)
+	h2 = _fmix64(h2)
+	h1 = (h1 + h2) & mask64
+	h2 = (h2 + h1) & mask64
+	return _BLOCK.pack(h1, h2)
@@ -0,0 +1,43 @@
+import struct
+from typing import List, Tuple
+
+from pyfastcdc.py.constants import GEAR
+from pyfastcdc.py.murmur3 import murmur3_x64_128
+
+# Finesse-style resemblance sketch, see pyfastcdc/cy/sketch.pxd
+
+SKETCH_FEATURES = 12
+SKETCH_SUPER_FEATURES = 3
+SKETCH_GROUP_SIZE = SKETCH_SUPER_FEATURES  # each group provides one feature to each super-feature
+
+_UINT64_MASK = (1 << 64) - 1
+_SUPER_FEATURE_STRUCT = struct.Struct('<{}Q'.format(SKETCH_FEATURES // SKETCH_GROUP_SIZE))
+
+
+def create_sketch(data: memoryview) -> Tuple[int, ...]:
+	length = len(data)
+	gear = GEAR
+	mask64 = _UINT64_MASK
+
+	# the max gear hash of each of the 12 sub-chunks
+	features: List[int] = []
+	gear_hash = 0
+	start = 0
+	for i in range(SKETCH_FEATURES):
+		end = (i + 1) * length // SKETCH_FEATURES
+		feature = 0
+		for pos in range(start, end):
+			gear_hash = ((gear_hash << 1) + gear[data[pos]]) & mask64
+			if gear_hash > feature:
+				feature = gear_hash
+		features.append(feature)
+		start = end
+
+	groups = [
+		sorted(features[i:i + SKETCH_GROUP_SIZE], reverse=True)
+		for i in range(0, SKETCH_FEATURES, SKETCH_GROUP_SIZE)
+	]
+	return tuple(
+		int.from_bytes(murmur3_x64_128(memoryview(_SUPER_FEATURE_STRUCT.pack(*(group[j] for group in groups))))[:8], 'little')
+		for j in range(SKETCH_SUPER_FEATURES)
+	)
@@ -0,0 +1,118 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+from pyfastcdc import _export, utils
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class ChunkerStats:
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.reset()
+
+	def reset(self):
+		with self.__lock:
+			self.__chunk_count = 0
+			self.__total_bytes = 0
+			self.__read_count = 0
+			self.__read_bytes = 0
+			self.__read_ns = 0
+			self.__copy_bytes = 0
+			self.__cut_ns = 0
+			self.__total_ns = 0
+			self.__cut_counts = [0] * len(utils.CUT_REASONS)
+			self.__chunk_size_buckets = [0] * utils.CHUNKER_STATS_HISTOGRAM_BUCKETS
+			self.__read_time_buckets = [0] * utils.CHUNKER_STATS_HISTOGRAM_BUCKETS
+
+	# the reason is an index of utils.CUT_REASONS
+	def _add_chunk(self, length: int, cut_reason: int):
+		with self.__lock:
+			self.__chunk_count += 1
+			self.__total_bytes += length
+			self.__cut_counts[cut_reason] += 1
+			self.__chunk_size_buckets[utils.get_histogram_bucket(length)] += 1
+
+	def _add_read(self, n_read: int, cost_ns: int):
+		with self.__lock:
+			self.__read_count += 1
+			self.__read_bytes += n_read
+			self.__read_ns += cost_ns
+			self.__read_time_buckets[utils.get_histogram_bucket(cost_ns)] += 1
+
+	def _add_copy(self, n_copied: int):
+		with self.__lock:
+			self.__copy_bytes += n_copied
+
+	def _add_cut_time(self, cost_ns: int):
+		with self.__lock:
+			self.__cut_ns += cost_ns
+
+	def _add_total_time(self, cost_ns: int):
+		with self.__lock:
+			self.__total_ns += cost_ns
+
+	@property
+	def chunk_count(self) -> int:
+		return self.__chunk_count
+
+	@property
+	def total_bytes(self) -> int:
+		return self.__total_bytes
+
+	@property
+	def cut_counts(self) -> Dict[str, int]:
+		return dict(zip(utils.CUT_REASONS, self.__cut_counts))
+
+	@property
+	def chunk_size_histogram(self) -> List[int]:
+		return list(self.__chunk_size_buckets)
+
+	@property
+	def read_count(self) -> int:
+		return self.__read_count
+
+	@property
+	def read_bytes(self) -> int:
+		return self.__read_bytes
+
+	@property
+	def read_ns(self) -> int:
+		return self.__read_ns
+
+	@property
+	def read_time_histogram(self) -> List[int]:
+		return list(self.__read_time_buckets)
+
+	@property
+	def copy_bytes(self) -> int:
+		return self.__copy_bytes
+
+	@property
+	def cut_ns(self) -> int:
+		return self.__cut_ns
+
+	@property
+	def total_ns(self) -> int:
+		return self.__total_ns
+
+	def to_dict(self) -> Dict[str, Any]:
+		with self.__lock:
+			return {
+				'chunk_count': self.chunk_count,
+				'total_bytes': self.total_bytes,
+				'cut_counts': self.cut_counts,
+				'chunk_size_histogram': self.chunk_size_histogram,
+				'read_count': self.read_count,
+				'read_bytes': self.read_bytes,
+				'read_ns': self.read_ns,
+				'read_time_histogram': self.read_time_histogram,
+				'copy_bytes': self.copy_bytes,
+				'cut_ns': self.cut_ns,
+				'total_ns': self.total_ns,
+			}
+
+	def to_prometheus(self, *, prefix: str = 'pyfastcdc', labels: Optional[Dict[str, str]] = None) -> str:
+		return _export.format_chunker_stats_prometheus(self.to_dict(), prefix, labels)
+
+	def __repr__(self) -> str:
+		return f'<ChunkerStats chunk_count={self.chunk_count} total_bytes={self.total_bytes} read_count={self.read_count}>'
@@ -0,0 +1,63 @@
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from pyfastcdc import _export, utils
+from pyfastcdc.common import TraceSpan
+
+# the same as the SPAN_* constants of pyfastcdc/cy/trace.pxd
+SPAN_NEXT = 0
+SPAN_READ = 1
+SPAN_SCAN = 2
+SPAN_SHIFT = 3
+SPAN_YIELD = 4
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class ChunkTracer:
+	def __init__(self, *, callback: Optional[Callable[[TraceSpan], None]] = None, max_spans: int = 1000000):
+		if max_spans < 0:
+			raise ValueError(f'max_spans {max_spans} should not be negative')
+		self.__callback = callback
+		self.__max_spans = max_spans
+		self.__lock = threading.Lock()
+		self.reset()
+
+	def reset(self):
+		with self.__lock:
+			self.__records: List[Tuple[int, int, int, int, int]] = []
+			self.__dropped_span_count = 0
+
+	# the span is one of the SPAN_* constants
+	def _add_span(self, span: int, start_ns: int, end_ns: int, size: int):
+		thread_id = threading.get_ident()
+		with self.__lock:
+			if len(self.__records) >= self.__max_spans:
+				self.__dropped_span_count += 1
+			else:
+				self.__records.append((span, thread_id, start_ns, end_ns, size))
+		if self.__callback is not None:
+			self.__callback(TraceSpan(utils.TRACE_SPAN_NAMES[span], thread_id, start_ns, end_ns, size))
+
+	@property
+	def max_spans(self) -> int:
+		return self.__max_spans
+
+	@property
+	def dropped_span_count(self) -> int:
+		return self.__dropped_span_count
+
+	@property
+	def spans(self) -> List[TraceSpan]:
+		with self.__lock:
+			records = list(self.__records)
+		return [TraceSpan(utils.TRACE_SPAN_NAMES[span], thread_id, start_ns, end_ns, size) for span, thread_id, start_ns, end_ns, size in records]
+
+	def to_chrome_trace(self) -> Dict[str, Any]:
+		return _export.format_chrome_trace(self.spans)
+
+	def save_chrome_trace(self, file_path: Union[str, bytes, Path]):
+		_export.save_chrome_trace(self.spans, file_path)
+
+	def __repr__(self) -> str:
+		return f'<ChunkTracer spans={len(self.__records)} dropped_span_count={self.__dropped_span_count}>'
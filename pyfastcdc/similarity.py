@@ -0,0 +1,44 @@
+from typing import Dict, Generic, List, Optional, TypeVar
+
+from pyfastcdc.common import Sketch
+
+_K = TypeVar('_K')
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class SketchIndex(Generic[_K]):
+	def __init__(self):
+		self.__keys: List[_K] = []
+		self.__tables: List[Dict[int, List[int]]] = []
+
+	def add(self, sketch: Sketch, key: _K):
+		if len(self.__tables) == 0:
+			self.__tables = [{} for _ in range(len(sketch))]
+		elif len(sketch) != len(self.__tables):
+			raise ValueError(f'sketch size {len(sketch)} does not match the index sketch size {len(self.__tables)}')
+
+		key_index = len(self.__keys)
+		self.__keys.append(key)
+		for table, super_feature in zip(self.__tables, sketch):
+			table.setdefault(super_feature, []).append(key_index)
+
+	def find(self, sketch: Sketch, *, min_matches: int = 1, limit: Optional[int] = None) -> List[_K]:
+		matches: Dict[int, int] = {}
+		for table, super_feature in zip(self.__tables, sketch):
+			for key_index in table.get(super_feature, ()):
+				matches[key_index] = matches.get(key_index, 0) + 1
+
+		# most matched super-features first, then the earliest added key first
+		key_indexes = sorted(
+			(key_index for key_index, count in matches.items() if count >= min_matches),
+			key=lambda key_index: (-matches[key_index], key_index),
+		)
+		if limit is not None:
+			key_indexes = key_indexes[:limit]
+		return [self.__keys[key_index] for key_index in key_indexes]
+
+	def __len__(self) -> int:
+		return len(self.__keys)
+
+	def __repr__(self) -> str:
+		return f'<{self.__class__.__name__} size={len(self)}>'
@@ -0,0 +1,375 @@
+import abc
+import hashlib
+import hmac
+import http.client
+import os
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from pyfastcdc.common import ChunkLike, ObjectStore
+
+_EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+_RETRYABLE_STATUSES = frozenset([408, 429, 500, 502, 503, 504])  # keep in sync with the S3ObjectStore docstring
+
+
+def _hmac_sha256(key: bytes, msg: str) -> bytes:
+	return hmac.new(key, msg.encode('utf8'), hashlib.sha256).digest()
+
+
+# AWS Signature Version 4, returns the value of the Authorization header
+# headers must contain host, x-amz-date and x-amz-content-sha256, the canonical query string must be pre-encoded
+def _sign_v4(
+		method: str, canonical_uri: str, canonical_query: str, headers: Dict[str, str], payload_hash: str,
+		access_key: str, secret_key: str, region: str, service: str = 's3',
+) -> str:
+	amz_date = headers['x-amz-date']
+	scope = f'{amz_date[:8]}/{region}/{service}/aws4_request'
+	canonical_headers = {name.lower(): ' '.join(value.strip().split()) for name, value in headers.items()}
+	signed_headers = ';'.join(sorted(canonical_headers))
+	canonical_request = '\n'.join([
+		method,
+		canonical_uri,
+		canonical_query,
+		''.join(f'{name}:{canonical_headers[name]}\n' for name in sorted(canonical_headers)),
+		signed_headers,
+		payload_hash,
+	])
+	string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode('utf8')).hexdigest()])
+
+	signing_key = ('AWS4' + secret_key).encode('utf8')
+	for part in [amz_date[:8], region, service, 'aws4_request']:
+		signing_key = _hmac_sha256(signing_key, part)
+	signature = hmac.new(signing_key, string_to_sign.encode('utf8'), hashlib.sha256).hexdigest()
+	return f'AWS4-HMAC-SHA256 Credential={access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}'
+
+
+# A LIFO pool of idle keep-alive connections. Connections in use are owned by the caller,
+# and only returned if the response was fully read
+class _ConnectionPool:
+	def __init__(self, scheme: str, host: str, port: Optional[int], max_idle: int, timeout: float):
+		self.scheme = scheme
+		self.host = host
+		self.port = port
+		self.max_idle = max_idle
+		self.timeout = timeout
+		self.lock = threading.Lock()
+		self.idle: List[http.client.HTTPConnection] = []
+		self.created_count = 0
+
+	def acquire(self) -> http.client.HTTPConnection:
+		with self.lock:
+			if self.idle:
+				return self.idle.pop()
+			self.created_count += 1
+		if self.scheme == 'https':
+			return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+		return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+	def release(self, conn: http.client.HTTPConnection):
+		with self.lock:
+			if len(self.idle) < self.max_idle:
+				self.idle.append(conn)
+				return
+		conn.close()
+
+	def close(self):
+		with self.lock:
+			idle, self.idle = self.idle, []
+		for conn in idle:
+			conn.close()
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class S3ObjectStore:
+	def __init__(
+			self,
+			endpoint: str,
+			bucket: str,
+			*,
+			access_key: Optional[str] = None,
+			secret_key: Optional[str] = None,
+			session_token: Optional[str] = None,
+			region: str = 'us-east-1',
+			max_connections: int = 16,
+			max_retries: int = 4,
+			retry_backoff: float = 0.2,
+			timeout: float = 60,
+	):
+		url = urllib.parse.urlsplit(endpoint)
+		if url.scheme not in ('http', 'https') or not url.hostname:
+			raise ValueError(f'endpoint {endpoint!r} should be an http:// or https:// URL')
+		if (access_key is None) != (secret_key is None):
+			raise ValueError('access_key and secret_key should be given together')
+		if not bucket:
+			raise ValueError('bucket should not be empty')
+		if max_connections <= 0:
+			raise ValueError(f'max_connections {max_connections} should be positive')
+		if max_retries < 0:
+			raise ValueError(f'max_retries {max_retries} should not be negative')
+
+		self.__host = url.netloc
+		self.__path_prefix = f'{url.path.rstrip("/")}/{bucket}/'
+		self.__access_key = access_key
+		self.__secret_key = secret_key
+		self.__session_token = session_token
+		self.__region = region
+		self.__max_retries = max_retries
+		self.__retry_backoff = retry_backoff
+		self.__pool = _ConnectionPool(url.scheme, url.hostname, url.port, max_connections, timeout)
+
+	@property
+	def connection_count(self) -> int:
+		return self.__pool.created_count
+
+	def put_object(self, key: str, data: bytes):
+		self.__request('PUT', key, data)
+
+	def get_object(self, key: str) -> bytes:
+		return self.__request('GET', key, b'')
+
+	def close(self):
+		self.__pool.close()
+
+	def __enter__(self) -> 'S3ObjectStore':
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def __create_headers(self, method: str, path: str, data: bytes) -> Dict[str, str]:
+		payload_hash = hashlib.sha256(data).hexdigest() if data else _EMPTY_SHA256
+		headers = {
+			'host': self.__host,
+			'x-amz-date': time.strftime('%Y%m%dT%H%M%SZ', time.gmtime()),
+			'x-amz-content-sha256': payload_hash,
+		}
+		if self.__session_token is not None:
+			headers['x-amz-security-token'] = self.__session_token
+		if self.__access_key is not None and self.__secret_key is not None:
+			headers['authorization'] = _sign_v4(method, path, '', headers, payload_hash, self.__access_key, self.__secret_key, self.__region)
+		if method == 'PUT':
+			headers['content-length'] = str(len(data))
+		return headers
+
+	def __request(self, method: str, key: str, data: bytes) -> bytes:
+		path = urllib.parse.quote(self.__path_prefix + key, safe='/-_.~')
+		attempt = 0
+		while True:
+			conn = self.__pool.acquire()
+			try:
+				# re-signed every attempt, since the signature expires
+				conn.request(method, path, body=data if method == 'PUT' else None, headers=self.__create_headers(method, path, data))
+				response = conn.getresponse()
+				body = response.read()
+			except (OSError, http.client.HTTPException) as e:
+				conn.close()
+				# a pooled connection might have been closed by the server while idle, so always retry it
+				error: Exception = e
+			else:
+				if response.will_close:
+					conn.close()
+				else:
+					self.__pool.release(conn)
+				if 200 <= response.status < 300:
+					return body
+				error = OSError(f'{method} {key!r} failed with HTTP {response.status} {response.reason}: {body[:200]!r}')
+				if response.status not in _RETRYABLE_STATUSES:
+					raise error
+
+			if attempt >= self.__max_retries:
+				raise error
+			# exponential backoff with full jitter
+			time.sleep(random.uniform(0, self.__retry_backoff * (2 ** attempt)))
+			attempt += 1
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class ChunkLocation(NamedTuple):
+	digest: bytes
+	key: str
+	offset: int
+	length: int
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class ChunkSink(abc.ABC):
+	@abc.abstractmethod
+	def write(self, chunk: ChunkLike) -> ChunkLocation:
+		...
+
+	def write_chunks(self, chunks: Iterable[ChunkLike]) -> List[ChunkLocation]:
+		return [self.write(chunk) for chunk in chunks]
+
+	def flush(self):
+		pass
+
+	def close(self):
+		self.flush()
+
+	def __enter__(self) -> 'ChunkSink':
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class PackedChunkSink(ChunkSink):
+	def __init__(
+			self,
+			store: ObjectStore,
+			*,
+			pack_size: int = 8 * 1024 * 1024,
+			max_workers: int = 8,
+			max_pending_bytes: int = 128 * 1024 * 1024,
+			key_prefix: str = 'packs/',
+			hash_name: str = 'sha256',
+			dedup: bool = True,
+	):
+		if pack_size <= 0:
+			raise ValueError(f'pack_size {pack_size} should be positive')
+		if max_workers <= 0:
+			raise ValueError(f'max_workers {max_workers} should be positive')
+		if max_pending_bytes <= 0:
+			raise ValueError(f'max_pending_bytes {max_pending_bytes} should be positive')
+		hashlib.new(hash_name)  # fail early on unknown hash names
+
+		self.__store = store
+		self.__pack_size = pack_size
+		self.__max_pending_bytes = max_pending_bytes
+		self.__hash_name = hash_name
+		self.__locations: Optional[Dict[bytes, ChunkLocation]] = {} if dedup else None
+		self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pyfastcdc-upload')
+		self.__closed = False
+
+		# pack keys are unique per sink, so sinks writing to the same store concurrently won't collide
+		self.__key_prefix = f'{key_prefix}{os.urandom(8).hex()}-'
+		self.__pack_index = 0
+		self.__pack = bytearray()
+		self.__pack_key = self.__next_pack_key()
+
+		# shared with the upload threads
+		self.__cond = threading.Condition()
+		self.__pending_bytes = 0
+		self.__error: Optional[BaseException] = None
+		self.__uploaded_bytes = 0
+		self.__uploaded_object_count = 0
+		self.__chunk_count = 0
+		self.__duplicate_chunk_count = 0
+
+	@property
+	def chunk_count(self) -> int:
+		return self.__chunk_count
+
+	@property
+	def duplicate_chunk_count(self) -> int:
+		return self.__duplicate_chunk_count
+
+	@property
+	def uploaded_bytes(self) -> int:
+		with self.__cond:
+			return self.__uploaded_bytes
+
+	@property
+	def uploaded_object_count(self) -> int:
+		with self.__cond:
+			return self.__uploaded_object_count
+
+	@property
+	def pending_bytes(self) -> int:
+		with self.__cond:
+			return self.__pending_bytes
+
+	def write(self, chunk: ChunkLike) -> ChunkLocation:
+		if self.__closed:
+			raise ValueError('write to a closed sink')
+		self.__raise_error()
+
+		data = chunk.data
+		digest = hashlib.new(self.__hash_name, data).digest()
+		self.__chunk_count += 1
+		if self.__locations is not None:
+			location = self.__locations.get(digest)
+			if location is not None:
+				self.__duplicate_chunk_count += 1
+				return location
+
+		length = len(data)
+		if len(self.__pack) > 0 and len(self.__pack) + length > self.__pack_size:
+			self.__submit_pack()
+		location = ChunkLocation(digest, self.__pack_key, len(self.__pack), length)
+		self.__pack += data  # copied, so chunks from cut_stream() are safe to pass
+		if self.__locations is not None:
+			self.__locations[digest] = location
+		if len(self.__pack) >= self.__pack_size:
+			self.__submit_pack()
+		return location
+
+	def flush(self):
+		if len(self.__pack) > 0:
+			self.__submit_pack()
+		with self.__cond:
+			while self.__pending_bytes > 0:
+				self.__cond.wait()
+		self.__raise_error()
+
+	def close(self):
+		if self.__closed:
+			self.__raise_error()
+			return
+		try:
+			self.flush()
+		finally:
+			self.__closed = True
+			self.__executor.shutdown(wait=True)
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		if exc_type is None:
+			self.close()
+		else:
+			# don't upload a partial pack, only wait for the submitted uploads
+			self.__closed = True
+			self.__executor.shutdown(wait=True)
+
+	def __next_pack_key(self) -> str:
+		key = f'{self.__key_prefix}{self.__pack_index:08d}'
+		self.__pack_index += 1
+		return key
+
+	# the error is kept, since the locations of chunks in the failed pack might be returned again by the dedup
+	def __raise_error(self):
+		with self.__cond:
+			error = self.__error
+		if error is not None:
+			raise error
+
+	def __submit_pack(self):
+		data = bytes(self.__pack)
+		key = self.__pack_key
+		self.__pack = bytearray()
+		self.__pack_key = self.__next_pack_key()
+
+		# flow control: block the caller, and so the chunker feeding it, until the uploads catch up.
+		# A pack is always accepted with nothing pending, even if it's larger than max_pending_bytes
+		with self.__cond:
+			while self.__pending_bytes > 0 and self.__pending_bytes + len(data) > self.__max_pending_bytes:
+				self.__cond.wait()
+			self.__pending_bytes += len(data)
+		future = self.__executor.submit(self.__store.put_object, key, data)
+		future.add_done_callback(lambda f: self.__on_uploaded(f, len(data)))
+
+	def __on_uploaded(self, future: 'Future[None]', size: int):
+		error = future.exception()
+		with self.__cond:
+			self.__pending_bytes -= size
+			if error is None:
+				self.__uploaded_bytes += size
+				self.__uploaded_object_count += 1
+			elif self.__error is None:
+				self.__error = error
+			self.__cond.notify_all()
+
@@ -0,0 +1,167 @@
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from pyfastcdc.common import NormalizedChunking
+
+if TYPE_CHECKING:
+	from pyfastcdc import FastCDC
+
+
+# docstrings are in pyfastcdc/__init__.pyi
+class TuningCandidate(NamedTuple):
+	avg_size: int
+	min_size: int
+	max_size: int
+	normalized_chunking: NormalizedChunking
+	chunk_count: int
+	unique_chunk_count: int
+	total_bytes: int
+	unique_bytes: int
+	cut_seconds: float
+	metadata_bytes: int
+
+	@property
+	def throughput(self) -> float:
+		return self.total_bytes / self.cut_seconds if self.cut_seconds > 0 else float('inf')
+
+	@property
+	def dedup_ratio(self) -> float:
+		return self.total_bytes / self.unique_bytes if self.unique_bytes > 0 else 1.0
+
+	@property
+	def metadata_overhead(self) -> float:
+		return self.metadata_bytes / self.total_bytes if self.total_bytes > 0 else 0.0
+
+	def create_fastcdc(self, **kwargs: Any) -> 'FastCDC':
+		from pyfastcdc import FastCDC
+		return FastCDC(self.avg_size, min_size=self.min_size, max_size=self.max_size, normalized_chunking=self.normalized_chunking, **kwargs)
+
+
+class TuningReport(NamedTuple):
+	sampled_bytes: int
+	sampled_block_count: int
+	candidates: List[TuningCandidate]
+	pareto_front: List[TuningCandidate]
+	recommended: TuningCandidate
+
+
+def _sample_blocks(file_paths: Sequence[Union[str, bytes, Path]], sample_size: int, block_size: int) -> List[bytes]:
+	# Blocks are spread over each file at the same relative offsets,
+	# so similar files, e.g. versions of the same file, get similar samples and their duplicates are seen
+	file_sizes = [os.path.getsize(file_path) for file_path in file_paths]
+	total_size = sum(file_sizes)
+	if total_size == 0:
+		raise ValueError('there is no data to sample')
+
+	block_cnt = max(1, sample_size // block_size)
+	blocks: List[bytes] = []
+	expected_cnt = 0.0
+	assigned_cnt = 0
+	for file_path, file_size in zip(file_paths, file_sizes):
+		if total_size <= sample_size:
+			file_block_cnt = 1 if file_size > 0 else 0
+		else:
+			# distribute the blocks proportionally to the file sizes, carrying over the fractions
+			expected_cnt += block_cnt * file_size / total_size
+			file_block_cnt = int(expected_cnt) - assigned_cnt
+			assigned_cnt += file_block_cnt
+		if file_block_cnt <= 0:
+			continue
+
+		with open(file_path, 'rb') as f:
+			if total_size <= sample_size or file_block_cnt * block_size >= file_size:
+				blocks.append(f.read())
+				continue
+			for i in range(file_block_cnt):
+				offset = (file_size - block_size) * i // max(1, file_block_cnt - 1)
+				f.seek(offset)
+				blocks.append(f.read(block_size))
+	return blocks
+
+
+def _evaluate(blocks: List[bytes], avg_size: int, min_size: int, max_size: int, normalized_chunking: NormalizedChunking, metadata_entry_size: int) -> TuningCandidate:
+	from pyfastcdc import FastCDC
+
+	# the timed pass does nothing but cutting, the fingerprints for dedup are calculated in another pass
+	cdc = FastCDC(avg_size, min_size=min_size, max_size=max_size, normalized_chunking=normalized_chunking)
+	start = time.perf_counter()
+	for block in blocks:
+		for _ in cdc.cut_buf(block):
+			pass
+	cut_seconds = time.perf_counter() - start
+
+	cdc = FastCDC(avg_size, min_size=min_size, max_size=max_size, normalized_chunking=normalized_chunking, fingerprint=True)
+	chunk_count = 0
+	total_bytes = 0
+	lengths: Dict[Optional[bytes], int] = {}
+	for block in blocks:
+		for chunk in cdc.cut_buf(block):
+			chunk_count += 1
+			total_bytes += chunk.length
+			lengths[chunk.fingerprint] = chunk.length
+
+	return TuningCandidate(
+		avg_size=avg_size,
+		min_size=min_size,
+		max_size=max_size,
+		normalized_chunking=normalized_chunking,
+		chunk_count=chunk_count,
+		unique_chunk_count=len(lengths),
+		total_bytes=total_bytes,
+		unique_bytes=sum(lengths.values()),
+		cut_seconds=cut_seconds,
+		metadata_bytes=chunk_count * metadata_entry_size,
+	)
+
+
+def _dominates(a: TuningCandidate, b: TuningCandidate) -> bool:
+	not_worse = a.dedup_ratio >= b.dedup_ratio and a.throughput >= b.throughput and a.metadata_bytes <= b.metadata_bytes
+	better = a.dedup_ratio > b.dedup_ratio or a.throughput > b.throughput or a.metadata_bytes < b.metadata_bytes
+	return not_worse and better
+
+
+def tune_parameters(
+		file_paths: Iterable[Union[str, bytes, Path]],
+		*,
+		avg_sizes: Sequence[int] = (4096, 8192, 16384, 32768, 65536),
+		normalized_chunkings: Sequence[NormalizedChunking] = (0, 1, 2, 3),
+		size_ratios: Sequence[Tuple[int, int]] = ((4, 4),),
+		sample_size: int = 64 * 1024 * 1024,
+		block_size: int = 4 * 1024 * 1024,
+		metadata_entry_size: int = 48,
+		metadata_budget: Optional[float] = None,
+) -> TuningReport:
+	if sample_size <= 0:
+		raise ValueError(f'sample_size {sample_size} should be positive')
+	if block_size <= 0:
+		raise ValueError(f'block_size {block_size} should be positive')
+	if metadata_entry_size < 0:
+		raise ValueError(f'metadata_entry_size {metadata_entry_size} should not be negative')
+	configs = [
+		(avg_size, avg_size // min_ratio, avg_size * max_ratio, nc)
+		for avg_size in avg_sizes
+		for min_ratio, max_ratio in size_ratios
+		for nc in normalized_chunkings
+	]
+	if len(configs) == 0:
+		raise ValueError('the configuration grid is empty')
+
+	blocks = _sample_blocks(list(file_paths), sample_size, block_size)
+	candidates = [_evaluate(blocks, *config, metadata_entry_size=metadata_entry_size) for config in configs]
+	pareto_front = [c for c in candidates if not any(_dominates(other, c) for other in candidates)]
+
+	within_budget = [c for c in pareto_front if metadata_budget is None or c.metadata_overhead <= metadata_budget]
+	if len(within_budget) > 0:
+		recommended = max(within_budget, key=lambda c: (c.dedup_ratio, c.throughput))
+	else:
+		recommended = min(pareto_front, key=lambda c: (c.metadata_bytes, -c.dedup_ratio))
+
+	return TuningReport(
+		sampled_bytes=sum(map(len, blocks)),
+		sampled_block_count=len(blocks),
+		candidates=candidates,
+		pareto_front=pareto_front,
+		recommended=recommended,
+	)
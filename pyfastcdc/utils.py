@@ -1,11 +1,22 @@
+import errno
+import hashlib
+import math
 import mmap
 import os
+import time
 from pathlib import Path
-from typing import Callable, Union, Optional
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Tuple, Union, Optional
 
-from pyfastcdc.common import BinaryStreamReader
+from pyfastcdc.common import BinaryStreamReader, Boundaries
 
 ReadintoFunc = Callable[[memoryview], int]
+HashFunc = Callable[[memoryview], bytes]
+NextBoundaryFunc = Callable[[int], Optional[int]]
+
+
+# used by __reduce__, since pickle cannot pass keyword-only arguments to constructors
+def reconstruct(cls: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+	return cls(*args, **kwargs)
 
 
 def create_memoryview_from_buffer(buf: Union[bytes, bytearray, memoryview]) -> memoryview:
@@ -31,18 +42,112 @@ def create_readinto_func(stream: BinaryStreamReader) -> ReadintoFunc:
 	raise TypeError('stream must be readable')
 
 
+# returns a function that returns the smallest boundary greater than the given offset, or None if there's no more boundary
+def create_next_boundary_func(boundaries: Boundaries) -> NextBoundaryFunc:
+	if callable(boundaries):
+		callback = boundaries
+
+		def next_boundary_from_callback(offset: int) -> Optional[int]:
+			boundary = callback(offset)
+			if boundary is not None and boundary <= offset:
+				raise ValueError(f'boundary {boundary} returned by the callback is not greater than the offset {offset}')
+			return boundary
+
+		return next_boundary_from_callback
+
+	iterator = iter(boundaries)
+	last_boundary = -1
+
+	def next_boundary_from_iterable(offset: int) -> Optional[int]:
+		nonlocal last_boundary
+		for boundary in iterator:
+			if boundary < last_boundary:
+				raise ValueError(f'boundaries are not sorted, got {boundary} after {last_boundary}')
+			last_boundary = boundary
+			if boundary > offset:
+				return boundary
+		return None
+
+	return next_boundary_from_iterable
+
+
+# returns None if the stream has readinto(), which is preferred
+def create_read_iter(stream: BinaryStreamReader, block_size: int) -> Optional[Iterator[bytes]]:
+	readinto_func = getattr(stream, 'readinto', None)
+	if readinto_func is not None and callable(readinto_func):
+		return None
+
+	read_func = getattr(stream, 'read', None)
+	if read_func is not None and callable(read_func):
+		def read_iter() -> Iterator[bytes]:
+			while True:
+				block = read_func(block_size)
+				if not block:
+					break
+				yield block
+
+		return read_iter()
+
+	raise TypeError('stream must be readable')
+
+
+def create_hash_func(hash_name: str) -> HashFunc:
+	if hash_name not in hashlib.algorithms_available:
+		raise ValueError(f'unsupported hash algorithm {hash_name!r}')
+
+	constructor = getattr(hashlib, hash_name, None)
+	if constructor is not None:
+		def hash_func(data: memoryview) -> bytes:
+			return constructor(data).digest()
+	else:
+		def hash_func(data: memoryview) -> bytes:
+			return hashlib.new(hash_name, data).digest()
+	return hash_func
+
+
+# Returns the sorted (start, end) ranges of the holes in the file.
+# Returns an empty list if the platform or the file system does not support SEEK_HOLE, then holes are read as zeros
+def find_file_holes(fd: int, file_size: int) -> List[Tuple[int, int]]:
+	seek_data = getattr(os, 'SEEK_DATA', None)
+	seek_hole = getattr(os, 'SEEK_HOLE', None)
+	if seek_data is None or seek_hole is None:
+		return []
+
+	holes: List[Tuple[int, int]] = []
+	offset = 0
+	try:
+		while offset < file_size:
+			hole_start = os.lseek(fd, offset, seek_hole)
+			if hole_start >= file_size:
+				break
+			try:
+				data_start = os.lseek(fd, hole_start, seek_data)
+			except OSError as e:
+				if e.errno != errno.ENXIO:
+					raise
+				data_start = file_size  # the file ends with a hole
+			holes.append((hole_start, min(data_start, file_size)))
+			offset = data_start
+	except OSError:
+		return []
+	return holes
+
+
 class MmapFile:
-	def __init__(self, file_path: Union[str, bytes, Path]):
+	def __init__(self, file_path: Union[str, bytes, Path], find_holes: bool = False):
 		self.__mmap_obj: Optional[mmap.mmap] = None
 		self.__data = memoryview(b'')
-		self.__open(file_path)
+		self.__holes: List[Tuple[int, int]] = []
+		self.__open(file_path, find_holes)
 
-	def __open(self, file_path: Union[str, bytes, Path]):
+	def __open(self, file_path: Union[str, bytes, Path], find_holes: bool):
 		file_size = os.path.getsize(file_path)
 		if file_size == 0:
 			return
 
 		with open(file_path, 'rb') as f:
+			if find_holes:
+				self.__holes = find_file_holes(f.fileno(), file_size)
 			self.__mmap_obj = mmap.mmap(f.fileno(), length=file_size, access=mmap.ACCESS_READ)
 			self.__data = memoryview(self.__mmap_obj)
 
@@ -50,6 +155,71 @@ class MmapFile:
 	def data(self) -> memoryview:
 		return self.__data
 
+	@property
+	def holes(self) -> List[Tuple[int, int]]:
+		return self.__holes
+
+	# views sliced from data should be released before, or the mmap cannot be closed
+	def close(self):
+		self.__data.release()
+		if self.__mmap_obj is not None:
+			self.__mmap_obj.close()
+			self.__mmap_obj = None
+
+
+def create_mmap_from_file(file_path: Union[str, bytes, Path], find_holes: bool = False) -> MmapFile:
+	return MmapFile(file_path, find_holes)
+
+
+class FastCDC2016Params(NamedTuple):
+	mask_s: int
+	mask_l: int
+	center_size: int
+
+
+# the same as iscc/fastcdc-py: the masks take the lowest bits, and the center is where the cut mask switches to mask_l
+def get_fastcdc2016_params(avg_size: int, min_size: int, max_size: int) -> FastCDC2016Params:
+	bits = round(math.log2(avg_size))
+	offset = min(min_size + (min_size + 1) // 2, avg_size)
+	center_size = min(avg_size - offset, max_size)
+	return FastCDC2016Params((1 << (bits + 1)) - 1, (1 << (bits - 1)) - 1, center_size)
+
+
+# AE cuts a chunk once the max value stays unbeaten for a whole window. With random values,
+# that happens (e - 1) windows after the chunk start on average
+def get_ae_window_size(avg_size: int, min_size: int) -> int:
+	return max(1, round((avg_size - min_size) / (math.e - 1)))
+
+
+# RAM cuts a chunk at the first byte after the window that is not less than the max byte in the window.
+# Returns the smallest window size whose expected chunk size with random bytes reaches avg_size
+def get_ram_window_size(avg_size: int, min_size: int) -> int:
+	def expected_size(window: int) -> float:
+		# P(max byte of the window <= m), and the expected count of bytes to read until one is >= m
+		cdf = [((m + 1) / 256) ** window for m in range(256)]
+		return min_size + window + sum((cdf[m] - (cdf[m - 1] if m > 0 else 0)) * 256 / (256 - m) for m in range(256))
+
+	low, high = 1, max(1, avg_size - min_size)
+	while low < high:
+		mid = (low + high) // 2
+		if expected_size(mid) >= avg_size:
+			high = mid
+		else:
+			low = mid + 1
+	return low
+
+
+# why a chunk was cut, in the order of the CUT_REASON_* constants of pyfastcdc/cy/stats.pxd
+CUT_REASONS = ('mask_s', 'mask_l', 'extremum', 'max_size', 'boundary', 'end', 'zero')
+CHUNKER_STATS_HISTOGRAM_BUCKETS = 65
+
+# what a chunker was doing in a span, in the order of the SPAN_* constants of pyfastcdc/cy/trace.pxd
+TRACE_SPAN_NAMES = ('next', 'read', 'scan', 'shift', 'yield')
+
+# time.perf_counter_ns() is new in Python 3.7
+perf_counter_ns: Callable[[], int] = getattr(time, 'perf_counter_ns', None) or (lambda: int(time.perf_counter() * 1e9))
+
 
-def create_mmap_from_file(file_path: Union[str, bytes, Path]) -> MmapFile:
-	return MmapFile(file_path)
+# bucket i of a log2 histogram counts values within (2 ** (i - 1), 2 ** i], and bucket 0 counts 0 and 1
+def get_histogram_bucket(value: int) -> int:
+	return (value - 1).bit_length() if value > 1 else 0
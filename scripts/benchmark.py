@@ -1,18 +1,41 @@
 import argparse
+import contextlib
 import csv
+import datetime
 import functools
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import threading
 import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Union, Callable, Dict, Type, List
+from typing import Union, Callable, Dict, Type, List, NamedTuple, Optional, Any, Iterator, Tuple
 
 import numpy as np
 
+import pyfastcdc
+import pyfastcdc.cy
+import pyfastcdc.py
 from pyfastcdc.cy import FastCDC as FastCDC_cy
 from pyfastcdc.py import FastCDC as FastCDC_py
+from generate_corpus import CORPUS_GENERATORS, ensure_corpus
 
 FastCDC = Union[FastCDC_cy, FastCDC_py]
 HERE = Path(__file__).absolute().parent
 DEFAULT_BENCHMARK_DIR = HERE / 'benchmark'
+# algorithm name -> class name in pyfastcdc.cy and pyfastcdc.py
+ALGORITHMS: Dict[str, str] = {
+	'fastcdc': 'FastCDC',
+	'fastcdc2016': 'FastCDC2016',
+	'ae': 'AECDC',
+	'ram': 'RAMCDC',
+}
 
 
 def create_random_file(filename: Path, size: int, seed: int):
@@ -44,6 +67,7 @@ class TestChunkerFunction:
 	def __init__(self, cdc: FastCDC, file_name: Path):
 		self.cdc = cdc
 		self.file_name = file_name
+		self.chunk_cnt = 0
 
 	def init(self): pass
 	def run(self): pass
@@ -56,28 +80,82 @@ class TestCutBuf(TestChunkerFunction):
 		self.buf = read_file_cached(self.file_name)
 
 	def run(self):
-		for _ in self.cdc.cut_buf(self.buf):
-			pass
+		self.chunk_cnt = sum(1 for _ in self.cdc.cut_buf(self.buf))
 
 
 class TestCutFile(TestChunkerFunction):
 	def run(self):
-		for _ in self.cdc.cut_file(self.file_name):
-			pass
+		self.chunk_cnt = sum(1 for _ in self.cdc.cut_file(self.file_name))
 
 
 class TestCutStream(TestChunkerFunction):
 	def run(self):
 		with open(self.file_name, 'rb') as f:
-			for _ in self.cdc.cut_stream(f):
-				pass
+			self.chunk_cnt = sum(1 for _ in self.cdc.cut_stream(f))
 
 
-def measure_time_cost(func: Callable[[], None], round_cnt: int) -> float:
-	start_time = time.time()
-	for _ in range(round_cnt):
+def measure_samples(func: Callable[[], None], sample_cnt: int, warmup_cnt: int) -> List[int]:
+	# perf_counter_ns() cost of each run after the untimed warmup runs. GC is paused while timing, like timeit does
+	for _ in range(warmup_cnt):
+		func()
+	gc.collect()
+	gc_enabled = gc.isenabled()
+	gc.disable()
+	try:
+		samples = []
+		for _ in range(sample_cnt):
+			start_ns = time.perf_counter_ns()
+			func()
+			samples.append(time.perf_counter_ns() - start_ns)
+		return samples
+	finally:
+		if gc_enabled:
+			gc.enable()
+
+
+class SampleStats(NamedTuple):
+	median_ns: float
+	ci_low_ns: float  # the confidence interval of the median
+	ci_high_ns: float
+	stdev_ns: float
+
+
+BOOTSTRAP_RESAMPLES = 2000
+
+
+def compute_sample_stats(samples: List[int], confidence: float = 0.95) -> SampleStats:
+	# bootstrap confidence interval of the median, with a fixed seed so the same samples give the same interval
+	arr = np.asarray(samples, dtype=np.float64)
+	resampled = np.random.default_rng(0).choice(arr, size=(BOOTSTRAP_RESAMPLES, len(arr)), replace=True)
+	tail = (1 - confidence) / 2
+	ci_low, ci_high = np.quantile(np.median(resampled, axis=1), [tail, 1 - tail])
+	stdev = float(np.std(arr, ddof=1)) if len(arr) > 1 else 0.0
+	return SampleStats(float(np.median(arr)), float(ci_low), float(ci_high), stdev)
+
+
+def measure_time_cost(func: Callable[[], None], round_cnt: int, warmup_cnt: int = 1) -> float:
+	return compute_sample_stats(measure_samples(func, round_cnt, warmup_cnt)).median_ns / 1e9
+
+
+# Pin the process to the given CPU, or to the last CPU it is allowed to run on if cpu is None,
+# which is less likely to be busy with interrupts than CPU 0. Returns the pinned CPU, or None if pinning is unsupported
+def pin_cpu(cpu: Optional[int]) -> Optional[int]:
+	if not hasattr(os, 'sched_setaffinity'):
+		return None
+	if cpu is None:
+		cpu = max(os.sched_getaffinity(0))
+	os.sched_setaffinity(0, {cpu})
+	return cpu
+
+
+def measure_peak_memory(func: Callable[[], None]) -> int:
+	# Python-level allocations only, e.g. the stream buffer. Pages mapped by cut_file() are not included
+	tracemalloc.start()
+	try:
 		func()
-	return (time.time() - start_time) / round_cnt
+		return tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
 
 
 def ensure_random_file(file_path: Path, size: int, seed: int = 0):
@@ -88,32 +166,106 @@ def ensure_random_file(file_path: Path, size: int, seed: int = 0):
 	return file_path
 
 
-def benchmark(benchmark_dir: Path, output_csv_path: Path, test_files: List[str]):
+def run_in_threads(func: Callable[[], None], thread_count: int):
+	barrier = threading.Barrier(thread_count)
+
+	def worker():
+		barrier.wait()
+		func()
+
+	threads = [threading.Thread(target=worker) for _ in range(thread_count)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+
+def prepare_test_files(benchmark_dir: Path, test_files: List[str]) -> List[Path]:
 	if 'rand_100M.bin' in test_files:
 		ensure_random_file(benchmark_dir / 'rand_100M.bin', 100 * 1024 * 1024, 0)
 	if 'rand_1G.bin' in test_files:
 		ensure_random_file(benchmark_dir / 'rand_1G.bin', 1024 * 1024 * 1024, 0)
 	if 'rand_10G.bin' in test_files:
 		ensure_random_file(benchmark_dir / 'rand_10G.bin', 10 * 1024 * 1024 * 1024, 0)
+	return [benchmark_dir / name for name in test_files]
+
+
+DEFAULT_AVG_SIZES = [
+	4 * 1024,
+	8 * 1024,
+	16 * 1024,
+	32 * 1024,
+	64 * 1024,
+	128 * 1024,
+	256 * 1024,
+	512 * 1024,
+	1024 * 1024,
+	2 * 1024 * 1024,
+	4 * 1024 * 1024,
+]
+
+
+IMPL_MODULES = {
+	'cy': pyfastcdc.cy,
+	'py': pyfastcdc.py,
+}
+
+
+def benchmark(benchmark_dir: Path, output_csv_path: Path, test_files: List[str], avg_sizes: List[int], round_cnt: int, warmup_cnt: int, algorithms: List[str], impls: List[str]):
+	test_files = prepare_test_files(benchmark_dir, test_files)
+	impl_modules = {name: IMPL_MODULES[name] for name in impls}
+	chunker_funcs: Dict[str, Type[TestChunkerFunction]] = {
+		'cut_buf': TestCutBuf,
+		'cut_file': TestCutFile,
+		'cut_stream': TestCutStream,
+	}
+
+	with open(output_csv_path, 'w', encoding='utf8', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=['file_name', 'file_size', 'algorithm', 'avg_size', 'impl', 'func', 'cost_ms', 'ci_low_ms', 'ci_high_ms', 'mib_per_sec', 'chunk_cnt', 'peak_mib'])
+		writer.writeheader()
+
+		for test_file_path in test_files:
+			for algorithm in algorithms:
+				for avg_size in avg_sizes:
+					for impl_name, impl_module in impl_modules.items():
+						cdc: FastCDC = getattr(impl_module, ALGORITHMS[algorithm])(avg_size)
+						for chunker_name, chunker_func_type in chunker_funcs.items():
+							chunker_func = chunker_func_type(cdc, test_file_path)
+							chunker_func.init()
+							stats = compute_sample_stats(measure_samples(chunker_func.run, round_cnt, warmup_cnt))
+							cost_sec = stats.median_ns / 1e9
+							peak_bytes = measure_peak_memory(chunker_func.run)
+							file_size = test_file_path.stat().st_size
+							mib_per_sec = file_size / cost_sec / 1024 / 1024
+							row = {
+								'file_name': test_file_path.name,
+								'file_size': file_size,
+								'algorithm': algorithm,
+								'avg_size': avg_size,
+								'impl': impl_name,
+								'func': chunker_name,
+								'cost_ms': round(cost_sec * 1000, 6),
+								'ci_low_ms': round(stats.ci_low_ns / 1e6, 6),
+								'ci_high_ms': round(stats.ci_high_ns / 1e6, 6),
+								'mib_per_sec': round(mib_per_sec, 6),
+								'chunk_cnt': chunker_func.chunk_cnt,
+								'peak_mib': round(peak_bytes / 1024 / 1024, 3),
+							}
+							print(row)
+							writer.writerow(row)
+			read_file_cached.cache_clear()
 
-	test_files = [benchmark_dir / name for name in test_files]
+
+# Multi-threaded scaling benchmark: every thread chunks the whole test file, using a FastCDC instance shared by all threads
+def benchmark_threads(benchmark_dir: Path, output_csv_path: Path, test_files: List[str], thread_counts: List[int]):
+	test_files = prepare_test_files(benchmark_dir, test_files)
 	avg_sizes = [
 		4 * 1024,
-		8 * 1024,
 		16 * 1024,
-		32 * 1024,
 		64 * 1024,
-		128 * 1024,
 		256 * 1024,
-		512 * 1024,
 		1024 * 1024,
-		2 * 1024 * 1024,
-		4 * 1024 * 1024,
 	]
-	impl_classes: Dict[str, Type[FastCDC]] = {
-		'cy': FastCDC_cy,
-		# 'py': FastCDC_py,
-	}
 	chunker_funcs: Dict[str, Type[TestChunkerFunction]] = {
 		'cut_buf': TestCutBuf,
 		'cut_file': TestCutFile,
@@ -121,42 +273,553 @@ def benchmark(benchmark_dir: Path, output_csv_path: Path, test_files: List[str])
 	}
 
 	with open(output_csv_path, 'w', encoding='utf8', newline='') as f:
-		writer = csv.DictWriter(f, fieldnames=['file_name', 'file_size', 'avg_size', 'impl', 'func', 'cost_ms', 'mib_per_sec'])
+		writer = csv.DictWriter(f, fieldnames=['file_name', 'file_size', 'avg_size', 'impl', 'func', 'threads', 'cost_ms', 'mib_per_sec', 'speedup'])
 		writer.writeheader()
 
 		for test_file_path in test_files:
+			file_size = test_file_path.stat().st_size
 			for avg_size in avg_sizes:
-				for impl_name, impl_class in impl_classes.items():
-					cdc = impl_class(avg_size)
-					for chunker_name, chunker_func_type in chunker_funcs.items():
-						chunker_func = chunker_func_type(cdc, test_file_path)
-						chunker_func.init()
-						cost_sec = measure_time_cost(chunker_func.run, 10)
-						file_size = test_file_path.stat().st_size
-						mib_per_sec = file_size / cost_sec / 1024 / 1024
+				cdc = FastCDC_cy(avg_size)
+				for chunker_name, chunker_func_type in chunker_funcs.items():
+					chunker_func = chunker_func_type(cdc, test_file_path)
+					chunker_func.init()
+					single_thread_mib_per_sec = None
+					for thread_count in thread_counts:
+						cost_sec = measure_time_cost(functools.partial(run_in_threads, chunker_func.run, thread_count), 3)
+						mib_per_sec = file_size * thread_count / cost_sec / 1024 / 1024
+						if single_thread_mib_per_sec is None:
+							single_thread_mib_per_sec = mib_per_sec / thread_count
 						row = {
 							'file_name': test_file_path.name,
 							'file_size': file_size,
 							'avg_size': avg_size,
-							'impl': impl_name,
+							'impl': 'cy',
 							'func': chunker_name,
+							'threads': thread_count,
 							'cost_ms': round(cost_sec * 1000, 6),
 							'mib_per_sec': round(mib_per_sec, 6),
+							'speedup': round(mib_per_sec / single_thread_mib_per_sec, 3),
 						}
 						print(row)
 						writer.writerow(row)
 			read_file_cached.cache_clear()
 
 
+DEFAULT_DEDUP_AVG_SIZES = [
+	4 * 1024,
+	8 * 1024,
+	16 * 1024,
+	32 * 1024,
+	64 * 1024,
+]
+
+
+# Deduplication benchmark on the synthetic corpora of generate_corpus.py: the dedup ratio and the chunk size distribution
+# come from a fingerprinted pass over the corpus, and the throughput from timed passes without fingerprints
+def benchmark_dedup(
+		benchmark_dir: Path, output_csv_path: Path, corpus_kinds: List[str], corpus_size: int,
+		avg_sizes: List[int], nc_values: List[int], round_cnt: int, warmup_cnt: int, algorithms: List[str], impls: List[str],
+):
+	corpus_files = {kind: ensure_corpus(benchmark_dir / 'corpus', kind, corpus_size) for kind in corpus_kinds}
+
+	with open(output_csv_path, 'w', encoding='utf8', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=[
+			'corpus', 'corpus_size', 'file_cnt', 'algorithm', 'avg_size', 'normalized_chunking', 'impl',
+			'chunk_cnt', 'unique_chunk_cnt', 'dedup_ratio', 'mean_chunk', 'stdev_chunk', 'min_chunk', 'p5_chunk', 'p50_chunk', 'p95_chunk', 'max_chunk',
+			'cost_ms', 'ci_low_ms', 'ci_high_ms', 'mib_per_sec',
+		])
+		writer.writeheader()
+
+		for kind, file_paths in corpus_files.items():
+			corpus_size = sum(path.stat().st_size for path in file_paths)
+			for algorithm in algorithms:
+				# normalized chunking is a parameter of FastCDC 2020 only
+				for nc in (nc_values if algorithm == 'fastcdc' else [None]):
+					for avg_size in avg_sizes:
+						for impl_name in impls:
+							cls = getattr(IMPL_MODULES[impl_name], ALGORITHMS[algorithm])
+							kwargs = {} if nc is None else {'normalized_chunking': nc}
+
+							lengths = []
+							unique_chunks: Dict[bytes, int] = {}
+							for path in file_paths:
+								for chunk in cls(avg_size, fingerprint=True, **kwargs).cut_file(path):
+									lengths.append(chunk.length)
+									unique_chunks[chunk.fingerprint] = chunk.length
+
+							cdc = cls(avg_size, **kwargs)
+							stats = compute_sample_stats(measure_samples(lambda: [sum(1 for _ in cdc.cut_file(path)) for path in file_paths], round_cnt, warmup_cnt))
+							length_arr = np.asarray(lengths, dtype=np.float64)
+							p5, p50, p95 = np.percentile(length_arr, [5, 50, 95])
+							row = {
+								'corpus': kind,
+								'corpus_size': corpus_size,
+								'file_cnt': len(file_paths),
+								'algorithm': algorithm,
+								'avg_size': avg_size,
+								'normalized_chunking': '' if nc is None else nc,
+								'impl': impl_name,
+								'chunk_cnt': len(lengths),
+								'unique_chunk_cnt': len(unique_chunks),
+								'dedup_ratio': round(corpus_size / sum(unique_chunks.values()), 6),
+								'mean_chunk': round(float(length_arr.mean()), 3),
+								'stdev_chunk': round(float(length_arr.std()), 3),
+								'min_chunk': int(length_arr.min()),
+								'p5_chunk': round(float(p5), 3),
+								'p50_chunk': round(float(p50), 3),
+								'p95_chunk': round(float(p95), 3),
+								'max_chunk': int(length_arr.max()),
+								'cost_ms': round(stats.median_ns / 1e6, 6),
+								'ci_low_ms': round(stats.ci_low_ns / 1e6, 6),
+								'ci_high_ms': round(stats.ci_high_ns / 1e6, 6),
+								'mib_per_sec': round(corpus_size / 1024 / 1024 / (stats.median_ns / 1e9), 6),
+							}
+							print(row)
+							writer.writerow(row)
+
+
+MEMORY_FUNCS = ['cut_buf', 'cut_file', 'cut_stream', 'cut_iter']
+MEMORY_ITER_BLOCK_SIZE = 1024 * 1024
+MEMORY_HELD_CHUNKS = 10000
+
+
+@contextlib.contextmanager
+def open_chunks(cdc: FastCDC, func: str, file_path: Path, stats=None) -> Iterator[Iterator[Any]]:
+	# cut_buf() chunks the file content cached in memory, cut_iter() chunks blocks read from the file, like an HTTP response body
+	if func == 'cut_buf':
+		yield cdc.cut_buf(read_file_cached(file_path), stats=stats)
+	elif func == 'cut_file':
+		yield cdc.cut_file(file_path, stats=stats)
+	elif func == 'cut_stream':
+		with open(file_path, 'rb') as f:
+			yield cdc.cut_stream(f, stats=stats)
+	elif func == 'cut_iter':
+		with open(file_path, 'rb') as f:
+			yield cdc.cut_iter(iter(functools.partial(f.read, MEMORY_ITER_BLOCK_SIZE), b''), stats=stats)
+	else:
+		raise ValueError(f'Unknown func {func}')
+
+
+def read_proc_kib(proc_file: str, key: str) -> Optional[int]:
+	# e.g. VmRSS in /proc/self/status or Cached in /proc/meminfo, whose values are in kB
+	try:
+		with open(proc_file, 'r') as f:
+			for line in f:
+				if line.startswith(key + ':'):
+					return int(line.split()[1])
+	except OSError:
+		pass
+	return None
+
+
+def read_proc_io(key: str) -> Optional[int]:
+	# e.g. rchar, the bytes copied from the kernel by read syscalls
+	try:
+		with open('/proc/self/io', 'r') as f:
+			for line in f:
+				if line.startswith(key + ':'):
+					return int(line.split()[1])
+	except OSError:
+		pass
+	return None
+
+
+def reset_peak_rss() -> bool:
+	# writing 5 to clear_refs resets VmHWM, the peak RSS, to the current RSS (Linux 4.0+)
+	try:
+		with open('/proc/self/clear_refs', 'w') as f:
+			f.write('5')
+		return True
+	except OSError:
+		return False
+
+
+def drop_file_cache(file_path: Path):
+	# evicts the clean pages of the file from the page cache, so its growth can be seen
+	if hasattr(os, 'posix_fadvise'):
+		fd = os.open(file_path, os.O_RDONLY)
+		try:
+			os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+		finally:
+			os.close(fd)
+
+
+def count_traced_blocks() -> int:
+	return sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+
+
+class MemoryStats(NamedTuple):
+	peak_rss_mib: Optional[float]  # the peak RSS above the RSS before the run, including the pages mapped by cut_file()
+	page_cache_mib: Optional[float]  # the growth of the system-wide page cache
+	copied_mib: float  # bytes copied inside the chunker
+	read_syscall_mib: Optional[float]  # bytes copied from the kernel by read syscalls
+	py_peak_mib: float  # the peak Python allocation
+	py_blocks_per_chunk: float  # Python memory blocks kept alive by each chunk, e.g. the chunk object and its memoryview
+	py_bytes_per_chunk: float
+
+
+def measure_process_memory(impl_name: str, algorithm: str, avg_size: int, func: str, file_path: Path) -> Tuple[Optional[float], Optional[float], float, Optional[float]]:
+	# Runs in a fresh process, so memory freed by earlier cases but kept by the allocator does not hide the peak RSS.
+	# Returns the peak RSS growth, the page cache growth, the bytes copied inside the chunker and by read syscalls, in MiB
+	impl_module = IMPL_MODULES[impl_name]
+	cdc = getattr(impl_module, ALGORITHMS[algorithm])(avg_size)
+	if func == 'cut_buf':
+		read_file_cached(file_path)
+	gc.collect()
+	drop_file_cache(file_path)
+	cached_before = read_proc_kib('/proc/meminfo', 'Cached')
+	rchar_before = read_proc_io('rchar')
+	rss_before = read_proc_kib('/proc/self/status', 'VmRSS')
+	peak_rss_resettable = reset_peak_rss()
+	stats = impl_module.ChunkerStats()
+	with open_chunks(cdc, func, file_path, stats) as chunks:
+		for _ in chunks:
+			pass
+	peak_rss = read_proc_kib('/proc/self/status', 'VmHWM') if peak_rss_resettable else None
+	cached_after = read_proc_kib('/proc/meminfo', 'Cached')
+	rchar_after = read_proc_io('rchar')
+	return (
+		None if peak_rss is None or rss_before is None else (peak_rss - rss_before) / 1024,
+		None if cached_before is None or cached_after is None else (cached_after - cached_before) / 1024,
+		stats.copy_bytes / 1024 / 1024,
+		None if rchar_before is None or rchar_after is None else (rchar_after - rchar_before) / 1024 / 1024,
+	)
+
+
+def measure_memory(impl_name: str, algorithm: str, avg_size: int, func: str, file_path: Path) -> MemoryStats:
+	with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+		peak_rss_mib, page_cache_mib, copied_mib, read_syscall_mib = executor.submit(measure_process_memory, impl_name, algorithm, avg_size, func, file_path).result()
+
+	cdc = getattr(IMPL_MODULES[impl_name], ALGORITHMS[algorithm])(avg_size)
+
+	def run():
+		with open_chunks(cdc, func, file_path) as chunks:
+			for _ in chunks:
+				pass
+
+	gc.collect()
+	py_peak = measure_peak_memory(run)
+
+	# the memory kept alive by each chunk, measured by holding the first chunks
+	gc.collect()
+	tracemalloc.start()
+	try:
+		with open_chunks(cdc, func, file_path) as chunks:
+			blocks_before, bytes_before = count_traced_blocks(), tracemalloc.get_traced_memory()[0]
+			held = list(itertools.islice(chunks, MEMORY_HELD_CHUNKS))
+			held_blocks, held_bytes = count_traced_blocks() - blocks_before, tracemalloc.get_traced_memory()[0] - bytes_before
+			held_cnt = max(1, len(held))
+			del held
+	finally:
+		tracemalloc.stop()
+
+	return MemoryStats(
+		peak_rss_mib=peak_rss_mib,
+		page_cache_mib=page_cache_mib,
+		copied_mib=copied_mib,
+		read_syscall_mib=read_syscall_mib,
+		py_peak_mib=py_peak / 1024 / 1024,
+		py_blocks_per_chunk=held_blocks / held_cnt,
+		py_bytes_per_chunk=held_bytes / held_cnt,
+	)
+
+
+# Memory footprint benchmark: the throughput of each chunker, next to its peak RSS, page cache growth,
+# Python allocations and bytes copied, measured in separate runs so the measuring does not slow down the timed runs.
+# RSS and page cache are read from /proc, so they are Linux only. The page cache is system-wide, so other processes add noise to it
+def benchmark_memory(benchmark_dir: Path, output_csv_path: Path, test_files: List[str], avg_sizes: List[int], round_cnt: int, warmup_cnt: int, algorithms: List[str], impls: List[str]):
+	test_files = prepare_test_files(benchmark_dir, test_files)
+
+	def format_optional(value: Optional[float], digits: int = 3) -> Union[float, str]:
+		return '' if value is None else round(value, digits)
+
+	with open(output_csv_path, 'w', encoding='utf8', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=[
+			'file_name', 'file_size', 'algorithm', 'avg_size', 'impl', 'func', 'cost_ms', 'ci_low_ms', 'ci_high_ms', 'mib_per_sec', 'chunk_cnt',
+			'peak_rss_mib', 'page_cache_mib', 'py_peak_mib', 'py_blocks_per_chunk', 'py_bytes_per_chunk', 'copied_mib_per_gib', 'read_syscall_mib_per_gib',
+		])
+		writer.writeheader()
+
+		for test_file_path in test_files:
+			file_size = test_file_path.stat().st_size
+			file_gib = file_size / 1024 / 1024 / 1024
+			for algorithm in algorithms:
+				for avg_size in avg_sizes:
+					for impl_name in impls:
+						cdc: FastCDC = getattr(IMPL_MODULES[impl_name], ALGORITHMS[algorithm])(avg_size)
+						for func in MEMORY_FUNCS:
+							def run() -> int:
+								with open_chunks(cdc, func, test_file_path) as chunks:
+									return sum(1 for _ in chunks)
+
+							chunk_cnt = run()
+							stats = compute_sample_stats(measure_samples(run, round_cnt, warmup_cnt))
+							memory = measure_memory(impl_name, algorithm, avg_size, func, test_file_path)
+							row = {
+								'file_name': test_file_path.name,
+								'file_size': file_size,
+								'algorithm': algorithm,
+								'avg_size': avg_size,
+								'impl': impl_name,
+								'func': func,
+								'cost_ms': round(stats.median_ns / 1e6, 6),
+								'ci_low_ms': round(stats.ci_low_ns / 1e6, 6),
+								'ci_high_ms': round(stats.ci_high_ns / 1e6, 6),
+								'mib_per_sec': round(file_size / 1024 / 1024 / (stats.median_ns / 1e9), 6),
+								'chunk_cnt': chunk_cnt,
+								'peak_rss_mib': format_optional(memory.peak_rss_mib),
+								'page_cache_mib': format_optional(memory.page_cache_mib),
+								'py_peak_mib': round(memory.py_peak_mib, 3),
+								'py_blocks_per_chunk': round(memory.py_blocks_per_chunk, 3),
+								'py_bytes_per_chunk': round(memory.py_bytes_per_chunk, 3),
+								'copied_mib_per_gib': round(memory.copied_mib / file_gib, 3),
+								'read_syscall_mib_per_gib': format_optional(None if memory.read_syscall_mib is None else memory.read_syscall_mib / file_gib),
+							}
+							print(row)
+							writer.writerow(row)
+			read_file_cached.cache_clear()
+
+
+class SuiteCase(NamedTuple):
+	impl: str
+	algorithm: str
+	func: str
+	kwargs: Dict[str, Any]  # constructor arguments of the chunker
+	data_size: int
+	block_size: Optional[int] = None  # small-buffer cases: the size of each cut_buf() buffer, cut_iter() block or stream read
+
+	@property
+	def name(self) -> str:
+		# the key to match results against the baseline
+		parts = [self.impl, self.algorithm, self.func, ','.join(f'{k}={v}' for k, v in self.kwargs.items())]
+		if self.block_size is not None:
+			parts.append(f'block_size={self.block_size}')
+		return '/'.join(parts)
+
+
+# The pure Python implementation is ~300x slower, so it chunks less data to keep the suite within minutes
+SUITE_DATA_SIZES = {
+	'cy': 32 * 1024 * 1024,
+	'py': 1024 * 1024,
+}
+
+
+def make_suite_cases() -> List[SuiteCase]:
+	cases = []
+	for impl, data_size in SUITE_DATA_SIZES.items():
+		def add(algorithm: str, func: str, block_size: Optional[int] = None, **kwargs):
+			cases.append(SuiteCase(impl, algorithm, func, {'avg_size': 16384, **kwargs}, data_size, block_size))
+
+		# every chunker of every algorithm
+		for algorithm in ALGORITHMS.keys():
+			for func in ['cut_buf', 'cut_file', 'cut_stream', 'cut_iter']:
+				add(algorithm, func)
+
+		# parameter sweeps
+		for avg_size in [1024, 4096, 65536, 262144]:
+			add('fastcdc', 'cut_buf', avg_size=avg_size)
+		for nc in [0, 2, 3]:
+			add('fastcdc', 'cut_buf', normalized_chunking=nc)
+		add('fastcdc', 'cut_buf', seed=1)
+		add('fastcdc', 'cut_buf', fingerprint=True)
+		add('fastcdc', 'cut_buf', sketch=True)
+
+		# small buffers, where the per-call and per-block overhead dominates
+		for block_size in [256, 4096]:
+			add('fastcdc', 'cut_buf', block_size, avg_size=1024)
+		add('fastcdc', 'cut_iter', 4096)
+		add('fastcdc', 'cut_stream', 4096)
+	return cases
+
+
+class ShortReadStream:
+	# a stream that returns at most block_size bytes per read(), like a socket or a pipe
+	def __init__(self, stream, block_size: int):
+		self.stream = stream
+		self.block_size = block_size
+
+	def read(self, n: int = -1) -> bytes:
+		return self.stream.read(self.block_size if n < 0 else min(n, self.block_size))
+
+
+def make_suite_runner(case: SuiteCase, file_path: Path, data: bytes) -> Callable[[], int]:
+	cdc = getattr(IMPL_MODULES[case.impl], ALGORITHMS[case.algorithm])(**case.kwargs)
+	block_size = case.block_size
+
+	def blocks() -> Iterator[memoryview]:
+		view = memoryview(data)
+		size = block_size or 1024 * 1024
+		return (view[i:i + size] for i in range(0, len(view), size))
+
+	if case.func == 'cut_buf' and block_size is None:
+		return lambda: sum(1 for _ in cdc.cut_buf(data))
+	elif case.func == 'cut_buf':
+		return lambda: sum(1 for block in blocks() for _ in cdc.cut_buf(block))
+	elif case.func == 'cut_file':
+		return lambda: sum(1 for _ in cdc.cut_file(file_path))
+	elif case.func == 'cut_iter':
+		return lambda: sum(1 for _ in cdc.cut_iter(blocks()))
+	elif case.func == 'cut_stream':
+		def run_stream() -> int:
+			with open(file_path, 'rb') as f:
+				return sum(1 for _ in cdc.cut_stream(f if block_size is None else ShortReadStream(f, block_size)))
+		return run_stream
+	else:
+		raise ValueError(f'Unknown func {case.func}')
+
+
+def get_cpu_model() -> Optional[str]:
+	try:
+		with open('/proc/cpuinfo', 'r') as f:
+			for line in f:
+				if line.startswith('model name'):
+					return line.split(':', 1)[1].strip()
+	except OSError:
+		pass
+	return platform.processor() or None
+
+
+def run_suite(benchmark_dir: Path, sample_cnt: int, warmup_cnt: int, pinned_cpu: Optional[int], name_filter: Optional[str]) -> Dict[str, Any]:
+	cases = [case for case in make_suite_cases() if name_filter is None or name_filter in case.name]
+	files = {
+		data_size: ensure_random_file(benchmark_dir / f'suite_{data_size}.bin', data_size, 0)
+		for data_size in sorted({case.data_size for case in cases})
+	}
+
+	results = []
+	for idx, case in enumerate(cases):
+		run = make_suite_runner(case, files[case.data_size], read_file_cached(files[case.data_size]))
+		chunk_cnt = run()
+		samples = measure_samples(run, sample_cnt, warmup_cnt)
+		stats = compute_sample_stats(samples)
+		mib = case.data_size / 1024 / 1024
+		result = {
+			'name': case.name,
+			'impl': case.impl,
+			'algorithm': case.algorithm,
+			'func': case.func,
+			'kwargs': case.kwargs,
+			'block_size': case.block_size,
+			'data_size': case.data_size,
+			'chunk_cnt': chunk_cnt,
+			'median_ns': stats.median_ns,
+			'ci_low_ns': stats.ci_low_ns,
+			'ci_high_ns': stats.ci_high_ns,
+			'stdev_ns': stats.stdev_ns,
+			'mib_per_sec': mib / (stats.median_ns / 1e9),
+			'samples_ns': samples,
+		}
+		results.append(result)
+		print(f'[{idx + 1}/{len(cases)}] {case.name}: {result["mib_per_sec"]:.2f} MiB/s (±{(stats.ci_high_ns - stats.ci_low_ns) / 2 / stats.median_ns * 100:.1f}%)')
+		read_file_cached.cache_clear()
+
+	return {
+		'meta': {
+			'pyfastcdc_version': pyfastcdc.__version__,
+			'python': sys.version,
+			'platform': platform.platform(),
+			'cpu_model': get_cpu_model(),
+			'pinned_cpu': pinned_cpu,
+			'samples': sample_cnt,
+			'warmup': warmup_cnt,
+			'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+		},
+		'results': results,
+	}
+
+
+# Print the throughput change of every case against the baseline, and return the number of regressions.
+# A case is flagged only if the median changed by more than the threshold,
+# and the confidence intervals of the two medians do not overlap, so noise alone is not reported
+def compare_with_baseline(suite_result: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+	for key in ['python', 'platform', 'cpu_model']:
+		if suite_result['meta'].get(key) != baseline['meta'].get(key):
+			print(f'Warning: {key} differs from the baseline: {suite_result["meta"].get(key)!r} vs {baseline["meta"].get(key)!r}')
+
+	baseline_results = {result['name']: result for result in baseline['results']}
+	regression_cnt = 0
+	print(f'{"case":<70} {"baseline":>12} {"current":>12} {"change":>8}  status')
+	for result in suite_result['results']:
+		base = baseline_results.get(result['name'])
+		if base is None:
+			print(f'{result["name"]:<70} {"-":>12} {result["mib_per_sec"]:>12.2f} {"-":>8}  new')
+			continue
+		# compare the time per byte, so cases stay comparable if the data size of the suite changes
+		cur_ns, base_ns = result['median_ns'] / result['data_size'], base['median_ns'] / base['data_size']
+		change = base_ns / cur_ns - 1  # the throughput change
+		if change < -threshold and result['ci_low_ns'] / result['data_size'] > base['ci_high_ns'] / base['data_size']:
+			status = 'REGRESSION'
+			regression_cnt += 1
+		elif change > threshold and result['ci_high_ns'] / result['data_size'] < base['ci_low_ns'] / base['data_size']:
+			status = 'improvement'
+		else:
+			status = 'ok'
+		print(f'{result["name"]:<70} {base["mib_per_sec"]:>12.2f} {result["mib_per_sec"]:>12.2f} {change * 100:>+7.1f}%  {status}')
+	print(f'{regression_cnt} regression(s) beyond {threshold * 100:.0f}%')
+	return regression_cnt
+
+
 def main():
 	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 	parser.add_argument('--test-files', nargs='+', default=['rand_100M.bin', 'rand_1G.bin', 'rand_10G.bin'])
 	parser.add_argument('--benchmark-dir', type=Path, default=DEFAULT_BENCHMARK_DIR)
-	parser.add_argument('--output-csv', type=Path, default=DEFAULT_BENCHMARK_DIR / 'result.csv')
+	parser.add_argument('--output-csv', type=Path, default=None, help='Default: result.csv, result_threads.csv with --threads, result_dedup.csv with --dedup, or result_memory.csv with --memory, inside the benchmark dir')
+	parser.add_argument('--avg-sizes', type=int, nargs='+', default=None, help='avg_size values to benchmark, e.g. 33554432 67108864 134217728 for the large object profile. Default: 4 KiB to 4 MiB, or 4 KiB to 64 KiB for --dedup')
+	parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS.keys()), default=['fastcdc'], help='Chunking algorithms to benchmark')
+	parser.add_argument('--impls', nargs='+', choices=list(IMPL_MODULES.keys()), default=['cy'], help='Implementations to benchmark')
+	parser.add_argument('--rounds', type=int, default=10, help='Timed samples per case. The median is reported')
+	parser.add_argument('--warmup', type=int, default=1, help='Untimed warmup runs per case')
+	parser.add_argument('--cpu', type=int, default=None, help='The CPU to pin the benchmark process to. Default: the last allowed CPU')
+	parser.add_argument('--no-pin', action='store_true', help='Do not pin the benchmark process to a CPU')
+	parser.add_argument('--threads', type=int, nargs='+', default=None, help=f'Run the multi-threaded scaling benchmark with the given thread counts instead, e.g. 1 2 4 {os.cpu_count()}')
+	parser.add_argument('--suite', action='store_true', help='Run the regression suite instead, covering every implementation, algorithm and chunker')
+	parser.add_argument('--output-json', type=Path, default=None, help='Where to save the suite result. Default: suite.json inside the benchmark dir')
+	parser.add_argument('--baseline', type=Path, default=None, help='A suite result JSON to compare against. Exits with code 1 if any case regressed')
+	parser.add_argument('--save-baseline', action='store_true', help='Also save the suite result to the --baseline path')
+	parser.add_argument('--threshold', type=float, default=0.05, help='The relative throughput drop to flag as a regression')
+	parser.add_argument('--filter', default=None, help='Only run the suite cases whose name contains the given string, e.g. cy/fastcdc/')
+	parser.add_argument('--dedup', action='store_true', help='Run the deduplication benchmark on the synthetic corpora of generate_corpus.py instead')
+	parser.add_argument('--corpus-kinds', nargs='+', choices=list(CORPUS_GENERATORS.keys()), default=list(CORPUS_GENERATORS.keys()), help='Corpora for --dedup')
+	parser.add_argument('--corpus-size-mib', type=int, default=256, help='The approximate size of each corpus for --dedup')
+	parser.add_argument('--normalized-chunking', type=int, nargs='+', default=[1], help='NC values for --dedup')
+	parser.add_argument('--memory', action='store_true', help='Run the memory footprint benchmark instead, reporting peak RSS, page cache growth, Python allocations and bytes copied next to the throughput')
 	args = parser.parse_args()
 
 	init_benchmark_dir(args.benchmark_dir)
-	benchmark(args.benchmark_dir, args.output_csv, args.test_files)
+	if args.threads:
+		benchmark_threads(args.benchmark_dir, args.output_csv or args.benchmark_dir / 'result_threads.csv', args.test_files, args.threads)
+		return
+
+	pinned_cpu = None if args.no_pin else pin_cpu(args.cpu)
+	print(f'Pinned to CPU {pinned_cpu}' if pinned_cpu is not None else 'Not pinned to a CPU')
+	if args.dedup:
+		benchmark_dedup(
+			args.benchmark_dir, args.output_csv or args.benchmark_dir / 'result_dedup.csv', args.corpus_kinds, args.corpus_size_mib * 1024 * 1024,
+			args.avg_sizes or DEFAULT_DEDUP_AVG_SIZES, args.normalized_chunking, args.rounds, args.warmup, args.algorithms, args.impls,
+		)
+		return
+	if args.memory:
+		benchmark_memory(args.benchmark_dir, args.output_csv or args.benchmark_dir / 'result_memory.csv', args.test_files, args.avg_sizes or DEFAULT_AVG_SIZES, args.rounds, args.warmup, args.algorithms, args.impls)
+		return
+	if not args.suite:
+		benchmark(args.benchmark_dir, args.output_csv or args.benchmark_dir / 'result.csv', args.test_files, args.avg_sizes or DEFAULT_AVG_SIZES, args.rounds, args.warmup, args.algorithms, args.impls)
+		return
+
+	suite_result = run_suite(args.benchmark_dir, args.rounds, args.warmup, pinned_cpu, args.filter)
+	output_json_path = args.output_json or args.benchmark_dir / 'suite.json'
+	output_json_path.write_text(json.dumps(suite_result, indent=2), encoding='utf8')
+	print(f'Saved the suite result to {output_json_path}')
+
+	regression_cnt = 0
+	if args.baseline is not None:
+		if args.baseline.exists():
+			regression_cnt = compare_with_baseline(suite_result, json.loads(args.baseline.read_text(encoding='utf8')), args.threshold)
+		else:
+			print(f'Baseline {args.baseline} does not exist, nothing to compare with')
+		if args.save_baseline:
+			args.baseline.write_text(json.dumps(suite_result, indent=2), encoding='utf8')
+			print(f'Saved the suite result as the baseline {args.baseline}')
+	sys.exit(1 if regression_cnt > 0 else 0)
 
 
 if __name__ == '__main__':
@@ -1,13 +1,62 @@
 import argparse
 from pathlib import Path
+from typing import Dict, List, Optional
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
 HERE = Path(__file__).absolute().parent
 DEFAULT_CSV_PATH = HERE / 'benchmark' / 'result.csv'
 
 
+# y-axis labels of the columns written by benchmark.py --memory, plotted next to MiB/s
+MEMORY_METRICS = {
+	'peak_rss_mib': 'peak RSS growth (MiB)',
+	'page_cache_mib': 'page cache growth (MiB)',
+	'py_peak_mib': 'Python peak allocation (MiB)',
+	'py_bytes_per_chunk': 'Python bytes kept per chunk',
+	'copied_mib_per_gib': 'copied MiB per GiB',
+}
+
+
+def plot_metric(ax, group: pd.DataFrame, metric: str, ylabel: str, title: str):
+	ax.set_title(title, fontsize=16, fontweight='bold')
+	ax.set_xlabel('avg_size', fontsize=14)
+	ax.set_ylabel(ylabel, fontsize=14)
+
+	# results of older benchmark.py versions have no algorithm column
+	multi_algorithm = 'algorithm' in group.columns and group['algorithm'].nunique() > 1
+	multi_impl = 'impl' in group.columns and group['impl'].nunique() > 1
+	keys = (['algorithm'] if multi_algorithm else []) + (['impl'] if multi_impl else []) + ['func']
+	for key, func_group in group.groupby(keys if len(keys) > 1 else 'func'):
+		func_group = func_group.sort_values('avg_size')
+		ax.plot(
+			func_group['avg_size'],
+			func_group[metric],
+			marker='o',
+			markersize=8,
+			linewidth=2,
+			label=' '.join(key) if len(keys) > 1 else key,
+		)
+
+	ax.legend(fontsize=12)
+	ax.set_xscale('log', base=2)
+
+	all_avg_sizes = sorted(group['avg_size'].unique())
+	ax.set_xticks(all_avg_sizes)
+	ax.set_xticklabels(
+		[
+			f'{int(x / 1024)}K' if x < 1024 * 1024 else f'{int(x / 1024 / 1024)}M'
+			for x in all_avg_sizes
+		],
+		fontsize=12,
+	)
+
+	ax.tick_params(axis='y', labelsize=12)
+	ax.grid(True, alpha=0.3, linestyle='--')
+
+
 def visualize(csv_path: Path):
 	df = pd.read_csv(csv_path)
 
@@ -16,8 +65,15 @@ def visualize(csv_path: Path):
 	if num_files == 0:
 		raise ValueError(f'No rows found in CSV: {csv_path}')
 
-	cols = min(3, num_files)
-	rows = (num_files + cols - 1) // cols
+	# one row of MiB/s and memory metrics per file for a --memory result, otherwise a grid of MiB/s per file
+	metrics = {'mib_per_sec': 'MiB/s'}
+	metrics.update({metric: ylabel for metric, ylabel in MEMORY_METRICS.items() if metric in df.columns and df[metric].notna().any()})
+	if len(metrics) > 1:
+		cols = len(metrics)
+		rows = num_files
+	else:
+		cols = min(3, num_files)
+		rows = (num_files + cols - 1) // cols
 
 	subplot_width = 8
 	subplot_height = subplot_width / 1.5
@@ -32,57 +88,172 @@ def visualize(csv_path: Path):
 	)
 	axes = axes.ravel()
 
-	for idx, file_name in enumerate(file_names):
+	idx = 0
+	for file_name in file_names:
 		group = df[df['file_name'] == file_name]
 		file_size = group['file_size'].iloc[0]
 		file_size_mib = file_size / 1024 / 1024
 		title = f'{file_name} ({file_size_mib:.0f} MiB)'
+		for metric, ylabel in metrics.items():
+			plot_metric(axes[idx], group, metric, ylabel, title)
+			idx += 1
+
+	for idx in range(idx, len(axes)):
+		axes[idx].set_visible(False)
+
+	plt.tight_layout()
+	plt.show()
+
+
+# rows of result sets are aligned by these columns in the compare mode
+COMPARE_KEYS = ['file_name', 'algorithm', 'avg_size', 'impl', 'func']
+
+
+def load_result(csv_path: Path) -> pd.DataFrame:
+	df = pd.read_csv(csv_path)
+	# results of older benchmark.py versions have no algorithm column
+	if 'algorithm' not in df.columns:
+		df['algorithm'] = 'fastcdc'
+	return df
 
+
+# Align the rows of two result sets and compute the speedup of the new one for each row.
+# Like benchmark.py --baseline, a change is significant only if it's beyond the threshold,
+# and the confidence intervals of the two medians do not overlap, so noise alone is not reported.
+# Results without confidence intervals get a status with a question mark, since their noise is unknown
+def compare_results(base: pd.DataFrame, new: pd.DataFrame, threshold: float) -> pd.DataFrame:
+	columns = [c for c in ['cost_ms', 'ci_low_ms', 'ci_high_ms', 'mib_per_sec'] if c in base.columns and c in new.columns]
+	merged = base[COMPARE_KEYS + columns].merge(new[COMPARE_KEYS + columns], on=COMPARE_KEYS, suffixes=('_base', '_new'))
+	merged['speedup'] = merged['cost_ms_base'] / merged['cost_ms_new']
+	if 'ci_low_ms' in columns and 'ci_high_ms' in columns:
+		merged['speedup_low'] = merged['ci_low_ms_base'] / merged['ci_high_ms_new']
+		merged['speedup_high'] = merged['ci_high_ms_base'] / merged['ci_low_ms_new']
+		faster = (merged['speedup'] > 1 + threshold) & (merged['ci_high_ms_new'] < merged['ci_low_ms_base'])
+		slower = (merged['speedup'] < 1 / (1 + threshold)) & (merged['ci_low_ms_new'] > merged['ci_high_ms_base'])
+		merged['status'] = 'same'
+		merged.loc[faster, 'status'] = 'faster'
+		merged.loc[slower, 'status'] = 'slower'
+	else:
+		merged['speedup_low'] = merged['speedup_high'] = merged['speedup']
+		merged['status'] = 'same?'
+		merged.loc[merged['speedup'] > 1 + threshold, 'status'] = 'faster?'
+		merged.loc[merged['speedup'] < 1 / (1 + threshold), 'status'] = 'slower?'
+	return merged
+
+
+def geometric_mean(values: pd.Series) -> float:
+	return float(np.exp(np.log(values).mean()))
+
+
+def print_comparison(label: str, base_label: str, comparison: pd.DataFrame, unmatched_cnt: int):
+	print(f'=== {label} vs {base_label} ===')
+	if len(comparison) == 0:
+		print(f'No matching rows, {unmatched_cnt} unmatched rows')
+		print()
+		return
+	print(f'{"file_name":<24} {"algorithm":<12} {"avg_size":>9} {"impl":<4} {"func":<10} {"base MiB/s":>11} {"new MiB/s":>11} {"speedup":>8} {"95% interval":>15}  status')
+	for _, row in comparison.iterrows():
+		interval = f'[{row["speedup_low"]:.3f}, {row["speedup_high"]:.3f}]'
+		print(
+			f'{row["file_name"]:<24} {row["algorithm"]:<12} {row["avg_size"]:>9} {row["impl"]:<4} {row["func"]:<10} '
+			f'{row["mib_per_sec_base"]:>11.2f} {row["mib_per_sec_new"]:>11.2f} {row["speedup"]:>8.3f} {interval:>15}  {row["status"]}'
+		)
+	for key, group in comparison.groupby(['impl', 'func']):
+		print(f'{" ".join(key)}: geometric mean speedup {geometric_mean(group["speedup"]):.3f} over {len(group)} rows')
+	status_cnt = comparison['status'].value_counts()
+	print(
+		f'Overall: geometric mean speedup {geometric_mean(comparison["speedup"]):.3f} over {len(comparison)} rows, ' +
+		', '.join(f'{cnt} {status}' for status, cnt in status_cnt.items()) +
+		(f', {unmatched_cnt} unmatched rows' if unmatched_cnt > 0 else '')
+	)
+	print()
+
+
+def plot_comparisons(comparisons: Dict[str, pd.DataFrame], base_label: str):
+	file_names = sorted({file_name for comparison in comparisons.values() for file_name in comparison['file_name'].unique()})
+	cols = min(3, len(file_names))
+	rows = (len(file_names) + cols - 1) // cols
+	subplot_width = 8
+	fig, axes = plt.subplots(rows, cols, figsize=(subplot_width * cols, subplot_width / 1.5 * rows), dpi=150, squeeze=False)
+	axes = axes.ravel()
+
+	for idx, file_name in enumerate(file_names):
 		ax = axes[idx]
-		ax.set_title(title, fontsize=16, fontweight='bold')
+		ax.set_title(f'{file_name}, speedup vs {base_label}', fontsize=16, fontweight='bold')
 		ax.set_xlabel('avg_size', fontsize=14)
-		ax.set_ylabel('MiB/s', fontsize=14)
-
-		for func_name, func_group in group.groupby('func'):
-			func_group = func_group.sort_values('avg_size')
-			ax.plot(
-				func_group['avg_size'],
-				func_group['mib_per_sec'],
-				marker='o',
-				markersize=8,
-				linewidth=2,
-				label=func_name,
-			)
-
-		ax.legend(fontsize=12)
+		ax.set_ylabel('speedup', fontsize=14)
+		ax.axhline(1, color='gray', linewidth=1)
+		all_avg_sizes = set()
+		for label, comparison in comparisons.items():
+			group = comparison[comparison['file_name'] == file_name]
+			multi_algorithm = group['algorithm'].nunique() > 1
+			for key, line in group.groupby(['algorithm', 'impl', 'func'] if multi_algorithm else ['impl', 'func']):
+				line = line.sort_values('avg_size')
+				all_avg_sizes.update(line['avg_size'])
+				ax.errorbar(
+					line['avg_size'],
+					line['speedup'],
+					yerr=[line['speedup'] - line['speedup_low'], line['speedup_high'] - line['speedup']],
+					marker='o',
+					markersize=6,
+					linewidth=2,
+					capsize=3,
+					label=' '.join((label,) + key) if len(comparisons) > 1 else ' '.join(key),
+				)
+		ax.legend(fontsize=10)
 		ax.set_xscale('log', base=2)
-
-		all_avg_sizes = sorted(group['avg_size'].unique())
+		all_avg_sizes = sorted(all_avg_sizes)
 		ax.set_xticks(all_avg_sizes)
-		ax.set_xticklabels(
-			[
-				f'{int(x / 1024)}K' if x < 1024 * 1024 else f'{int(x / 1024 / 1024)}M'
-				for x in all_avg_sizes
-			],
-			fontsize=12,
-		)
-
-		ax.tick_params(axis='y', labelsize=12)
+		ax.set_xticklabels([f'{int(x / 1024)}K' if x < 1024 * 1024 else f'{int(x / 1024 / 1024)}M' for x in all_avg_sizes], fontsize=12)
 		ax.grid(True, alpha=0.3, linestyle='--')
 
-	for idx in range(num_files, len(axes)):
+	for idx in range(len(file_names), len(axes)):
 		axes[idx].set_visible(False)
 
 	plt.tight_layout()
 	plt.show()
 
 
+# Compare two or more result sets, e.g. of two pyfastcdc versions, build flags or hosts, against the first one
+def compare(csv_paths: List[Path], labels: Optional[List[str]], threshold: float, output_csv_path: Optional[Path], plot: bool):
+	if labels is None:
+		stems = [path.stem for path in csv_paths]
+		labels = stems if len(set(stems)) == len(stems) else [str(path) for path in csv_paths]
+	if len(labels) != len(csv_paths):
+		raise ValueError(f'Got {len(labels)} labels for {len(csv_paths)} result sets')
+
+	results = [load_result(path) for path in csv_paths]
+	base, base_label = results[0], labels[0]
+	comparisons: Dict[str, pd.DataFrame] = {}
+	for label, result in zip(labels[1:], results[1:]):
+		comparison = compare_results(base, result, threshold)
+		unmatched_cnt = len(base) + len(result) - 2 * len(comparison)
+		print_comparison(label, base_label, comparison, unmatched_cnt)
+		comparisons[label] = comparison
+
+	if output_csv_path is not None:
+		pd.concat([comparison.assign(label=label, base_label=base_label) for label, comparison in comparisons.items()]).to_csv(output_csv_path, index=False)
+		print(f'Saved the comparison to {output_csv_path}')
+	if plot:
+		plot_comparisons(comparisons, base_label)
+
+
 def main():
 	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 	parser.add_argument('--csv', type=Path, default=DEFAULT_CSV_PATH)
+	parser.add_argument('--compare', type=Path, nargs='+', default=None, help='Compare two or more result CSVs against the first one instead, e.g. of two pyfastcdc versions or hosts')
+	parser.add_argument('--labels', nargs='+', default=None, help='Names of the compared result sets. Default: the CSV file names')
+	parser.add_argument('--threshold', type=float, default=0.05, help='The relative change below which a speedup is not significant')
+	parser.add_argument('--output-csv', type=Path, default=None, help='Where to save the comparison table of --compare')
+	parser.add_argument('--no-plot', action='store_true', help='Only print the comparison table of --compare')
 	args = parser.parse_args()
 
-	visualize(args.csv)
+	if args.compare is not None:
+		if len(args.compare) < 2:
+			parser.error('--compare needs at least two result CSVs')
+		compare(args.compare, args.labels, args.threshold, args.output_csv, not args.no_plot)
+	else:
+		visualize(args.csv)
 
 
 if __name__ == '__main__':
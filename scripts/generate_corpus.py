@@ -0,0 +1,182 @@
+# Synthetic deduplication corpora for benchmark.py --dedup, since random data never deduplicates.
+# Every corpus is fully determined by its kind, size and seed
+import argparse
+import io
+import json
+import tarfile
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+HERE = Path(__file__).absolute().parent
+DEFAULT_CORPUS_DIR = HERE / 'benchmark' / 'corpus'
+
+
+def random_bytes(rng: np.random.Generator, size: int) -> bytes:
+	return rng.integers(0, 256, size=size, dtype=np.uint8).tobytes()
+
+
+def apply_edits(rng: np.random.Generator, data: bytearray, edit_cnt: int, max_edit_size: int):
+	# inserts, deletes and shifts (a block moved elsewhere), the edits between two versions of a file
+	for _ in range(edit_cnt):
+		op = rng.integers(0, 3)
+		size = int(rng.integers(1, max_edit_size + 1))
+		offset = int(rng.integers(0, len(data) + 1))
+		if op == 0:
+			data[offset:offset] = random_bytes(rng, size)
+		elif op == 1:
+			del data[offset:offset + size]
+		else:
+			block = data[offset:offset + size]
+			del data[offset:offset + size]
+			target = int(rng.integers(0, len(data) + 1))
+			data[target:target] = block
+
+
+# Successive versions of a file, each one derived from the previous one with a few hundred small edits,
+# like the daily backups of a document or a database dump
+def generate_versions(output_dir: Path, size: int, seed: int) -> List[Path]:
+	version_cnt = 8
+	rng = np.random.default_rng(seed)
+	data = bytearray(random_bytes(rng, size // version_cnt))
+	paths = []
+	for i in range(version_cnt):
+		if i > 0:
+			apply_edits(rng, data, edit_cnt=200, max_edit_size=4096)
+		path = output_dir / f'v{i:03d}.bin'
+		path.write_bytes(data)
+		paths.append(path)
+	return paths
+
+
+# Raw disk images of VMs cloned from one base image: mostly zero regions and files shared by all images,
+# with some blocks rewritten and some free space filled in each clone
+def generate_vm_images(output_dir: Path, size: int, seed: int) -> List[Path]:
+	image_cnt = 4
+	extent_size = 1024 * 1024
+	block_size = 4096
+	rng = np.random.default_rng(seed)
+	extent_cnt = max(1, size // image_cnt // extent_size)
+
+	# files shared by all images, e.g. the OS and the installed packages
+	shared_files = [random_bytes(rng, int(rng.integers(block_size, extent_size))) for _ in range(16)]
+	base = bytearray()
+	for _ in range(extent_cnt):
+		if rng.random() < 0.5:
+			base += bytes(extent_size)
+		else:
+			extent = bytearray()
+			while len(extent) < extent_size:
+				extent += shared_files[int(rng.integers(0, len(shared_files)))]
+			base += extent[:extent_size]
+
+	paths = []
+	for i in range(image_cnt):
+		image = bytearray(base)
+		for _ in range(extent_cnt * 8):  # rewritten blocks, aligned like a file system does
+			offset = int(rng.integers(0, len(image) // block_size)) * block_size
+			image[offset:offset + block_size] = random_bytes(rng, block_size)
+		for _ in range(extent_cnt // 8):  # free space filled with new data
+			offset = int(rng.integers(0, extent_cnt)) * extent_size
+			image[offset:offset + extent_size // 2] = random_bytes(rng, extent_size // 2)
+		path = output_dir / f'img{i:03d}.raw'
+		path.write_bytes(image)
+		paths.append(path)
+	return paths
+
+
+def make_source_file(rng: np.random.Generator, vocabulary: List[bytes], size: int) -> bytes:
+	tokens = [vocabulary[j] for j in rng.integers(0, len(vocabulary), size=max(1, size // 13))]  # 13 bytes per token on average
+	lines = []
+	for j in range(0, len(tokens), 10):
+		lines.append(b'\t' * int(rng.integers(0, 4)) + b' '.join(tokens[j:j + 10]))
+	return b'\n'.join(lines) + b'\n'
+
+
+# Tarballs of successive releases of a source tree, where each release edits a tenth of the files,
+# and adds or removes a few
+def generate_source_tars(output_dir: Path, size: int, seed: int) -> List[Path]:
+	release_cnt = 6
+	rng = np.random.default_rng(seed)
+	vocabulary = [random_bytes(rng, int(rng.integers(1, 12))).hex().encode() for _ in range(2000)]
+	vocabulary += [b'if', b'else', b'for', b'return', b'def', b'class', b'self', b'(', b')', b':', b'=', b'None']
+	file_cnt = max(1, size // release_cnt // 10000)  # ~10 KiB per file on average
+
+	def new_file_size() -> int:
+		return int(min(rng.lognormal(np.log(6000), 1.0), 256 * 1024))
+
+	files: Dict[str, bytes] = {f'src/mod{j // 50:03d}/file{j:05d}.py': make_source_file(rng, vocabulary, new_file_size()) for j in range(file_cnt)}
+	next_file_id = file_cnt
+	paths = []
+	for i in range(release_cnt):
+		if i > 0:
+			names = sorted(files.keys())
+			for name in rng.choice(names, size=max(1, len(names) // 10), replace=False):
+				lines = files[name].split(b'\n')
+				for _ in range(int(rng.integers(1, 6))):
+					pos = int(rng.integers(0, len(lines) + 1))
+					lines[pos:pos + int(rng.integers(0, 3))] = make_source_file(rng, vocabulary, 120).split(b'\n')[:-1]
+				files[name] = b'\n'.join(lines)
+			for name in rng.choice(names, size=max(1, len(names) // 100), replace=False):
+				del files[name]
+			for _ in range(max(1, len(names) // 100)):
+				files[f'src/new/file{next_file_id:05d}.py'] = make_source_file(rng, vocabulary, new_file_size())
+				next_file_id += 1
+
+		path = output_dir / f'release{i:03d}.tar'
+		with tarfile.open(path, 'w', format=tarfile.USTAR_FORMAT) as tar:
+			for name in sorted(files.keys()):
+				info = tarfile.TarInfo(f'project-{i}/{name}')
+				info.size = len(files[name])
+				info.mode = 0o644
+				info.mtime = 0  # no timestamps, so the output stays deterministic
+				tar.addfile(info, io.BytesIO(files[name]))
+		paths.append(path)
+	return paths
+
+
+CORPUS_GENERATORS: Dict[str, Callable[[Path, int, int], List[Path]]] = {
+	'versions': generate_versions,
+	'vm_images': generate_vm_images,
+	'source_tars': generate_source_tars,
+}
+
+
+# Generate the corpus of the given kind with roughly the given total size into corpus_dir / kind,
+# unless it has already been generated with the same parameters. Returns the corpus files
+def ensure_corpus(corpus_dir: Path, kind: str, size: int, seed: int = 0) -> List[Path]:
+	output_dir = corpus_dir / kind
+	manifest_path = output_dir / 'manifest.json'
+	params = {'kind': kind, 'size': size, 'seed': seed}
+	if manifest_path.exists():
+		manifest = json.loads(manifest_path.read_text(encoding='utf8'))
+		paths = [output_dir / name for name in manifest['files']]
+		if manifest['params'] == params and all(path.exists() for path in paths):
+			return paths
+
+	print(f'Generating {kind} corpus with size={size} seed={seed}...')
+	output_dir.mkdir(parents=True, exist_ok=True)
+	for path in output_dir.iterdir():
+		path.unlink()
+	paths = CORPUS_GENERATORS[kind](output_dir, size, seed)
+	manifest_path.write_text(json.dumps({'params': params, 'files': [path.name for path in paths]}, indent=2), encoding='utf8')
+	return paths
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--corpus-dir', type=Path, default=DEFAULT_CORPUS_DIR)
+	parser.add_argument('--kinds', nargs='+', choices=list(CORPUS_GENERATORS.keys()), default=list(CORPUS_GENERATORS.keys()))
+	parser.add_argument('--size-mib', type=int, default=256, help='The approximate total size of each corpus')
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args()
+
+	for kind in args.kinds:
+		paths = ensure_corpus(args.corpus_dir, kind, args.size_mib * 1024 * 1024, args.seed)
+		total_size = sum(path.stat().st_size for path in paths)
+		print(f'{kind}: {len(paths)} files, {total_size / 1024 / 1024:.1f} MiB in {args.corpus_dir / kind}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,63 @@
+# Recommend FastCDC parameters for a dataset with pyfastcdc.tune_parameters(), e.g.
+#
+#     python tune_parameters.py /data/backups --metadata-budget 0.005
+import argparse
+import os
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+import pyfastcdc
+
+
+def collect_files(paths: Iterable[Path]) -> List[Path]:
+	files = []
+	for path in paths:
+		if path.is_dir():
+			for root, _, names in os.walk(path):
+				files.extend(Path(root) / name for name in sorted(names) if (Path(root) / name).is_file())
+		else:
+			files.append(path)
+	return files
+
+
+def parse_size_ratio(text: str) -> Tuple[int, int]:
+	min_ratio, max_ratio = text.split(':')
+	return int(min_ratio), int(max_ratio)
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('paths', type=Path, nargs='+', help='Files or directories of the dataset')
+	parser.add_argument('--avg-sizes', type=int, nargs='+', default=[4096, 8192, 16384, 32768, 65536])
+	parser.add_argument('--normalized-chunking', type=int, nargs='+', default=[0, 1, 2, 3])
+	parser.add_argument('--size-ratios', type=parse_size_ratio, nargs='+', default=[(4, 4)], help='avg_size // min_size and max_size // avg_size ratios, e.g. 4:4 2:8')
+	parser.add_argument('--sample-mib', type=int, default=64, help='The approximate total size of the sample')
+	parser.add_argument('--block-kib', type=int, default=4096, help='The size of the sampled blocks')
+	parser.add_argument('--metadata-entry-size', type=int, default=48, help='Metadata bytes per chunk reference')
+	parser.add_argument('--metadata-budget', type=float, default=None, help='The max metadata bytes per input byte, e.g. 0.005')
+	args = parser.parse_args()
+
+	files = collect_files(args.paths)
+	report = pyfastcdc.tune_parameters(
+		files,
+		avg_sizes=args.avg_sizes,
+		normalized_chunkings=args.normalized_chunking,
+		size_ratios=args.size_ratios,
+		sample_size=args.sample_mib * 1024 * 1024,
+		block_size=args.block_kib * 1024,
+		metadata_entry_size=args.metadata_entry_size,
+		metadata_budget=args.metadata_budget,
+	)
+
+	print(f'Sampled {report.sampled_bytes / 1024 / 1024:.1f} MiB in {report.sampled_block_count} blocks from {len(files)} files')
+	print(f'{"avg_size":>9} {"min_size":>9} {"max_size":>9} {"nc":>2} {"chunks":>9} {"MiB/s":>8} {"dedup":>7} {"metadata":>9}')
+	for c in report.candidates:
+		mark = '<- recommended' if c is report.recommended else ('pareto' if c in report.pareto_front else '')
+		print(f'{c.avg_size:>9} {c.min_size:>9} {c.max_size:>9} {c.normalized_chunking:>2} {c.chunk_count:>9} {c.throughput / 1024 / 1024:>8.1f} {c.dedup_ratio:>7.3f} {c.metadata_overhead:>9.3%}  {mark}')
+
+	c = report.recommended
+	print(f'Recommended: FastCDC({c.avg_size}, min_size={c.min_size}, max_size={c.max_size}, normalized_chunking={c.normalized_chunking})')
+
+
+if __name__ == '__main__':
+	main()
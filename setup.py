@@ -92,7 +92,11 @@ else:
 	from Cython.Build import cythonize
 	ext_modules = cythonize(
 		'pyfastcdc/cy/*.pyx',
-		compiler_directives={'language_level': '3'},
+		compiler_directives={
+			'language_level': '3',
+			# FastCDC objects are immutable after __init__, and chunkers guard themselves with a lock on free-threaded builds
+			'freethreading_compatible': True,
+		},
 	)
 
 print(f'setuptools_version: {setuptools_version}')
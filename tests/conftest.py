@@ -5,7 +5,9 @@ from typing import Type, Union
 import pytest
 
 from pyfastcdc import FastCDC as FastCDC_cy
+from pyfastcdc import cy, py
 from pyfastcdc.py import FastCDC as FastCDC_py
+from tests.utils import ChunkerStatsType, ChunkTracerType, FastCDCType
 
 
 @pytest.fixture(params=['cy', 'py'])
@@ -21,6 +23,16 @@ def fastcdc_instance(fastcdc_impl) -> Union[FastCDC_cy, FastCDC_py]:
 	return fastcdc_impl(avg_size=16384)
 
 
+@pytest.fixture
+def stats_impl(fastcdc_impl: FastCDCType) -> ChunkerStatsType:
+	return cy.ChunkerStats if fastcdc_impl is cy.FastCDC else py.ChunkerStats
+
+
+@pytest.fixture
+def tracer_impl(fastcdc_impl: FastCDCType) -> ChunkTracerType:
+	return cy.ChunkTracer if fastcdc_impl is cy.FastCDC else py.ChunkTracer
+
+
 SEKIEN_AKASHITA_PATH = Path(__file__).parent / 'fixtures' / 'SekienAkashita.jpg'
 
 
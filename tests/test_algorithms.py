@@ -0,0 +1,107 @@
+import io
+import pickle
+from pathlib import Path
+from typing import Optional, Tuple, Type, Union
+
+import pytest
+
+from pyfastcdc import cy, py
+from tests.utils import chunk_summary
+
+AlgorithmType = Union[Type[cy.FastCDC2016], Type[cy.AECDC], Type[cy.RAMCDC], Type[py.FastCDC2016], Type[py.AECDC], Type[py.RAMCDC]]
+
+
+@pytest.fixture(params=['FastCDC2016', 'AECDC', 'RAMCDC'])
+def algorithm_name(request) -> str:
+	return request.param
+
+
+@pytest.fixture(params=['cy', 'py'])
+def algorithm_impl(request, algorithm_name: str) -> AlgorithmType:
+	return getattr(cy if request.param == 'cy' else py, algorithm_name)
+
+
+class TestFastCDC2016:
+	# (min_size, avg_size, max_size) -> [(offset, length), ...], generated with iscc/fastcdc-py 1.5.0
+	EXPECTED_RESULT = {
+		(None, 8192, None): [(0, 22366), (22366, 7750), (30116, 2741), (32857, 10731), (43588, 7129), (50717, 14930), (65647, 20406), (86053, 6083), (92136, 11927), (104063, 5403)],
+		(4096, 16384, 65535): [(0, 22366), (22366, 10491), (32857, 14094), (46951, 18696), (65647, 43819)],
+		(8192, 16384, 32768): [(0, 22366), (22366, 8282), (30648, 16303), (46951, 18696), (65647, 32768), (98415, 11051)],
+	}
+
+	@pytest.mark.parametrize('sizes', EXPECTED_RESULT.keys())
+	def test_iscc_compatibility(self, sekien_akashita_bytes: bytes, sizes: Tuple[Optional[int], int, Optional[int]]):
+		min_size, avg_size, max_size = sizes
+		for cls in [cy.FastCDC2016, py.FastCDC2016]:
+			cdc = cls(avg_size, min_size=min_size, max_size=max_size)
+			assert [(c.offset, c.length) for c in cdc.cut_buf(sekien_akashita_bytes)] == self.EXPECTED_RESULT[sizes]
+
+	def test_default_sizes(self):
+		cdc = cy.FastCDC2016()
+		assert (cdc.min_size, cdc.avg_size, cdc.max_size) == (2048, 8192, 65536)
+		for cls in [cy.FastCDC2016, py.FastCDC2016]:
+			cdc = cls(128 * 1048576)  # avg_size * 8 is capped at the max_size upper bound
+			assert (cdc.avg_size, cdc.max_size) == (128 * 1048576, 512 * 1048576)
+
+
+class TestAlgorithms:
+	def test_py_cy_consistency(self, algorithm_name: str, random_data_1m: bytes):
+		for kwargs in [dict(avg_size=1024), dict(avg_size=8192), dict(avg_size=16384, min_size=64, max_size=32768)]:
+			chunks_cy = [(c.offset, c.length, c.gear_hash) for c in getattr(cy, algorithm_name)(**kwargs).cut_buf(random_data_1m)]
+			chunks_py = [(c.offset, c.length, c.gear_hash) for c in getattr(py, algorithm_name)(**kwargs).cut_buf(random_data_1m)]
+			assert chunks_cy == chunks_py
+
+	def test_cut_methods(self, algorithm_impl: AlgorithmType, random_data_1m: bytes, tmp_path: Path):
+		cdc = algorithm_impl(avg_size=8192)
+		expected = chunk_summary(cdc.cut_buf(random_data_1m))
+		assert b''.join(chunk[-1] for chunk in expected) == random_data_1m
+		assert all(chunk[1] <= cdc.max_size for chunk in expected)
+		assert all(chunk[1] >= cdc.min_size for chunk in expected[:-1])
+
+		file_path = tmp_path / 'data.bin'
+		file_path.write_bytes(random_data_1m)
+
+		class ReadOnlyStream:
+			def __init__(self):
+				self.stream = io.BytesIO(random_data_1m)
+
+			def read(self, n: int) -> bytes:
+				return self.stream.read(n)
+
+		assert chunk_summary(cdc.cut_file(file_path)) == expected
+		assert chunk_summary(cdc.cut_stream(io.BytesIO(random_data_1m))) == expected
+		assert chunk_summary(cdc.cut_stream(ReadOnlyStream())) == expected
+		assert chunk_summary(cdc.cut_iter(random_data_1m[i:i + 10000] for i in range(0, len(random_data_1m), 10000))) == expected
+
+	def test_boundaries_and_sparse(self, algorithm_impl: AlgorithmType, random_data_1m: bytes):
+		cdc = algorithm_impl(avg_size=8192)
+		data = random_data_1m[:300000] + bytes(300000) + random_data_1m[300000:]
+		boundaries = [1000, 50001, 700000]
+		expected = chunk_summary(cdc.cut_buf(data, boundaries=boundaries))
+		assert {1000, 50001, 700000} <= {chunk[0] for chunk in expected}
+		assert chunk_summary(cdc.cut_buf(data, boundaries=boundaries, sparse=True)) == expected
+		assert chunk_summary(cdc.cut_stream(io.BytesIO(data), boundaries=boundaries)) == expected
+
+	def test_avg_size(self, algorithm_name: str, random_data_1m: bytes):
+		for avg_size in [2048, 8192]:
+			chunks = list(getattr(cy, algorithm_name)(avg_size).cut_buf(random_data_1m))
+			assert avg_size * 0.7 <= len(random_data_1m) / len(chunks) <= avg_size * 1.5
+
+	def test_pickle(self, algorithm_impl: AlgorithmType, random_data_1m: bytes):
+		cdc = algorithm_impl(avg_size=4096, min_size=1024, max_size=16384, fingerprint=True)
+		cdc2 = pickle.loads(pickle.dumps(cdc))
+		assert type(cdc2) is type(cdc)
+		assert (cdc2.avg_size, cdc2.min_size, cdc2.max_size, cdc2.fingerprint) == (4096, 1024, 16384, True)
+		assert [c.fingerprint for c in cdc2.cut_buf(random_data_1m)] == [c.fingerprint for c in cdc.cut_buf(random_data_1m)]
+
+	def test_fixed_parameters(self, algorithm_impl: AlgorithmType):
+		for cdc in [algorithm_impl(), algorithm_impl(avg_size=1024)]:
+			assert (cdc.normalized_chunking, cdc.seed) == (0, 0)
+
+	def test_invalid_arguments(self, algorithm_impl: AlgorithmType):
+		with pytest.raises(ValueError):
+			algorithm_impl(avg_size=100)
+		with pytest.raises(ValueError):
+			algorithm_impl(avg_size=8192, min_size=16384)
+		with pytest.raises(TypeError):
+			algorithm_impl(avg_size=8192, seed=1)
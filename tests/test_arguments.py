@@ -1,6 +1,10 @@
+import random
+
 import pytest
 
 from pyfastcdc import NormalizedChunking
+from pyfastcdc.cy import FastCDC as FastCDC_cy
+from pyfastcdc.py import FastCDC as FastCDC_py
 from tests.utils import FastCDCType
 
 
@@ -10,13 +14,18 @@ class TestParameterValidation:
 	def test_valid_avg_size(self, fastcdc_impl: FastCDCType):
 		assert fastcdc_impl(avg_size=256).avg_size == 256
 		assert fastcdc_impl(avg_size=4 * 1024 * 1024).avg_size == 4 * 1024 * 1024
+		assert fastcdc_impl(avg_size=128 * 1024 * 1024).avg_size == 128 * 1024 * 1024
 		assert fastcdc_impl(avg_size=16384).avg_size == 16384
 
 	def test_invalid_avg_size(self, fastcdc_impl: FastCDCType):
 		with pytest.raises(ValueError, match="out of range"):
 			fastcdc_impl(avg_size=63)
 		with pytest.raises(ValueError, match="out of range"):
-			fastcdc_impl(avg_size=5 * 1024 * 1024)
+			fastcdc_impl(avg_size=129 * 1024 * 1024)
+		with pytest.raises(ValueError, match="out of range"):
+			fastcdc_impl(avg_size=64 * 1024 * 1024, max_size=513 * 1024 * 1024)
+		with pytest.raises(ValueError, match="out of range"):
+			fastcdc_impl(avg_size=64 * 1024 * 1024, min_size=33 * 1024 * 1024)
 
 	def test_custom_min_max_sizes(self, fastcdc_impl: FastCDCType):
 		cdc = fastcdc_impl(avg_size=16384, min_size=4096, max_size=65536)
@@ -27,6 +36,10 @@ class TestParameterValidation:
 		assert cdc.min_size == 16384 // 4
 		assert cdc.max_size == 16384 * 4
 
+		cdc = fastcdc_impl(avg_size=128 * 1024 * 1024)
+		assert cdc.min_size == 32 * 1024 * 1024
+		assert cdc.max_size == 512 * 1024 * 1024
+
 	def test_normalized_chunking_values(self, fastcdc_impl: FastCDCType):
 		value: NormalizedChunking
 		for value in [0, 1, 2, 3]:
@@ -102,4 +115,35 @@ class TestAvgSize:
 
 		# larger avg_size means fewer chunks
 		for i in range(1, len(chunk_counts)):
-			assert chunk_counts[i] <= chunk_counts[i - 1]
\ No newline at end of file
+			assert chunk_counts[i] <= chunk_counts[i - 1]
+
+	def test_large_avg_sizes(self, random_data_1m: bytes):
+		for avg_size in [8, 32, 128]:
+			kwargs = dict(avg_size=avg_size * 1024 * 1024, min_size=64, max_size=avg_size * 1024 * 1024)
+			chunks_cy = [(c.offset, c.length, c.gear_hash) for c in FastCDC_cy(**kwargs).cut_buf(random_data_1m)]
+			chunks_py = [(c.offset, c.length, c.gear_hash) for c in FastCDC_py(**kwargs).cut_buf(random_data_1m)]
+			assert chunks_cy == chunks_py
+			assert sum(length for _, length, _ in chunks_cy) == len(random_data_1m)
+
+	def test_large_chunks(self):
+		class RandomStream:
+			def __init__(self, size: int):
+				self.random = random.Random(0)
+				self.remaining = size
+
+			def readinto(self, buf: memoryview) -> int:
+				n = min(len(buf), self.remaining, 16 * 1024 * 1024)
+				if n == 0:
+					return 0  # getrandbits(0) raises ValueError before Python 3.9
+				buf[:n] = self.random.getrandbits(n * 8).to_bytes(n, 'little')
+				self.remaining -= n
+				return n
+
+		# chunks above the old 16 MiB max_size, through the stream buffer refills
+		stream_size = 300 * 1024 * 1024
+		cdc = FastCDC_cy(avg_size=32 * 1024 * 1024, max_size=128 * 1024 * 1024)
+		lengths = [chunk.length for chunk in cdc.cut_stream(RandomStream(stream_size))]
+		assert sum(lengths) == stream_size
+		assert len(lengths) >= 2
+		assert all(length > 16 * 1024 * 1024 for length in lengths[:-1])
+		assert max(lengths) <= 128 * 1024 * 1024
@@ -0,0 +1,119 @@
+import io
+import itertools
+import threading
+from typing import Iterator
+
+import pytest
+
+from pyfastcdc import prefetch_chunks
+from tests.utils import FastCDCType, chunk_summary
+
+
+class TestPrefetchChunks:
+	def test_prefetch(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=4096)
+		expected = chunk_summary(cdc.cut_buf(random_data_1m))
+
+		with prefetch_chunks(cdc.cut_buf(random_data_1m), max_chunks=4) as chunks:
+			assert chunk_summary(chunks) == expected
+		with prefetch_chunks(cdc.cut_stream(io.BytesIO(random_data_1m)), max_bytes=16384) as chunks:
+			chunk_list = list(chunks)  # the stream buffer has been reused, chunk data must be copied to stay valid
+		assert chunk_summary(chunk_list) == expected
+
+	def test_no_copy(self, fastcdc_instance, random_data_1m: bytes):
+		data = bytearray(random_data_1m)
+		with prefetch_chunks(fastcdc_instance.cut_buf(data), copy_data=False) as chunks:
+			for chunk in chunks:
+				assert chunk.data.obj is data
+
+		with prefetch_chunks(fastcdc_instance.cut_buf(data)) as chunks:
+			for chunk in chunks:
+				assert chunk.data.obj is not data
+
+	def test_wrapped_stream(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=4096)
+		expected = chunk_summary(cdc.cut_buf(random_data_1m))
+
+		def source() -> Iterator:
+			yield from cdc.cut_stream(io.BytesIO(random_data_1m))
+
+		for chunks_func in [source, lambda: itertools.islice(cdc.cut_stream(io.BytesIO(random_data_1m)), None), lambda: filter(None, cdc.cut_stream(io.BytesIO(random_data_1m)))]:
+			with prefetch_chunks(chunks_func(), max_bytes=16384) as chunks:
+				chunk_list = list(chunks)
+			assert chunk_summary(chunk_list) == expected
+
+	def test_bounded(self, fastcdc_instance, random_data_1m: bytes):
+		produced = 0
+		blocked = threading.Event()
+
+		def source() -> Iterator:
+			nonlocal produced
+			for chunk in fastcdc_instance.cut_buf(random_data_1m):
+				produced += 1
+				if produced == 5:
+					blocked.set()
+				yield chunk
+
+		with prefetch_chunks(source(), max_chunks=3) as chunks:
+			first = next(chunks)
+			# 1 consumed, 3 in the queue, the 5th one waits to be put into the queue
+			assert blocked.wait(10)
+			assert produced == 5
+			assert first.offset == 0
+
+	def test_copy_func(self, fastcdc_instance, random_data_1m: bytes):
+		class ChunkData:
+			def __init__(self, offset: int, data: memoryview):
+				self.offset = offset
+				self.length = len(data)
+				self.data = data
+
+		items = [ChunkData(chunk.offset, chunk.data) for chunk in fastcdc_instance.cut_buf(random_data_1m)]
+		with pytest.raises(TypeError):
+			list(prefetch_chunks(items))
+		with prefetch_chunks(items, copy_func=lambda item: ChunkData(item.offset, memoryview(bytes(item.data)))) as chunks:
+			copied = list(chunks)
+		assert [(item.offset, bytes(item.data)) for item in copied] == [(item.offset, bytes(item.data)) for item in items]
+		assert all(isinstance(item.data.obj, bytes) for item in copied)
+
+	def test_error(self, fastcdc_instance, random_data_1m: bytes):
+		class BrokenStream:
+			def __init__(self):
+				self.stream = io.BytesIO(random_data_1m)
+
+			def read(self, n: int) -> bytes:
+				if self.stream.tell() >= 300000:
+					raise OSError('broken stream')
+				return self.stream.read(min(n, 1000))
+
+		chunks = prefetch_chunks(fastcdc_instance.cut_stream(BrokenStream()))
+		offset = 0
+		with pytest.raises(OSError, match='broken stream'):
+			for chunk in chunks:
+				assert chunk.offset == offset
+				offset += chunk.length
+		assert offset > 0
+		with pytest.raises(StopIteration):
+			next(chunks)
+
+	def test_close(self, fastcdc_instance, random_data_1m: bytes):
+		closed = threading.Event()
+
+		def source() -> Iterator:
+			try:
+				yield from fastcdc_instance.cut_buf(random_data_1m)
+			finally:
+				closed.set()
+
+		chunks = prefetch_chunks(source(), max_chunks=1)
+		next(chunks)
+		chunks.close()
+		assert closed.is_set()
+		with pytest.raises(StopIteration):
+			next(chunks)
+
+	def test_invalid_arguments(self, fastcdc_instance):
+		with pytest.raises(ValueError):
+			prefetch_chunks(fastcdc_instance.cut_buf(b''), max_chunks=0)
+		with pytest.raises(ValueError):
+			prefetch_chunks(fastcdc_instance.cut_buf(b''), max_bytes=0)
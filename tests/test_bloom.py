@@ -0,0 +1,148 @@
+import hashlib
+import threading
+from pathlib import Path
+from typing import List, Type, Union
+
+import pytest
+
+from pyfastcdc.cy import BloomFilter as BloomFilter_cy
+from pyfastcdc.py import BloomFilter as BloomFilter_py
+
+BloomFilterType = Union[Type[BloomFilter_cy], Type[BloomFilter_py]]
+
+
+@pytest.fixture(params=['cy', 'py'])
+def bloom_filter_impl(request) -> BloomFilterType:
+	if request.param == 'cy':
+		return BloomFilter_cy
+	else:
+		return BloomFilter_py
+
+
+def _create_keys(start: int, count: int) -> List[bytes]:
+	return [hashlib.sha256(i.to_bytes(8, 'little')).digest() for i in range(start, start + count)]
+
+
+class TestBloomFilter:
+	def test_arguments(self, bloom_filter_impl: BloomFilterType):
+		with pytest.raises(ValueError):
+			bloom_filter_impl(0)
+		with pytest.raises(ValueError):
+			bloom_filter_impl(100, 0)
+		with pytest.raises(ValueError):
+			bloom_filter_impl(100, 1)
+
+		bf = bloom_filter_impl(1000, 0.01)
+		assert bf.capacity == 1000
+		assert bf.false_positive_rate == 0.01
+		assert bf.bit_count % 64 == 0
+		assert bf.hash_count == 7
+		with pytest.raises(ValueError):
+			bf.add_many(b'123', 2)
+		with pytest.raises(ValueError):
+			bf.contains_many(b'1234', 0)
+
+	def test_add_contains(self, bloom_filter_impl: BloomFilterType):
+		bf = bloom_filter_impl(1000)
+		assert b'foo' not in bf
+		assert bf.add(b'foo') is True
+		assert bf.add(b'foo') is False
+		assert b'foo' in bf
+		assert bytearray(b'foo') in bf
+		assert bf.add(b'') is True
+		assert memoryview(b'') in bf
+		assert bf.count == 2
+
+	def test_false_positive_rate(self, bloom_filter_impl: BloomFilterType):
+		keys = _create_keys(0, 2000)
+		bf = bloom_filter_impl(len(keys), 0.01)
+		assert bf.add_many(b''.join(keys), 32) == bf.count
+		assert bf.contains_many(b''.join(keys), 32) == [True] * len(keys)
+		assert all(key in bf for key in keys)
+
+		results = bf.contains_many(b''.join(_create_keys(len(keys), 10000)), 32)
+		assert sum(results) / len(results) < 0.02
+		assert bf.contains_many(b'', 32) == []
+
+	def test_consistency(self, tmp_path: Path):
+		keys = b''.join(_create_keys(0, 1000))
+		for i, cls in enumerate([BloomFilter_cy, BloomFilter_py]):
+			bf = cls(1000, 0.001)
+			bf.add_many(keys, 16)
+			bf.save(tmp_path / f'{i}.bloom')
+		assert (tmp_path / '0.bloom').read_bytes() == (tmp_path / '1.bloom').read_bytes()
+
+	def test_save_load(self, bloom_filter_impl: BloomFilterType, tmp_path: Path):
+		keys = _create_keys(0, 1000)
+		file_path = tmp_path / 'filter.bloom'
+		bf = bloom_filter_impl(1000)
+		bf.add_many(b''.join(keys[:500]), 32)
+		bf.save(file_path)
+
+		with bloom_filter_impl.load(file_path) as bf2:
+			assert bf2.count == bf.count
+			assert bf2.bit_count == bf.bit_count
+			assert bf2.hash_count == bf.hash_count
+			assert all(bf2.contains_many(b''.join(keys[:500]), 32))
+			bf2.add_many(b''.join(keys[500:]), 32)
+			assert all(key in bf2 for key in keys)
+		with pytest.raises(ValueError):
+			bf2.add(b'foo')  # closed
+
+		# changes are written back only if writable
+		with bloom_filter_impl.load(file_path, writable=True) as bf3:
+			assert bf3.count == bf.count
+			bf3.add_many(b''.join(keys[500:]), 32)
+			count = bf3.count
+		with bloom_filter_impl.load(file_path) as bf4:
+			assert bf4.count == count
+			assert all(bf4.contains_many(b''.join(keys), 32))
+
+	def test_load_invalid(self, bloom_filter_impl: BloomFilterType, tmp_path: Path):
+		file_path = tmp_path / 'filter.bloom'
+		file_path.write_bytes(b'not a bloom filter')
+		with pytest.raises(ValueError):
+			bloom_filter_impl.load(file_path)
+
+		bloom_filter_impl(1000).save(file_path)
+		file_path.write_bytes(file_path.read_bytes()[:-1])
+		with pytest.raises(ValueError):
+			bloom_filter_impl.load(file_path)
+
+	def test_concurrent_add(self, bloom_filter_impl: BloomFilterType):
+		keys = _create_keys(0, 8000)
+		bf = bloom_filter_impl(len(keys))
+		threads = [
+			threading.Thread(target=bf.add_many, args=(b''.join(keys[i::4]), 32))
+			for i in range(4)
+		]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		assert all(bf.contains_many(b''.join(keys), 32))
+
+	def test_concurrent_close(self, bloom_filter_impl: BloomFilterType, tmp_path: Path):
+		keys = b''.join(_create_keys(0, 2000))
+		file_path = tmp_path / 'filter.bloom'
+		bloom_filter_impl(2000).save(file_path)
+		for _ in range(20):
+			bf = bloom_filter_impl.load(file_path, writable=True)
+			errors = []
+
+			def run(func):
+				try:
+					while True:
+						func(keys, 32)
+				except ValueError as e:
+					errors.append(e)  # closed, instead of touching the unmapped memory
+
+			threads = [threading.Thread(target=run, args=(func,)) for func in [bf.add_many, bf.contains_many]]
+			for thread in threads:
+				thread.start()
+			bf.close()
+			for thread in threads:
+				thread.join()
+			assert len(errors) == 2
+			with pytest.raises(ValueError):
+				keys[:32] in bf
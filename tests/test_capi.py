@@ -0,0 +1,59 @@
+import ctypes
+import os
+
+import pytest
+
+import pyfastcdc
+from pyfastcdc.cy import AECDC as AECDC_cy
+from pyfastcdc.cy import FastCDC as FastCDC_cy
+from pyfastcdc.cy import FastCDC2016 as FastCDC2016_cy
+from pyfastcdc.cy import RAMCDC as RAMCDC_cy
+from pyfastcdc.cy import fastcdc as fastcdc_cy
+from pyfastcdc.py import FastCDC as FastCDC_py
+
+
+class _CutResult(ctypes.Structure):
+	_fields_ = [
+		('gear_hash', ctypes.c_uint64),
+		('cut_offset', ctypes.c_uint64),
+	]
+
+
+# the same layout as pyfastcdc_capi in pyfastcdc/include/pyfastcdc.h
+class _CApi(ctypes.Structure):
+	_fields_ = [
+		('version', ctypes.c_uint32),
+		('get_config', ctypes.PYFUNCTYPE(ctypes.c_void_p, ctypes.py_object)),
+		('cut_gear', ctypes.CFUNCTYPE(_CutResult, ctypes.c_void_p, ctypes.c_char_p, ctypes.c_uint64)),
+	]
+
+
+@pytest.fixture
+def c_api() -> _CApi:
+	get_pointer = ctypes.pythonapi.PyCapsule_GetPointer
+	get_pointer.restype = ctypes.c_void_p
+	get_pointer.argtypes = [ctypes.py_object, ctypes.c_char_p]
+	return _CApi.from_address(get_pointer(fastcdc_cy._C_API, b'pyfastcdc.cy.fastcdc._C_API'))
+
+
+class TestCApi:
+	def test_cut_gear(self, c_api: _CApi, random_data_1m: bytes):
+		assert c_api.version == 1
+		for cdc in [FastCDC_cy(8192), FastCDC_cy(16384, normalized_chunking=2, seed=1), FastCDC2016_cy(8192), AECDC_cy(8192), RAMCDC_cy(8192)]:
+			config = c_api.get_config(cdc)
+			chunks = []
+			offset = 0
+			while offset < len(random_data_1m):
+				res = c_api.cut_gear(config, random_data_1m[offset:], len(random_data_1m) - offset)
+				chunks.append((offset, res.cut_offset, res.gear_hash))
+				offset += res.cut_offset
+			assert chunks == [(c.offset, c.length, c.gear_hash) for c in cdc.cut_buf(random_data_1m)]
+
+	def test_get_config_invalid(self, c_api: _CApi):
+		with pytest.raises(TypeError):
+			c_api.get_config(FastCDC_py())
+		with pytest.raises(TypeError):
+			c_api.get_config(object())
+
+	def test_get_include(self):
+		assert os.path.isfile(os.path.join(pyfastcdc.get_include(), 'pyfastcdc.h'))
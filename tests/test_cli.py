@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from pyfastcdc import FastCDC, cli
+
+
+@pytest.fixture
+def data_tree(tmp_path: Path, random_data_1m: bytes) -> Path:
+	root = tmp_path / 'tree'
+	(root / 'sub').mkdir(parents=True)
+	(root / 'a.bin').write_bytes(random_data_1m)
+	(root / 'sub' / 'b.bin').write_bytes(random_data_1m[:500000] + b'edit' + random_data_1m[500000:])
+	(root / 'sub' / 'empty.bin').write_bytes(b'')
+	return root
+
+
+class TestCli:
+	def test_parse_size(self):
+		assert [cli.parse_size(text) for text in ['65536', '64K', '64KiB', '64kb', '1M', '2G']] == [65536, 65536, 65536, 65536, 1048576, 2 * 1024 ** 3]
+		with pytest.raises(Exception):
+			cli.parse_size('64X')
+
+	@pytest.mark.parametrize('file_name', ['manifest.json', 'manifest.bin'])
+	def test_chunk(self, data_tree: Path, tmp_path: Path, file_name: str, capsys):
+		output = tmp_path / file_name
+		assert cli.main(['chunk', str(data_tree), '-o', str(output), '--avg-size', '8K', '--nc', '2', '-j', '1']) == 0
+		assert 'Chunked 3 files' in capsys.readouterr().out
+		assert output.read_bytes().startswith(b'{' if file_name.endswith('.json') else cli.BINARY_MANIFEST_MAGIC)
+
+		manifest_file = cli.load_manifest(output)
+		assert manifest_file.params == {'algorithm': 'fastcdc', 'avg_size': 8192, 'min_size': 2048, 'max_size': 32768, 'normalized_chunking': 2, 'seed': 0}
+		assert manifest_file.hash_name == 'sha256'
+		assert [file.name for file in manifest_file.files] == ['a.bin', 'sub/b.bin', 'sub/empty.bin']
+
+		cdc = FastCDC(8192, normalized_chunking=2)
+		for file in manifest_file.files:
+			chunks = list(cdc.cut_file(data_tree / file.name))
+			assert [(entry.offset, entry.length) for entry in file.manifest] == [(chunk.offset, chunk.length) for chunk in chunks]
+
+	def test_stats(self, data_tree: Path, capsys):
+		assert cli.main(['stats', str(data_tree), '--json', '-a', 'ae', '--avg-size', '4096', '-j', '1']) == 0
+		stats = json.loads(capsys.readouterr().out)
+		assert stats['params'] == {'algorithm': 'ae', 'avg_size': 4096, 'min_size': 1024, 'max_size': 16384, 'normalized_chunking': 0, 'seed': 0}
+		assert stats['file_count'] == 3
+		assert stats['total_bytes'] == 2 * 1024 * 1024 + 4
+		assert stats['dedup_ratio'] > 1.8
+		assert stats['chunk_size']['min'] <= stats['chunk_size']['p50'] <= stats['chunk_size']['max'] <= 16384
+		assert stats['seconds'] > 0
+
+		assert cli.main(['stats', str(data_tree / 'a.bin'), '-j', '1']) == 0
+		assert 'Dedup ratio:    1.0000' in capsys.readouterr().out
+
+	def test_diff(self, data_tree: Path, tmp_path: Path, random_data_1m: bytes, capsys):
+		old_path, new_path = tmp_path / 'old.bin', tmp_path / 'new.json'
+		assert cli.main(['chunk', str(data_tree), '-o', str(old_path), '-j', '1']) == 0
+		(data_tree / 'a.bin').write_bytes(random_data_1m[:100] + random_data_1m[200:])
+		(data_tree / 'c.bin').write_bytes(b'new file')
+		(data_tree / 'sub' / 'empty.bin').unlink()
+		assert cli.main(['chunk', str(data_tree), '-o', str(new_path), '-j', '1']) == 0
+		capsys.readouterr()
+
+		assert cli.main(['diff', str(old_path), str(new_path), '--json']) == 0
+		result = json.loads(capsys.readouterr().out)
+		assert result['added_files'] == ['c.bin']
+		assert result['removed_files'] == ['sub/empty.bin']
+		assert result['changed_files'] == ['a.bin']
+		assert result['new_bytes'] == result['old_bytes'] - 100 + 8
+		assert 0 < result['changed_bytes'] < 100000
+		assert result['transfer_bytes'] <= result['changed_bytes']
+
+	def test_errors(self, data_tree: Path, tmp_path: Path, capsys):
+		assert cli.main(['stats', str(data_tree), '-a', 'ram', '--seed', '1']) == 1
+		assert cli.main(['stats', str(tmp_path / 'missing')]) == 1
+		(tmp_path / 'bad.json').write_text('{}')
+		assert cli.main(['diff', str(tmp_path / 'bad.json'), str(tmp_path / 'bad.json')]) == 1
+		assert 'Error:' in capsys.readouterr().err
+
+	def test_duplicate_names(self, data_tree: Path, tmp_path: Path, capsys):
+		other_tree = tmp_path / 'other'
+		other_tree.mkdir()
+		(other_tree / 'a.bin').write_bytes(b'another a.bin')
+		with pytest.raises(ValueError, match='a.bin'):
+			cli.collect_files([data_tree, other_tree])
+		assert cli.main(['chunk', str(data_tree), str(other_tree), '-o', str(tmp_path / 'manifest.json'), '-j', '1']) == 1
+		assert 'are both stored as a.bin' in capsys.readouterr().err
+		assert not (tmp_path / 'manifest.json').exists()
+
+		(other_tree / 'a.bin').rename(other_tree / 'c.bin')
+		assert [file.name for file in cli.collect_files([data_tree, other_tree])] == ['a.bin', 'sub/b.bin', 'sub/empty.bin', 'c.bin']
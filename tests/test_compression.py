@@ -0,0 +1,77 @@
+import bz2
+import gzip
+import io
+import lzma
+import zlib
+from pathlib import Path
+
+import pytest
+
+from tests.utils import FastCDCType, ShortReadStream, chunk_summary
+
+_COMPRESS_FUNCS = {
+	'gzip': gzip.compress,
+	'bz2': bz2.compress,
+	'lzma': lzma.compress,
+	'zlib': zlib.compress,
+}
+
+
+def _create_data(random_data_1m: bytes) -> bytes:
+	# highly compressible data makes decompressed blocks larger than the compressed ones
+	return random_data_1m[:300000] + bytes(1000000) + random_data_1m[300000:]
+
+
+class TestCutCompressed:
+	@pytest.mark.parametrize('codec', ['gzip', 'bz2', 'lzma', 'zlib'])
+	def test_codecs(self, fastcdc_impl: FastCDCType, random_data_1m: bytes, tmp_path: Path, codec: str):
+		cdc = fastcdc_impl(avg_size=8192)
+		data = _create_data(random_data_1m)
+		expected = chunk_summary(cdc.cut_buf(data))
+		compressed = _COMPRESS_FUNCS[codec](data)
+
+		assert chunk_summary(cdc.cut_compressed(io.BytesIO(compressed), codec=codec)) == expected
+		file_path = tmp_path / 'data.bin'
+		file_path.write_bytes(compressed)
+		assert chunk_summary(cdc.cut_compressed(file_path, codec=codec)) == expected
+		assert chunk_summary(cdc.cut_compressed(str(file_path), codec=codec, boundaries=[500000])) == chunk_summary(cdc.cut_buf(data, boundaries=[500000]))
+
+	@pytest.mark.parametrize('codec', ['gzip', 'bz2', 'lzma'])
+	def test_detect_codec(self, fastcdc_impl: FastCDCType, random_data_1m: bytes, codec: str):
+		cdc = fastcdc_impl(avg_size=8192)
+		compressed = _COMPRESS_FUNCS[codec](random_data_1m)
+		stream = ShortReadStream(compressed, 2, 2, 2, len(compressed))  # smaller reads than the magic bytes first
+		assert chunk_summary(cdc.cut_compressed(stream)) == chunk_summary(cdc.cut_buf(random_data_1m))
+
+	@pytest.mark.parametrize('codec', ['gzip', 'bz2', 'lzma'])
+	def test_concatenated_streams(self, fastcdc_impl: FastCDCType, random_data_1m: bytes, codec: str):
+		cdc = fastcdc_impl(avg_size=8192)
+		compress = _COMPRESS_FUNCS[codec]
+		compressed = compress(random_data_1m[:100000]) + compress(b'') + compress(random_data_1m[100000:])
+		assert chunk_summary(cdc.cut_compressed(io.BytesIO(compressed), codec=codec)) == chunk_summary(cdc.cut_buf(random_data_1m))
+
+	def test_gzip_zero_padding(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192)
+		expected = chunk_summary(cdc.cut_buf(random_data_1m))
+		compressed = gzip.compress(random_data_1m[:100000]) + bytes(10) + gzip.compress(random_data_1m[100000:])
+		for padding in [bytes(1), bytes(5000), bytes(1 << 20)]:  # the last one spans read blocks
+			assert gzip.decompress(compressed + padding) == random_data_1m
+			assert chunk_summary(cdc.cut_compressed(io.BytesIO(compressed + padding))) == expected
+
+	def test_empty(self, fastcdc_impl: FastCDCType):
+		cdc = fastcdc_impl()
+		assert list(cdc.cut_compressed(io.BytesIO(b''))) == []
+		assert list(cdc.cut_compressed(io.BytesIO(gzip.compress(b'')))) == []
+
+	def test_invalid(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl()
+		with pytest.raises(ValueError):
+			cdc.cut_compressed(io.BytesIO(b''), codec='zip')
+		with pytest.raises(ValueError):
+			list(cdc.cut_compressed(io.BytesIO(b'not compressed data')))
+		with pytest.raises(EOFError):
+			list(cdc.cut_compressed(io.BytesIO(gzip.compress(random_data_1m)[:-100])))
+		with pytest.raises(zlib.error):
+			list(cdc.cut_compressed(io.BytesIO(b'\x1f\x8b' + random_data_1m[:100])))
+		with pytest.raises(FileNotFoundError):
+			cdc.cut_compressed('not/existing/file.gz')
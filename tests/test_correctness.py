@@ -7,6 +7,8 @@ from typing import Dict, Tuple, List, NamedTuple
 
 import pytest
 
+import pyfastcdc.cy.fastcdc
+import pyfastcdc.py.fastcdc
 from pyfastcdc.common import NormalizedChunking
 from pyfastcdc.cy import FastCDC as FastCDC_cy
 from pyfastcdc.py import FastCDC as FastCDC_py
@@ -21,7 +23,7 @@ class TestSekienAkashitaImage:
 	# Param -> [(gear_hash, length), ...]
 	EXPECTED_RESULT: Dict[Param, List[Tuple[int, int]]] = {}
 
-	@pytest.mark.parametrize('cut_func', ['buf', 'stream'])
+	@pytest.mark.parametrize('cut_func', ['buf', 'stream', 'iter'])
 	@pytest.mark.parametrize('case_param', EXPECTED_RESULT.keys())
 	def test_sekien_akashita(self, fastcdc_impl: FastCDCType, sekien_akashita_bytes: bytes, case_param: Param, cut_func: str):
 		expected = self.EXPECTED_RESULT[case_param]
@@ -32,6 +34,8 @@ class TestSekienAkashitaImage:
 			chunk_gen = cdc.cut_stream(BytesIO(sekien_akashita_bytes))
 		elif cut_func == 'stream':
 			chunk_gen = cdc.cut_buf(sekien_akashita_bytes)
+		elif cut_func == 'iter':
+			chunk_gen = cdc.cut_iter(sekien_akashita_bytes[i:i + 5000] for i in range(0, len(sekien_akashita_bytes), 5000))
 		else:
 			raise ValueError(cut_func)
 
@@ -168,6 +172,100 @@ class TestCutMethods:
 			assert bytes(chunk.data) == bytes(chunks_memory[i].data)
 		assert len(chunks_memory) == chunk_cnt
 
+	@pytest.mark.parametrize('read_size_limit', [1000, 8192, 50000])
+	def test_cut_stream_small_buffer(self, fastcdc_impl: FastCDCType, random_data_1m: bytes, monkeypatch: pytest.MonkeyPatch, read_size_limit: int):
+		# a buffer smaller than 2 * max_size, as with a huge max_size
+		monkeypatch.setattr(pyfastcdc.cy.fastcdc, 'STREAM_READ_SIZE_LIMIT', read_size_limit)
+		monkeypatch.setattr(pyfastcdc.py.fastcdc, 'STREAM_READ_SIZE_LIMIT', read_size_limit)
+		for cdc in [fastcdc_impl(avg_size=8192), fastcdc_impl(avg_size=16384, min_size=64, max_size=131072)]:
+			for boundaries in [None, [1000, 50001, 300000]]:
+				expected = [(c.offset, c.length, c.gear_hash, bytes(c.data)) for c in cdc.cut_buf(random_data_1m, boundaries=boundaries)]
+				chunks = cdc.cut_stream(io.BytesIO(random_data_1m), boundaries=boundaries)
+				assert [(c.offset, c.length, c.gear_hash, bytes(c.data)) for c in chunks] == expected
+
+	@pytest.mark.parametrize('block_size', [1, 1000, 8192, 10000, 40000, 1024 * 1024])
+	def test_cut_buf_vs_cut_iter_consistency(self, fastcdc_impl: FastCDCType, random_data_1m: bytes, block_size: int):
+		cdc = fastcdc_impl(avg_size=8192)
+		chunks_memory = list(cdc.cut_buf(random_data_1m))
+		blocks = [random_data_1m[i:i + block_size] for i in range(0, len(random_data_1m), block_size)]
+
+		# chunk data stays valid after the next chunk is generated
+		chunks = list(cdc.cut_iter(iter(blocks)))
+		assert [(c.offset, c.length, c.gear_hash) for c in chunks] == [(c.offset, c.length, c.gear_hash) for c in chunks_memory]
+		assert [bytes(c.data) for c in chunks] == [bytes(c.data) for c in chunks_memory]
+
+	def test_cut_iter_in_place(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192)
+		blocks = [b'', random_data_1m[:500000], b'', b'', random_data_1m[500000:]]
+		chunks = list(cdc.cut_iter(blocks))
+		assert b''.join(c.data for c in chunks) == random_data_1m
+
+		in_place_count = sum(1 for c in chunks if c.data.obj is blocks[1] or c.data.obj is blocks[4])
+		assert in_place_count >= len(chunks) - 1  # only the chunk across the block edge is copied
+
+		assert list(cdc.cut_iter([])) == []
+		assert list(cdc.cut_iter([b'', b''])) == []
+
+
+class TestBoundaries:
+	BOUNDARIES = [0, 100, 1000, 50000, 50001, 300000, 300000 + 65536 * 2, 1024 * 1024, 2 * 1024 * 1024]
+
+	@classmethod
+	def _cut_segments(cls, cdc, data: bytes) -> List[Tuple[int, int, int]]:
+		result = []
+		starts = [b for b in cls.BOUNDARIES if 0 < b < len(data)]
+		for start, end in zip([0] + starts, starts + [len(data)]):
+			result.extend((start + c.offset, c.length, c.gear_hash) for c in cdc.cut_buf(data[start:end]))
+		return result
+
+	@pytest.mark.parametrize('cut_func', ['buf', 'file', 'stream_read', 'stream_readinto', 'iter'])
+	def test_boundaries(self, fastcdc_impl: FastCDCType, random_data_1m: bytes, tmp_path: Path, cut_func: str):
+		cdc = fastcdc_impl(avg_size=8192)
+		boundaries = self.BOUNDARIES
+		if cut_func == 'buf':
+			chunks = cdc.cut_buf(random_data_1m, boundaries=boundaries)
+		elif cut_func == 'file':
+			file_path = tmp_path / 'data.bin'
+			file_path.write_bytes(random_data_1m)
+			chunks = cdc.cut_file(file_path, boundaries=boundaries)
+		elif cut_func == 'stream_read':
+			class ReadOnlyStream:
+				def __init__(self):
+					self.stream = BytesIO(random_data_1m)
+
+				def read(self, n: int) -> bytes:
+					return self.stream.read(n)
+
+			chunks = cdc.cut_stream(ReadOnlyStream(), boundaries=boundaries)
+		elif cut_func == 'stream_readinto':
+			chunks = cdc.cut_stream(BytesIO(random_data_1m), boundaries=boundaries)
+		else:
+			chunks = cdc.cut_iter((random_data_1m[i:i + 10000] for i in range(0, len(random_data_1m), 10000)), boundaries=boundaries)
+
+		chunks = [(c.offset, c.length, c.gear_hash) for c in chunks]
+		assert chunks == self._cut_segments(cdc, random_data_1m)
+		offsets = {offset for offset, _, _ in chunks}
+		assert all(b in offsets for b in boundaries if b < len(random_data_1m))
+
+	def test_boundaries_callback(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192)
+		queried = []
+
+		def next_boundary(offset: int):
+			queried.append(offset)
+			return next((b for b in self.BOUNDARIES if b > offset), None)
+
+		chunks = [(c.offset, c.length, c.gear_hash) for c in cdc.cut_buf(random_data_1m, boundaries=next_boundary)]
+		assert chunks == self._cut_segments(cdc, random_data_1m)
+		assert len(queried) < len(chunks)  # only queried when a boundary is passed
+
+	def test_invalid_boundaries(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192)
+		with pytest.raises(ValueError):
+			list(cdc.cut_buf(random_data_1m, boundaries=[1000, 500]))
+		with pytest.raises(ValueError):
+			list(cdc.cut_buf(random_data_1m, boundaries=lambda offset: offset))
+
 
 class TestSeed:
 	def test_different_seeds_produce_different_chunks(self, random_data_1m: bytes):
@@ -190,6 +288,25 @@ class TestChunkProperties:
 			data_list.append(bytes(chunk.data))
 		assert b''.join(data_list) == random_data_1m
 
+	@pytest.mark.parametrize('cut_func', ['cut_buf', 'cut_file', 'cut_iter'])
+	def test_chunk_data_after_iteration(self, fastcdc_impl: FastCDCType, random_data_1m: bytes, tmp_path: Path, cut_func: str):
+		# the data views might be created lazily, they should still be right after the chunker moved on
+		cdc = fastcdc_impl(avg_size=1024)
+		file_path = tmp_path / 'data.bin'
+		file_path.write_bytes(random_data_1m)
+		if cut_func == 'cut_buf':
+			chunks = list(cdc.cut_buf(random_data_1m))
+		elif cut_func == 'cut_file':
+			chunks = list(cdc.cut_file(file_path))
+		else:
+			view = memoryview(random_data_1m)
+			chunks = list(cdc.cut_iter(view[i:i + 10000] for i in range(0, len(view), 10000)))
+
+		assert b''.join(c.data for c in reversed(chunks)) == b''.join(random_data_1m[c.offset:c.offset + c.length] for c in reversed(chunks))
+		for chunk in chunks:
+			assert chunk.data is chunk.data
+			assert len(chunk.data) == chunk.length
+
 	def test_chunk_size_constraints(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
 		avg_size = 16384
 		min_size = avg_size // 4  # 4096
@@ -0,0 +1,98 @@
+import io
+import os
+import random
+from pathlib import Path
+
+import pytest
+
+from pyfastcdc import ChunkManifest, DeltaCopy, DeltaLiteral, ManifestEntry, apply_delta, compute_delta
+from tests.utils import FastCDCType
+
+
+def _mutate(data: bytes, seed: int) -> bytes:
+	rnd = random.Random(seed)
+	result = bytearray(data)
+	for _ in range(5):
+		pos = rnd.randrange(len(result))
+		if rnd.random() < 0.5:
+			result[pos:pos] = bytes(rnd.getrandbits(8) for _ in range(rnd.randrange(1, 300)))
+		else:
+			del result[pos:pos + rnd.randrange(1, 300)]
+	return bytes(result)
+
+
+class TestManifest:
+	def test_from_chunks(self, fastcdc_instance, random_data_1m: bytes):
+		chunks = list(fastcdc_instance.cut_buf(random_data_1m))
+		manifest = ChunkManifest.from_chunks(chunks)
+		assert len(manifest) == len(chunks)
+		assert manifest.hash_name == 'sha256'
+		assert manifest.total_size == len(random_data_1m)
+		for entry, chunk in zip(manifest, chunks):
+			assert entry.offset == chunk.offset
+			assert entry.length == chunk.length
+			assert len(entry.digest) == 32
+
+	def test_non_contiguous_entry(self):
+		manifest = ChunkManifest([ManifestEntry(0, 10, b'a')])
+		with pytest.raises(ValueError):
+			manifest.append(ManifestEntry(11, 10, b'b'))
+
+	def test_unknown_hash_name(self):
+		with pytest.raises(ValueError):
+			ChunkManifest(hash_name='not_a_hash')
+
+
+class TestDelta:
+	def test_identical(self, fastcdc_instance, random_data_1m: bytes):
+		manifest = ChunkManifest.from_chunks(fastcdc_instance.cut_buf(random_data_1m))
+		ops = list(compute_delta(manifest, fastcdc_instance.cut_buf(random_data_1m)))
+		assert ops == [DeltaCopy(0, len(manifest))]
+
+	def test_empty_manifest(self, fastcdc_instance, random_data_1m: bytes):
+		ops = list(compute_delta(ChunkManifest(), fastcdc_instance.cut_buf(random_data_1m), max_literal_size=len(random_data_1m)))
+		assert ops == [DeltaLiteral(random_data_1m)]
+
+	@pytest.mark.parametrize('seed', [0, 1, 2])
+	def test_roundtrip(self, fastcdc_impl: FastCDCType, random_data_1m: bytes, seed: int):
+		cdc = fastcdc_impl(avg_size=4096)
+		new_data = _mutate(random_data_1m, seed)
+		manifest = ChunkManifest.from_chunks(cdc.cut_buf(random_data_1m))
+
+		ops = list(compute_delta(manifest, cdc.cut_stream(io.BytesIO(new_data)), max_literal_size=8192))
+		literal_size = sum(len(op.data) for op in ops if isinstance(op, DeltaLiteral))
+		assert literal_size < len(new_data) // 4
+		for prev, op in zip(ops, ops[1:]):
+			assert not (isinstance(prev, DeltaCopy) and isinstance(op, DeltaCopy) and prev.end == op.start)
+
+		output = io.BytesIO()
+		assert apply_delta(manifest, ops, random_data_1m, output) == len(new_data)
+		assert output.getvalue() == new_data
+
+	def test_apply_from_file(self, fastcdc_instance, random_data_1m: bytes, tmp_path: Path):
+		old_file = tmp_path / 'old.bin'
+		old_file.write_bytes(random_data_1m)
+		new_file = tmp_path / 'new.bin'
+		new_data = _mutate(random_data_1m, 3)
+
+		manifest = ChunkManifest.from_chunks(fastcdc_instance.cut_file(old_file))
+		ops = compute_delta(manifest, fastcdc_instance.cut_buf(new_data))
+		with open(new_file, 'wb') as f:
+			assert apply_delta(manifest, ops, old_file, f) == len(new_data)
+		assert new_file.read_bytes() == new_data
+
+		# the old file is released after use, so it can be replaced with the new one, also on errors
+		os.replace(new_file, old_file)
+		assert old_file.read_bytes() == new_data
+		old_file.write_bytes(random_data_1m)
+		with pytest.raises(ValueError):
+			apply_delta(manifest, [DeltaCopy(0, 1), DeltaCopy(0, len(manifest) + 1)], old_file, io.BytesIO())
+		old_file.unlink()
+		assert not old_file.exists()
+
+	def test_apply_invalid(self, fastcdc_instance, random_data_1m: bytes):
+		manifest = ChunkManifest.from_chunks(fastcdc_instance.cut_buf(random_data_1m))
+		with pytest.raises(ValueError):
+			apply_delta(manifest, [], random_data_1m[:-1], io.BytesIO())
+		with pytest.raises(ValueError):
+			apply_delta(manifest, [DeltaCopy(0, len(manifest) + 1)], random_data_1m, io.BytesIO())
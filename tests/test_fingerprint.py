@@ -0,0 +1,45 @@
+import io
+import pickle
+
+import pytest
+
+from pyfastcdc.py.murmur3 import murmur3_x64_128
+from tests.utils import FastCDCType
+
+# values from the reference implementation, which is also what mmh3.hash_bytes() returns
+KNOWN_FINGERPRINTS = [
+	(b'hello', '029bbd41b3a7d8cb191dae486a901e5b'),
+	(b'The quick brown fox jumps over the lazy dog', '6c1b07bc7bbc4be347939ac4a93c437a'),
+]
+
+
+class TestFingerprint:
+	def test_murmur3_empty(self):
+		assert murmur3_x64_128(memoryview(b'')) == bytes(16)
+
+	@pytest.mark.parametrize('data, expected', KNOWN_FINGERPRINTS)
+	def test_known_fingerprint(self, fastcdc_impl: FastCDCType, data: bytes, expected: str):
+		chunks = list(fastcdc_impl(fingerprint=True).cut_buf(data))
+		assert len(chunks) == 1
+		assert chunks[0].fingerprint.hex() == expected
+
+	def test_disabled(self, fastcdc_instance, random_data_1m: bytes):
+		assert fastcdc_instance.fingerprint is False
+		for chunk in fastcdc_instance.cut_buf(random_data_1m):
+			assert chunk.fingerprint is None
+
+	def test_fingerprint(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=1024, fingerprint=True)
+		assert cdc.fingerprint is True
+
+		chunks = [(c.offset, c.length, c.fingerprint) for c in cdc.cut_buf(random_data_1m)]
+		for offset, length, fingerprint in chunks:
+			assert isinstance(fingerprint, bytes)
+			assert fingerprint == murmur3_x64_128(memoryview(random_data_1m)[offset:offset + length])
+		assert chunks == [(c.offset, c.length, c.fingerprint) for c in cdc.cut_stream(io.BytesIO(random_data_1m))]
+
+	def test_pickle(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = pickle.loads(pickle.dumps(fastcdc_impl(fingerprint=True)))
+		assert cdc.fingerprint is True
+		for chunk in cdc.cut_buf(random_data_1m):
+			assert pickle.loads(pickle.dumps(chunk)).fingerprint == chunk.fingerprint
@@ -0,0 +1,99 @@
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from pyfastcdc import ChunkManifest, cut_files_parallel
+from tests.utils import FastCDCType
+
+
+class TestPickle:
+	def test_pickle_fastcdc(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192, min_size=1024, max_size=32768, normalized_chunking=2, seed=12345)
+		cdc2 = pickle.loads(pickle.dumps(cdc))
+		assert type(cdc2) is type(cdc)
+		assert cdc2.avg_size == 8192
+		assert cdc2.min_size == 1024
+		assert cdc2.max_size == 32768
+		assert cdc2.normalized_chunking == 2
+		assert cdc2.seed == 12345
+
+		chunks = [(c.offset, c.length, c.gear_hash) for c in cdc.cut_buf(random_data_1m)]
+		chunks2 = [(c.offset, c.length, c.gear_hash) for c in cdc2.cut_buf(random_data_1m)]
+		assert chunks == chunks2
+
+	def test_pickle_chunk(self, fastcdc_instance, random_data_1m: bytes):
+		for chunk in fastcdc_instance.cut_buf(random_data_1m):
+			chunk2 = pickle.loads(pickle.dumps(chunk))
+			assert type(chunk2) is type(chunk)
+			assert chunk2.offset == chunk.offset
+			assert chunk2.length == chunk.length
+			assert chunk2.gear_hash == chunk.gear_hash
+			assert isinstance(chunk2.data, memoryview)
+			assert chunk2.data == chunk.data
+
+
+class TestCutFilesParallel:
+	@pytest.fixture
+	def file_paths(self, tmp_path: Path, random_data_1m: bytes) -> List[Path]:
+		paths = []
+		for i, data in enumerate([random_data_1m, b'', random_data_1m[:1000], random_data_1m[1000:]]):
+			path = tmp_path / f'{i}.bin'
+			path.write_bytes(data)
+			paths.append(path)
+		return paths
+
+	def test_cut_files_parallel(self, fastcdc_impl: FastCDCType, file_paths: List[Path]):
+		cdc = fastcdc_impl(avg_size=16384, seed=1)
+		results = list(cut_files_parallel(cdc, file_paths, max_workers=2))
+		assert [r.file_path for r in results] == file_paths
+
+		for path, boundaries in zip(file_paths, results):
+			expected = list(cdc.cut_file(path))
+			assert len(boundaries) == len(expected)
+			assert list(boundaries.offsets) == [c.offset for c in expected]
+			assert list(boundaries.lengths) == [c.length for c in expected]
+			assert list(boundaries.gear_hashes) == [c.gear_hash for c in expected]
+			assert boundaries.digests is None
+			with pytest.raises(ValueError):
+				boundaries.to_manifest()
+
+	def test_cut_files_parallel_with_digests(self, fastcdc_instance, file_paths: List[Path]):
+		for path, boundaries in zip(file_paths, cut_files_parallel(fastcdc_instance, file_paths, hash_name='sha256', max_workers=2)):
+			assert boundaries.to_manifest() == ChunkManifest.from_chunks(fastcdc_instance.cut_file(path), hash_name='sha256')
+
+	def test_cut_files_parallel_error(self, fastcdc_instance, file_paths: List[Path], tmp_path: Path):
+		with pytest.raises(FileNotFoundError):
+			list(cut_files_parallel(fastcdc_instance, [file_paths[0], tmp_path / 'nonexistent'], max_workers=2))
+
+		# invalid arguments are reported at the call, not at the first next()
+		with pytest.raises(ValueError):
+			cut_files_parallel(fastcdc_instance, file_paths, hash_name='unknown')
+		with pytest.raises(TypeError):
+			cut_files_parallel(fastcdc_instance, 123, max_workers=2)  # noqa
+		with pytest.raises(ValueError):
+			cut_files_parallel(fastcdc_instance, file_paths, max_workers=0)
+
+	def test_cut_files_parallel_window(self, fastcdc_instance, file_paths: List[Path]):
+		class CountingExecutor(Executor):
+			def __init__(self):
+				self.executor = ProcessPoolExecutor(max_workers=1)
+				self.submit_count = 0
+
+			def submit(self, fn, *args, **kwargs):
+				self.submit_count += 1
+				return self.executor.submit(fn, *args, **kwargs)
+
+		executor = CountingExecutor()
+		try:
+			results = cut_files_parallel(fastcdc_instance, file_paths * 3, max_workers=1, executor=executor)
+			next(results)
+			assert executor.submit_count == 2
+			next(results)
+			assert executor.submit_count == 3
+			assert len(list(results)) == len(file_paths) * 3 - 2
+			assert executor.submit_count == len(file_paths) * 3
+		finally:
+			executor.executor.shutdown(wait=True)
@@ -0,0 +1,161 @@
+import io
+import threading
+import time
+
+import pytest
+
+from pyfastcdc import BufferPool
+from tests.utils import FastCDCType, chunk_summary
+
+
+class TestBufferPool:
+	def test_acquire_release(self):
+		pool = BufferPool(100)
+		buf1 = pool.acquire(40)
+		buf2 = pool.acquire(60)
+		assert len(buf1) == 40 and len(buf2) == 60
+		assert pool.used_bytes == 100
+
+		pool.release(buf1)
+		assert pool.used_bytes == 60
+		assert pool.cached_bytes == 40
+		assert pool.acquire(40) is buf1  # reused
+
+		pool.release(buf1)
+		pool.release(buf2)
+		buf3 = pool.acquire(100)  # cached buffers of other sizes are dropped
+		assert len(buf3) == 100
+		assert pool.cached_bytes == 0
+
+	def test_invalid_arguments(self):
+		with pytest.raises(ValueError):
+			BufferPool(0)
+		with pytest.raises(ValueError):
+			BufferPool(100, timeout=-1)
+		pool = BufferPool(100)
+		with pytest.raises(ValueError):
+			pool.acquire(0)
+		with pytest.raises(ValueError):
+			pool.acquire(101)
+		with pytest.raises(ValueError):
+			pool.release(bytearray(10))
+
+	def test_double_release(self):
+		pool = BufferPool(100)
+		buf1 = pool.acquire(10)
+		buf2 = pool.acquire(10)
+		pool.release(buf1)
+		with pytest.raises(ValueError):
+			pool.release(buf1)
+		with pytest.raises(ValueError):
+			pool._discard(buf1)
+		with pytest.raises(ValueError):
+			pool.release(bytearray(10))  # not from this pool, even with a buffer of its size in use
+		assert pool.used_bytes == 10
+		assert pool.acquire(10) is buf1
+		assert pool.acquire(10) is not buf1
+		pool.release(buf2)
+
+	def test_backpressure(self):
+		pool = BufferPool(100)
+		buf = pool.acquire(80)
+		acquired = threading.Event()
+
+		def acquire():
+			pool.release(pool.acquire(50))
+			acquired.set()
+
+		thread = threading.Thread(target=acquire)
+		thread.start()
+		time.sleep(0.1)
+		assert not acquired.is_set()
+		pool.release(buf)
+		thread.join()
+		assert acquired.is_set()
+
+		pool = BufferPool(100, timeout=0.05)
+		pool.acquire(80)
+		with pytest.raises(TimeoutError):
+			pool.acquire(50)
+
+
+class TestCutStreamWithPool:
+	def test_consistency(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192)
+		pool = BufferPool(10 * 1024 * 1024)
+		expected = chunk_summary(cdc.cut_buf(random_data_1m))
+
+		class ReadOnlyStream:
+			def __init__(self):
+				self.stream = io.BytesIO(random_data_1m)
+
+			def read(self, n: int) -> bytes:
+				return self.stream.read(n)
+
+		for stream in [io.BytesIO(random_data_1m), ReadOnlyStream()]:
+			assert chunk_summary(cdc.cut_stream(stream, buffer_pool=pool)) == expected
+			assert pool.used_bytes == 0  # released on exhaustion
+
+	def test_lazy_allocation(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192)
+		buf_size = cdc.max_size * 2
+		pool = BufferPool(buf_size * 2)
+		chunkers = [cdc.cut_stream(io.BytesIO(random_data_1m), buffer_pool=pool) for _ in range(10)]
+		assert pool.used_bytes == 0
+
+		next(chunkers[0])
+		next(chunkers[1])
+		assert pool.used_bytes == buf_size * 2
+
+		chunkers[0].close()
+		assert pool.used_bytes == buf_size
+		with pytest.raises(StopIteration):
+			next(chunkers[0])
+
+		offset = next(chunkers[2]).length
+		for chunk in chunkers[2]:
+			assert chunk.offset == offset
+			offset += chunk.length
+		assert offset == len(random_data_1m)
+		assert pool.used_bytes == buf_size
+
+		del chunkers[1]
+		assert pool.used_bytes == 0
+
+	def test_chunk_outlives_chunker(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192)
+		pool = BufferPool(cdc.max_size * 2)
+		chunker = cdc.cut_stream(io.BytesIO(random_data_1m), buffer_pool=pool)
+		chunk = next(chunker)
+		expected = bytes(chunk.data)
+		del chunker
+		assert pool.used_bytes == 0
+		assert pool.cached_bytes == 0  # the buffer is still viewed by the chunk, so it is not reused
+
+		for _ in cdc.cut_stream(io.BytesIO(bytes(len(random_data_1m))), buffer_pool=pool):
+			pass
+		assert bytes(chunk.data) == expected
+
+	def test_budget(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192)
+		pool = BufferPool(cdc.max_size * 2 * 3)
+		expected = [(c.offset, c.length, c.gear_hash) for c in cdc.cut_buf(random_data_1m)]
+		results = []
+		max_used_bytes = 0
+
+		def run():
+			nonlocal max_used_bytes
+			chunks = []
+			for chunk in cdc.cut_stream(io.BytesIO(random_data_1m), buffer_pool=pool):
+				chunks.append((chunk.offset, chunk.length, chunk.gear_hash))
+				max_used_bytes = max(max_used_bytes, pool.used_bytes)
+			results.append(chunks)
+
+		threads = [threading.Thread(target=run) for _ in range(8)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		assert results == [expected] * len(threads)
+		assert max_used_bytes <= pool.max_bytes
+		assert pool.used_bytes == 0
@@ -0,0 +1,76 @@
+import io
+import pickle
+
+import pytest
+
+from pyfastcdc import SketchIndex
+from tests.utils import FastCDCType
+
+
+class TestSketch:
+	def test_disabled(self, fastcdc_instance, random_data_1m: bytes):
+		assert fastcdc_instance.sketch is False
+		for chunk in fastcdc_instance.cut_buf(random_data_1m):
+			assert chunk.sketch is None
+
+	def test_sketch(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=4096, sketch=True)
+		assert cdc.sketch is True
+
+		sketches = [c.sketch for c in cdc.cut_buf(random_data_1m)]
+		for sketch in sketches:
+			assert isinstance(sketch, tuple)
+			assert len(sketch) == 3
+			assert all(0 <= sf < 2 ** 64 for sf in sketch)
+		assert len(set(sketches)) == len(sketches)
+		assert sketches == [c.sketch for c in cdc.cut_stream(io.BytesIO(random_data_1m))]
+
+	def test_consistency(self, random_data_1m: bytes):
+		from pyfastcdc.cy import FastCDC as FastCDC_cy
+		from pyfastcdc.py import FastCDC as FastCDC_py
+		for data in [random_data_1m[:size] for size in [1, 11, 12, 13, 100]] + [random_data_1m[:200000]]:
+			sketches_cy = [c.sketch for c in FastCDC_cy(avg_size=1024, sketch=True).cut_buf(data)]
+			sketches_py = [c.sketch for c in FastCDC_py(avg_size=1024, sketch=True).cut_buf(data)]
+			assert sketches_cy == sketches_py
+
+	def test_seed_independent(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		data = random_data_1m[:1000]  # a single chunk
+		assert [c.sketch for c in fastcdc_impl(sketch=True).cut_buf(data)] == [c.sketch for c in fastcdc_impl(sketch=True, seed=123).cut_buf(data)]
+
+	def test_pickle(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = pickle.loads(pickle.dumps(fastcdc_impl(sketch=True)))
+		assert cdc.sketch is True
+		for chunk in cdc.cut_buf(random_data_1m):
+			assert pickle.loads(pickle.dumps(chunk)).sketch == chunk.sketch
+
+
+class TestSketchIndex:
+	def test_similar_chunks(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=8192, sketch=True)
+		# blocks not larger than min_size are never cut, so each of them is a single chunk
+		blocks = [random_data_1m[i * cdc.min_size:(i + 1) * cdc.min_size] for i in range(20)]
+
+		index: SketchIndex[int] = SketchIndex()
+		for i, block in enumerate(blocks):
+			index.add(next(cdc.cut_buf(block)).sketch, i)
+		assert len(index) == len(blocks)
+
+		for i, block in enumerate(blocks):
+			modified = bytearray(block)
+			modified[len(modified) // 2] ^= 0xFF
+			assert index.find(next(cdc.cut_buf(modified)).sketch, limit=1) == [i]
+
+	def test_find(self):
+		index: SketchIndex[str] = SketchIndex()
+		index.add((1, 2, 3), 'a')
+		index.add((1, 5, 6), 'b')
+		index.add((1, 2, 6), 'c')
+		index.add((7, 8, 9), 'd')
+
+		assert index.find((1, 2, 3)) == ['a', 'c', 'b']
+		assert index.find((1, 2, 3), min_matches=2) == ['a', 'c']
+		assert index.find((1, 2, 6), limit=2) == ['c', 'a']
+		assert index.find((0, 0, 0)) == []
+
+		with pytest.raises(ValueError):
+			index.add((1, 2), 'e')
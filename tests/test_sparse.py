@@ -0,0 +1,95 @@
+import os
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from pyfastcdc import utils
+from tests.utils import FastCDCType, chunk_summary
+
+
+def _create_sparse_file(file_path: Path, random_data_1m: bytes):
+	with open(file_path, 'wb') as f:
+		f.truncate(8 * 1024 * 1024)
+		for offset, data in [
+			(0, random_data_1m[:1000]),
+			(1024 * 1024 + 123, random_data_1m[1000:300000]),
+			(3 * 1024 * 1024, bytes(500000)),  # zeros that are not a hole
+			(5 * 1024 * 1024 - 1, random_data_1m[300000:300001]),
+			(8 * 1024 * 1024 - 100, random_data_1m[-50:]),
+		]:
+			f.seek(offset)
+			f.write(data)
+
+
+class TestSparse:
+	@pytest.mark.parametrize('kwargs', [
+		dict(avg_size=16384),
+		dict(avg_size=65536, fingerprint=True, sketch=True),
+		dict(avg_size=8192, normalized_chunking=3, seed=1),
+	])
+	def test_sparse_file(self, fastcdc_impl: FastCDCType, random_data_1m: bytes, tmp_path: Path, kwargs: dict):
+		file_path = tmp_path / 'sparse.img'
+		_create_sparse_file(file_path, random_data_1m)
+		cdc = fastcdc_impl(**kwargs)
+		assert chunk_summary(cdc.cut_file(file_path, sparse=True)) == chunk_summary(cdc.cut_file(file_path))
+
+		boundaries = [100, 1024 * 1024, 3 * 1024 * 1024 + 1]
+		assert chunk_summary(cdc.cut_file(file_path, sparse=True, boundaries=boundaries)) == chunk_summary(cdc.cut_file(file_path, boundaries=boundaries))
+
+	def test_zero_runs(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		# with this seed, zero chunks are cut before max_size
+		cdc = fastcdc_impl(avg_size=256, seed=21)
+		assert next(cdc.cut_buf(bytes(10000))).length < cdc.max_size
+
+		data = bytes(5000) + random_data_1m[:3000] + bytes(20000) + b'\x01' + bytes(7777)
+		for n in range(len(data) - 100, len(data) + 1):
+			assert chunk_summary(cdc.cut_buf(data[:n], sparse=True)) == chunk_summary(cdc.cut_buf(data[:n]))
+		assert list(cdc.cut_buf(b'', sparse=True)) == []
+
+	def test_zero_chunk_end_parity(self, fastcdc_impl: FastCDCType):
+		# zero chunks of 74 bytes, an even cut that the kernel only reaches with 2 more bytes available
+		cdc = fastcdc_impl(avg_size=256, normalized_chunking=0)
+		assert next(cdc.cut_buf(bytes(1000))).length == 74
+		for n in [75, 76, 149, 150]:
+			assert chunk_summary(cdc.cut_buf(bytes(n), sparse=True)) == chunk_summary(cdc.cut_buf(bytes(n)))
+		assert [chunk.length for chunk in cdc.cut_buf(bytes(75), sparse=True)] == [75]
+
+	def test_zero_run_before_data(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		# the kernel cuts a zero chunk before max_size with the byte after it, so the data right after the zero run matters
+		cdc = fastcdc_impl(avg_size=256, normalized_chunking=0)
+		for zero_len in [73, 74, 75, 147, 148, 149]:
+			data = bytes(zero_len) + random_data_1m[:2000]
+			assert chunk_summary(cdc.cut_buf(data, sparse=True)) == chunk_summary(cdc.cut_buf(data))
+
+	def test_zero_chunk_cached(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		# the zero chunk is computed once per FastCDC instance, instead of scanning a max_size buffer per chunker
+		cdc = fastcdc_impl(avg_size=1048576, max_size=64 * 1048576)
+		data = bytes(100000) + random_data_1m
+		expected = chunk_summary(cdc.cut_buf(data, sparse=True))
+		tracemalloc.start()
+		try:
+			assert chunk_summary(cdc.cut_buf(data, sparse=True)) == expected
+			_, peak = tracemalloc.get_traced_memory()
+		finally:
+			tracemalloc.stop()
+		assert peak < cdc.max_size // 2
+
+	def test_find_file_holes(self, tmp_path: Path):
+		file_path = tmp_path / 'sparse.img'
+		file_size = 8 * 1024 * 1024
+		with open(file_path, 'wb') as f:
+			f.truncate(file_size)
+			f.seek(4 * 1024 * 1024)
+			f.write(b'\x01' * 4096)
+
+		with open(file_path, 'rb') as f:
+			holes = utils.find_file_holes(f.fileno(), file_size)
+		prev_end = 0
+		for start, end in holes:
+			assert prev_end <= start < end <= file_size
+			prev_end = end
+		data = file_path.read_bytes()
+		assert all(data[start:end] == bytes(end - start) for start, end in holes)
+		if not hasattr(os, 'SEEK_HOLE'):
+			assert holes == []
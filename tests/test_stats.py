@@ -0,0 +1,144 @@
+import io
+from pathlib import Path
+
+from pyfastcdc import cy, py, utils
+from tests.utils import ChunkerStatsType, FastCDCType, ShortReadStream
+
+
+class TestChunkerStats:
+	def test_counters(self, fastcdc_impl: FastCDCType, stats_impl: ChunkerStatsType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=4096, max_size=8192)
+		stats = stats_impl()
+		chunks = list(cdc.cut_buf(random_data_1m, boundaries=[100000, 100100], stats=stats))
+
+		assert stats.chunk_count == len(chunks)
+		assert stats.total_bytes == len(random_data_1m)
+		assert sum(stats.cut_counts.values()) == len(chunks)
+		assert list(stats.cut_counts.keys()) == list(utils.CUT_REASONS)
+		assert stats.cut_counts['boundary'] == 2
+		assert stats.cut_counts['end'] == 1
+		assert stats.cut_counts['max_size'] == sum(1 for chunk in chunks if chunk.length == 8192) > 0
+		assert stats.cut_counts['mask_s'] > 0 and stats.cut_counts['mask_l'] > 0
+		assert stats.cut_counts['extremum'] == stats.cut_counts['zero'] == 0
+
+		histogram = stats.chunk_size_histogram
+		assert len(histogram) == 65
+		assert sum(histogram) == len(chunks)
+		assert histogram[13] == sum(1 for chunk in chunks if 4096 < chunk.length <= 8192)
+		assert stats.read_count == 0
+		assert 0 < stats.cut_ns <= stats.total_ns
+
+	def test_py_cy_consistency(self, random_data_1m: bytes):
+		for algorithm in ['FastCDC', 'FastCDC2016', 'AECDC', 'RAMCDC']:
+			stats_cy, stats_py = cy.ChunkerStats(), py.ChunkerStats()
+			list(getattr(cy, algorithm)(2048).cut_buf(random_data_1m, stats=stats_cy))
+			list(getattr(py, algorithm)(2048).cut_buf(random_data_1m, stats=stats_py))
+			assert stats_cy.cut_counts == stats_py.cut_counts
+			assert stats_cy.chunk_size_histogram == stats_py.chunk_size_histogram
+			if algorithm in ['AECDC', 'RAMCDC']:
+				assert stats_cy.cut_counts['extremum'] > 0
+
+	def test_cut_methods(self, fastcdc_impl: FastCDCType, stats_impl: ChunkerStatsType, random_data_1m: bytes, tmp_path: Path):
+		cdc = fastcdc_impl(avg_size=8192)
+		expected = stats_impl()
+		list(cdc.cut_buf(random_data_1m, stats=expected))
+
+		file_path = tmp_path / 'data.bin'
+		file_path.write_bytes(random_data_1m)
+
+		for chunks_func in [
+			lambda stats: cdc.cut_file(file_path, stats=stats),
+			lambda stats: cdc.cut_stream(io.BytesIO(random_data_1m), stats=stats),
+			lambda stats: cdc.cut_stream(ShortReadStream(random_data_1m, 10000), stats=stats),
+			lambda stats: cdc.cut_iter([random_data_1m[i:i + 10000] for i in range(0, len(random_data_1m), 10000)], stats=stats),
+		]:
+			stats = stats_impl()
+			list(chunks_func(stats))
+			assert stats.cut_counts == expected.cut_counts
+			assert stats.chunk_size_histogram == expected.chunk_size_histogram
+
+		stats = stats_impl()
+		list(cdc.cut_stream(ShortReadStream(random_data_1m, 10000), stats=stats))
+		assert stats.read_bytes == len(random_data_1m)
+		assert stats.read_count >= len(random_data_1m) // 10000 + 2  # plus the last partial read and the eof read
+		assert sum(stats.read_time_histogram) == stats.read_count
+
+		stats = stats_impl()
+		list(cdc.cut_iter([b'', random_data_1m[:1000], random_data_1m[1000:]], stats=stats))
+		assert (stats.read_count, stats.read_bytes) == (4, len(random_data_1m))
+
+	def test_copy_bytes(self, random_data_1m: bytes):
+		blocks = [random_data_1m[i:i + 10000] for i in range(0, len(random_data_1m), 10000)]
+		copy_bytes = []
+		for impl, stats_impl in [(cy, cy.ChunkerStats), (py, py.ChunkerStats)]:
+			cdc = impl.FastCDC(avg_size=8192)
+			stats_buf, stats_iter, stats_stream = stats_impl(), stats_impl(), stats_impl()
+			list(cdc.cut_buf(random_data_1m, stats=stats_buf))
+			list(cdc.cut_iter(blocks, stats=stats_iter))
+			list(cdc.cut_stream(io.BytesIO(random_data_1m), stats=stats_stream))
+			assert stats_buf.copy_bytes == 0
+			assert stats_iter.copy_bytes > 0
+			copy_bytes.append((stats_iter.copy_bytes, stats_stream.copy_bytes))
+		assert copy_bytes[0] == copy_bytes[1]
+
+	def test_mask_cut_reasons(self, fastcdc_impl: FastCDCType, stats_impl: ChunkerStatsType, random_data_1m: bytes):
+		# the mask_s phase of the kernel cuts before avg_size, and the mask_l phase cuts at or after it
+		cdc = fastcdc_impl(avg_size=256)
+		stats = stats_impl()
+		last_counts = stats.cut_counts
+		center_cut_count = 0
+		for chunk in cdc.cut_buf(random_data_1m, stats=stats):
+			cut_counts = stats.cut_counts
+			reason = next(reason for reason in cut_counts if cut_counts[reason] > last_counts[reason])
+			last_counts = cut_counts
+			if reason in ['mask_s', 'mask_l']:
+				assert reason == ('mask_s' if chunk.length < 256 else 'mask_l')
+				center_cut_count += chunk.length == 256
+		assert center_cut_count > 0
+
+	def test_center_cut_reason(self, fastcdc_impl: FastCDCType, stats_impl: ChunkerStatsType, random_data_10m: bytes):
+		# a chunk cut right at the center by mask_l, with a gear hash that also matches mask_s
+		cdc = fastcdc_impl(avg_size=256, normalized_chunking=3)
+		stats = stats_impl()
+		chunk = next(cdc.cut_buf(random_data_10m[2941800:2941800 + 1024], stats=stats))
+		assert chunk.length == 256
+		assert stats.cut_counts['mask_l'] == 1
+
+	def test_zero_chunks(self, fastcdc_impl: FastCDCType, stats_impl: ChunkerStatsType):
+		cdc = fastcdc_impl(avg_size=4096)
+		stats = stats_impl()
+		chunks = list(cdc.cut_buf(bytes(100000), sparse=True, stats=stats))
+		assert stats.cut_counts['zero'] == len(chunks) - 1
+		assert stats.cut_counts['end'] == 1
+
+	def test_accumulate_and_reset(self, fastcdc_instance, stats_impl: ChunkerStatsType, random_data_1m: bytes):
+		stats = stats_impl()
+		list(fastcdc_instance.cut_buf(random_data_1m, stats=stats))
+		count = stats.chunk_count
+		list(fastcdc_instance.cut_buf(random_data_1m, stats=stats))
+		assert stats.chunk_count == count * 2
+		assert stats.total_bytes == len(random_data_1m) * 2
+
+		stats.reset()
+		assert stats.to_dict() == stats_impl().to_dict()
+		assert stats.chunk_count == stats.total_ns == 0
+
+	def test_prometheus(self, fastcdc_instance, stats_impl: ChunkerStatsType, random_data_1m: bytes):
+		stats = stats_impl()
+		list(fastcdc_instance.cut_stream(io.BytesIO(random_data_1m), stats=stats))
+		text = stats.to_prometheus(prefix='cdc', labels={'tenant': 'a"b\\c'})
+		lines = text.splitlines()
+		assert '# TYPE cdc_chunks_total counter' in lines
+		assert f'cdc_chunks_total{{tenant="a\\"b\\\\c"}} {stats.chunk_count}' in lines
+		assert f'cdc_chunk_size_bytes_bucket{{tenant="a\\"b\\\\c",le="+Inf"}} {stats.chunk_count}' in lines
+		assert f'cdc_chunk_size_bytes_count{{tenant="a\\"b\\\\c"}} {stats.chunk_count}' in lines
+		assert f'cdc_read_bytes_total{{tenant="a\\"b\\\\c"}} {len(random_data_1m)}' in lines
+		assert any(line.startswith('cdc_cuts_total{tenant="a\\"b\\\\c",reason="end"} 1') for line in lines)
+
+		# buckets are cumulative
+		buckets = [int(line.rsplit(' ', 1)[1]) for line in lines if line.startswith('cdc_chunk_size_bytes_bucket')]
+		assert buckets == sorted(buckets)
+		assert stats_impl().to_prometheus().startswith('# HELP pyfastcdc_chunks_total')
+
+	def test_histogram_bucket(self):
+		assert [utils.get_histogram_bucket(v) for v in [0, 1, 2, 3, 4, 5, 8, 9, 65536, 65537]] == [0, 0, 1, 2, 2, 3, 3, 4, 16, 17]
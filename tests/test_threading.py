@@ -0,0 +1,80 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from pyfastcdc.cy import FastCDC as FastCDC_cy
+from tests.utils import FastCDCType, chunk_summary
+
+
+class TestThreading:
+	THREAD_COUNT = 8
+
+	def test_shared_fastcdc(self, fastcdc_impl: FastCDCType, random_data_1m: bytes):
+		cdc = fastcdc_impl(avg_size=4096, seed=42)
+		expected = chunk_summary(cdc.cut_buf(random_data_1m))
+
+		def worker(i: int) -> List[tuple]:
+			if i % 2 == 0:
+				return chunk_summary(cdc.cut_buf(random_data_1m))
+			else:
+				return chunk_summary(cdc.cut_stream(io.BytesIO(random_data_1m)))
+
+		with ThreadPoolExecutor(max_workers=self.THREAD_COUNT) as executor:
+			results = list(executor.map(worker, range(self.THREAD_COUNT * 2)))
+		for result in results:
+			assert result == expected
+
+	def test_shared_chunker(self, random_data_1m: bytes):
+		cdc = FastCDC_cy(avg_size=1024)
+		expected = chunk_summary(cdc.cut_buf(random_data_1m))
+		chunker = cdc.cut_buf(random_data_1m)
+
+		results: List[tuple] = []
+		lock = threading.Lock()
+
+		def worker():
+			while True:
+				try:
+					chunk = next(chunker)
+				except StopIteration:
+					break
+				except ValueError:
+					continue  # used by another thread right now
+				with lock:
+					results.extend(chunk_summary([chunk]))
+
+		threads = [threading.Thread(target=worker) for _ in range(self.THREAD_COUNT)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		# every chunk is generated exactly once, just in arbitrary order
+		assert sorted(results) == expected
+
+	def test_reentrant_chunker(self, random_data_1m: bytes):
+		cdc = FastCDC_cy(avg_size=1024)
+		bytes_io = io.BytesIO(random_data_1m)
+		errors = []
+
+		class ReentrantStream:
+			def readinto(self, buf) -> int:
+				try:
+					next(chunker)
+				except ValueError as e:
+					errors.append(e)
+				return bytes_io.readinto(buf)
+
+		chunker = cdc.cut_stream(ReentrantStream())
+		assert chunk_summary(chunker) == chunk_summary(cdc.cut_buf(random_data_1m))
+		assert len(errors) > 0
+		assert all('already executing' in str(e) for e in errors)
+
+	def test_reinitialize(self):
+		cdc = FastCDC_cy(avg_size=4096, seed=1)
+		with pytest.raises(RuntimeError):
+			cdc.__init__(avg_size=8192)
+		assert cdc.avg_size == 4096
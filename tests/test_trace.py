@@ -0,0 +1,134 @@
+import collections
+import io
+import json
+import threading
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from pyfastcdc import TraceSpan, _export, cy, py
+from tests.utils import ChunkTracerType, FastCDCType, ShortReadStream
+
+
+def sum_sizes(spans: List[TraceSpan]) -> collections.Counter:
+	sizes = collections.Counter()
+	for span in spans:
+		sizes[span.name] += span.size
+	return sizes
+
+
+class TestChunkTracer:
+	def test_buf_spans(self, fastcdc_impl: FastCDCType, tracer_impl: ChunkTracerType, random_data_1m: bytes):
+		tracer = tracer_impl()
+		chunks = list(fastcdc_impl(avg_size=8192).cut_buf(random_data_1m, tracer=tracer))
+		spans = tracer.spans
+
+		counts = collections.Counter(span.name for span in spans)
+		assert counts == {'next': len(chunks) + 1, 'scan': len(chunks), 'yield': len(chunks)}
+		assert [span.size for span in spans if span.name == 'scan'] == [chunk.length for chunk in chunks]
+		assert [span.size for span in spans if span.name == 'next'] == [chunk.length for chunk in chunks] + [0]
+		assert [span.size for span in spans if span.name == 'yield'] == [chunk.length for chunk in chunks]
+		assert all(span.start_ns <= span.end_ns and span.thread_id == threading.get_ident() for span in spans)
+
+		# scan spans are nested in next spans, and next spans are separated by yield spans
+		next_spans = [span for span in spans if span.name == 'next']
+		scan_spans = [span for span in spans if span.name == 'scan']
+		yield_spans = [span for span in spans if span.name == 'yield']
+		for i, scan_span in enumerate(scan_spans):
+			assert next_spans[i].start_ns <= scan_span.start_ns <= scan_span.end_ns <= next_spans[i].end_ns
+		for i, yield_span in enumerate(yield_spans):
+			assert (yield_span.start_ns, yield_span.end_ns) == (next_spans[i].end_ns, next_spans[i + 1].start_ns)
+
+	def test_stream_and_iter_spans(self, fastcdc_impl: FastCDCType, tracer_impl: ChunkTracerType, random_data_1m: bytes, tmp_path: Path):
+		cdc = fastcdc_impl(avg_size=8192)
+		expected = [chunk.length for chunk in cdc.cut_buf(random_data_1m)]
+
+		file_path = tmp_path / 'data.bin'
+		file_path.write_bytes(random_data_1m)
+
+		for chunks_func, has_shift in [
+			(lambda tracer: cdc.cut_file(file_path, tracer=tracer), False),
+			(lambda tracer: cdc.cut_stream(io.BytesIO(random_data_1m), tracer=tracer), True),
+			(lambda tracer: cdc.cut_stream(ShortReadStream(random_data_1m, 10000), tracer=tracer), True),
+			(lambda tracer: cdc.cut_iter([random_data_1m[i:i + 10000] for i in range(0, len(random_data_1m), 10000)], tracer=tracer), True),
+		]:
+			tracer = tracer_impl()
+			assert [chunk.length for chunk in chunks_func(tracer)] == expected
+			sizes = sum_sizes(tracer.spans)
+			assert sizes['next'] == sizes['yield'] == len(random_data_1m)
+			assert sizes['scan'] >= len(random_data_1m)
+			assert ('shift' in sizes) == has_shift
+			if 'read' in sizes:
+				assert sizes['read'] == len(random_data_1m)
+
+	def test_py_cy_consistency(self, random_data_1m: bytes):
+		blocks = [random_data_1m[i:i + 10000] for i in range(0, len(random_data_1m), 10000)]
+		results = []
+		for impl in [cy, py]:
+			tracer = impl.ChunkTracer()
+			list(impl.FastCDC(avg_size=8192).cut_iter(blocks, tracer=tracer))
+			list(impl.FastCDC(avg_size=8192).cut_stream(io.BytesIO(random_data_1m), tracer=tracer))
+			results.append([(span.name, span.size) for span in tracer.spans])
+		assert results[0] == results[1]
+
+	def test_callback_and_max_spans(self, fastcdc_instance, tracer_impl: ChunkTracerType, random_data_1m: bytes):
+		received: List[TraceSpan] = []
+		tracer = tracer_impl(callback=received.append, max_spans=10)
+		chunks = list(fastcdc_instance.cut_buf(random_data_1m, tracer=tracer))
+		assert all(isinstance(span, TraceSpan) for span in received)
+		assert len(received) == len(chunks) * 3 + 1
+		assert tracer.spans == received[:10]
+		assert tracer.max_spans == 10
+		assert tracer.dropped_span_count == len(received) - 10
+
+		tracer = tracer_impl(max_spans=0)
+		list(fastcdc_instance.cut_buf(random_data_1m, tracer=tracer))
+		assert tracer.spans == []
+		assert tracer.dropped_span_count == len(received)
+
+		with pytest.raises(ValueError):
+			tracer_impl(max_spans=-1)
+
+		def bad_callback(span: TraceSpan):
+			raise KeyError(span.name)
+
+		with pytest.raises(KeyError):
+			list(fastcdc_instance.cut_buf(random_data_1m, tracer=tracer_impl(callback=bad_callback)))
+
+	def test_accumulate_and_reset(self, fastcdc_instance, tracer_impl: ChunkTracerType, random_data_1m: bytes):
+		tracer = tracer_impl()
+		list(fastcdc_instance.cut_buf(random_data_1m, tracer=tracer))
+		count = len(tracer.spans)
+		list(fastcdc_instance.cut_buf(random_data_1m, tracer=tracer))
+		assert len(tracer.spans) == count * 2
+
+		tracer.reset()
+		assert tracer.spans == []
+		assert tracer.dropped_span_count == 0
+
+	def test_chrome_trace(self, fastcdc_instance, tracer_impl: ChunkTracerType, random_data_1m: bytes, tmp_path: Path):
+		tracer = tracer_impl()
+		thread = threading.Thread(target=lambda: list(fastcdc_instance.cut_buf(random_data_1m, tracer=tracer)))
+		thread.start()
+		thread.join()
+		list(fastcdc_instance.cut_buf(random_data_1m, tracer=tracer))
+
+		file_path = tmp_path / 'trace.json'
+		tracer.save_chrome_trace(file_path)
+		trace = json.loads(file_path.read_text())
+		assert trace == json.loads(json.dumps(tracer.to_chrome_trace()))
+
+		events = trace['traceEvents']
+		# the finished thread is not named
+		assert [event['args']['name'] for event in events if event['ph'] == 'M'] == [threading.current_thread().name]
+		complete_events = [event for event in events if event['ph'] == 'X']
+		assert len(complete_events) == len(tracer.spans)
+		assert {event['name'] for event in complete_events} == {'next', 'scan', 'yield'}
+		assert {event['tid'] for event in complete_events} == {thread.ident, threading.get_ident()}
+		assert sum(event['args']['size'] for event in complete_events if event['name'] == 'scan') == len(random_data_1m) * 2
+		assert all(event['dur'] >= 0 for event in complete_events)
+
+	def test_format_chrome_trace(self):
+		trace = _export.format_chrome_trace([TraceSpan('read', 7, 1000, 3500, 100)])
+		assert trace['traceEvents'][-1] == {'name': 'read', 'cat': 'pyfastcdc', 'ph': 'X', 'ts': 1.0, 'dur': 2.5, 'pid': trace['traceEvents'][-1]['pid'], 'tid': 7, 'args': {'size': 100}}
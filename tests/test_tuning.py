@@ -0,0 +1,85 @@
+import random
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from pyfastcdc import FastCDC, tune_parameters
+
+
+@pytest.fixture
+def versioned_files(tmp_path: Path, random_data_1m: bytes) -> List[Path]:
+	rnd = random.Random(0)
+	data = bytearray(random_data_1m)
+	paths = []
+	for i in range(4):
+		for _ in range(20):
+			offset = rnd.randrange(len(data))
+			data[offset:offset] = bytes(rnd.getrandbits(8) for _ in range(100))
+		path = tmp_path / f'v{i}.bin'
+		path.write_bytes(data)
+		paths.append(path)
+	return paths
+
+
+class TestTuneParameters:
+	def test_whole_files(self, versioned_files: List[Path]):
+		report = tune_parameters(versioned_files, avg_sizes=[4096, 16384], normalized_chunkings=[0, 2])
+		total_size = sum(path.stat().st_size for path in versioned_files)
+		assert (report.sampled_bytes, report.sampled_block_count) == (total_size, len(versioned_files))
+		assert [(c.avg_size, c.min_size, c.max_size, c.normalized_chunking) for c in report.candidates] == [
+			(4096, 1024, 16384, 0), (4096, 1024, 16384, 2), (16384, 4096, 65536, 0), (16384, 4096, 65536, 2),
+		]
+
+		for candidate in report.candidates:
+			cdc = candidate.create_fastcdc(fingerprint=True)
+			chunks = [chunk for path in versioned_files for chunk in cdc.cut_file(path)]
+			assert candidate.chunk_count == len(chunks)
+			assert candidate.unique_chunk_count == len({chunk.fingerprint for chunk in chunks})
+			assert candidate.total_bytes == total_size
+			assert candidate.metadata_bytes == len(chunks) * 48
+			assert candidate.dedup_ratio > 1.5
+			assert candidate.throughput > 0
+
+	def test_pareto_front(self, versioned_files: List[Path]):
+		report = tune_parameters(versioned_files, avg_sizes=[1024, 4096, 16384, 65536], normalized_chunkings=[1])
+		assert report.recommended in report.pareto_front
+		for candidate in report.pareto_front:
+			for other in report.candidates:
+				assert not (
+					other.dedup_ratio >= candidate.dedup_ratio and other.throughput >= candidate.throughput and other.metadata_bytes <= candidate.metadata_bytes and
+					(other.dedup_ratio > candidate.dedup_ratio or other.throughput > candidate.throughput or other.metadata_bytes < candidate.metadata_bytes)
+				)
+		assert report.recommended.dedup_ratio == max(c.dedup_ratio for c in report.pareto_front)
+
+	def test_metadata_budget(self, versioned_files: List[Path]):
+		budget = 0.002
+		report = tune_parameters(versioned_files, avg_sizes=[1024, 4096, 16384, 65536], normalized_chunkings=[1], metadata_budget=budget)
+		assert report.recommended.metadata_overhead <= budget
+		assert report.recommended.dedup_ratio == max(c.dedup_ratio for c in report.pareto_front if c.metadata_overhead <= budget)
+
+		report = tune_parameters(versioned_files, avg_sizes=[1024, 4096], normalized_chunkings=[1], metadata_budget=1e-9)
+		assert report.recommended.metadata_bytes == min(c.metadata_bytes for c in report.candidates)
+
+	def test_sampling(self, versioned_files: List[Path]):
+		report = tune_parameters(versioned_files, avg_sizes=[4096], normalized_chunkings=[1], sample_size=256 * 1024, block_size=64 * 1024)
+		assert report.sampled_block_count == 4
+		assert report.sampled_bytes == 4 * 64 * 1024
+
+		# versions are sampled at the same offsets, so the duplicates are found
+		assert report.recommended.dedup_ratio > 1.5
+
+	def test_arguments(self, versioned_files: List[Path], tmp_path: Path):
+		with pytest.raises(ValueError):
+			tune_parameters(versioned_files, avg_sizes=[])
+		with pytest.raises(ValueError):
+			tune_parameters(versioned_files, sample_size=0)
+		with pytest.raises(ValueError):
+			tune_parameters(versioned_files, block_size=-1)
+		empty_path = tmp_path / 'empty.bin'
+		empty_path.write_bytes(b'')
+		with pytest.raises(ValueError):
+			tune_parameters([empty_path])
+		with pytest.raises(ValueError):
+			tune_parameters(versioned_files, normalized_chunkings=[4])
+		assert isinstance(tune_parameters(versioned_files, avg_sizes=[4096], normalized_chunkings=[1]).recommended.create_fastcdc(), FastCDC)
@@ -1,6 +1,24 @@
-from typing import Union, Type
+import io
+from typing import List, Optional, Tuple, Type, Union
 
-from pyfastcdc.cy import FastCDC as FastCDC_cy
-from pyfastcdc.py import FastCDC as FastCDC_py
+from pyfastcdc import Sketch, cy, py
 
-FastCDCType = Union[Type[FastCDC_cy], Type[FastCDC_py]]
+FastCDCType = Union[Type[cy.FastCDC], Type[py.FastCDC]]
+ChunkerStatsType = Union[Type[cy.ChunkerStats], Type[py.ChunkerStats]]
+ChunkTracerType = Union[Type[cy.ChunkTracer], Type[py.ChunkTracer]]
+
+
+def chunk_summary(chunks) -> List[Tuple[int, int, int, Optional[bytes], Optional[Sketch], bytes]]:
+	# consumes the chunks one by one, so the data of chunks from cut_stream() is still valid when copied
+	return [(chunk.offset, chunk.length, chunk.gear_hash, chunk.fingerprint, chunk.sketch, bytes(chunk.data)) for chunk in chunks]
+
+
+class ShortReadStream:
+	# a readinto()-only stream that reads at most read_sizes[i] bytes in the i-th call, and the last size in the rest
+	def __init__(self, data: bytes, *read_sizes: int):
+		self.stream = io.BytesIO(data)
+		self.read_sizes = list(read_sizes)
+
+	def readinto(self, buf: memoryview) -> int:
+		read_size = self.read_sizes.pop(0) if len(self.read_sizes) > 1 else self.read_sizes[0]
+		return self.stream.readinto(buf[:read_size])